@@ -0,0 +1,107 @@
+"""
+Adaptive testing: simulated takers on a large calibrated pool.
+
+Takers of known ability (drawn from a standard normal) answer each question
+right with the chance the 3PL model gives. Every taker sits:
+
+    linear    - the first `length` questions of the quiz, in order, as run_quiz asks them
+    adaptive  - an AdaptiveSession that stops once its standard error is as small
+                as the linear test's mean standard error
+
+and the script reports how many questions each needed, the standard error and
+the error of the ability estimate against the true ability. It also times
+building the pool and picking the next question. The adaptive test must reach
+the same precision with fewer questions, and picking must take under a
+millisecond (p99); the script exits with an error otherwise.
+
+Run from the repository root:
+    python -m benchmarks.bench_adaptive [pool size] [takers] [linear test length]
+"""
+
+import math
+import random
+import sys
+import time
+
+from quiz_adaptive import Ability, AdaptiveSession, ItemPool
+from quiz_model import Quiz
+
+
+def simulated_pool(n, rng):
+    a = [rng.lognormvariate(0.0, 0.3) for _ in range(n)]
+    b = [rng.gauss(0.0, 1.2) for _ in range(n)]
+    c = [rng.uniform(0.1, 0.25) for _ in range(n)]
+    return a, b, c
+
+
+def answer(pool, row, theta, rng):
+    return "right" if rng.random() < pool.probability(row, theta) else "wrong"
+
+
+def linear_test(pool, length, theta, rng):
+    ability = Ability()
+    for row in range(length):
+        ability.update(pool, row, answer(pool, row, theta, rng) == "right")
+    return length, ability
+
+
+def adaptive_test(pool, quiz, target_se, max_items, theta, rng):
+    session = AdaptiveSession(pool, quiz, "Sim", max_items=max_items, target_se=target_se)
+    while not session.finished:
+        session.answer(answer(pool, session.rows[session.index], theta, rng))
+    return len(session.rows), session.ability
+
+
+def report(name, results, thetas):
+    lengths = [length for length, _ in results]
+    se = sum(ability.se for _, ability in results) / len(results)
+    rmse = math.sqrt(sum((ability.theta - theta) ** 2 for (_, ability), theta in zip(results, thetas)) / len(thetas))
+    print(f"{name:9s}: {sum(lengths) / len(lengths):5.1f} questions (mean), mean standard error {se:.3f}, "
+          f"RMSE against the true ability {rmse:.3f}")
+    return sum(lengths) / len(lengths), se
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    takers = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    length = int(sys.argv[3]) if len(sys.argv) > 3 else 30
+    rng = random.Random(7)
+    a, b, c = simulated_pool(n, rng)
+    quiz = Quiz()
+    quiz.add_rows((f"Question {i}?", ["right", "wrong", "also wrong", "not this"], 0) for i in range(n))
+
+    start = time.perf_counter()
+    pool = ItemPool(a, b, c)
+    print(f"pool of {n:,} questions built in {time.perf_counter() - start:.2f} s")
+
+    # Picking the next question at random abilities, with up to 60 questions already asked
+    times = []
+    for _ in range(20_000):
+        used = set(rng.sample(range(n), rng.randrange(60)))
+        theta = rng.uniform(-3, 3)
+        start = time.perf_counter()
+        pool.select(theta, used)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    p99 = times[int(len(times) * 0.99)]
+    print(f"next question: {times[len(times) // 2] * 1e6:.1f} us median, {p99 * 1e6:.1f} us p99")
+
+    thetas = [rng.gauss(0.0, 1.0) for _ in range(takers)]
+    linear = [linear_test(pool, length, theta, rng) for theta in thetas]
+    linear_length, linear_se = report("linear", linear, thetas)
+    adaptive = [adaptive_test(pool, quiz, linear_se, 3 * length, theta, rng) for theta in thetas]
+    adaptive_length, adaptive_se = report("adaptive", adaptive, thetas)
+    print(f"same precision with {1 - adaptive_length / linear_length:.0%} fewer questions")
+
+    failures = []
+    if p99 >= 1e-3:
+        failures.append("picking the next question takes over 1 ms (p99)")
+    if adaptive_length >= linear_length or adaptive_se > linear_se * 1.05:
+        failures.append("the adaptive test is not shorter at the same precision")
+    if failures:
+        sys.exit("FAIL: " + "; ".join(failures))
+    print("adaptive testing: PASS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Item analytics benchmark: synthetic attempts of a 20-question exam drawn from a
+1,000-question pool, with takers of random ability. Measures streaming updates
+(responses/sec), the vectorized recompute over the whole history, and reading
+one item's statistics; and checks that both give the same values.
+
+Run from the repository root (the default is 10M responses, i.e. 500k attempts):
+    python -m benchmarks.bench_analytics [responses]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from quiz_analytics import ItemAnalytics
+
+POOL = 1000
+LENGTH = 20
+CHUNK = 10_000      # attempts generated at a time
+
+
+def attempts(count, seed=1):
+    """
+    Yield (responses, score) per attempt: a 2-parameter logistic model of the
+    chance of a right answer, otherwise a random wrong choice.
+    """
+    rng = np.random.default_rng(seed)
+    difficulty = rng.normal(0, 1, POOL)
+    slope = rng.uniform(0.5, 2.0, POOL)
+    for start in range(0, count, CHUNK):
+        n = min(CHUNK, count - start)
+        ability = rng.normal(0, 1, (n, 1))
+        rows = rng.integers(0, POOL, (n, LENGTH))
+        right = rng.random((n, LENGTH)) < 1 / (1 + np.exp(-slope[rows] * (ability - difficulty[rows])))
+        wrong = (rows % 4 + rng.integers(1, 4, (n, LENGTH))) % 4
+        chosen = np.where(right, rows % 4, wrong)
+        seconds = rng.gamma(4.0, 5.0, (n, LENGTH))
+        scores = right.mean(axis=1)
+        for k in range(n):
+            yield list(zip(rows[k].tolist(), chosen[k].tolist(), right[k].tolist(), seconds[k].tolist())), float(scores[k])
+
+
+def main():
+    responses = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    count = responses // LENGTH
+
+    analytics = ItemAnalytics()
+    elapsed = 0.0
+    for items, score in attempts(count):
+        start = time.perf_counter()
+        analytics.add_attempt("Pool", items, score)
+        elapsed += time.perf_counter() - start
+    print(f"streaming updates : {len(analytics) / elapsed:12,.0f} responses/s "
+          f"({count:,} attempts, {len(analytics):,} responses in {elapsed:.1f}s)")
+
+    start = time.perf_counter()
+    table = analytics.recompute("Pool")
+    elapsed = time.perf_counter() - start
+    print(f"batch recompute   : {len(analytics) / elapsed:12,.0f} responses/s ({elapsed:.2f}s)")
+
+    start = time.perf_counter()
+    for _ in range(100_000):
+        item = analytics.stats("Pool", 500)
+        item.p_value, item.discrimination, item.choice_rates, item.mean_time
+    print(f"stats lookup      : {(time.perf_counter() - start) / 100_000 * 1e6:12.2f} us per item")
+
+    worst = 0.0
+    for row in range(POOL):
+        item = analytics.stats("Pool", row)
+        worst = max(worst, abs(item.p_value - table.p_value[row]),
+                    abs(item.discrimination - table.discrimination[row]),
+                    abs(item.mean_time - table.mean_time[row]))
+    print(f"streaming vs batch: max difference {worst:.2e}")
+
+
+if __name__ == "__main__":
+    main()
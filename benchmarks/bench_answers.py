@@ -0,0 +1,149 @@
+"""
+Answer checking at large choice counts: the previous string scans against the
+correct-choice index and hashed choice lookup.
+
+    validate      Quiz_item construction (validation + storing), per item
+    set_correct   set_correct_answer to the last choice, per call
+    grade         answering a question: by text (previous scan, hashed lookup)
+                  and by index (QuizSession.answer_index), per answer
+
+Run from the repository root:
+    python -m benchmarks.bench_answers [largest choice count]
+"""
+
+import sys
+import time
+
+from question_bank import QuestionBank
+from quiz_model import Quiz, Quiz_item
+from quiz_session import QuizSession
+
+
+class LegacyQuizItem(Quiz_item):
+    """
+    The previous checks: `in` scans of the choices, then list.index.
+    """
+    __slots__ = ()
+
+    def __init__(self, question, choice, correct_answer):
+        if not isinstance(question, str) or not question.strip():
+            raise ValueError("question must be a non-empty string")
+        if not isinstance(choice, list):
+            raise ValueError("choice must be a list of strings")
+        if len(choice) < 2:
+            raise ValueError("There must be at least two choices")
+        if not all(isinstance(c, str) and c.strip() for c in choice):
+            raise ValueError("each choice must be a non-empty string")
+        if not isinstance(correct_answer, str) or not correct_answer.strip():
+            raise ValueError("correct answer must be a non-empty string")
+        if correct_answer not in choice:
+            raise ValueError("Correct answer must be one of the choices")
+        self._bank = QuestionBank()
+        self._row = self._bank.append(question, choice, choice.index(correct_answer))
+
+    def set_correct_answer(self, correct_answer):
+        if not isinstance(correct_answer, str) or not correct_answer.strip():
+            raise ValueError("correct answer must be a non-empty string")
+        choices = self._bank.choices(self._row)
+        if correct_answer not in choices:
+            raise ValueError("Correct answer must be one of the choices")
+        self._bank.set_correct_index(self._row, choices.index(correct_answer))
+
+
+def legacy_grade(session, chosen):
+    """
+    The previous QuizSession.answer: position by scanning, grading by comparing strings.
+    """
+    q = session.current_question()
+    choices = q.choices
+    position = choices.index(chosen) if chosen in choices else -1
+    session.responses.append((session.index, position, 0.0))
+    correct = chosen == q.get_correct_answer()
+    if correct:
+        session.score = session.score + 1
+    else:
+        session.missed.append((session.index + 1, q.get_question(), chosen, q.get_correct_answer()))
+    session.index = session.index + 1
+    return correct
+
+
+def per_op(fn, ops, budget=1.0):
+    best = None
+    spent = 0.0
+    while spent < budget:
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        spent = spent + elapsed
+        best = elapsed / ops if best is None else min(best, elapsed / ops)
+    return best
+
+
+def choices_of(k):
+    return [f"choice number {j}" for j in range(k)]
+
+
+def validate(k):
+    choices = choices_of(k)
+    n = max(1, 20_000 // k)
+    row = [(f"Question {i}?", choices, choices[-1]) for i in range(n)]
+
+    def run(cls):
+        return lambda: [cls(q, c, a) for q, c, a in row]
+    return run(LegacyQuizItem), run(Quiz_item), n
+
+
+def set_correct(k):
+    choices = choices_of(k)
+    legacy, item = LegacyQuizItem("Which one?", choices, choices[0]), Quiz_item("Which one?", choices, choices[0])
+    last = choices[-1]
+    calls = max(10, 20_000 // k)
+
+    def run(target):
+        def loop():
+            for _ in range(calls):
+                target.set_correct_answer(last)
+        return loop
+    return run(legacy), run(item), calls
+
+
+def grade(k):
+    choices = choices_of(k)
+    quiz = Quiz()
+    n = max(10, 20_000 // k)
+    quiz.add_rows((f"Question {i}?", choices, i % k) for i in range(n))
+    texts = [choices[(i * 7) % k] for i in range(n)]
+
+    def by_scan():
+        session = QuizSession(quiz)
+        for chosen in texts:
+            legacy_grade(session, chosen)
+
+    def by_hash():
+        session = QuizSession(quiz)
+        for chosen in texts:
+            session.answer(chosen)
+
+    def by_index():
+        session = QuizSession(quiz)
+        for i in range(n):
+            session.answer_index((i * 7) % k)
+    return by_scan, by_hash, by_index, n
+
+
+def main():
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    counts = [k for k in (4, 100, 10_000, 100_000, 1_000_000) if k <= largest]
+    print(f"{'choices':>9s} {'case':14s} {'previous':>12s} {'now':>12s}")
+    for k in counts:
+        legacy, new, ops = validate(k)
+        print(f"{k:9,} {'validate':14s} {per_op(legacy, ops) * 1e6:10.2f}us {per_op(new, ops) * 1e6:10.2f}us")
+        legacy, new, ops = set_correct(k)
+        print(f"{k:9,} {'set_correct':14s} {per_op(legacy, ops) * 1e6:10.2f}us {per_op(new, ops) * 1e6:10.2f}us")
+        by_scan, by_hash, by_index, ops = grade(k)
+        print(f"{k:9,} {'grade by text':14s} {per_op(by_scan, ops) * 1e6:10.2f}us {per_op(by_hash, ops) * 1e6:10.2f}us")
+        print(f"{k:9,} {'grade by index':14s} {'':12s} {per_op(by_index, ops) * 1e6:10.2f}us")
+
+
+if __name__ == "__main__":
+    main()
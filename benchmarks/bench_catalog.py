@@ -0,0 +1,129 @@
+"""
+Sharded catalog: read throughput by shard count, hot-quiz replicas, and data
+moved when a shard is added.
+
+    reads      client processes read pages of random quizzes through their own
+               ShardedCatalog for a fixed time, against 1, 2, 4... shard processes
+    hot quiz   the same clients all read one quiz, from its owner alone and then
+               with a replica on every other shard
+    rebalance  share of 100k quiz names that change shard when a shard is added:
+               consistent hashing against hash % N, then the copies made when a
+               shard joins a live catalog
+
+Shards and clients are processes of this machine, so reads only scale while
+there are cores for them (the script prints the core count). Adding a shard
+must move at most 1.5 times the ideal 1/N share of the names; the script exits
+with an error otherwise.
+
+Run from the repository root:
+    python -m benchmarks.bench_catalog [largest shard count] [clients] [seconds]
+"""
+
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+from quiz_catalog import HashRing, LocalShards, ShardedCatalog, _hash
+from quiz_replay import synthetic_quiz
+
+QUIZZES = 64
+QUESTIONS = 200
+PAGE = 10
+
+
+def reader(nodes, names, start, seconds, seed, results):
+    catalog = ShardedCatalog(nodes)
+    rng = random.Random(seed)
+    while time.time() < start:
+        time.sleep(0.001)
+    reads = 0
+    end = start + seconds
+    while time.time() < end:
+        for _ in range(50):
+            catalog.rows(rng.choice(names), rng.randrange(QUESTIONS - PAGE), PAGE)
+        reads = reads + 50
+    catalog.close()
+    results.put(reads)
+
+
+def read_rate(nodes, names, clients, seconds):
+    """
+    Reads per second of `clients` processes over the catalog.
+    """
+    results = multiprocessing.Queue()
+    start = time.time() + 1.0       # every client connected before the clock starts
+    processes = [multiprocessing.Process(target=reader, args=(nodes, names, start, seconds, k, results))
+                 for k in range(clients)]
+    for process in processes:
+        process.start()
+    total = sum(results.get() for _ in processes)
+    for process in processes:
+        process.join()
+    return total / seconds
+
+
+def publish(nodes):
+    catalog = ShardedCatalog(nodes)
+    for k in range(QUIZZES):
+        catalog.put(f"Quiz {k}", synthetic_quiz(QUESTIONS))
+    return catalog
+
+
+def moved_share(nodes, names):
+    before = HashRing(nodes)
+    after = HashRing(nodes + [f"10.0.0.{len(nodes) + 1}:9001"])
+    ring = sum(before.node_for(name) != after.node_for(name) for name in names) / len(names)
+    modulo = sum(_hash(name) % len(nodes) != _hash(name) % (len(nodes) + 1) for name in names) / len(names)
+    return ring, modulo
+
+
+def main():
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 2.0
+    counts = [n for n in (1, 2, 4, 8, 16) if n <= largest]
+    names = [f"Quiz {k}" for k in range(QUIZZES)]
+    print(f"{os.cpu_count()} cores, {clients} client processes, {QUIZZES} quizzes of {QUESTIONS} questions, "
+          f"pages of {PAGE} rows")
+
+    base = None
+    for n in counts:
+        with LocalShards(n) as shards:
+            publish(shards.nodes).close()
+            rate = read_rate(shards.nodes, names, clients, seconds)
+            base = base or rate
+            print(f"reads     {n:2d} shards: {rate:9,.0f} reads/s ({rate / base:.2f}x one shard)")
+
+    with LocalShards(largest) as shards:
+        catalog = publish(shards.nodes)
+        alone = read_rate(shards.nodes, names[:1], clients, seconds)
+        catalog.replicate(names[0], largest - 1)
+        replicated = read_rate(shards.nodes, names[:1], clients, seconds)
+        print(f"hot quiz  {largest:2d} shards: {alone:9,.0f} reads/s from its owner, "
+              f"{replicated:,.0f} reads/s with {largest - 1} replicas")
+
+        keys = [f"quiz {k}" for k in range(100_000)]
+        failures = []
+        for n in counts:
+            nodes = [f"10.0.0.{k + 1}:9001" for k in range(n)]
+            ring, modulo = moved_share(nodes, keys)
+            ideal = 1 / (n + 1)
+            print(f"rebalance {n:2d} -> {n + 1:2d} shards: {ring:6.1%} of the names move "
+                  f"(ideal {ideal:.1%}), {modulo:6.1%} with hash % N")
+            if ring > 1.5 * ideal:
+                failures.append(f"adding a shard to {n} moves {ring:.1%} of the names")
+        start = time.perf_counter()
+        copies = catalog.add_node(shards.start())
+        print(f"live add  {largest:2d} -> {largest + 1:2d} shards: {copies} of {QUIZZES} quizzes "
+              f"({sum(len(h) for h in catalog.placement.values())} copies) moved in "
+              f"{time.perf_counter() - start:.2f} s")
+        catalog.close()
+    if failures:
+        sys.exit("FAIL: " + "; ".join(failures))
+    print("minimal data movement: PASS")
+
+
+if __name__ == "__main__":
+    main()
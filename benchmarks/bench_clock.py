@@ -0,0 +1,141 @@
+"""
+Quiz clock under event-loop lag: a simulated Tk event loop whose after()
+callbacks fire late (a random delay on every callback, plus long stalls like a
+modal dialog now and then) drives two countdowns for the same quiz:
+
+    ticks     - the old update_timer: take one second off per callback and
+                reschedule after(1000)
+    deadline  - QuizSession on a QuizClock: recompute the time left from the
+                deadline, reschedule for when the displayed second changes
+
+For each it reports how long after the real deadline the quiz actually ended,
+how far the displayed time was from the truth, and how many callbacks and
+label redraws it took. The deadline clock must end every quiz within one
+callback's lag of its deadline; the script exits with an error otherwise.
+
+Run from the repository root:
+    python -m benchmarks.bench_clock [runs] [mean lag ms]
+"""
+
+import heapq
+import math
+import random
+import sys
+
+from quiz_model import Quiz, Quiz_item
+from quiz_session import QuizSession
+
+QUESTIONS = 10
+STALL_CHANCE = 0.02     # chance that a callback is held up by a long stall
+STALL_SECONDS = 5.0
+
+
+class LaggyLoop:
+    """
+    Simulated event loop with its own clock: a callback asked for after `ms`
+    runs after ms plus a random lag.
+    """
+    def __init__(self, rng, mean_lag):
+        self.rng = rng
+        self.mean_lag = mean_lag
+        self.time = 0.0
+        self.max_lag = 0.0
+        self._queue = []
+        self._seq = 0
+
+    def now(self):
+        return self.time
+
+    def after(self, ms, callback):
+        lag = self.rng.expovariate(1 / self.mean_lag)
+        if self.rng.random() < STALL_CHANCE:
+            lag = lag + STALL_SECONDS
+        self.max_lag = max(self.max_lag, lag)
+        self._seq = self._seq + 1
+        heapq.heappush(self._queue, (self.time + ms / 1000 + lag, self._seq, callback))
+
+    def run(self):
+        while self._queue:
+            self.time, _, callback = heapq.heappop(self._queue)
+            callback()
+
+
+def tick_countdown(loop, total):
+    state = {"remaining": total, "ended": None, "callbacks": 0, "redraws": 0, "error": 0.0, "shown": None}
+
+    def update_timer():
+        state["callbacks"] += 1
+        text = f"Time Remaining: {divmod(state['remaining'], 60)}"
+        if text != state["shown"]:
+            state["shown"] = text
+            state["redraws"] += 1
+        state["error"] = max(state["error"], abs(state["remaining"] - max(0.0, total - loop.now())))
+        if state["remaining"] <= 0:
+            state["ended"] = loop.now()
+            return
+        state["remaining"] -= 1
+        loop.after(1000, update_timer)
+
+    update_timer()
+    loop.run()
+    return state
+
+
+def deadline_countdown(loop, quiz):
+    session = QuizSession(quiz, "Sim", clock=loop.now)
+    total = session.total_time
+    state = {"ended": None, "callbacks": 0, "redraws": 0, "error": 0.0, "shown": None}
+
+    def update_timer():
+        state["callbacks"] += 1
+        session.tick()
+        text = session.time_text()
+        if text != state["shown"]:
+            state["shown"] = text
+            state["redraws"] += 1
+        state["error"] = max(state["error"], abs(session.remaining_time - max(0.0, total - loop.now())))
+        if session.timed_out:
+            state["ended"] = loop.now()
+            return
+        loop.after(max(1, math.ceil(session.until_change() * 1000)), update_timer)
+
+    update_timer()
+    loop.run()
+    return state
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    mean_lag = (float(sys.argv[2]) if len(sys.argv) > 2 else 250) / 1000
+    quiz = Quiz()
+    for i in range(QUESTIONS):
+        quiz.add_question(Quiz_item(f"Question {i}?", ["a", "b", "c", "d"], "a"))
+    total = QUESTIONS * 30
+
+    results = {"ticks": [], "deadline": []}
+    failures = 0
+    for run in range(runs):
+        loop = LaggyLoop(random.Random(run), mean_lag)
+        results["ticks"].append(tick_countdown(loop, total))
+        loop = LaggyLoop(random.Random(run), mean_lag)
+        state = deadline_countdown(loop, quiz)
+        results["deadline"].append(state)
+        # Ended no earlier than the deadline, and no later than one (the worst) callback's lag after it
+        if not total <= state["ended"] <= total + loop.max_lag + 1e-9:
+            failures = failures + 1
+
+    print(f"{runs} simulated {total}s quizzes, mean callback lag {mean_lag * 1000:.0f} ms, "
+          f"{STALL_CHANCE:.0%} of callbacks stalled {STALL_SECONDS:.0f}s")
+    for name, states in results.items():
+        overrun = sorted(s["ended"] - total for s in states)
+        print(f"{name:9s}: ended {overrun[len(overrun) // 2]:7.2f}s after the deadline (median), "
+              f"{overrun[-1]:7.2f}s worst; display off by up to {max(s['error'] for s in states):6.2f}s; "
+              f"{sum(s['callbacks'] for s in states) / runs:5.0f} callbacks, "
+              f"{sum(s['redraws'] for s in states) / runs:4.0f} redraws per quiz")
+    if failures:
+        sys.exit(f"FAIL: {failures} of {runs} quizzes did not end within one callback's lag of the deadline")
+    print("deadline accuracy: PASS")
+
+
+if __name__ == "__main__":
+    main()
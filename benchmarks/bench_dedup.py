@@ -0,0 +1,73 @@
+"""
+Near-duplicate detection benchmark: batch scan time per question at growing
+bank sizes (it should stay roughly flat, i.e. the scan scales linearly), the
+share of planted near-duplicates that are found, and the cost of streaming
+checks on add_question.
+
+Run from the repository root:
+    python -m benchmarks.bench_dedup [largest size]
+"""
+
+import random
+import sys
+import time
+
+from quiz_dedup import DuplicateDetector
+from quiz_model import Quiz, Quiz_item
+
+WORDS = [f"word{k}" for k in range(50_000)]
+
+
+def reword(text, rng):
+    """
+    A near-duplicate: one word replaced.
+    """
+    words = text.split()
+    words[rng.randrange(len(words))] = rng.choice(WORDS)
+    return " ".join(words)
+
+
+def build_quizzes(n, rng, duplicate_rate=0.01):
+    quizzes = {f"Quiz {k}": Quiz() for k in range(10)}
+    banks = [q.bank for q in quizzes.values()]
+    planted = 0
+    originals = []
+    for i in range(n):
+        if originals and rng.random() < duplicate_rate:
+            question, choices = rng.choice(originals)
+            question = reword(question, rng)
+            planted = planted + 1
+        else:
+            question = " ".join(rng.choice(WORDS) for _ in range(12)) + "?"
+            choices = [" ".join(rng.choice(WORDS) for _ in range(2)) for _ in range(4)]
+            if len(originals) < 10_000:
+                originals.append((question, choices))
+        banks[i % len(banks)].append(question, choices, 0)
+    return quizzes, planted
+
+
+def main():
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    sizes = [n for n in (10_000, 100_000, 1_000_000) if n <= largest] or [largest]
+    rng = random.Random(11)
+
+    for n in sizes:
+        quizzes, planted = build_quizzes(n, rng)
+        detector = DuplicateDetector()
+        start = time.perf_counter()
+        found = detector.scan(quizzes)
+        elapsed = time.perf_counter() - start
+        print(f"{n:>9,} questions: scan {elapsed:6.1f}s  {elapsed / n * 1e6:6.1f} us/question  "
+              f"{len(found):,} pairs for {planted:,} planted")
+
+    quiz = Quiz()
+    detector.attach("streamed", quiz)
+    start = time.perf_counter()
+    for k in range(2000):
+        question = " ".join(rng.choice(WORDS) for _ in range(12)) + "?"
+        quiz.add_question(Quiz_item(question, ["yes", "no"], "yes"))
+    print(f"add_question with streaming check: {(time.perf_counter() - start) / 2:.3f} ms per question")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Exam assembly benchmark: single exams (pure Python) and batches of printed
+variants (NumPy), from pools of growing size. The cost should not depend on
+the pool size.
+
+Run from the repository root:
+    python -m benchmarks.bench_exam [variants]
+"""
+
+import random
+import sys
+import time
+
+from quiz_exam import ExamSampler
+from quiz_model import Quiz
+
+LEVELS = ["easy", "medium", "hard"]
+
+
+def build_quiz(n, rng):
+    quiz = Quiz()
+    bank = quiz.bank
+    for i in range(n):
+        k = rng.randint(2, 5)
+        bank.append(f"Question {i}?", [f"choice {i}.{j}" for j in range(k)], rng.randrange(k), [rng.choice(LEVELS)])
+    return quiz
+
+
+def main():
+    variants = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = random.Random(12)
+    quotas = {"easy": 7, "medium": 7, "hard": 6}
+    for pool in (1_000, 100_000, 1_000_000):
+        sampler = ExamSampler(build_quiz(pool, rng), stratify=LEVELS)
+        sampler.strata()
+
+        start = time.perf_counter()
+        for seed in range(2000):
+            sampler.assemble(20, seed=seed)
+        single = 2000 / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        batch = sampler.assemble_batch(variants, seed=1, quotas=quotas)
+        quota_rate = variants / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        mixed = sampler.assemble_batch(variants, 20, seed=2, weights={"easy": 2, "medium": 1, "hard": 1})
+        mix_rate = variants / (time.perf_counter() - start)
+
+        print(f"pool {pool:>9,}: assemble {single:8,.0f}/s   batch with quotas {quota_rate:9,.0f}/s   "
+              f"weighted batch {mix_rate:9,.0f}/s   distinct {batch.distinct():,}/{mixed.distinct():,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Batch grading benchmark: Quiz.grade_batch (NumPy) against grading every answer
+sheet with a Python loop that compares choice strings, as execute_quiz and
+run_quiz's submit() do.
+
+Needs NumPy. Run from the repository root:
+    python -m benchmarks.bench_grading [takers] [questions]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from quiz_model import Quiz, Quiz_item
+
+
+def build_quiz(n):
+    quiz = Quiz()
+    for i in range(n):
+        quiz.add_question(Quiz_item(f"Question {i}?", ["A", "B", "C", "D"], "ABCD"[i % 4]))
+    return quiz
+
+
+def grade_loop(quiz, chosen):
+    """
+    The per-question loop: one string comparison per answer.
+    """
+    questions = list(quiz.questions)
+    scores = []
+    missed = []
+    for sheet in chosen.tolist():
+        score = 0
+        wrong = []
+        for i, q in enumerate(questions):
+            if sheet[i] < 0:
+                continue
+            picked = q.choices[sheet[i]]
+            if picked == q.get_correct_answer():
+                score = score + 1
+            else:
+                wrong.append((i + 1, q.get_question(), picked, q.get_correct_answer()))
+        scores.append(score)
+        missed.append(wrong)
+    return scores, missed
+
+
+def main():
+    takers = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    quiz = build_quiz(n)
+    rng = np.random.default_rng(1)
+    chosen = rng.integers(-1, 4, size=(takers, n), dtype=np.int32)
+    print(f"{takers} takers x {n} questions = {takers * n:,} answers")
+
+    start = time.perf_counter()
+    scores, _ = grade_loop(quiz, chosen)
+    loop_time = time.perf_counter() - start
+    print(f"python loop:   {loop_time:8.3f}s  ({takers * n / loop_time:,.0f} answers/sec)")
+
+    start = time.perf_counter()
+    grades = quiz.grade_batch(chosen)
+    batch_time = time.perf_counter() - start
+    print(f"grade_batch:   {batch_time:8.3f}s  ({takers * n / batch_time:,.0f} answers/sec)")
+    assert grades.scores.tolist() == scores
+
+    start = time.perf_counter()
+    for taker in range(min(takers, 1000)):
+        grades.missed(taker)
+    print(f"missed lists:  {time.perf_counter() - start:8.3f}s for {min(takers, 1000)} takers")
+    print(f"speed-up:      {loop_time / batch_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Memory benchmark: bytes per question of the columnar QuestionBank behind Quiz,
+compared with the old layout of one Quiz_item object (with its own __dict__ and
+choices list) per question.
+
+Run from the repository root:
+    python -m benchmarks.bench_memory [number_of_questions]
+"""
+
+import gc
+import sys
+import tracemalloc
+
+from quiz_model import Quiz, Quiz_item
+
+
+class LegacyQuizItem:
+    """
+    The previous Quiz_item layout: plain attributes on a per-instance __dict__.
+    """
+    def __init__(self, question, choice, correct_answer):
+        self.question = question
+        self.choices = choice
+        self.correct_answer = correct_answer
+
+
+def synthetic_rows(n):
+    """
+    Yield (question, choices, correct_answer) rows. Choice texts repeat across
+    questions the way they do in real banks (numbers, True/False, ...).
+    """
+    for i in range(n):
+        a = i % 50
+        b = (i // 50) % 50
+        choices = [str(a + b), str(a + b + 1), str(a + b - 1), str(a * b)]
+        # Every row gets fresh string objects, as it would when read from a file
+        yield f"What is {a} + {b}? (item {i})", [c + "" for c in choices], str(a + b)
+
+
+def measure(build, n):
+    """
+    Return the bytes allocated (and still alive) by build(n), divided by n.
+    """
+    gc.collect()
+    tracemalloc.start()
+    data = build(n)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return current / n
+
+
+def build_legacy(n):
+    questions = []
+    for question, choices, correct in synthetic_rows(n):
+        questions.append(LegacyQuizItem(question, choices, correct))
+    return questions
+
+
+def build_columnar(n):
+    quiz = Quiz()
+    for question, choices, correct in synthetic_rows(n):
+        quiz.add_question(Quiz_item(question, choices, correct))
+    return quiz
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    before = measure(build_legacy, n)
+    after = measure(build_columnar, n)
+    print(f"questions:            {n}")
+    print(f"list of Quiz_item:    {before:8.1f} bytes/question")
+    print(f"columnar QuestionBank:{after:8.1f} bytes/question")
+    print(f"reduction:            {100 * (1 - after / before):8.1f} %")
+
+
+if __name__ == "__main__":
+    main()
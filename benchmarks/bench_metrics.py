@@ -0,0 +1,59 @@
+"""
+Instrumentation overhead: Quiz_item construction with timing off (the default)
+and on, the cost of an empty span() block off and on, and rendering the
+Prometheus text. Run without QUIZ_METRICS set:
+    python -m benchmarks.bench_metrics [calls]
+"""
+
+import sys
+import time
+
+from quiz_metrics import Registry
+from quiz_model import Quiz_item
+
+CHOICES = ["Paris", "Rome", "Madrid", "Berlin"]
+
+
+def per_call(fn, calls):
+    start = time.perf_counter()
+    fn(calls)
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    on = Registry(enabled=True)
+    off = Registry(enabled=False)
+
+    class TimedItem(Quiz_item):
+        __slots__ = ()
+        __init__ = on.timed("item_init")(Quiz_item.__init__)
+
+    def build(cls):
+        def run(n):
+            for _ in range(n):
+                cls("Capital of France?", CHOICES, "Paris")
+        return run
+
+    def spans(registry):
+        def run(n):
+            span = registry.span
+            for _ in range(n):
+                with span("block"):
+                    pass
+        return run
+
+    plain = per_call(build(Quiz_item), calls)
+    timed = per_call(build(TimedItem), calls)
+    print(f"Quiz_item(), metrics off: {plain:8.0f} ns")
+    print(f"Quiz_item(), metrics on : {timed:8.0f} ns (+{timed - plain:.0f} ns)")
+    print(f"empty span, metrics off : {per_call(spans(off), calls):8.0f} ns")
+    print(f"empty span, metrics on  : {per_call(spans(on), calls):8.0f} ns")
+    start = time.perf_counter()
+    text = on.render()
+    print(f"render                  : {(time.perf_counter() - start) * 1e6:8.0f} us ({len(text)} bytes)")
+    print(on.summary())
+
+
+if __name__ == "__main__":
+    main()
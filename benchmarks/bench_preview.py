@@ -0,0 +1,65 @@
+"""
+Preview benchmark: time to first paint of a quiz preview.
+
+    full string - build every line of the quiz and join them, as the old
+                  preview did before anything could be shown
+    virtualized - PreviewLines renders only the lines of the first screen
+
+Also times a repeated show() of an unchanged quiz (served from the cache).
+
+Run from the repository root:
+    python -m benchmarks.bench_preview [sizes...]
+"""
+
+import sys
+import time
+
+from quiz_model import Quiz, Quiz_item
+from quiz_preview import PreviewLines
+
+SCREEN_LINES = 40
+
+
+def build_quiz(n):
+    quiz = Quiz()
+    for i in range(n):
+        quiz.add_question(Quiz_item(f"Question number {i}?", ["Alpha", "Beta", "Gamma", "Delta"], "Beta"))
+    return quiz
+
+
+def full_string(quiz):
+    lines = []
+    i = 1
+    for q in quiz.questions:
+        lines.append(f"{i}. {q.get_question()}")
+        j = 1
+        for c in q.choices:
+            lines.append(f"{j}) {c}")
+            j = j + 1
+        lines.append(f"Correct: {q.get_correct_answer()}")
+        i = i + 1
+    return "\n".join(lines)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000]
+    for n in sizes:
+        quiz = build_quiz(n)
+        full_ms, text = timed(lambda: full_string(quiz))
+        lines = PreviewLines(quiz)
+        first_ms, screen = timed(lambda: lines.window(0, SCREEN_LINES))
+        assert screen == text.split("\n")[:SCREEN_LINES]
+        middle_ms, _ = timed(lambda: lines.window(len(lines) // 2, SCREEN_LINES))
+        again_ms, _ = timed(lambda: lines.window(0, SCREEN_LINES))
+        print(f"{n:>8} questions  full string {full_ms:9.2f} ms   first paint {first_ms:6.3f} ms   "
+              f"jump to middle {middle_ms:6.3f} ms   repeat show {again_ms:6.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
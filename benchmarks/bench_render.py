@@ -0,0 +1,162 @@
+"""
+Render cache: text built for repeated previews and sessions of the same quiz.
+
+    uncached  - every line and label built again on every use, as before
+    cached    - quiz_render: built once per question, dropped when it is edited
+
+Scenarios (1% of the questions are edited between passes, so invalidation is
+part of the measurement):
+    preview   - the preview scrolled through the whole quiz a screen at a time,
+                pass after pass (uncached: PreviewLines rendering every line it shows)
+    sessions  - takers one after the other, each shown every question's
+                option labels, then the results asked for twice
+
+For each it reports the time of a pass and the strings built per pass, each one
+a fresh allocation, with their total size. Every cached string is checked
+against a fresh rendering; the script exits with an error if one is stale.
+
+Run from the repository root:
+    python -m benchmarks.bench_render [number_of_questions] [passes]
+
+Quizzes larger than the cache (quiz_render.CACHE_SIZE questions) are rendered
+again on every full pass, as the least recently used questions are evicted.
+"""
+
+import sys
+import time
+
+import quiz_render
+
+from quiz_model import Quiz
+from quiz_preview import PreviewLines
+from quiz_render import option_labels
+from quiz_session import QuizSession
+
+SCREEN = 40     # preview lines on one screen
+
+
+def build_quiz(n):
+    quiz = Quiz()
+    quiz.add_rows((f"Question {i}?", [f"choice {i}.{k}" for k in range(4)], i % 4) for i in range(n))
+    return quiz
+
+
+def fresh_preview(bank, row):
+    lines = [f"{row + 1}. {bank.question(row)}"]
+    lines.extend(f"{j + 1}) {choice}" for j, choice in enumerate(bank.choices(row)))
+    lines.append(f"Correct: {bank.correct_answer(row)}")
+    return lines
+
+
+class Built:
+    """
+    Counts the strings a rendering function builds.
+    """
+    strings = 0
+    size = 0
+
+    @classmethod
+    def count(cls, rendered):
+        for text in rendered:
+            if isinstance(text, tuple):     # (label, value): the value is the choice's index
+                text = text[0]
+            cls.strings = cls.strings + 1
+            cls.size = cls.size + sys.getsizeof(text)
+        return rendered
+
+    @classmethod
+    def counting(cls, render):
+        return lambda *args: cls.count(render(*args))
+
+
+class UncachedPreview(PreviewLines):
+    """
+    PreviewLines without the cache: every line found and rendered when it is shown.
+    """
+    def window(self, first, count):
+        return [self[line] for line in range(max(first, 0), min(first + count, len(self)))]
+
+    def __getitem__(self, line):
+        row, part = self.locate(line)
+        bank = self.quiz.bank
+        if part == 0:
+            text = f"{row + 1}. {bank.question(row)}"
+        elif part <= bank.choice_count(row):
+            text = f"{part}) {bank.choice(row, part - 1)}"
+        else:
+            text = f"Correct: {bank.correct_answer(row)}"
+        return Built.count((text,))[0]
+
+
+def fresh_options(item):
+    choices = item.choices
+    return [(str(j + 1) + ". " + choices[j], j) for j in range(len(choices))]
+
+
+def preview_pass(quiz, cached):
+    lines = PreviewLines(quiz) if cached else UncachedPreview(quiz)
+    for first in range(0, len(lines), SCREEN):
+        lines.window(first, SCREEN)
+
+
+def session_pass(quiz, cached, takers):
+    for _ in range(takers):
+        session = QuizSession(quiz.snapshot(), "Bench")
+        while not session.finished:
+            q = session.current_question()
+            options = option_labels(q) if cached else Built.count(fresh_options(q))
+            session.answer_index(options[session.index % len(options)][1])
+        session.result_text()
+        session.result_text()
+
+
+def run(name, quiz, cached, passes, one_pass):
+    bank = quiz.bank
+    times, strings, size = [], 0, 0
+    for k in range(passes + 1):
+        for row in range(k, len(bank), 100):        # edit 1% of the questions
+            bank.set_question(row, f"Question {row}, edited {k}?")
+        Built.strings = Built.size = 0
+        start = time.perf_counter()
+        one_pass(quiz, cached)
+        times.append(time.perf_counter() - start)
+        if k:       # the first pass fills the cache
+            strings, size = strings + Built.strings, size + Built.size
+    label = "cached" if cached else "uncached"
+    print(f"{name:9s} {label:9s}: {min(times[1:]) * 1000:9.1f} ms, {strings / passes:11,.0f} strings "
+          f"({size / passes / 1e6:6.2f} MB) built per pass")
+
+
+def check(quiz):
+    bank = quiz.bank
+    lines = PreviewLines(quiz)
+    stale = 0
+    for row in range(len(bank)):
+        item = quiz.questions[row]
+        stale += list(option_labels(item)) != fresh_options(item)
+        stale += lines.window(lines._first_line(row), 6) != fresh_preview(bank, row)
+    return stale
+
+
+def main():
+    # Count what the cache renders
+    quiz_render._preview = Built.counting(quiz_render._preview)
+    quiz_render._options = Built.counting(quiz_render._options)
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 4_000
+    passes = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    takers = max(1, 100_000 // n)
+    print(f"quiz of {n:,} questions, {passes} passes, {takers} takers per session pass")
+    for cached in (False, True):
+        quiz = build_quiz(n)
+        run("preview", quiz, cached, passes, preview_pass)
+    for cached in (False, True):
+        quiz = build_quiz(n)
+        run("sessions", quiz, cached, passes, lambda quiz, cached: session_pass(quiz, cached, takers))
+    stale = check(quiz)
+    if stale:
+        sys.exit(f"FAIL: {stale} cached renderings differ from a fresh rendering")
+    print("cache consistency: PASS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Session replay as a capacity test: synthetic exam-room load on quizzes of
+growing size, replayed as fast as possible.
+
+For every quiz size the script generates the same number of sessions (20
+questions drawn per session, starts spread over a minute), writes them to a
+replay log and replays it, reporting events per second, the p99 time of each
+kind of event and the memory high-water marks (Python heap, traced in a second
+replay, and process RSS). It also times what recording costs the quiz window
+per event. Every replayed session must end as logged; the script exits with
+an error otherwise.
+
+Run from the repository root:
+    python -m benchmarks.bench_replay [sessions] [largest quiz size]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from quiz_replay import (SessionRecorder, read_events, replay, synthetic_quiz, synthetic_sessions,
+                         write_events)
+from quiz_session import QuizSession
+
+
+def recording_cost(events=100_000):
+    """
+    Seconds per recorded event, ticks of one session into a fresh log.
+    """
+    quiz = synthetic_quiz(20)
+    fd, path = tempfile.mkstemp(suffix=".qzr")
+    os.close(fd)
+    try:
+        recorder = SessionRecorder(path)
+        session = QuizSession(quiz, "Bench")
+        rid = recorder.start(session, "Bench")
+        start = time.perf_counter()
+        for _ in range(events):
+            recorder.tick(rid, session)
+        recorder.finish(rid, session)
+        elapsed = time.perf_counter() - start
+        recorder.close()
+    finally:
+        os.remove(path)
+    return elapsed / events
+
+
+def main():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    largest = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+    sizes = [n for n in (1_000, 100_000, 1_000_000) if n <= largest]
+    print(f"recording: {recording_cost() * 1e6:.2f} us per event")
+    print(f"{sessions:,} sessions of 20 questions per quiz size")
+    print(f"{'questions':>10s} {'events':>10s} {'events/s':>10s} {'shown p99':>10s} {'answer p99':>11s} "
+          f"{'tick p99':>9s} {'heap peak':>10s} {'RSS peak':>9s}")
+    failures = []
+    fd, path = tempfile.mkstemp(suffix=".qzr")
+    os.close(fd)
+    try:
+        for n in sizes:
+            quiz = synthetic_quiz(n)
+            write_events(path, synthetic_sessions(quiz, "Load", sessions, seed=n))
+            report = replay(read_events(path), {"Load": quiz})
+            traced = replay(read_events(path), {"Load": quiz}, trace_memory=True)
+            print(f"{n:10,} {report.events:10,} {report.events / report.elapsed:10,.0f} "
+                  f"{report.percentile('shown', 0.99) * 1e6:8.1f}us {report.percentile('answer', 0.99) * 1e6:9.1f}us "
+                  f"{report.percentile('tick', 0.99) * 1e6:7.1f}us {traced.peak_memory / 1e6:8.1f}MB "
+                  f"{report.max_rss / 1e6 if report.max_rss else 0.0:7.1f}MB")
+            if report.mismatches or traced.mismatches:
+                failures.append(f"{len(report.mismatches) + len(traced.mismatches)} sessions did not end "
+                                f"as logged at {n:,} questions")
+    finally:
+        os.remove(path)
+    if failures:
+        sys.exit("FAIL: " + "; ".join(failures))
+    print("replay matches the log: PASS")
+
+
+if __name__ == "__main__":
+    main()
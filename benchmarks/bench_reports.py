@@ -0,0 +1,68 @@
+"""
+Report generation benchmark: result summaries for every taker of several
+quizzes, built serially (grade_batch + result_text per taker, one file) and
+with generate_reports on 1, 2, 4, ... worker processes.
+
+Near-linear scaling needs as many free cores as workers; the core count is
+printed with the results.
+
+Run from the repository root:
+    python -m benchmarks.bench_reports [takers per quiz]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from quiz_model import Quiz, Quiz_item
+from quiz_reports import generate_reports
+
+QUIZZES = 5
+QUESTIONS = 100
+
+
+def build(takers):
+    rng = np.random.default_rng(1)
+    quizzes = {}
+    answers = {}
+    for k in range(QUIZZES):
+        quiz = Quiz()
+        for i in range(QUESTIONS):
+            choices = [f"Quiz {k} question {i} choice {c}" for c in range(4)]
+            quiz.add_question(Quiz_item(f"Quiz {k}, question {i}: which one is right?", choices, choices[i % 4]))
+        name = f"Quiz {k}"
+        quizzes[name] = quiz
+        right = np.arange(QUESTIONS) % 4
+        chosen = np.where(rng.random((takers, QUESTIONS)) < 0.7, right, rng.integers(0, 4, (takers, QUESTIONS)))
+        answers[name] = (None, chosen)
+    return quizzes, answers
+
+
+def serial(quizzes, answers, out_dir):
+    start = time.perf_counter()
+    count = 0
+    with open(os.path.join(out_dir, "serial.txt"), "w", encoding="utf-8") as f:
+        for name, (_, chosen) in answers.items():
+            grades = quizzes[name].grade_batch(chosen)
+            for taker in range(len(grades)):
+                f.write(f"Taker: {taker + 1}\nQuiz: {name}\n{grades.result_text(taker)}\n\n")
+                count = count + 1
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    takers = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    quizzes, answers = build(takers)
+    out_dir = tempfile.mkdtemp()
+    print(f"{QUIZZES * takers:,} takers of {QUIZZES} quizzes x {QUESTIONS} questions, {os.cpu_count()} cores")
+    print(f"serial           : {serial(quizzes, answers, out_dir):10,.0f} reports/s")
+    for processes in sorted({1, 2, 4, os.cpu_count() or 1}):
+        summary = generate_reports(quizzes, answers, out_dir, processes=processes)
+        print(f"{processes:2d} processes     : {summary.reports_per_sec:10,.0f} reports/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Search index benchmark: build time, query latency (keyword, prefix and tag
+queries), incremental updates, and save/load time compared with a rebuild.
+
+Run from the repository root:
+    python -m benchmarks.bench_search [questions]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from quiz_index import SearchIndex
+from quiz_model import Quiz
+
+WORDS = [f"w{k}" for k in range(20_000)]
+TAGS = ["algebra", "geometry", "history", "biology", "chemistry", "physics", "easy", "hard"]
+
+
+def build_quizzes(n, rng):
+    quizzes = {f"Quiz {k}": Quiz() for k in range(10)}
+    banks = [q.bank for q in quizzes.values()]
+    for i in range(n):
+        # Zipf-like word choice: a few common words, a long tail of rare ones
+        words = [WORDS[min(int(rng.paretovariate(1.1)) - 1, len(WORDS) - 1)] for _ in range(8)]
+        choices = [" ".join(rng.choice(WORDS) for _ in range(2)) for _ in range(4)]
+        banks[i % len(banks)].append(" ".join(words) + "?", choices, 0, [rng.choice(TAGS)])
+    return quizzes
+
+
+def latency(index, query, runs=200):
+    start = time.perf_counter()
+    for _ in range(runs):
+        hits = index.search(query)
+    return (time.perf_counter() - start) / runs * 1000, len(hits)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(5)
+    quizzes = build_quizzes(n, rng)
+
+    start = time.perf_counter()
+    index = SearchIndex()
+    index.attach_all(quizzes)
+    print(f"indexed {n:,} questions in {time.perf_counter() - start:.1f}s ({len(index._terms):,} words)")
+
+    for query in ["w5 w17", "w1234", "w12 w3", "w99", "#hard w2", "#algebra"]:
+        ms, hits = latency(index, query)
+        print(f"query {query!r:14} {ms:7.3f} ms  ({hits} hits)")
+
+    item = next(iter(quizzes.values())).questions[0]
+    start = time.perf_counter()
+    for k in range(1000):
+        item.set_question(f"edited question {k} w{k}")
+    print(f"set_question + reindex: {(time.perf_counter() - start):.3f} ms per edit")
+
+    path = os.path.join(tempfile.mkdtemp(), "search.idx")
+    start = time.perf_counter()
+    index.save(path)
+    print(f"save: {time.perf_counter() - start:.2f}s ({os.path.getsize(path) / 1e6:.0f} MB)")
+    start = time.perf_counter()
+    loaded = SearchIndex.load(path)
+    loaded.attach_all(quizzes)
+    print(f"load + attach: {time.perf_counter() - start:.2f}s")
+    assert loaded.search("w5 w17") == index.search("w5 w17")
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
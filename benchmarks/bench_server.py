@@ -0,0 +1,105 @@
+"""
+Load test for quiz_server: many concurrent sessions over keep-alive HTTP.
+
+Each client connection starts several sessions up front (so that
+clients x sessions_per_client sessions are live at the same time), then answers
+their questions round-robin and fetches the results. Reports completed
+sessions/sec and answer latency percentiles.
+
+Run from the repository root:
+    python -m benchmarks.bench_server [clients] [sessions_per_client] [questions]
+"""
+
+import asyncio
+import json
+import random
+import sys
+import time
+
+from quiz_model import Quiz, Quiz_item
+from quiz_server import QuizServer
+
+
+def build_quiz(n):
+    quiz = Quiz()
+    for i in range(n):
+        quiz.add_question(Quiz_item(f"Question {i}?", ["A", "B", "C", "D"], "ABCD"[i % 4]))
+    return quiz
+
+
+class Client:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def request(self, method, path, body=None):
+        payload = json.dumps(body).encode() if body is not None else b""
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: x\r\nContent-Length: {len(payload)}\r\n\r\n".encode() + payload)
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        length = 0
+        for line in head.split(b"\r\n"):
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":", 1)[1])
+        data = json.loads(await self.reader.readexactly(length))
+        status = int(head.split(b" ", 2)[1])
+        if status >= 400:
+            raise RuntimeError(f"{method} {path}: {status} {data}")
+        return data
+
+
+async def run_client(port, sessions_per_client, latencies, rng):
+    client = Client(*await asyncio.open_connection("127.0.0.1", port))
+    ids = []
+    for _ in range(sessions_per_client):
+        ids.append((await client.request("POST", "/sessions", {"quiz": "bench"}))["session"])
+    live = list(ids)
+    while live:
+        still = []
+        for session_id in live:
+            start = time.perf_counter()
+            data = await client.request("POST", f"/sessions/{session_id}/answer", {"choice": rng.randint(1, 4)})
+            latencies.append(time.perf_counter() - start)
+            if not data["finished"]:
+                still.append(session_id)
+        live = still
+    for session_id in ids:
+        await client.request("GET", f"/sessions/{session_id}/results")
+    client.writer.close()
+    return len(ids)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+async def main_async(clients, sessions_per_client, questions):
+    server = QuizServer({"bench": build_quiz(questions)})
+    srv = await server.start("127.0.0.1", 0)
+    port = srv.sockets[0].getsockname()[1]
+    latencies = []
+    rng = random.Random(1)
+    start = time.perf_counter()
+    done = await asyncio.gather(*[run_client(port, sessions_per_client, latencies, rng) for _ in range(clients)])
+    elapsed = time.perf_counter() - start
+    srv.close()
+    await srv.wait_closed()
+
+    sessions = sum(done)
+    print(f"concurrent sessions: {clients * sessions_per_client} ({clients} connections)")
+    print(f"questions per quiz:  {questions}")
+    print(f"sessions/sec:        {sessions / elapsed:,.0f}")
+    print(f"answers/sec:         {len(latencies) / elapsed:,.0f}")
+    print(f"answer latency p50:  {percentile(latencies, 50) * 1000:.2f} ms")
+    print(f"answer latency p99:  {percentile(latencies, 99) * 1000:.2f} ms")
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    sessions_per_client = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    questions = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    asyncio.run(main_async(clients, sessions_per_client, questions))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+SQLite backend benchmark: bulk import with batched inserts versus one commit per
+question, opening a large quiz lazily versus loading it whole, streaming every
+question through the cursor, and random reads from concurrent threads with one
+versus several pooled connections.
+
+Run from the repository root:
+    python -m benchmarks.bench_sqlite [questions]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from quiz_model import Quiz_item
+from quiz_sqlite import SQLiteRepository
+
+
+def rows(n):
+    for i in range(n):
+        yield f"Question {i}: which choice is right?", [f"choice {i}.{k}" for k in range(4)], i % 4
+
+
+def random_reads(path, pool_size, threads=8, reads=2000):
+    repo = SQLiteRepository(path, pool_size=pool_size, page_size=16, cached_pages=1)
+    quiz = repo.quiz("Bench")
+    n = len(quiz.questions)
+
+    def reader(seed):
+        rng = random.Random(seed)
+        for _ in range(reads):
+            quiz.questions[rng.randrange(n)].get_question()
+
+    workers = [threading.Thread(target=reader, args=(k,)) for k in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    repo.close()
+    return threads * reads / elapsed
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    path = os.path.join(tempfile.mkdtemp(), "quizzes.db")
+
+    repo = SQLiteRepository(path)
+    repo.create_quiz("Bench")
+    start = time.perf_counter()
+    repo.add_items("Bench", rows(n))
+    print(f"batched import     : {n / (time.perf_counter() - start):10,.0f} questions/s")
+
+    quiz = repo.create_quiz("One by one")
+    start = time.perf_counter()
+    for question, choices, correct in rows(2000):
+        quiz.add_question(Quiz_item(question, choices, choices[correct]))
+    print(f"add_question       : {2000 / (time.perf_counter() - start):10,.0f} questions/s (a commit each)")
+    repo.close()
+
+    start = time.perf_counter()
+    repo = SQLiteRepository(path)
+    quiz = repo.quiz("Bench")
+    quiz.questions[n // 2].get_question()
+    print(f"open + one question: {(time.perf_counter() - start) * 1000:10.2f} ms")
+    start = time.perf_counter()
+    count = sum(1 for _ in quiz.questions)
+    print(f"cursor iteration   : {count / (time.perf_counter() - start):10,.0f} questions/s")
+    start = time.perf_counter()
+    quiz.bank
+    print(f"full load          : {(time.perf_counter() - start) * 1000:10.2f} ms")
+    repo.close()
+
+    for size in (1, 4):
+        print(f"8 readers, pool {size}: {random_reads(path, size):10,.0f} random reads/s")
+
+
+if __name__ == "__main__":
+    main()
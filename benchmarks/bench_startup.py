@@ -0,0 +1,47 @@
+"""
+Startup benchmark for headless use: how long importing the quiz engine takes on
+top of a bare interpreter start, checked against a budget. Also checks that
+Tkinter is not imported.
+
+Run from the repository root:
+    python -m benchmarks.bench_startup [runs]
+"""
+
+import statistics
+import subprocess
+import sys
+import time
+
+BUDGET_MS = 20      # import cost allowed on top of a bare interpreter start
+
+HEADLESS = ("import GUI_Based_Quiz_Management_System as m, sys; "
+            "s = m.QuizSession; assert 'tkinter' not in sys.modules, 'tkinter was imported'")
+
+
+def run(code, runs):
+    """
+    Return the median wall time (ms) of `python -c code` over several runs.
+    """
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    bare = run("pass", runs)
+    headless = run(HEADLESS, runs)
+    cost = headless - bare
+    print(f"bare interpreter:   {bare:7.1f} ms")
+    print(f"headless import:    {headless:7.1f} ms")
+    print(f"import cost:        {cost:7.1f} ms (budget {BUDGET_MS} ms)")
+    if cost > BUDGET_MS:
+        print("OVER BUDGET")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
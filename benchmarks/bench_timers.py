@@ -0,0 +1,97 @@
+"""
+CPU cost of tracking many timed sessions on one event loop.
+
+    polling - every session reschedules itself once per second and rebuilds its
+              readout, like update_timer in run_quiz
+    wheel   - all deadlines live in one TimerWheel; the loop only wakes up when
+              a deadline is due
+
+Both run the same sessions (deadlines spread over the run) for the same wall
+time and report the process CPU time used and the number of wakeups.
+
+Run from the repository root:
+    python -m benchmarks.bench_timers [sessions] [seconds]
+"""
+
+import asyncio
+import random
+import sys
+import time
+
+from timer_wheel import TimerWheel
+
+
+def deadlines(n, seconds):
+    rng = random.Random(7)
+    return [rng.uniform(0.5, seconds) for _ in range(n)]
+
+
+async def polling(offsets, seconds):
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    stats = {"wakeups": 0, "expired": 0}
+
+    def update_timer(deadline):
+        stats["wakeups"] += 1
+        remaining = max(0, int(deadline - loop.time()))
+        mins, secs = divmod(remaining, 60)
+        text = f"Time Remaining: {mins}:{secs}"
+        if loop.time() >= deadline:
+            stats["expired"] += 1
+            return
+        loop.call_later(1, update_timer, deadline)
+
+    for offset in offsets:
+        update_timer(start + offset)
+    await asyncio.sleep(seconds + 1.1)
+    return stats
+
+
+async def wheel(offsets, seconds):
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    stats = {"wakeups": 0, "expired": 0}
+    timers = TimerWheel(0.05, start=start)
+    wakeup = {"handle": None}
+
+    def expire():
+        stats["expired"] += 1
+
+    def run_timers():
+        stats["wakeups"] += 1
+        wakeup["handle"] = None
+        timers.advance(loop.time())
+        arm()
+
+    def arm():
+        when = timers.next_wakeup()
+        if when is not None and wakeup["handle"] is None:
+            wakeup["handle"] = loop.call_at(when, run_timers)
+
+    for offset in offsets:
+        timers.schedule(start + offset, expire)
+    arm()
+    await asyncio.sleep(seconds + 1.1)
+    return stats
+
+
+def run(name, strategy, offsets, seconds):
+    cpu = time.process_time()
+    stats = asyncio.run(strategy(offsets, seconds))
+    cpu = time.process_time() - cpu
+    print(f"{name:8s} cpu {cpu:6.3f}s  wakeups {stats['wakeups']:8d}  expired {stats['expired']}")
+    return cpu
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    offsets = deadlines(n, seconds)
+    print(f"{n} timed sessions, deadlines over {seconds:.0f}s")
+    before = run("polling", polling, offsets, seconds)
+    after = run("wheel", wheel, offsets, seconds)
+    print(f"CPU reduction: {before / max(after, 1e-9):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Write-ahead log benchmark: durable events per second when every writer waits
+for its event to reach the disk, with an fsync per event versus group commit,
+then the rate of logged answers through a Journal and the time to recover them.
+
+Run from the repository root:
+    python -m benchmarks.bench_wal [writers] [seconds]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from quiz_model import Quiz_item
+from quiz_session import QuizSession
+from quiz_wal import Journal, WriteAheadLog
+
+
+class FsyncPerEvent:
+    """
+    The naive way: every append writes and fsyncs its own event.
+    """
+    def __init__(self, path):
+        self._file = open(path, "ab")
+        self._lock = threading.Lock()
+        self.commits = 0
+
+    def append(self, event, wait=True):
+        data = json.dumps(event).encode("utf-8") + b"\n"
+        with self._lock:
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.commits = self.commits + 1
+
+    def close(self):
+        self._file.close()
+
+
+def durable_rate(log, path, writers, seconds):
+    stop = time.perf_counter() + seconds
+    counts = [0] * writers
+
+    def writer(k):
+        n = 0
+        while time.perf_counter() < stop:
+            log.append(["answer", f"session-{k}", "Paris", 120], wait=True)
+            n = n + 1
+        counts[k] = n
+
+    threads = [threading.Thread(target=writer, args=(k,)) for k in range(writers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    commits = log.commits
+    log.close()
+    os.remove(path)
+    return sum(counts) / elapsed, sum(counts) / max(commits, 1)
+
+
+def main():
+    writers = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 3
+    folder = tempfile.mkdtemp()
+    path = os.path.join(folder, "bench.wal")
+
+    rate, _ = durable_rate(FsyncPerEvent(path), path, writers, seconds)
+    print(f"fsync per event : {rate:10,.0f} durable events/s ({writers} writers)")
+    for delay in (0, 0.001):
+        rate, per_commit = durable_rate(WriteAheadLog(path, commit_delay=delay), path, writers, seconds)
+        print(f"group commit    : {rate:10,.0f} durable events/s ({per_commit:.0f} events per fsync, "
+              f"commit delay {delay * 1000:g} ms)")
+
+    # Answers through the journal, without waiting on each one (the GUI's case)
+    journal = Journal(os.path.join(folder, "quizzes.qzs"), snapshot_every=10 ** 9)
+    quiz = journal.create_quiz("Bench")
+    for k in range(100):
+        quiz.add_question(Quiz_item(f"Question {k}?", ["Paris", "Rome"], "Paris"))
+    n = 0
+    start = time.perf_counter()
+    while n < 200_000:
+        sid = journal.start_session(QuizSession(quiz, "Bench"), "Bench")
+        for _ in range(100):
+            journal.answer(sid, 0)          # "Paris", by index as the GUI logs it
+        journal.end_session(sid)
+        n = n + 102
+    journal.sync()
+    elapsed = time.perf_counter() - start
+    print(f"journal answers : {n / elapsed:10,.0f} events/s logged and on disk")
+
+    # Recover with half the sessions left in flight
+    for _ in range(1000):
+        sid = journal.start_session(QuizSession(quiz, "Bench"), "Bench")
+        for _ in range(50):
+            journal.answer(sid, 1)          # "Rome"
+    journal.sync()
+    journal.log.close()
+    journal.store.close()
+    start = time.perf_counter()
+    recovered = Journal(os.path.join(folder, "quizzes.qzs"))
+    print(f"recovery        : {recovered.recovered_events:,} events, {len(recovered.sessions)} sessions "
+          f"in flight, {time.perf_counter() - start:.2f}s")
+    start = time.perf_counter()
+    recovered.close()
+    print(f"snapshot        : {time.perf_counter() - start:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+Benchmark suite for the core paths, at bank sizes from 10 to 1M questions,
+compared against a stored baseline so regressions are caught:
+
+    item_init           Quiz_item construction and validation, per question
+    set_correct_answer  set_correct_answer on one question with `size` choices
+                        (the lookup of the answer among them), per call
+    set_choices         set_choices on every question of a quiz, per call
+    add_question        Quiz.add_question into a growing quiz, per question
+    display_questions   Quiz.display_questions (output discarded), per question
+    execute_quiz        Quiz.execute_quiz with scripted input, per question
+    session             a QuizSession taken from start to finish, per answer
+    run_quiz_tk         run_quiz in Tk, answered through its widgets, per answer;
+                        needs a display: started under Xvfb when DISPLAY is not
+                        set and Xvfb is installed, skipped otherwise
+
+Every case is timed a few times on fresh data and the best time is kept.
+Results are compared with benchmarks/baseline.json (per case and size); a case
+more than --tolerance slower than its baseline is a regression and makes the
+run exit with status 1. Baselines are machine specific: record one with
+--save-baseline on the machine (or CI runner) that runs the comparison.
+
+Run from the repository root:
+    python -m benchmarks.suite                     # sizes 10 .. 1M
+    python -m benchmarks.suite --max-size 10000    # quick run
+    python -m benchmarks.suite --case session --case item_init
+    python -m benchmarks.suite --save-baseline
+"""
+
+import argparse
+import builtins
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+
+from quiz_model import Quiz, Quiz_item
+from quiz_session import QuizSession
+
+SIZES = (10, 1_000, 100_000, 1_000_000)
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+CASES = {}      # name -> (function(size) -> (run, operations), sizes)
+
+
+def case(name, sizes=SIZES):
+    """
+    Register a case: fn(size) prepares fresh data and returns (run, operations),
+    the function to time and how many operations one run performs.
+    """
+    def register(fn):
+        CASES[name] = (fn, sizes)
+        return fn
+    return register
+
+
+def choices_of(i, n=4):
+    return [f"choice {i}.{k}" for k in range(n)]
+
+
+def build_quiz(size):
+    quiz = Quiz()
+    quiz.add_rows((f"Question {i}?", choices_of(i), i % 4) for i in range(size))
+    return quiz
+
+
+class _Discard(io.TextIOBase):
+    def write(self, s):
+        return len(s)
+
+
+@case("item_init")
+def item_init(size):
+    rows = [(f"Question {i}?", choices_of(i), f"choice {i}.{i % 4}") for i in range(size)]
+
+    def run():
+        for question, choices, correct in rows:
+            Quiz_item(question, choices, correct)
+    return run, size
+
+
+@case("set_correct_answer")
+def set_correct_answer(size):
+    item = Quiz_item("Which one?", [f"choice {k}" for k in range(max(2, size))], "choice 0")
+    last = f"choice {max(2, size) - 1}"
+    item.choice_index(last)         # the row's lookup table is built once, not per call
+    calls = 10
+
+    def run():
+        for _ in range(calls):
+            item.set_correct_answer(last)
+    return run, calls
+
+
+@case("set_choices")
+def set_choices(size):
+    items = list(build_quiz(size).questions)
+
+    def run():
+        for item in items:
+            item.set_choices(1, "changed")
+    return run, size
+
+
+@case("add_question")
+def add_question(size):
+    items = [Quiz_item(f"Question {i}?", choices_of(i), f"choice {i}.0") for i in range(size)]
+    quiz = Quiz()
+
+    def run():
+        for item in items:
+            quiz.add_question(item)
+    return run, size
+
+
+@case("display_questions")
+def display_questions(size):
+    quiz = build_quiz(size)
+
+    def run():
+        with contextlib.redirect_stdout(_Discard()):
+            quiz.display_questions()
+    return run, size
+
+
+@case("execute_quiz")
+def execute_quiz(size):
+    quiz = build_quiz(size)
+    script = []
+    for i in range(size):
+        if i % 3 == 0:
+            script.append("9")      # out of range: asked again
+        script.append(str(i % 4 + 1))
+
+    def run():
+        real_input = builtins.input
+        answers = iter(script)
+        builtins.input = lambda prompt="": next(answers)
+        try:
+            with contextlib.redirect_stdout(_Discard()):
+                quiz.execute_quiz()
+        finally:
+            builtins.input = real_input
+    return run, size
+
+
+@case("session")
+def session(size):
+    quiz = build_quiz(size)
+    answers = [f"choice {i}.{(i * 7) % 4}" for i in range(size)]
+
+    def run():
+        s = QuizSession(quiz, "Bench")
+        for chosen in answers:
+            s.answer(chosen)
+        s.result_text()
+    return run, size
+
+
+@case("run_quiz_tk", sizes=(10, 1_000, 10_000))
+def run_quiz_tk(size):
+    import tkinter
+    import quiz_gui
+
+    quiz = build_quiz(size)
+    root = tkinter._default_root or tkinter.Tk()
+    root.withdraw()
+
+    def run():
+        show = quiz_gui.messagebox.showinfo
+        quiz_gui.messagebox.showinfo = lambda *args, **kwargs: None    # the results dialog would block
+        try:
+            with contextlib.redirect_stdout(_Discard()):
+                quiz_gui.run_quiz(quiz, "Bench")
+                win = root.winfo_children()[-1]
+                widgets = win.winfo_children()
+                next_btn = next(w for w in widgets if isinstance(w, tkinter.Button))
+                options = [w for w in widgets if isinstance(w, tkinter.Frame)][-1]
+                for _ in range(size):
+                    options.winfo_children()[0].invoke()
+                    next_btn.invoke()
+                    root.update()
+        finally:
+            quiz_gui.messagebox.showinfo = show
+    return run, size
+
+
+@contextlib.contextmanager
+def display():
+    """
+    Make sure Tk has a display: the current one, or a private Xvfb server.
+    Yields: bool: whether a display is available
+    """
+    if os.environ.get("DISPLAY"):
+        yield True
+        return
+    if shutil.which("Xvfb") is None:
+        yield False
+        return
+    server = subprocess.Popen(["Xvfb", ":97", "-screen", "0", "1024x768x24", "-nolisten", "tcp"],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.environ["DISPLAY"] = ":97"
+    time.sleep(0.5)
+    try:
+        yield server.poll() is None
+    finally:
+        del os.environ["DISPLAY"]
+        server.terminate()
+        server.wait()
+
+
+def measure(fn, size, budget=2.0, max_repeats=5):
+    """
+    Best time of a few runs, each on fresh data; fewer runs when one is slow.
+    Returns: float: seconds per operation
+    """
+    best = None
+    spent = 0.0
+    for _ in range(max_repeats):
+        run, operations = fn(size)
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        spent = spent + elapsed
+        best = elapsed / operations if best is None else min(best, elapsed / operations)
+        if spent > budget:
+            break
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark suite with baseline comparison")
+    parser.add_argument("--case", action="append", choices=sorted(CASES), help="run only these cases")
+    parser.add_argument("--max-size", type=int, default=max(SIZES))
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    results = {}
+    regressions = []
+    with display() as has_display:
+        for name in args.case or list(CASES):
+            fn, sizes = CASES[name]
+            if name == "run_quiz_tk" and not has_display:
+                print(f"{name:20s} skipped: no display (set DISPLAY or install Xvfb)")
+                continue
+            for size in sizes:
+                if size > args.max_size:
+                    continue
+                key = f"{name}@{size}"
+                seconds = measure(fn, size)
+                results[key] = seconds
+                line = f"{name:20s} {size:>9,} {seconds * 1e9:12,.0f} ns/op"
+                if key in baseline:
+                    ratio = seconds / baseline[key]
+                    line = line + f"   {ratio:5.2f}x baseline"
+                    if ratio > 1 + args.tolerance:
+                        regressions.append(key)
+                        line = line + "  REGRESSION"
+                print(line, flush=True)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "results": dict(sorted({**baseline, **results}.items()))}, f, indent=1)
+            f.write("\n")
+        print("baseline saved to " + args.baseline)
+    elif regressions:
+        sys.exit(f"{len(regressions)} regressions: " + ", ".join(regressions))
+
+
+if __name__ == "__main__":
+    main()
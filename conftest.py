@@ -0,0 +1,3 @@
+"""
+Lets the tests import the modules of the repository root, however pytest is started.
+"""
@@ -0,0 +1,243 @@
+"""
+Compact, column oriented storage for the questions of a Quiz.
+
+Instead of keeping one Python object (with its own __dict__ and choices list)
+per question, a QuestionBank keeps every question in a handful of flat arrays:
+    - every distinct string is stored once in a string table and referenced by id
+    - the choices of all questions live in one array, sliced by per-row offsets
+    - the correct answer is the index of the right choice, not a copy of its text
+    - the few questions that carry tags keep them in a sparse row -> tag ids map
+    - finding a choice by its text hashes the text to its string id, then finds
+      the id among the row's choices (through a per-row table built on first
+      use for rows with many choices), so it never compares strings
+
+Other components (e.g. the search index) can follow changes by adding a
+listener: listener(bank, row, event) is called with event "add" after a row is
+appended, and with "before" / "change" around every edit of a row's text,
+correct answer or tags.
+"""
+
+from array import array
+
+LOOKUP_MIN = 32     # rows with at least this many choices get a string id -> index table
+
+
+class QuestionBank:
+    __slots__ = ("_strings", "_string_ids", "_question", "_offsets", "_choices", "_correct", "_tags",
+                 "_lookup", "version", "listeners")
+
+    def __init__(self):
+        """
+        Initialize an empty bank.
+        Inputs:  None
+        Outputs: None
+        """
+        self._strings = []              # string table: id -> text
+        self._string_ids = {}           # reverse lookup: text -> id
+        self._question = array("I")     # string id of each row's question
+        self._offsets = array("I", [0]) # choices of row r are _choices[_offsets[r]:_offsets[r+1]]
+        self._choices = array("I")      # string ids of all choices, row after row
+        self._correct = array("I")      # index of the correct choice of each row
+        self._tags = {}                 # row -> tuple of tag string ids, only for tagged rows
+        self._lookup = {}               # row -> {choice string id: index}, for rows with many choices
+        self.version = 0                # bumped on every change, so views can tell when to re-render
+        self.listeners = []             # called as listener(bank, row, event)
+
+    def __len__(self):
+        return len(self._question)
+
+    def intern(self, text):
+        """
+        Get the id of a string, adding it to the string table if it is new.
+        Inputs: text(str): The string to store
+        Returns: int: Its id in the string table
+        """
+        sid = self._string_ids.get(text)
+        if sid is None:
+            sid = len(self._strings)
+            self._strings.append(text)
+            self._string_ids[text] = sid
+        return sid
+
+    def _notify(self, row, event):
+        for listener in self.listeners:
+            listener(self, row, event)
+
+    def append(self, question, choices, correct_index, tags=()):
+        """
+        Add a question as a new row. The inputs are assumed to be validated already.
+        Inputs: question(str): The question text
+                choices(list[str]): The choices
+                correct_index(int): Index of the correct choice
+                tags(list[str]): Optional tags
+        Returns: int: The row number of the new question
+        """
+        row = len(self._question)
+        intern = self.intern
+        self._question.append(intern(question))
+        self._choices.extend([intern(c) for c in choices])
+        self._offsets.append(len(self._choices))
+        self._correct.append(correct_index)
+        if tags:
+            self._tags[row] = tuple(intern(t) for t in tags)
+        self.version = self.version + 1
+        if self.listeners:
+            self._notify(row, "add")
+        return row
+
+    def append_row(self, other, row):
+        """
+        Copy one row of another bank into this bank.
+        Inputs: other(QuestionBank): The bank to copy from
+                row(int): The row to copy
+        Returns: int: The row number of the copy in this bank
+        """
+        return self.append(other.question(row), other.choices(row), other.correct_index(row), other.tags(row))
+
+    def question(self, row):
+        return self._strings[self._question[row]]
+
+    def set_question(self, row, question):
+        if self.listeners:
+            self._notify(row, "before")
+        self._question[row] = self.intern(question)
+        self.version = self.version + 1
+        if self.listeners:
+            self._notify(row, "change")
+
+    def choice_count(self, row):
+        return self._offsets[row + 1] - self._offsets[row]
+
+    def choice(self, row, index):
+        return self._strings[self._choices[self._offsets[row] + index]]
+
+    def choices(self, row):
+        """
+        Get the choices of a row as a new list.
+        """
+        strings = self._strings
+        start = self._offsets[row]
+        end = self._offsets[row + 1]
+        return [strings[sid] for sid in self._choices[start:end]]
+
+    def distinct_choices(self, row):
+        """
+        Number of different choice texts of a row (equal texts share a string id).
+        """
+        return len(set(self._choices[self._offsets[row]:self._offsets[row + 1]]))
+
+    def choice_index(self, row, choice):
+        """
+        Find a choice of a row by its text, in O(1) for rows with many choices.
+        Returns: int: Index of its first occurrence, -1 if it is not a choice of the row
+        """
+        sid = self._string_ids.get(choice)
+        if sid is None:
+            return -1
+        start = self._offsets[row]
+        end = self._offsets[row + 1]
+        if end - start < LOOKUP_MIN:
+            try:
+                return self._choices.index(sid, start, end) - start
+            except ValueError:
+                return -1
+        return self._table(row, start, end).get(sid, -1)
+
+    def _table(self, row, start, end):
+        """
+        The {choice string id: index} table of a row, built on first use.
+        """
+        table = self._lookup.get(row)
+        if table is None:
+            table = {}
+            for k, choice_id in enumerate(self._choices[start:end]):
+                table.setdefault(choice_id, k)
+            self._lookup[row] = table
+        return table
+
+    def set_choice(self, row, index, choice, distinct=False):
+        """
+        Replace one choice of a row.
+        Inputs: distinct(bool): Refuse a text another choice of the row already has
+        Raises: IndexError: If the row has no choice at that index
+                ValueError: If distinct and the text is another choice of the row
+        """
+        start = self._offsets[row]
+        end = self._offsets[row + 1]
+        if not 0 <= index < end - start:
+            raise IndexError("Choice index is out of range")
+        position = start + index
+        sid = self._string_ids.get(choice)
+        if sid is None:
+            sid = self.intern(choice)       # a new string cannot be one of the choices
+        elif distinct and self._choices[position] != sid:
+            if sid in (self._choices[start:end] if end - start < LOOKUP_MIN else self._table(row, start, end)):
+                raise ValueError("choices must be different from each other")
+        if self.listeners:
+            self._notify(row, "before")
+        self._lookup.pop(row, None)
+        self._choices[position] = sid
+        self.version = self.version + 1
+        if self.listeners:
+            self._notify(row, "change")
+
+    def correct_index(self, row):
+        return self._correct[row]
+
+    def set_correct_index(self, row, index):
+        if self.listeners:
+            self._notify(row, "before")
+        self._correct[row] = index
+        self.version = self.version + 1
+        if self.listeners:
+            self._notify(row, "change")
+
+    def correct_answer(self, row):
+        return self.choice(row, self._correct[row])
+
+    def tags(self, row):
+        """
+        Get the tags of a row as a new list (empty if it has none).
+        """
+        ids = self._tags.get(row)
+        if not ids:
+            return []
+        return [self._strings[sid] for sid in ids]
+
+    def tagged_rows(self):
+        """
+        The rows that have tags, in ascending order.
+        """
+        return sorted(self._tags)
+
+    def set_tags(self, row, tags):
+        if self.listeners:
+            self._notify(row, "before")
+        if tags:
+            self._tags[row] = tuple(self.intern(t) for t in tags)
+        else:
+            self._tags.pop(row, None)
+        self.version = self.version + 1
+        if self.listeners:
+            self._notify(row, "change")
+
+    def correct_indices(self):
+        """
+        The correct choice index of every row, as an array("I"). Read-only.
+        """
+        return self._correct
+
+    def choice_offsets(self):
+        """
+        Start of each row's choices in the flat choice array, plus the end of
+        the last row, as an array("I"). Read-only.
+        """
+        return self._offsets
+
+    def columns(self):
+        """
+        The bank's storage, e.g. to copy it into shared memory. Read-only.
+        Returns: tuple: (string table, question string ids, choice offsets,
+                 choice string ids, correct indices)
+        """
+        return self._strings, self._question, self._offsets, self._choices, self._correct
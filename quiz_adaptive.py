@@ -0,0 +1,300 @@
+"""
+Computerized adaptive testing with item response theory (IRT).
+
+Every question of a quiz is calibrated with the three-parameter logistic model:
+the chance that a taker of ability theta answers it right is
+
+    P(theta) = c + (1 - c) / (1 + exp(-a * (theta - b)))
+
+with a the discrimination, b the difficulty and c the chance of guessing right.
+An AdaptiveSession estimates the taker's ability after every answer (EAP: the
+mean of the posterior over a grid of abilities, with a standard normal prior;
+its standard deviation is the standard error) and asks next the question that
+tells the most about a taker of that ability, i.e. with the highest Fisher
+information at the estimate. The test stops once the standard error is small
+enough, so takers answer only as many questions as their score needs.
+
+Picking the next question never scans the pool. ItemPool precomputes, for every
+point of the ability grid, the questions with the highest information there,
+best first (a few dozen per point), and an index of the questions by the
+ability where they are most informative, for when a taker has used all of
+them. Picking costs O(number of questions asked), whatever the size of the pool.
+
+Building an ItemPool needs NumPy. Parameters come from a calibration, or
+roughly from the item statistics of past attempts (ItemPool.from_analytics).
+"""
+
+import math
+import random
+import time
+from bisect import bisect_left
+from statistics import NormalDist
+
+from quiz_clock import QuizClock
+from quiz_session import SECONDS_PER_QUESTION, QuizSession
+
+THETA_MIN = -4.0
+THETA_MAX = 4.0
+GRID_STEP = 0.1
+GRID = [THETA_MIN + k * GRID_STEP for k in range(round((THETA_MAX - THETA_MIN) / GRID_STEP) + 1)]
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("adaptive testing needs NumPy: pip install numpy") from None
+    return numpy
+
+
+def grid_index(theta):
+    """
+    The ability grid point nearest to theta.
+    """
+    k = round((theta - THETA_MIN) / GRID_STEP)
+    return min(max(k, 0), len(GRID) - 1)
+
+
+class ItemPool:
+    def __init__(self, a, b, c=None, top=64):
+        """
+        Calibrated questions, with their information tables.
+        Inputs: a, b, c(sequence of float): Discrimination, difficulty and guessing
+                    parameter of every question, by row (c is 0 for all by default)
+                top(int): Questions kept per ability grid point, best first
+        Outputs: None
+        Raises: ValueError: If the parameters have different lengths or are out of range
+        """
+        np = _numpy()
+        a = np.asarray(a, dtype=np.float64)
+        b = np.asarray(b, dtype=np.float64)
+        c = np.zeros_like(a) if c is None else np.asarray(c, dtype=np.float64)
+        if not len(a) == len(b) == len(c):
+            raise ValueError("a, b and c must have one value per question")
+        if (a <= 0).any():
+            raise ValueError("discriminations must be positive")
+        if ((c < 0) | (c >= 1)).any():
+            raise ValueError("guessing parameters must be in [0, 1)")
+        self.params = list(zip(a.tolist(), b.tolist(), c.tolist()))
+
+        # Top questions by information at every grid point, one grid row at a time
+        # to keep memory at O(pool size)
+        top = min(top, len(a))
+        tables = []
+        for theta in GRID:
+            info = self._information(np, a, b, c, theta)
+            best = np.argpartition(-info, top - 1)[:top] if top < len(a) else np.arange(len(a))
+            tables.append(best[np.argsort(-info[best], kind="stable")].tolist())
+        self.tables = tables
+
+        # Questions ordered by the ability where their information peaks
+        peak = b + np.log((1 + np.sqrt(1 + 8 * c)) / 2) / a
+        order = np.argsort(peak, kind="stable")
+        self.by_peak = order.tolist()
+        self.peaks = peak[order].tolist()
+
+    @staticmethod
+    def _information(np, a, b, c, theta):
+        p = c + (1 - c) / (1 + np.exp(-a * (theta - b)))
+        return a * a * (p - c) ** 2 * (1 - p) / ((1 - c) ** 2 * p)
+
+    def __len__(self):
+        return len(self.params)
+
+    def probability(self, row, theta):
+        """
+        Chance that a taker of ability theta answers a question right.
+        """
+        a, b, c = self.params[row]
+        return c + (1 - c) / (1 + math.exp(-a * (theta - b)))
+
+    def information(self, row, theta):
+        """
+        Fisher information of a question at ability theta.
+        """
+        a, b, c = self.params[row]
+        p = c + (1 - c) / (1 + math.exp(-a * (theta - b)))
+        return a * a * (p - c) ** 2 * (1 - p) / ((1 - c) ** 2 * p)
+
+    def select(self, theta, used, rng=None, randomesque=1):
+        """
+        The most informative question at ability theta that is not in `used`.
+        Inputs: theta(float): Current ability estimate
+                used(set): Rows already asked
+                rng(random.Random): Source of the random pick with randomesque > 1
+                randomesque(int): Pick at random among this many best questions,
+                    so the very best ones are not given to every taker
+        Returns: int: The row, or None once every question has been used
+        """
+        picked = []
+        for row in self.tables[grid_index(theta)]:
+            if row not in used:
+                picked.append(row)
+                if len(picked) == randomesque:
+                    break
+        if len(picked) < randomesque:
+            # The best questions here are used up: nearest peaks outward from theta
+            peaks, by_peak = self.peaks, self.by_peak
+            right = bisect_left(peaks, theta)
+            left = right - 1
+            while len(picked) < randomesque and (left >= 0 or right < len(peaks)):
+                if right >= len(peaks) or (left >= 0 and theta - peaks[left] <= peaks[right] - theta):
+                    row = by_peak[left]
+                    left = left - 1
+                else:
+                    row = by_peak[right]
+                    right = right + 1
+                if row not in used and row not in picked:
+                    picked.append(row)
+        if not picked:
+            return None
+        if len(picked) == 1:
+            return picked[0]
+        return (rng or random).choice(picked)
+
+    @classmethod
+    def from_analytics(cls, quiz, analytics, name, top=64):
+        """
+        Rough calibration from the item statistics of past attempts, with the
+        classical approximations a = r / sqrt(1 - r^2), b = z(1 - p) / r (r the
+        discrimination, p the p-value, z the normal quantile), scaled to the
+        logistic model. Questions without usable statistics get a = 1, b = 0.
+        Inputs: quiz(Quiz): The quiz
+                analytics(ItemAnalytics): Statistics of its past attempts
+                name(str): The quiz's name in the statistics
+        Returns: ItemPool
+        """
+        z = NormalDist().inv_cdf
+        a, b = [], []
+        for row in range(len(quiz.questions)):
+            stats = analytics.stats(name, row)
+            p = stats.p_value if stats is not None else None
+            r = stats.discrimination if stats is not None else None
+            if p is None or r is None or not 0 < p < 1:
+                a.append(1.0)
+                b.append(0.0)
+                continue
+            r = min(max(r, 0.05), 0.95)
+            a.append(1.702 * r / math.sqrt(1 - r * r))
+            b.append(min(max(z(1 - p) / r, THETA_MIN), THETA_MAX))
+        return cls(a, b, top=top)
+
+
+class Ability:
+    """
+    Posterior of a taker's ability over the grid, updated answer by answer.
+    """
+    __slots__ = ("weights", "theta", "se")
+
+    def __init__(self):
+        prior = NormalDist()
+        self.weights = [prior.pdf(theta) for theta in GRID]
+        self._summarize()
+
+    def update(self, pool, row, correct):
+        """
+        Take one answer into account.
+        Inputs: pool(ItemPool): The calibrated questions
+                row(int): The question answered
+                correct(bool): Whether it was answered right
+        """
+        a, b, c = pool.params[row]
+        weights = self.weights
+        exp = math.exp
+        for k, theta in enumerate(GRID):
+            p = c + (1 - c) / (1 + exp(-a * (theta - b)))
+            weights[k] = weights[k] * (p if correct else 1 - p)
+        self._summarize()
+
+    def _summarize(self):
+        weights = self.weights
+        total = sum(weights)
+        mean = sum(w * theta for w, theta in zip(weights, GRID)) / total
+        variance = sum(w * (theta - mean) ** 2 for w, theta in zip(weights, GRID)) / total
+        # Rescale so long tests do not underflow
+        for k in range(len(weights)):
+            weights[k] = weights[k] / total
+        self.theta = mean
+        self.se = math.sqrt(variance)
+
+
+class AdaptiveSession(QuizSession):
+    def __init__(self, pool, quiz, name="", max_items=30, min_items=5, target_se=0.3,
+                 seconds_per_question=SECONDS_PER_QUESTION, question_seconds=None, clock=time.monotonic,
+                 rng=None, randomesque=1):
+        """
+        Start an adaptive test: questions are picked one at a time from the quiz.
+        Inputs: pool(ItemPool): Calibration of every question of the quiz, by row
+                quiz(Quiz): The quiz the questions come from
+                name(str): The quiz name
+                max_items(int): Most questions asked
+                min_items(int): Fewest questions asked
+                target_se(float): Stop once the ability's standard error is this small
+                seconds_per_question(int): Time budget per question, for max_items questions
+                question_seconds(float): Optional limit for each question; a question
+                    not answered in time counts as answered wrong
+                clock(function): Monotonic clock the deadlines are kept on
+                rng(random.Random): Source of the random picks with randomesque > 1
+                randomesque(int): Pick at random among this many best questions
+        Outputs: ValueError: If the quiz has no questions or the pool does not match it
+        """
+        # Any question may be picked: load them all (DbQuiz) and take a snapshot
+        quiz.bank
+        snapshot = quiz.snapshot()
+        if len(pool) != len(snapshot):
+            raise ValueError("the item pool does not match the quiz")
+        super().__init__(snapshot, name, seconds_per_question, question_seconds, clock)
+        self.pool = pool
+        self.snapshot = snapshot
+        self.max_items = max_items
+        self.min_items = min_items
+        self.target_se = target_se
+        self.rng = rng
+        self.randomesque = randomesque
+        self.ability = Ability()
+        self.rows = []          # quiz row of every question asked
+        self._used = set()
+        self.questions = []
+        self._pick()
+        self.total_time = max_items * seconds_per_question
+        self.clock = QuizClock(self.total_time, self.now)
+
+    def _pick(self):
+        row = self.pool.select(self.ability.theta, self._used, self.rng, self.randomesque)
+        if row is None:
+            return
+        self.rows.append(row)
+        self._used.add(row)
+        self.questions.append(self.snapshot.questions[row])
+
+    def _done(self):
+        asked = len(self.rows)
+        return asked >= self.max_items or (asked >= self.min_items and self.ability.se <= self.target_se)
+
+    def _record(self, correct):
+        """
+        Update the ability with the current question's answer, and add the next
+        question unless the test is over.
+        """
+        self.ability.update(self.pool, self.rows[self.index], correct)
+        if not self._done():
+            self._pick()
+
+    def _answer(self, q, position, chosen):
+        self._record(position >= 0 and position == q.correct_index)
+        return super()._answer(q, position, chosen)
+
+    def skip(self, at=None):
+        if not self.finished and self.current_question() is not None:
+            self._record(False)
+        super().skip(at)
+
+    def is_last_question(self):
+        return len(self.rows) >= self.max_items and self.index == len(self.rows) - 1
+
+    def progress_text(self):
+        return f"Question {self.index + 1} (at most {self.max_items})"
+
+    def result_text(self):
+        return (super().result_text() +
+                f"\nAbility estimate: {self.ability.theta:+.2f} (standard error {self.ability.se:.2f})")
@@ -0,0 +1,417 @@
+"""
+Item statistics from quiz attempts.
+
+Every answered question of every attempt is one response: which quiz and row,
+the chosen choice, whether it was right, the score of the whole attempt and the
+seconds spent on the question. ItemAnalytics keeps all responses (in compact
+typed arrays) and, per question, running statistics updated as each attempt
+comes in, so reading them never rescans the history:
+
+    p_value          share of responses that were correct (the item's easiness)
+    discrimination   point-biserial correlation between getting the item right
+                     and the attempt's score (how well it separates strong and
+                     weak takers)
+    choice_rates     share of responses that picked each choice; the rates of
+                     the wrong choices are the distractor rates
+    mean_time        mean seconds spent on the question
+
+Means and variances are kept with Welford's online method. recompute() derives
+the same statistics from the stored history in one vectorized pass (needs
+NumPy), e.g. after loading a saved history.
+
+Usage:
+    python quiz_analytics.py "Quiz name" [--stats quizzes.stats]
+"""
+
+import argparse
+import math
+import os
+import pickle
+from array import array
+
+from quiz_exam import ExamItem
+from quiz_versions import SnapshotItem
+
+FORMAT = 1
+DENSE_CHOICES = 4       # choice counts go through a (rows, choices) matrix up to this many cells per response
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("recomputing statistics needs NumPy: pip install numpy") from None
+    return numpy
+
+
+class ItemStats:
+    """
+    Running statistics of one question. Values that are not defined yet
+    (no responses, or everyone right or wrong) are None.
+    """
+    __slots__ = ("count", "correct", "score_mean", "score_m2", "correct_score_mean",
+                 "timed", "time_mean", "time_m2", "choice_counts")
+
+    def __init__(self):
+        self.count = 0                  # responses
+        self.correct = 0                # correct responses
+        self.score_mean = 0.0           # mean attempt score of the responses (Welford)
+        self.score_m2 = 0.0             # sum of squared deviations of the attempt scores
+        self.correct_score_mean = 0.0   # mean attempt score of the correct responses
+        self.timed = 0                  # responses with a known time
+        self.time_mean = 0.0
+        self.time_m2 = 0.0
+        self.choice_counts = []         # responses per choice index
+
+    def update(self, chosen, correct, score, seconds=-1.0):
+        """
+        Add one response.
+        Inputs: chosen(int): Index of the chosen choice in the quiz (-1 if unknown)
+                correct(bool): Whether the answer was right
+                score(float): Score of the attempt, 0 to 1
+                seconds(float): Time spent on the question, negative if unknown
+        """
+        self.count = n = self.count + 1
+        delta = score - self.score_mean
+        self.score_mean = self.score_mean + delta / n
+        self.score_m2 = self.score_m2 + delta * (score - self.score_mean)
+        if correct:
+            self.correct = self.correct + 1
+            self.correct_score_mean = self.correct_score_mean + (score - self.correct_score_mean) / self.correct
+        if chosen >= 0:
+            counts = self.choice_counts
+            if chosen >= len(counts):
+                counts.extend([0] * (chosen + 1 - len(counts)))
+            counts[chosen] = counts[chosen] + 1
+        if seconds >= 0:
+            self.timed = t = self.timed + 1
+            delta = seconds - self.time_mean
+            self.time_mean = self.time_mean + delta / t
+            self.time_m2 = self.time_m2 + delta * (seconds - self.time_mean)
+
+    @property
+    def p_value(self):
+        return self.correct / self.count if self.count else None
+
+    @property
+    def discrimination(self):
+        """
+        Point-biserial correlation: (M1 - M) / sd * sqrt(p / q), with M1 the
+        mean score of the takers who got the item right and M, sd over all takers.
+        """
+        n = self.count
+        if not 0 < self.correct < n or self.score_m2 <= 0:
+            return None
+        p = self.correct / n
+        sd = math.sqrt(self.score_m2 / n)
+        return (self.correct_score_mean - self.score_mean) / sd * math.sqrt(p / (1 - p))
+
+    @property
+    def choice_rates(self):
+        return [c / self.count for c in self.choice_counts] if self.count else []
+
+    @property
+    def mean_time(self):
+        return self.time_mean if self.timed else None
+
+    @property
+    def time_sd(self):
+        return math.sqrt(self.time_m2 / self.timed) if self.timed else None
+
+
+class StatsTable:
+    """
+    Statistics of every row of a quiz, as NumPy arrays indexed by row (NaN where
+    not defined).
+    Attributes: count(ndarray[int]): Responses per row
+                p_value(ndarray[float])
+                discrimination(ndarray[float])
+                choice_rates(list[ndarray[float]]): Share of responses per choice of each
+                    row, up to the highest choice picked (as ItemStats.choice_rates)
+                mean_time(ndarray[float])
+                time_sd(ndarray[float])
+    """
+    def __init__(self, count, p_value, discrimination, choice_rates, mean_time, time_sd):
+        self.count = count
+        self.p_value = p_value
+        self.discrimination = discrimination
+        self.choice_rates = choice_rates
+        self.mean_time = mean_time
+        self.time_sd = time_sd
+
+    def __len__(self):
+        return len(self.count)
+
+
+class ItemAnalytics:
+    def __init__(self):
+        self._stats = {}                # (quiz name, row) -> ItemStats
+        self._names = []                # quiz id -> name
+        self._ids = {}                  # name -> quiz id
+        # The history: one entry per response
+        self._quiz = array("I")
+        self._row = array("I")
+        self._chosen = array("i")       # choice index, -1 if unanswered (a question may have over 32k choices)
+        self._correct = array("B")
+        self._score = array("f")
+        self._seconds = array("f")
+
+    def __len__(self):
+        return len(self._row)
+
+    def _quiz_id(self, name):
+        quiz_id = self._ids.get(name)
+        if quiz_id is None:
+            quiz_id = self._ids[name] = len(self._names)
+            self._names.append(name)
+        return quiz_id
+
+    # Streaming
+
+    def add_attempt(self, name, responses, score):
+        """
+        Add the responses of one attempt, updating the statistics of their questions.
+        Inputs: name(str): The quiz name
+                responses(iterable): (row, chosen index, correct, seconds) tuples, chosen
+                    -1 and seconds negative when unknown
+                score(float): Score of the attempt, 0 to 1
+        """
+        responses = list(responses)
+        stats = self._stats
+        for row, chosen, correct, seconds in responses:
+            item = stats.get((name, row))
+            if item is None:
+                item = stats[name, row] = ItemStats()
+            item.update(chosen, correct, score, seconds)
+        n = len(responses)
+        rows, chosen, correct, seconds = zip(*responses) if n else ((), (), (), ())
+        self._quiz.extend([self._quiz_id(name)] * n)
+        self._row.extend(rows)
+        self._chosen.extend(chosen)
+        self._correct.extend(correct)
+        self._score.extend([score] * n)
+        self._seconds.extend(seconds)
+
+    def add_session(self, session):
+        """
+        Add a finished QuizSession (of a quiz, of an Exam drawn from one, or an adaptive test).
+        """
+        responses = []
+        for index, position, seconds in session.responses:
+            q = session.questions[index]
+            correct = position >= 0 and position == q.correct_index
+            if isinstance(q, ExamItem):
+                # Statistics follow the question and choice in the quiz, not their place in the exam
+                row, chosen = q.row, (q.source_index(position) if position >= 0 else -1)
+            elif isinstance(q, SnapshotItem):
+                # Questions of a snapshot may be asked out of order (adaptive tests)
+                row, chosen = q.row, position
+            else:
+                row, chosen = index, position
+            responses.append((row, chosen, correct, seconds))
+        self.add_attempt(session.name, responses, session.score / session.total)
+
+    def stats(self, name, row):
+        """
+        Statistics of one question, in O(1).
+        Returns: ItemStats, or None if it has no responses
+        """
+        return self._stats.get((name, row))
+
+    def quiz_stats(self, name):
+        """
+        Returns: dict: row -> ItemStats of every answered question of a quiz
+        """
+        return {row: item for (quiz, row), item in self._stats.items() if quiz == name}
+
+    # Batch
+
+    def _moments(self, quiz_id):
+        """
+        Sufficient statistics of every row of one quiz, from the whole history.
+        """
+        np = _numpy()
+        mask = np.frombuffer(self._quiz, dtype=np.uint32) == quiz_id
+        rows = np.frombuffer(self._row, dtype=np.uint32)[mask].astype(np.intp)
+        chosen = np.frombuffer(self._chosen, dtype=np.intc)[mask].astype(np.intp)
+        correct = np.frombuffer(self._correct, dtype=np.uint8)[mask].astype(np.float64)
+        score = np.frombuffer(self._score, dtype=np.float32)[mask].astype(np.float64)
+        seconds = np.frombuffer(self._seconds, dtype=np.float32)[mask].astype(np.float64)
+        n = int(rows.max()) + 1 if len(rows) else 0
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            count = np.bincount(rows, minlength=n)
+            n_correct = np.bincount(rows, weights=correct, minlength=n)
+            score_mean = np.bincount(rows, weights=score, minlength=n) / count
+            score_m2 = np.bincount(rows, weights=(score - score_mean[rows]) ** 2, minlength=n)
+            correct_score_mean = np.bincount(rows, weights=score * correct, minlength=n) / n_correct
+
+            timed = seconds >= 0
+            timed_rows = rows[timed]
+            time_count = np.bincount(timed_rows, minlength=n)
+            time_mean = np.bincount(timed_rows, weights=seconds[timed], minlength=n) / time_count
+            time_m2 = np.bincount(timed_rows, weights=(seconds[timed] - time_mean[timed_rows]) ** 2, minlength=n)
+
+        # Responses per (row, choice) pair that was picked at least once, in row
+        # then choice order. Counted in a (rows, widest choice) matrix only while
+        # that is small next to the history: one question with very many choices
+        # would make it huge, so the pairs are then counted by sorting
+        valid = chosen >= 0
+        keys_rows, keys_chosen = rows[valid], chosen[valid]
+        width = int(keys_chosen.max()) + 1 if len(keys_chosen) else 0
+        keys = keys_rows.astype(np.int64) * width + keys_chosen
+        if n * width <= DENSE_CHOICES * len(keys) + 4096:
+            counts = np.bincount(keys, minlength=n * width)
+            keys = np.flatnonzero(counts)
+            counts = counts[keys]
+        else:
+            keys, counts = np.unique(keys, return_counts=True)
+        choice_counts = (keys // max(width, 1), keys % max(width, 1), counts)
+        return (count, n_correct.astype(np.int64), score_mean, score_m2, correct_score_mean,
+                time_count, time_mean, time_m2, choice_counts)
+
+    @staticmethod
+    def _choice_lists(n, choice_counts):
+        """
+        Per-row choice counts from (row, choice, count) pairs: for each of n rows,
+        the counts of choices 0 to the highest one picked (as ItemStats keeps them).
+        Returns: list[list[int]]
+        """
+        rows, chosen, counts = (a.tolist() for a in choice_counts)
+        lists = [[] for _ in range(n)]
+        for row, k, c in zip(rows, chosen, counts):
+            counts_of_row = lists[row]
+            counts_of_row.extend([0] * (k + 1 - len(counts_of_row)))
+            counts_of_row[k] = c
+        return lists
+
+    def recompute(self, name):
+        """
+        Statistics of every row of a quiz computed from the whole history at
+        once (needs NumPy). Gives the same values as the running statistics.
+        Returns: StatsTable
+        Raises: KeyError: If the quiz has no responses
+        """
+        np = _numpy()
+        (count, n_correct, score_mean, score_m2, correct_score_mean,
+         time_count, time_mean, time_m2, choice_counts) = self._moments(self._ids[name])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            p = n_correct / count
+            discrimination = (correct_score_mean - score_mean) / np.sqrt(score_m2 / count) * np.sqrt(p / (1 - p))
+            discrimination[(n_correct == 0) | (n_correct == count) | (score_m2 <= 0)] = np.nan
+            time_sd = np.sqrt(time_m2 / time_count)
+        choice_rates = [np.array(counts, dtype=np.float64) / count[row] if counts else np.zeros(0)
+                        for row, counts in enumerate(self._choice_lists(len(count), choice_counts))]
+        return StatsTable(count, p, discrimination, choice_rates, time_mean, time_sd)
+
+    def rebuild(self):
+        """
+        Replace the running statistics by ones recomputed from the history,
+        vectorized when NumPy is available.
+        """
+        self._stats = {}
+        try:
+            _numpy()
+        except ImportError:
+            self._replay()
+            return
+        for quiz_id, name in enumerate(self._names):
+            (count, n_correct, score_mean, score_m2, correct_score_mean,
+             time_count, time_mean, time_m2, choice_counts) = self._moments(quiz_id)
+            choice_lists = self._choice_lists(len(count), choice_counts)
+            for row in range(len(count)):
+                if not count[row]:
+                    continue
+                item = self._stats[name, row] = ItemStats()
+                item.count = int(count[row])
+                item.correct = int(n_correct[row])
+                item.score_mean = float(score_mean[row])
+                item.score_m2 = float(score_m2[row])
+                item.correct_score_mean = float(correct_score_mean[row]) if item.correct else 0.0
+                item.timed = int(time_count[row])
+                item.time_mean = float(time_mean[row]) if item.timed else 0.0
+                item.time_m2 = float(time_m2[row])
+                item.choice_counts = choice_lists[row]
+
+    def _replay(self):
+        stats = self._stats
+        names = self._names
+        for quiz_id, row, chosen, correct, score, seconds in zip(self._quiz, self._row, self._chosen,
+                                                                 self._correct, self._score, self._seconds):
+            key = (names[quiz_id], row)
+            item = stats.get(key)
+            if item is None:
+                item = stats[key] = ItemStats()
+            item.update(chosen, correct, score, seconds)
+
+    # Files
+
+    def save(self, path):
+        """
+        Write the history to a file (atomically replacing an older one).
+        """
+        state = {
+            "format": FORMAT,
+            "names": self._names,
+            "quiz": self._quiz,
+            "row": self._row,
+            "chosen": self._chosen,
+            "correct": self._correct,
+            "score": self._score,
+            "seconds": self._seconds,
+        }
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a history written by save() and rebuild the statistics from it.
+        """
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if state.get("format") != FORMAT:
+            raise ValueError("unsupported analytics format")
+        analytics = cls()
+        analytics._names = state["names"]
+        analytics._ids = {name: k for k, name in enumerate(analytics._names)}
+        analytics._quiz = state["quiz"]
+        analytics._row = state["row"]
+        analytics._chosen = state["chosen"]
+        if analytics._chosen.typecode != "i":
+            analytics._chosen = array("i", analytics._chosen)     # written when choices were 16-bit
+        analytics._correct = state["correct"]
+        analytics._score = state["score"]
+        analytics._seconds = state["seconds"]
+        analytics.rebuild()
+        return analytics
+
+
+def _fmt(value, spec):
+    return "-" if value is None else format(value, spec)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Item statistics of a quiz")
+    parser.add_argument("quiz")
+    parser.add_argument("--stats", default=os.environ.get("QUIZ_STATS", "quizzes.stats"))
+    args = parser.parse_args(argv)
+
+    analytics = ItemAnalytics.load(args.stats)
+    stats = analytics.quiz_stats(args.quiz)
+    if not stats:
+        parser.error("no attempts of " + args.quiz)
+    print(f"{'Q':>5} {'answers':>8} {'p':>6} {'r_pb':>6} {'time':>7}  choice rates")
+    for row in sorted(stats):
+        item = stats[row]
+        rates = " ".join(f"{r:.2f}" for r in item.choice_rates)
+        print(f"{row + 1:>5} {item.count:>8} {_fmt(item.p_value, '.2f'):>6} {_fmt(item.discrimination, '.2f'):>6} "
+              f"{_fmt(item.mean_time, '.1f'):>7}  {rates}")
+
+
+if __name__ == "__main__":
+    main()
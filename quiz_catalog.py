@@ -0,0 +1,560 @@
+"""
+Sharded quiz catalog.
+
+Quizzes are spread over several quiz server processes (shards, on one machine
+or many) by consistent hashing of the quiz name. Every shard owns many points
+of a hash ring (virtual nodes), and a quiz lives on the shard owning the first
+point at or after its name's hash. Adding or removing a shard only moves the
+quizzes whose point changes hands, about 1/N of them, instead of nearly all of
+them as with hash(name) % N.
+
+Shards are QuizServers started with writable=True: they serve sessions as
+usual, and rows of their quizzes through the catalog routes (see quiz_server).
+
+ShardedCatalog is the routing client and the admin tool:
+    - it learns where every quiz is by listing the shards (refresh()), and
+      refreshes once and retries when a shard answers that it has no such quiz
+      (e.g. the quiz was moved by another client)
+    - reads (quiz rows, session starts) of a quiz with replicas are spread
+      round-robin over its copies; replicate(name, copies) puts copies of a hot
+      quiz on the next shards of the ring for an exam peak
+    - put(), delete(), add_node(), remove_node() and rebalance() change the
+      placement; other clients see it on their next refresh
+A session stays on the shard it was started on (RemoteSession).
+
+The GUI reads its quizzes from a catalog when QUIZ_CATALOG lists the shards
+("host:port,host:port"); quizzes are published to it with:
+    python quiz_catalog.py serve --port 9001                 (one per shard)
+    python quiz_catalog.py publish 127.0.0.1:9001,127.0.0.1:9002 [--store quizzes.qzs]
+    python quiz_catalog.py status 127.0.0.1:9001,127.0.0.1:9002
+LocalShards starts shards as processes of this machine, for tests and benchmarks.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import http.client
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from bisect import bisect_left
+from urllib.parse import quote
+
+from quiz_model import Quiz
+from quiz_server import ROWS_PAGE, QuizServer
+
+VNODES = 64             # ring points per shard
+MAX_BODY = 256 * 1024 * 1024        # largest quiz a shard accepts, as JSON
+IDEMPOTENT = {"GET", "HEAD", "PUT"}     # requests that may be sent twice
+
+
+class CatalogError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    def __init__(self, nodes=(), vnodes=VNODES):
+        """
+        Consistent-hash ring of shard addresses.
+        Inputs: nodes(iterable[str]): Shard addresses ("host:port")
+                vnodes(int): Ring points per shard; more points spread the quizzes more evenly
+        Outputs: None
+        """
+        self.vnodes = vnodes
+        self._points = []       # sorted hashes
+        self._owners = []       # shard of each point
+        self.nodes = []
+        for node in nodes:
+            self.add(node)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, node):
+        return node in self.nodes
+
+    def add(self, node):
+        if node in self.nodes:
+            return
+        self.nodes.append(node)
+        points = sorted(zip(self._points, self._owners))
+        points.extend((_hash(f"{node}#{k}"), node) for k in range(self.vnodes))
+        points.sort()
+        self._points = [point for point, _ in points]
+        self._owners = [owner for _, owner in points]
+
+    def remove(self, node):
+        if node not in self.nodes:
+            return
+        self.nodes.remove(node)
+        keep = [(point, owner) for point, owner in zip(self._points, self._owners) if owner != node]
+        self._points = [point for point, _ in keep]
+        self._owners = [owner for _, owner in keep]
+
+    def nodes_for(self, name, count=1):
+        """
+        The shards of a quiz, clockwise from its hash: its owner first, then the
+        shards its replicas go to.
+        Returns: list[str]: Up to `count` different shards
+        """
+        count = min(count, len(self.nodes))
+        found = []
+        if not count:
+            return found
+        points, owners = self._points, self._owners
+        k = bisect_left(points, _hash(name))
+        for step in range(len(points)):
+            owner = owners[(k + step) % len(points)]
+            if owner not in found:
+                found.append(owner)
+                if len(found) == count:
+                    break
+        return found
+
+    def node_for(self, name):
+        """
+        The shard that owns a quiz.
+        Raises: ValueError: If the ring has no shards
+        """
+        found = self.nodes_for(name)
+        if not found:
+            raise ValueError("the catalog has no shards")
+        return found[0]
+
+
+class ShardClient:
+    """
+    Keep-alive HTTP connection to one shard.
+    """
+    def __init__(self, node, timeout=30):
+        self.node = node
+        host, port = node.rsplit(":", 1)
+        self._connection = http.client.HTTPConnection(host, int(port), timeout=timeout)
+
+    def request(self, method, path, body=None):
+        """
+        Send one request. A dropped keep-alive connection is reopened and the
+        request sent again if that is safe: always for GET, HEAD and PUT, and
+        for other methods (POST: a new session, an answer) only if the request
+        could not be sent, since the shard may have applied it and only the
+        response was lost.
+        Returns: object: The JSON response
+        Raises: CatalogError: If the shard answers with an error
+        """
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+        for attempt in (0, 1):
+            sent = False
+            try:
+                self._connection.request(method, path, payload, headers)
+                sent = True
+                response = self._connection.getresponse()
+                data = json.loads(response.read() or b"null")
+                break
+            except (ConnectionError, http.client.HTTPException):
+                self._connection.close()
+                if attempt or (sent and method not in IDEMPOTENT):
+                    raise
+        if response.status >= 400:
+            raise CatalogError(response.status, data.get("error", "") if isinstance(data, dict) else "")
+        return data
+
+    def close(self):
+        self._connection.close()
+
+
+class RemoteSession:
+    """
+    A quiz session running on a shard. Its state is the shard's JSON view of the
+    session (question, choices, index, total, remaining time, finished...). The
+    time left is counted down locally from the last state, on a monotonic clock.
+    """
+    def __init__(self, client, state, clock=time.monotonic):
+        self._client = client
+        self.node = client.node
+        self.id = state["session"]
+        self.now = clock
+        self._set(state)
+
+    def _set(self, state):
+        self.state = state
+        self.deadline = self.now() + state["remaining_time"]
+
+    @property
+    def finished(self):
+        return self.state["finished"]
+
+    @property
+    def timed_out(self):
+        return self.state["timed_out"]
+
+    @property
+    def index(self):
+        return self.state["index"]
+
+    @property
+    def total(self):
+        return self.state["total"]
+
+    @property
+    def question(self):
+        """
+        Text of the current question, None once the session is finished.
+        """
+        return self.state.get("question")
+
+    @property
+    def choices(self):
+        return self.state.get("choices", [])
+
+    def remaining(self):
+        """
+        Seconds left for the quiz, as of the last state.
+        """
+        return 0.0 if self.finished else max(0.0, self.deadline - self.now())
+
+    def refresh(self):
+        self._set(self._client.request("GET", f"/sessions/{self.id}"))
+        return self.state
+
+    def answer_index(self, position):
+        """
+        Answer the current question by the index of the chosen choice.
+        Returns: bool: True if the answer was correct
+        """
+        self._set(self._client.request("POST", f"/sessions/{self.id}/answer", {"choice": position + 1}))
+        return self.state["correct"]
+
+    def results(self):
+        return self._client.request("GET", f"/sessions/{self.id}/results")
+
+
+class ShardedCatalog:
+    def __init__(self, nodes, vnodes=VNODES):
+        """
+        Connect to the shards of a catalog and learn where its quizzes are.
+        Inputs: nodes(iterable[str]): Shard addresses ("host:port")
+                vnodes(int): Ring points per shard; every client of a catalog must use the same
+        Outputs: None
+        """
+        self.ring = HashRing(nodes, vnodes)
+        self._clients = {node: ShardClient(node) for node in self.ring.nodes}
+        self.placement = {}         # quiz name -> shards holding it, owner first
+        self._turn = itertools.count()
+        self.refresh()
+
+    def _client(self, node):
+        client = self._clients.get(node)
+        if client is None:
+            client = self._clients[node] = ShardClient(node)
+        return client
+
+    def refresh(self):
+        """
+        List every shard's quizzes to rebuild the placement.
+        """
+        placement = {}
+        for node in self.ring.nodes:
+            for name in self._client(node).request("GET", "/quizzes"):
+                placement.setdefault(name, []).append(node)
+        for name, holders in placement.items():
+            owner = self.ring.node_for(name)
+            if owner in holders and holders[0] != owner:
+                holders.remove(owner)
+                holders.insert(0, owner)
+        self.placement = placement
+
+    # Reads
+
+    def names(self):
+        return sorted(self.placement)
+
+    def _read(self, name, method, path, body=None):
+        """
+        Send a read of a quiz to one of its copies, in turn; refresh and retry
+        once if the copy is gone.
+        """
+        for attempt in (0, 1):
+            holders = self.placement.get(name) or [self.ring.node_for(name)]
+            client = self._client(holders[next(self._turn) % len(holders)])
+            try:
+                return client, client.request(method, path, body)
+            except CatalogError as e:
+                if e.status != 404 or attempt:
+                    raise
+                self.refresh()
+
+    def info(self, name):
+        """
+        Returns: dict: {"name", "questions": count}
+        """
+        return self._read(name, "GET", "/quizzes/" + quote(name, safe=""))[1]
+
+    def rows(self, name, first=0, count=ROWS_PAGE):
+        """
+        A page of a quiz's rows.
+        Returns: tuple(int, list): The quiz's number of questions and
+                 [question, choices, correct index, tags] rows
+        """
+        data = self._read(name, "GET", f"/quizzes/{quote(name, safe='')}/rows?first={first}&count={count}")[1]
+        return data["total"], data["rows"]
+
+    def iter_rows(self, name):
+        first = 0
+        while True:
+            total, rows = self.rows(name, first)
+            yield from rows
+            first = first + len(rows)
+            if not rows or first >= total:
+                return
+
+    def loader(self, name):
+        """
+        A loader for Quiz(loader=...) that fetches the quiz from the catalog on first use.
+        """
+        def load(bank):
+            for question, choices, correct, tags in self.iter_rows(name):
+                bank.append(question, choices, correct, tags)
+        return load
+
+    def quiz(self, name):
+        """
+        The quiz, read from the catalog.
+        Returns: Quiz
+        """
+        quiz = Quiz()
+        quiz.add_rows(tuple(row) for row in self.iter_rows(name))
+        return quiz
+
+    def start_session(self, name):
+        """
+        Start a session of a quiz on one of its copies.
+        Returns: RemoteSession
+        """
+        client, state = self._read(name, "POST", "/sessions", {"quiz": name})
+        return RemoteSession(client, state)
+
+    # Placement
+
+    def _copy(self, name, source, targets):
+        rows = list(self._rows_from(source, name))
+        for node in targets:
+            self._client(node).request("PUT", "/quizzes/" + quote(name, safe=""), {"rows": rows})
+
+    def _rows_from(self, node, name):
+        first = 0
+        while True:
+            data = self._client(node).request("GET", f"/quizzes/{quote(name, safe='')}/rows?first={first}")
+            yield from data["rows"]
+            first = first + len(data["rows"])
+            if not data["rows"] or first >= data["total"]:
+                return
+
+    def _drop(self, name, nodes):
+        for node in nodes:
+            try:
+                self._client(node).request("DELETE", "/quizzes/" + quote(name, safe=""))
+            except CatalogError as e:
+                if e.status != 404:
+                    raise
+
+    def put(self, name, quiz):
+        """
+        Publish a quiz (new or replaced) to its owner and its replicas.
+        Inputs: name(str): The quiz name
+                quiz(Quiz): The quiz
+        """
+        bank = quiz.bank
+        self.put_rows(name, [[bank.question(row), bank.choices(row), bank.correct_index(row), bank.tags(row)]
+                             for row in range(len(bank))])
+
+    def put_rows(self, name, rows):
+        """
+        Publish a quiz from its rows.
+        Inputs: name(str): The quiz name
+                rows(list): [question, choices, correct index, tags] rows
+        Raises: CatalogError: If a shard rejects the quiz (e.g. an invalid row)
+        """
+        copies = len(self.placement.get(name, ())) or 1
+        targets = self.ring.nodes_for(name, copies)
+        for node in targets:
+            self._client(node).request("PUT", "/quizzes/" + quote(name, safe=""), {"rows": rows})
+        self._drop(name, [node for node in self.placement.get(name, ()) if node not in targets])
+        self.placement[name] = targets
+
+    def delete(self, name):
+        self._drop(name, self.placement.pop(name, ()))
+
+    def replicate(self, name, copies):
+        """
+        Keep `copies` read replicas of a quiz besides its owner (0 to go back to
+        the owner alone), on the next shards of the ring.
+        Raises: KeyError: If there is no such quiz
+        """
+        holders = self.placement[name]
+        targets = self.ring.nodes_for(name, copies + 1)
+        missing = [node for node in targets if node not in holders]
+        if missing:
+            self._copy(name, holders[0], missing)
+        self._drop(name, [node for node in holders if node not in targets])
+        self.placement[name] = targets
+
+    def rebalance(self):
+        """
+        Move every quiz (and its replicas) to the shards the ring gives it now,
+        copying only to shards that do not have it yet.
+        Returns: int: Number of copies made
+        """
+        moved = 0
+        for name, holders in list(self.placement.items()):
+            targets = self.ring.nodes_for(name, len(holders))
+            missing = [node for node in targets if node not in holders]
+            if missing:
+                self._copy(name, holders[0], missing)
+                moved = moved + len(missing)
+            self._drop(name, [node for node in holders if node not in targets])
+            self.placement[name] = targets
+        return moved
+
+    def add_node(self, node):
+        """
+        Add a shard and move to it the quizzes it now owns (about 1/N of them).
+        Returns: int: Number of copies made
+        """
+        self.ring.add(node)
+        return self.rebalance()
+
+    def remove_node(self, node):
+        """
+        Move a shard's quizzes to the shards that own them now, then forget it.
+        Returns: int: Number of copies made
+        """
+        self.ring.remove(node)
+        moved = self.rebalance()
+        client = self._clients.pop(node, None)
+        if client is not None:
+            client.close()
+        return moved
+
+    def close(self):
+        for client in self._clients.values():
+            client.close()
+        self._clients.clear()
+
+
+# Shard processes
+
+def serve_shard(host="127.0.0.1", port=0, ready=None):
+    """
+    Run a shard: an empty, writable QuizServer. With a connection `ready`, the
+    port it listens on is sent through it once it is listening.
+    """
+    async def run():
+        server = await QuizServer({}, writable=True, max_body=MAX_BODY).start(host, port)
+        if ready is not None:
+            ready.send(server.sockets[0].getsockname()[1])
+            ready.close()
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+class LocalShards:
+    """
+    Shards running as processes of this machine.
+    """
+    def __init__(self, count=0, host="127.0.0.1"):
+        self.host = host
+        self.nodes = []
+        self._processes = {}
+        for _ in range(count):
+            self.start()
+
+    def start(self):
+        """
+        Start one more shard.
+        Returns: str: Its address
+        """
+        receive, send = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=serve_shard, args=(self.host, 0, send), daemon=True)
+        process.start()
+        send.close()
+        port = receive.recv()
+        receive.close()
+        node = f"{self.host}:{port}"
+        self.nodes.append(node)
+        self._processes[node] = process
+        return node
+
+    def stop(self, node):
+        process = self._processes.pop(node)
+        self.nodes.remove(node)
+        process.terminate()
+        process.join()
+
+    def close(self):
+        for node in list(self.nodes):
+            self.stop(node)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    from quiz_store import QuizStore
+
+    parser = argparse.ArgumentParser(description="Sharded quiz catalog")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="run a shard")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=9001)
+    publish = sub.add_parser("publish", help="put the stored quizzes on the shards")
+    publish.add_argument("nodes", help="shard addresses, host:port,host:port,...")
+    publish.add_argument("--store", default=os.environ.get("QUIZ_STORE", "quizzes.qzs"))
+    status = sub.add_parser("status", help="show how the quizzes are spread")
+    status.add_argument("nodes", help="shard addresses, host:port,host:port,...")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        serve_shard(args.host, args.port)
+        return
+    catalog = ShardedCatalog(args.nodes.split(","))
+    try:
+        if args.command == "publish":
+            store = QuizStore(args.store)
+            try:
+                for name in store.names():
+                    catalog.put(name, Quiz(loader=store.loader(name)))
+            finally:
+                store.close()
+        counts = dict.fromkeys(catalog.ring.nodes, 0)
+        for holders in catalog.placement.values():
+            for node in holders:
+                counts[node] = counts[node] + 1
+        for node, count in counts.items():
+            print(f"{node}: {count} quizzes")
+        for name, holders in sorted(catalog.placement.items()):
+            if len(holders) > 1:
+                print(f"{name}: {len(holders) - 1} replicas")
+    finally:
+        catalog.close()
+
+
+if __name__ == "__main__":
+    main()
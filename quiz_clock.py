@@ -0,0 +1,70 @@
+"""
+Deadline-based countdown for quiz sessions.
+
+A QuizClock keeps the moment its time runs out on a monotonic clock
+(time.monotonic by default, or e.g. an event loop's time()). The remaining time
+is always computed from that deadline, never by counting callbacks, so timer
+callbacks that fire late (a busy window, a modal dialog) cannot add time, and
+the caller can sleep exactly until the displayed whole-second value changes.
+"""
+
+import math
+import time
+
+
+class QuizClock:
+    __slots__ = ("now", "deadline", "_paused")
+
+    def __init__(self, seconds, now=time.monotonic):
+        """
+        Inputs: seconds(float): Time until the deadline
+                now(function): Monotonic clock, in seconds
+        """
+        self.now = now
+        self.deadline = now() + seconds
+        self._paused = None         # remaining time while paused
+
+    @property
+    def paused(self):
+        return self._paused is not None
+
+    def remaining(self):
+        """
+        Seconds left, 0.0 once the deadline has passed.
+        """
+        if self._paused is not None:
+            return self._paused
+        return max(0.0, self.deadline - self.now())
+
+    def set_remaining(self, seconds):
+        if self._paused is not None:
+            self._paused = max(0.0, seconds)
+        else:
+            self.deadline = self.now() + seconds
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def pause(self):
+        """
+        Stop the countdown (e.g. while a finished or recovered session waits).
+        """
+        if self._paused is None:
+            self._paused = self.remaining()
+
+    def resume(self):
+        if self._paused is not None:
+            self.deadline = self.now() + self._paused
+            self._paused = None
+
+    def until_change(self):
+        """
+        Seconds until the remaining time shown in whole seconds (rounded up)
+        changes: when to redraw next. None while paused.
+        """
+        if self._paused is not None:
+            return None
+        remaining = self.remaining()
+        if remaining <= 0:
+            return 0.0
+        return remaining - math.floor(remaining) or 1.0
@@ -0,0 +1,287 @@
+"""
+Near-duplicate question detection with MinHash and locality-sensitive hashing.
+
+Every question (its text plus its choices, in any order) is normalized and cut
+into shingles: its words and its pairs of adjacent words. A MinHash signature
+of `num_perm` values summarizes the set of shingles; two signatures agree in a
+fraction of positions close to the Jaccard similarity of the shingle sets.
+Signatures are split into `bands`; questions that share any band land in the same bucket and become
+candidates, which are confirmed by comparing whole signatures. Each new question
+is only compared with its few candidates, so the work grows linearly with the
+number of questions instead of with the number of pairs.
+
+Questions can be checked one at a time as they are added (attach a quiz, or call
+add()), or in a batch pass over all quizzes (scan()). Needs NumPy:
+    pip install numpy
+"""
+
+import re
+import zlib
+
+PRIME = (1 << 31) - 1
+PAIR_MIX = 1_000_003        # combines the hashes of two adjacent words
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("duplicate detection needs NumPy: pip install numpy") from None
+    return numpy
+
+
+def item_text(question, choices):
+    """
+    The text compared for a question: the question and its choices, with the
+    choices sorted so that reordering them does not matter.
+    """
+    return question + " | " + " | ".join(sorted(choices))
+
+
+def question_text(bank, row):
+    return item_text(bank.question(row), bank.choices(row))
+
+
+def normalize(text):
+    return " ".join(re.sub(r"[^\w ]+", " ", text.lower()).split())
+
+
+def word_hashes(text):
+    """
+    CRC32 hash of every word of the normalized text, in order (at least one).
+    """
+    return [zlib.crc32(w) for w in normalize(text).encode("utf-8").split()] or [0]
+
+
+class _Buckets:
+    """
+    LSH buckets as a few sorted runs of (band key, item) pairs. New pairs form
+    a new run; runs of similar size are merged, so there are O(log n) runs and
+    every pair is re-sorted O(log n) times. Lookups are vectorized binary searches.
+    """
+    def __init__(self):
+        self.runs = []      # (keys: uint64 array, items: uint32 array), largest first
+
+    def __len__(self):
+        return sum(len(keys) for keys, _ in self.runs)
+
+    def find(self, keys, items):
+        """
+        Earlier items sharing a key with the given pairs (which are not added).
+        Returns: tuple(ndarray, ndarray): the items and, position by position, an earlier item
+        """
+        np = _numpy()
+        new = []
+        old = []
+        # Matches inside the batch itself
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        sorted_items = items[order]
+        for i in np.flatnonzero(sorted_keys[1:] == sorted_keys[:-1]).tolist():
+            j = i
+            while j >= 0 and sorted_keys[j] == sorted_keys[i + 1]:
+                new.append(sorted_items[i + 1:i + 2])
+                old.append(sorted_items[j:j + 1])
+                j = j - 1
+        # Matches with earlier batches: every position lo..hi-1 of a run holding the key
+        for run_keys, run_items in self.runs:
+            lo = np.searchsorted(run_keys, keys, "left")
+            hi = np.searchsorted(run_keys, keys, "right")
+            hit = np.flatnonzero(hi > lo)
+            if len(hit):
+                counts = (hi - lo)[hit]
+                first = np.repeat(lo[hit] - np.cumsum(counts) + counts, counts)
+                new.append(np.repeat(items[hit], counts))
+                old.append(run_items[first + np.arange(counts.sum())])
+        if not new:
+            return np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.uint32)
+        return np.concatenate(new), np.concatenate(old)
+
+    def add(self, keys, items):
+        np = _numpy()
+        order = np.argsort(keys, kind="stable")
+        self.runs.append((keys[order], items[order]))
+        while len(self.runs) > 1 and len(self.runs[-2][0]) <= 2 * len(self.runs[-1][0]):
+            (keys_a, items_a), (keys_b, items_b) = self.runs.pop(-2), self.runs.pop()
+            keys = np.concatenate((keys_a, keys_b))
+            items = np.concatenate((items_a, items_b))
+            order = np.argsort(keys, kind="stable")     # merging two sorted runs: close to linear
+            self.runs.append((keys[order], items[order]))
+
+
+class DuplicateDetector:
+    def __init__(self, threshold=0.7, num_perm=64, bands=16, seed=1, on_duplicate=None):
+        """
+        Inputs: threshold(float): Estimated Jaccard similarity at which two questions are duplicates
+                num_perm(int): Length of the MinHash signatures
+                bands(int): Number of LSH bands (must divide num_perm)
+                seed(int): Seed of the hash functions
+                on_duplicate(function): Called as on_duplicate(key, other_key, similarity)
+                    for every duplicate found; by default they are collected in `found`
+        Outputs: ValueError: If bands does not divide num_perm
+        """
+        np = _numpy()
+        if num_perm % bands:
+            raise ValueError("bands must divide num_perm")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.found = []
+        self.on_duplicate = on_duplicate if on_duplicate is not None else self._collect
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, PRIME, size=(num_perm, 1)).astype(np.int64)
+        self._b = rng.randint(0, PRIME, size=(num_perm, 1)).astype(np.int64)
+        # Odd multipliers that fold the rows of a band (and the band number) into one 64-bit key
+        self._fold = rng.randint(0, 1 << 62, size=self.rows + 1).astype(np.uint64) * 2 + 1
+        self._keys = []                                     # item id -> key
+        # Only the low 16 bits of each signature value are kept for comparing
+        # candidates ("b-bit MinHash"); they collide by chance 1 time in 65536
+        self._signatures = np.empty((1024, num_perm), dtype=np.uint16)
+        self._buckets = _Buckets()
+        self._attached = {}                                 # quiz name -> (bank, listener)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _collect(self, key, other, similarity):
+        self.found.append((key, other, similarity))
+
+    # Signatures
+
+    def signatures(self, texts):
+        """
+        MinHash signatures of several texts, computed together.
+        Returns: numpy.ndarray: (len(texts), num_perm) array of uint32
+        """
+        np = _numpy()
+        if not texts:
+            return np.empty((0, self.num_perm), dtype=np.uint32)
+        hashes = []
+        counts = []
+        for text in texts:
+            words = word_hashes(text)
+            hashes.extend(words)
+            counts.append(len(words))
+        counts = np.array(counts, dtype=np.int64)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+        # Shingles: every word, and every pair of adjacent words of the same text
+        x = np.array(hashes, dtype=np.int64) % PRIME
+        same_text = np.ones(len(x) - 1, dtype=bool)
+        same_text[starts[1:] - 1] = False
+        pairs = (x[:-1] * PAIR_MIX + x[1:])[same_text] % PRIME
+
+        # One row per hash function, one column per shingle; then the minimum per text
+        a, b = self._a, self._b
+        signatures = np.minimum.reduceat((a * x + b) % PRIME, starts, axis=1)
+        has_pairs = counts > 1
+        if has_pairs.any():
+            pair_starts = (starts - np.arange(len(starts)))[has_pairs]
+            paired = np.minimum.reduceat((a * pairs + b) % PRIME, pair_starts, axis=1)
+            signatures[:, has_pairs] = np.minimum(signatures[:, has_pairs], paired)
+        return signatures.T.astype(np.uint32)
+
+    # Locality-sensitive hashing
+
+    def _band_keys(self, signatures):
+        """
+        One 64-bit key per (item, band): items with equal keys share that band.
+        Returns: numpy.ndarray: (items * bands) uint64 keys, item after item
+        """
+        np = _numpy()
+        bands = signatures.astype(np.uint64).reshape(len(signatures), self.bands, self.rows)
+        keys = (bands * self._fold[:self.rows]).sum(axis=2, dtype=np.uint64)
+        keys = keys + np.arange(self.bands, dtype=np.uint64) * self._fold[self.rows]
+        return keys.ravel()
+
+    def _store(self, signatures):
+        np = _numpy()
+        first = len(self._keys)
+        end = first + len(signatures)
+        if end > len(self._signatures):
+            grown = np.empty((max(end, 2 * len(self._signatures)), self.num_perm), dtype=np.uint16)
+            grown[:first] = self._signatures[:first]
+            self._signatures = grown
+        self._signatures[first:end] = signatures
+        return first
+
+    def add_many(self, items):
+        """
+        Check a batch of items against everything seen so far (and each other), then remember them.
+        Inputs: items(list): (key, text) pairs
+        Returns: list of (key, other_key, similarity) for the duplicates found
+        """
+        np = _numpy()
+        items = list(items)
+        if not items:
+            return []
+        signatures = self.signatures([text for _, text in items])
+        first = self._store(signatures)
+        self._keys.extend(key for key, _ in items)
+
+        band_keys = self._band_keys(signatures)
+        ids = np.repeat(np.arange(first, first + len(items), dtype=np.uint32), self.bands)
+        new, old = self._buckets.find(band_keys, ids)
+        self._buckets.add(band_keys, ids)
+
+        found = []
+        if len(new):
+            # The same pair can share several bands; compare each pair once, in order of arrival
+            pairs = np.unique((new.astype(np.uint64) << np.uint64(32)) | old)
+            new = (pairs >> np.uint64(32)).astype(np.intp)
+            old = (pairs & np.uint64(0xFFFFFFFF)).astype(np.intp)
+            similarity = (self._signatures[new] == self._signatures[old]).mean(axis=1)
+            keys = self._keys
+            for k in np.flatnonzero(similarity >= self.threshold).tolist():
+                duplicate = (keys[new[k]], keys[old[k]], float(similarity[k]))
+                found.append(duplicate)
+                self.on_duplicate(*duplicate)
+        return found
+
+    def add(self, key, text):
+        """
+        Check one item against everything seen so far, then remember it.
+        Returns: list of (other_key, similarity)
+        """
+        return [(other, similarity) for _, other, similarity in self.add_many([(key, text)])]
+
+    # Quizzes
+
+    def attach(self, name, quiz):
+        """
+        Check the questions of a quiz, then check every question added to it
+        later (by add_question or a bulk import) as it arrives. Keys are (quiz name, row).
+        """
+        bank = quiz.bank
+        self.add_many(((name, row), question_text(bank, row)) for row in range(len(bank)))
+
+        def listener(bank, row, event):
+            if event == "add":
+                self.add((name, row), question_text(bank, row))
+
+        bank.listeners.append(listener)
+        self._attached[name] = (bank, listener)
+
+    def detach(self, name):
+        bank, listener = self._attached.pop(name)
+        bank.listeners.remove(listener)
+
+    def scan(self, quizzes, batch_size=1024):
+        """
+        Batch pass over every question of a {name: Quiz} dict.
+        Returns: list of ((quiz, row), (quiz, row), similarity) duplicate pairs
+        """
+        found = []
+        batch = []
+        for name, quiz in quizzes.items():
+            bank = quiz.bank
+            for row in range(len(bank)):
+                batch.append(((name, row), question_text(bank, row)))
+                if len(batch) >= batch_size:
+                    found.extend(self.add_many(batch))
+                    batch = []
+        if batch:
+            found.extend(self.add_many(batch))
+        return found
@@ -0,0 +1,515 @@
+"""
+Randomized exam assembly.
+
+An ExamSampler draws exams of N questions from the pool of a Quiz:
+    - questions can be stratified by tag (e.g. topic, or difficulty tags such as
+      "easy" / "hard") with exact quotas per stratum, or mixed at random with
+      given weights, drawn from an alias table in O(1) per question
+    - questions of a stratum are picked without replacement with a sparse
+      Fisher-Yates shuffle, which only touches the positions it draws, so an
+      exam costs O(N) however large the pool is
+    - the choices of every question are shuffled per exam; the exam keeps the
+      permutation and the new position of the correct answer, never a copy of
+      the question
+    - an exam reads its questions from a snapshot of the quiz taken when it was
+      drawn (see quiz_versions), so editing the quiz while the exam is taken
+      changes neither the text it shows nor the positions it grades against
+The same seed gives the same exam. An Exam can be taken like a Quiz (it has
+`questions`), e.g. with QuizSession.
+
+ExamSampler.assemble_batch() draws many variants at once with NumPy (needed only
+for that method), for printed-paper runs.
+"""
+
+import random
+from array import array
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("batch exam assembly needs NumPy: pip install numpy") from None
+    return numpy
+
+
+def alias_table(weights):
+    """
+    Build Vose's alias table for drawing index i with probability weights[i] / sum(weights).
+    Returns: tuple(list[float], list[int]): acceptance probability and alias of every index
+    Raises: ValueError: If no weight is positive
+    """
+    n = len(weights)
+    total = float(sum(weights))
+    if n == 0 or total <= 0:
+        raise ValueError("weights must include a positive value")
+    scaled = [w * n / total for w in weights]
+    prob = [1.0] * n
+    alias = list(range(n))
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        s = small.pop()
+        l = large[-1]
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] = scaled[l] - (1.0 - scaled[s])
+        if scaled[l] < 1.0:
+            small.append(large.pop())
+    return prob, alias
+
+
+def sample_indices(rng, n, k):
+    """
+    Draw k distinct indices from range(n) in O(k) time and memory, with a
+    Fisher-Yates shuffle that only remembers the positions it swapped.
+    """
+    swapped = {}
+    drawn = []
+    rand = rng.random
+    for i in range(k):
+        j = i + int(rand() * (n - i))
+        drawn.append(swapped.get(j, j))
+        swapped[j] = swapped.get(i, i)
+    return drawn
+
+
+class ExamItem:
+    """
+    One question of an Exam, with its choices in the exam's order. Read-only.
+    """
+    __slots__ = ("_exam", "_i")
+
+    def __init__(self, exam, i):
+        self._exam = exam
+        self._i = i
+
+    @property
+    def row(self):
+        """
+        The row of the question in the quiz it was drawn from.
+        """
+        return self._exam.rows[self._i]
+
+    @property
+    def question(self):
+        return self._exam.bank.question(self.row)
+
+    @property
+    def choices(self):
+        exam = self._exam
+        bank = exam.bank
+        row = exam.rows[self._i]
+        return [bank.choice(row, k) for k in exam.order[exam.starts[self._i]:exam.starts[self._i + 1]]]
+
+    @property
+    def correct_index(self):
+        return self._exam.correct[self._i]
+
+    @property
+    def correct_answer(self):
+        return self._exam.bank.correct_answer(self.row)
+
+    def get_question(self):
+        return self.question
+
+    def get_choice(self, index):
+        """
+        Get a choice by its position in this exam.
+        Raises: IndexError: if index is out of range
+        """
+        exam = self._exam
+        start = exam.starts[self._i]
+        if 0 <= index < exam.starts[self._i + 1] - start:
+            return exam.bank.choice(exam.rows[self._i], exam.order[start + index])
+        raise IndexError("Choice index is out of range")
+
+    def get_correct_answer(self):
+        return self.correct_answer
+
+    def get_correct_index(self):
+        return self.correct_index
+
+    def choice_index(self, choice):
+        """
+        The position of a choice in this exam, found by its text.
+        Returns: int: The position, -1 if it is not one of the choices
+        """
+        exam = self._exam
+        index = exam.bank.choice_index(exam.rows[self._i], choice)
+        if index < 0:
+            return -1
+        start = exam.starts[self._i]
+        return exam.order.index(index, start, exam.starts[self._i + 1]) - start
+
+    def get_tags(self):
+        return self._exam.bank.tags(self.row)
+
+    def source_index(self, index):
+        """
+        The index in the quiz of the choice shown at a position of this exam.
+        """
+        exam = self._exam
+        return exam.order[exam.starts[self._i] + index]
+
+
+class Exam:
+    """
+    An assembled exam: which pool rows it asks, in which order, and in which
+    order their choices are shown.
+    Attributes: bank(QuizSnapshot): The quiz as it was when the exam was drawn, read like a QuestionBank
+                rows(array): Pool row of each exam question
+                order(array): Original choice index shown at each position, question after question
+                starts(array): Start of each question's positions in `order`, plus the end
+                correct(array): Position of the correct choice of each exam question
+                seed: The seed it was drawn with
+    """
+    __slots__ = ("bank", "rows", "order", "starts", "correct", "seed")
+
+    def __init__(self, bank, rows, order, starts, correct, seed=None):
+        self.bank = bank
+        self.rows = rows
+        self.order = order
+        self.starts = starts
+        self.correct = correct
+        self.seed = seed
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def questions(self):
+        return [ExamItem(self, i) for i in range(len(self.rows))]
+
+    def answer_key(self):
+        """
+        The 1-based position of the correct choice of every question, as printed on an answer key.
+        """
+        return [c + 1 for c in self.correct]
+
+
+class ExamSampler:
+    def __init__(self, quiz, stratify=None):
+        """
+        Inputs: quiz(Quiz): The quiz whose questions form the pool
+                stratify: How questions are grouped:
+                    None: one group
+                    "tag": by the first tag of each question ("" when untagged)
+                    list[str]: by the first of these tags a question has (e.g. difficulty
+                        levels); questions with none of them are left out
+                    function(bank, row): returns the group of a row
+        Outputs: None
+        """
+        self.quiz = quiz
+        self.stratify = stratify
+        self._strata = None         # group -> array("I") of pool rows
+        self._version = None
+        self._np_strata = None
+
+    def _group_of(self):
+        stratify = self.stratify
+        if stratify is None:
+            return lambda bank, row: ""
+        if stratify == "tag":
+            return lambda bank, row: (bank.tags(row) or [""])[0]
+        if callable(stratify):
+            return stratify
+        levels = list(stratify)
+
+        def group(bank, row):
+            tags = bank.tags(row)
+            for level in levels:
+                if level in tags:
+                    return level
+            return None
+        return group
+
+    def strata(self):
+        """
+        The pool rows of every group, rebuilt when the quiz has changed.
+        Returns: dict: group -> array("I") of rows
+        """
+        bank = self.quiz.bank
+        if self._version != bank.version:
+            group_of = self._group_of()
+            strata = {}
+            for row in range(len(bank)):
+                group = group_of(bank, row)
+                if group is not None:
+                    strata.setdefault(group, array("I")).append(row)
+            self._strata = strata
+            self._np_strata = None
+            self._version = bank.version
+        return self._strata
+
+    def _check(self, n, quotas):
+        """
+        Check that the pool can provide the requested questions.
+        Returns: dict: The quotas, or None when n questions are to be mixed at random
+        """
+        strata = self.strata()
+        if quotas is not None:
+            for group, count in quotas.items():
+                if group not in strata:
+                    raise ValueError(f"no questions in group {group!r}")
+                if count > len(strata[group]):
+                    raise ValueError(f"group {group!r} has only {len(strata[group])} questions")
+            return dict(quotas)
+        available = sum(len(rows) for rows in strata.values())
+        if n > available:
+            raise ValueError(f"the pool has only {available} questions")
+        return None
+
+    def _weights(self, weights):
+        strata = self.strata()
+        if weights is None:
+            groups = list(strata)
+            return groups, [len(strata[g]) for g in groups]
+        for group in weights:
+            if group not in strata:
+                raise ValueError(f"no questions in group {group!r}")
+        groups = list(weights)
+        return groups, [weights[g] for g in groups]
+
+    # Single exams
+
+    def assemble(self, n=None, seed=None, quotas=None, weights=None, shuffle_choices=True):
+        """
+        Draw one exam.
+        Inputs: n(int): Number of questions (the whole pool by default; ignored with quotas)
+                seed: Seed for a reproducible exam (random when None)
+                quotas(dict): Exact number of questions per group
+                weights(dict): Relative share of each group in a random mix
+                    (by default groups are drawn in proportion to their size)
+                shuffle_choices(bool): Shuffle the choices of every question
+        Returns: Exam
+        Raises: ValueError: If the pool cannot provide the requested questions
+        """
+        if seed is None:
+            seed = random.randrange(1 << 63)
+        rng = random.Random(seed)
+        strata = self.strata()
+        if n is None and quotas is None:
+            n = sum(len(rows) for rows in strata.values())
+        quotas = self._check(n, quotas)
+        if quotas is None:
+            quotas = self._draw_mix(rng, n, weights)
+
+        rows = array("I")
+        for group, count in quotas.items():
+            pool = strata[group]
+            rows.extend(pool[k] for k in sample_indices(rng, len(pool), count))
+        # Groups were drawn one after the other: mix their questions
+        rand = rng.random
+        for i in range(len(rows) - 1, 0, -1):
+            j = int(rand() * (i + 1))
+            rows[i], rows[j] = rows[j], rows[i]
+
+        bank = self.quiz.bank
+        offsets = bank.choice_offsets()
+        correct_of = bank.correct_indices()
+        order = array("I")     # 32-bit: a question may have more than 65k choices
+        starts = array("I", [0])
+        correct = array("I")
+        for row in rows:
+            k = offsets[row + 1] - offsets[row]
+            perm = list(range(k))
+            answer = correct_of[row]
+            if shuffle_choices:
+                for i in range(k - 1, 0, -1):
+                    j = int(rand() * (i + 1))
+                    perm[i], perm[j] = perm[j], perm[i]
+                answer = perm.index(answer)
+            order.extend(perm)
+            starts.append(len(order))
+            correct.append(answer)
+        return Exam(self.quiz.snapshot(), rows, order, starts, correct, seed)
+
+    def _draw_mix(self, rng, n, weights):
+        """
+        Split n questions between groups by drawing each question's group from
+        an alias table; a group that runs out of questions is not drawn again.
+        """
+        strata = self.strata()
+        groups, group_weights = self._weights(weights)
+        counts = dict.fromkeys(groups, 0)
+        prob, alias = alias_table(group_weights)
+        rand = rng.random
+        drawn = 0
+        while drawn < n:
+            i = int(rand() * len(groups))
+            if rand() >= prob[i]:
+                i = alias[i]
+            group = groups[i]
+            if counts[group] < len(strata[group]):
+                counts[group] = counts[group] + 1
+                drawn = drawn + 1
+            else:
+                # Rebuild the table without the full group
+                keep = [k for k, g in enumerate(groups) if counts[g] < len(strata[g])]
+                if not any(group_weights[k] > 0 for k in keep):
+                    raise ValueError("the weighted groups do not have enough questions")
+                groups = [groups[k] for k in keep]
+                group_weights = [group_weights[k] for k in keep]
+                prob, alias = alias_table(group_weights)
+        return counts
+
+    # Many exams at once
+
+    def assemble_batch(self, count, n=None, seed=None, quotas=None, weights=None, shuffle_choices=True):
+        """
+        Draw many exams at once with NumPy. Arguments are as for assemble(); the
+        same seed gives the same batch (but not the same exams as assemble()).
+        Returns: ExamBatch
+        Raises: ValueError: If the pool cannot provide the requested questions
+        """
+        np = _numpy()
+        rng = np.random.default_rng(seed)
+        strata = self.strata()
+        if n is None and quotas is None:
+            n = sum(len(rows) for rows in strata.values())
+        quotas = self._check(n, quotas)
+        if self._np_strata is None:
+            self._np_strata = {group: np.array(rows, dtype=np.int64) for group, rows in strata.items()}
+        pools = self._np_strata
+
+        if quotas is not None:
+            n = sum(quotas.values())
+            rows = np.empty((count, n), dtype=np.int64)
+            col = 0
+            for group, q in quotas.items():
+                pool = pools[group]
+                rows[:, col:col + q] = pool[_distinct(rng, count, len(pool), q)]
+                col = col + q
+            # Groups were drawn one after the other: mix their questions
+            rows = np.take_along_axis(rows, np.argsort(rng.random((count, n)), axis=1), axis=1)
+        else:
+            rows = self._draw_mix_batch(rng, count, n, weights)
+
+        bank = self.quiz.bank
+        offsets = np.array(bank.choice_offsets(), dtype=np.int64)
+        correct_of = np.array(bank.correct_indices(), dtype=np.int64)[rows]
+        k = offsets[rows + 1] - offsets[rows]
+        positions = np.arange(k.max())
+        past_end = positions >= k[..., None]
+        if shuffle_choices:
+            keys = rng.random(past_end.shape)
+            keys[past_end] = 2.0                        # missing choices sort last
+            order = np.argsort(keys, axis=2).astype(np.int32)
+        else:
+            order = np.broadcast_to(positions, past_end.shape).astype(np.int32)
+        order[past_end] = -1
+        correct = np.argmax(order == correct_of[..., None], axis=2).astype(np.int32)
+        return ExamBatch(self.quiz.snapshot(), rows, order, correct, seed)
+
+    def _draw_mix_batch(self, rng, count, n, weights):
+        np = _numpy()
+        pools = self._np_strata
+        groups, group_weights = self._weights(weights)
+        sizes = np.array([len(pools[g]) for g in groups])
+        prob, alias = alias_table(group_weights)
+        prob = np.array(prob)
+        alias = np.array(alias)
+
+        def draw(m):
+            i = (rng.random((m, n)) * len(groups)).astype(np.int64)
+            return np.where(rng.random((m, n)) < prob[i], i, alias[i])
+
+        labels = draw(count)
+        for _ in range(100):
+            counts = np.stack([(labels == g).sum(axis=1) for g in range(len(groups))], axis=1)
+            over = (counts > sizes).any(axis=1)
+            if not over.any():
+                break
+            labels[over] = draw(int(over.sum()))
+        else:
+            raise ValueError("the weighted groups do not have enough questions; use quotas")
+
+        rows = np.empty((count, n), dtype=np.int64)
+        for g, group in enumerate(groups):
+            most = int(counts[:, g].max())
+            if most == 0:
+                continue
+            pool = pools[group]
+            drawn = pool[_distinct(rng, count, len(pool), most)]
+            mask = labels == g
+            rank = np.cumsum(mask, axis=1) - 1
+            exam, _ = np.nonzero(mask)
+            rows[mask] = drawn[exam, rank[mask]]
+        return rows
+
+
+def _distinct(rng, count, m, q):
+    """
+    A (count, q) matrix of indices in range(m), distinct within every row.
+    """
+    np = _numpy()
+    if q * q > 2 * m:
+        # Repeats would be common: take the start of a random permutation of the (small) pool
+        return np.argsort(rng.random((count, m)), axis=1)[:, :q]
+    drawn = rng.integers(0, m, (count, q))
+    while q > 1:
+        ordered = np.sort(drawn, axis=1)
+        repeated = (ordered[:, 1:] == ordered[:, :-1]).any(axis=1)
+        if not repeated.any():
+            break
+        drawn[repeated] = rng.integers(0, m, (int(repeated.sum()), q))
+    return drawn
+
+
+class ExamBatch:
+    """
+    Many exams drawn together.
+    Attributes: bank(QuizSnapshot): The quiz as it was when the exams were drawn
+                rows(ndarray): (exams, questions) pool rows
+                order(ndarray): (exams, questions, choices) original choice index shown
+                    at each position, -1 past a question's last choice
+                correct(ndarray): (exams, questions) position of the correct choice
+    """
+    def __init__(self, bank, rows, order, correct, seed=None):
+        self.bank = bank
+        self.rows = rows
+        self.order = order
+        self.correct = correct
+        self.seed = seed
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, k):
+        """
+        One exam of the batch.
+        Returns: Exam
+        """
+        np = _numpy()
+        order = self.order[k]
+        shown = order >= 0
+        starts = np.concatenate(([0], np.cumsum(shown.sum(axis=1))))
+        return Exam(self.bank, array("I", self.rows[k].tolist()), array("I", order[shown].tolist()),
+                    array("I", starts.tolist()), array("I", self.correct[k].tolist()), self.seed)
+
+    def answer_keys(self):
+        """
+        The 1-based position of the correct choice, per exam and question.
+        """
+        return self.correct + 1
+
+    def scores(self, chosen):
+        """
+        Grade answer sheets, one per exam of the batch.
+        Inputs: chosen(array-like): (exams, questions) matrix of chosen positions, 0-based, -1 if unanswered
+        Returns: ndarray[int]: Number of correct answers per exam
+        """
+        np = _numpy()
+        chosen = np.asarray(chosen)
+        if chosen.shape != self.correct.shape:
+            raise ValueError(f"answers must be a {self.correct.shape} matrix")
+        return (chosen == self.correct).sum(axis=1)
+
+    def distinct(self):
+        """
+        Number of different exams in the batch (questions, their order and their choice order).
+        """
+        np = _numpy()
+        flat = np.concatenate((self.rows.astype(np.int64), self.order.reshape(len(self), -1)), axis=1)
+        return len(np.unique(flat, axis=0))
@@ -0,0 +1,99 @@
+"""
+Vectorized batch grading of many answer sheets against one Quiz.
+
+Answer sheets are a NumPy matrix of chosen choice indices, one row per taker
+and one column per question (0-based, -1 for an unanswered question). Every
+sheet is compared at once against the quiz's array of correct indices, giving
+per-taker scores and percentages; the missed-question list that the quiz
+window shows is built only for the takers it is asked for.
+
+NumPy is only needed for this module:
+    pip install numpy
+"""
+
+from quiz_render import format_results
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("batch grading needs NumPy: pip install numpy") from None
+    return numpy
+
+
+def answer_matrix(takers, questions, chosen, n_takers, n_questions):
+    """
+    Build an answer matrix from long-format (taker, question, chosen index) rows.
+    Inputs: takers(array[int]): Taker number of each row
+            questions(array[int]): Question number (0-based) of each row
+            chosen(array[int]): Chosen choice index (0-based) of each row
+            n_takers(int): Number of takers
+            n_questions(int): Number of questions in the quiz
+    Returns: numpy.ndarray: (n_takers, n_questions) matrix, -1 where unanswered
+    """
+    np = _numpy()
+    matrix = np.full((n_takers, n_questions), -1, dtype=np.int32)
+    matrix[np.asarray(takers), np.asarray(questions)] = np.asarray(chosen)
+    return matrix
+
+
+class BatchGrades:
+    """
+    Grades of many takers of one quiz.
+    Attributes: scores(ndarray[int]): Number of correct answers per taker
+                percentages(ndarray[float]): Score as a percentage per taker
+                correct(ndarray[bool]): Which answers were right, per taker and question
+    """
+    def __init__(self, quiz, chosen, correct):
+        self.quiz = quiz
+        self.chosen = chosen
+        self.correct = correct
+        self.total = correct.shape[1]
+        self.scores = correct.sum(axis=1)
+        self.percentages = self.scores * (100.0 / self.total)
+
+    def __len__(self):
+        return self.correct.shape[0]
+
+    def missed(self, taker):
+        """
+        The questions a taker answered wrong or left unanswered, as a session
+        lists them.
+        Returns: list of (q_number, question_text, your_answer, correct_answer),
+                 your_answer None for an unanswered question
+        """
+        np = _numpy()
+        row = self.chosen[taker].tolist()
+        wrong = np.flatnonzero(~self.correct[taker])
+        bank = self.quiz.bank
+        return [(q + 1, bank.question(q), bank.choice(q, row[q]) if row[q] >= 0 else None, bank.correct_answer(q))
+                for q in wrong.tolist()]
+
+    def result_text(self, taker):
+        return format_results(int(self.scores[taker]), self.total, self.missed(taker))
+
+
+def grade(quiz, chosen):
+    """
+    Grade many answer sheets at once.
+    Inputs: quiz(Quiz): The quiz that was taken
+            chosen(array-like): (takers, questions) matrix of chosen indices, -1 if unanswered
+    Returns: BatchGrades
+    Raises: ValueError: If the matrix does not match the quiz or holds an invalid index
+    """
+    np = _numpy()
+    bank = quiz.bank
+    n = len(bank)
+    if n == 0:
+        raise ValueError("No quiz available")
+    chosen = np.asarray(chosen)
+    if chosen.ndim != 2 or chosen.shape[1] != n:
+        raise ValueError(f"answers must be a (takers, {n}) matrix")
+
+    correct_index = np.frombuffer(bank.correct_indices(), dtype=np.uintc).astype(np.int64)
+    choice_counts = np.diff(np.frombuffer(bank.choice_offsets(), dtype=np.uintc)).astype(np.int64)
+    if ((chosen < -1) | (chosen >= choice_counts)).any():
+        raise ValueError("answers hold a choice index that is out of range")
+
+    return BatchGrades(quiz, chosen, chosen == correct_index)
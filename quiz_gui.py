@@ -0,0 +1,857 @@
+"""
+This program lets you create named quizzes, add multiple-choice questions (exactly 4 choices, pick the correct one).
+Preview a quiz’s questions and correct answers. Take a quiz with a global countdown timer (30s per question), see your score,
+and review which questions you missed.
+"""
+
+import math
+import os
+import time
+from tkinter import *
+from tkinter import messagebox
+import tkinter.font as tkfont
+
+from quiz_adaptive import AdaptiveSession, ItemPool
+from quiz_analytics import ItemAnalytics
+from quiz_catalog import CatalogError, ShardedCatalog
+from quiz_exam import Exam, ExamSampler
+from quiz_index import MAX_PREFIX_TERMS, format_result, open_index
+from quiz_metrics import Profile, metrics
+from quiz_model import Quiz, Quiz_item
+from quiz_preview import PreviewLines
+from quiz_render import option_labels
+from quiz_replay import SessionRecorder
+from quiz_session import QuizSession
+from quiz_wal import Journal
+
+quizzes = {}    # Create an empty quiz 
+journal = None  # Journal every change is logged to, opened by main()
+repo = None     # SQLiteRepository used instead of the journal when QUIZ_DB is set
+catalog = None  # ShardedCatalog the quizzes are read from when QUIZ_CATALOG is set
+recorder = None     # SessionRecorder every quiz run is recorded to when QUIZ_REPLAY_LOG is set
+analytics = ItemAnalytics()    # item statistics of every finished attempt, saved on exit
+index = None    # SearchIndex of the questions, loaded by main() and saved on exit
+STORE_PATH = os.environ.get("QUIZ_STORE", "quizzes.qzs")
+STATS_PATH = os.environ.get("QUIZ_STATS", "quizzes.stats")
+INDEX_PATH = os.environ.get("QUIZ_INDEX", "quizzes.idx")
+
+def create_quiz():
+    """
+    Purpose:
+        - Open a dialog to create a new, named Quiz and store it in the global 'quizzes' dict.
+    Inputs:
+        - Reads the quiz name from an Entry in a Toplevel window.
+    Outputs:
+        - On success: inserts quizzes[name] = Quiz(), shows a success dialog, and closes the window.
+        - On failure: shows an error dialog (duplicate or empty name).
+        - Creates/destroys a Toplevel window.
+    """
+    win = Toplevel()
+    win.title("Create Quiz")
+    win.geometry("300x150")
+
+    Label(win, text="Enter Quiz Name: ").pack(pady=10)
+    ent = Entry(win)
+    ent.pack(pady=5)
+
+    def save_quiz():
+        """
+        Validate the name and create the Quiz object if the name is new and non-empty
+        """
+        name = ent.get()
+        if name and name not in quizzes:
+            if catalog is not None:
+                # Published to its shard right away, so other clients see it
+                try:
+                    catalog.put_rows(name, [])
+                except (CatalogError, OSError) as e:
+                    messagebox.showerror("Error", f"Could not publish the quiz: {e}")
+                    return
+                quizzes[name] = Quiz(loader=catalog.loader(name))
+            elif repo is not None:
+                quizzes[name] = repo.create_quiz(name)
+            elif journal is not None:
+                quizzes[name] = journal.create_quiz(name)
+            else:
+                quizzes[name] = Quiz()
+            messagebox.showinfo("Success", "Quiz created!")
+            win.destroy()
+        else:
+            # Either empty name or a name that already exists.
+            messagebox.showerror("Error", "Invalid name")
+    
+    Button(win, text="Create", command=save_quiz).pack(pady=20)
+
+def add_question():
+    """
+    Purpose:
+        - Open a dialog to add a new multiple-choice question to one of the existing quizzes.
+
+    Inputs:
+        - User selects a quiz name
+        - User provides the question text and 4 choice strings.
+        - User inputs the index (1–4) of the correct choice.
+
+    Outputs:
+        - On success: constructs a Quiz_item and calls quiz.add_question(item),
+          shows success dialog, and closes the window.
+        - On failure: shows an error dialog and keeps the window open.
+        - Creates/destroys a Toplevel window.
+    """
+    if not quizzes:
+        messagebox.showerror("Error", "No quizzes available")
+        return
+    
+    win = Toplevel()
+    win.title("Add Question")
+    win.geometry("420x470")
+
+    # Quiz selector
+    Label(win, text="Select Quiz:").pack(pady=20)
+    quiz_var = StringVar()
+    first_name = next(iter(quizzes.keys())) # pick any existing quiz name as default
+    quiz_var.set(first_name)
+    for name in quizzes.keys():
+        Radiobutton(win, text=name, variable=quiz_var, value=name).pack(fill='x', padx=12)
+    
+    # Question prompt and choices 
+    Label(win, text="Question: ").pack(padx=12, pady=(10,2))
+    ent_q = Entry(win, width=50)
+    ent_q.pack(padx=12, pady=(0,8))
+
+    Label(win, text="Choices:").pack(anchor="w", padx=12)
+    Label(win, text="(fill all 4, then pick the correct number 1–4)").pack(anchor="w", padx=12, pady=(0,6))
+
+    # Each row holds the label for the index and the Entry
+    row = Frame(win)
+    row.pack(fill="x", padx=12, pady=2)
+    Label(row, text="1").pack(side="left")
+    ent_c1 = Entry(row, width=40)
+    ent_c1.pack(side="left")
+
+    row = Frame(win)
+    row.pack(fill="x", padx=12, pady=2)
+    Label(row, text="2").pack(side="left")
+    ent_c2 = Entry(row, width=40)
+    ent_c2.pack(side="left")
+
+    row = Frame(win)
+    row.pack(fill="x", padx=12, pady=2)
+    Label(row, text="3").pack(side="left")
+    ent_c3 = Entry(row, width=40)
+    ent_c3.pack(side="left")
+
+    row = Frame(win)
+    row.pack(fill="x", padx=12, pady=2)
+    Label(row, text="4").pack(side="left")
+    ent_c4 = Entry(row, width=40)
+    ent_c4.pack(side="left")
+
+    Label(win, text="Correct Answer (enter 1–4):").pack(anchor="w", padx=12, pady=(10,2))
+    ent_correct = Entry(win, width=6)
+    ent_correct.pack(anchor="w", padx=12)
+
+    def save():
+        """
+        Validate inputs, build a Quiz_item, and append it to the selected Quiz.
+        Raises:
+            - Shows message boxes for any validation errors rather than raising Python exceptions.
+        """
+        quiz_name = quiz_var.get()
+        question = ent_q.get()
+        choices = [ent_c1.get(), ent_c2.get(), ent_c3.get(), ent_c4.get()]
+
+        # validations
+        if not quiz_name:
+            messagebox.showerror("Error", "Please select a quiz.")
+            return
+        if not question:
+            messagebox.showerror("Error", "Please enter a question.")
+            return
+        if not all(choices):
+            messagebox.showerror("Error", "Please fill all four choices.")
+            return
+
+        try:
+            idx = int(ent_correct.get())
+        except:
+            messagebox.showerror("Error", "Correct answer must be between 1 and 4.")
+            return
+
+        if not (1 <= idx <= 4):
+            messagebox.showerror("Error", "Correct answer must be between 1 and 4.")
+            return
+
+        correct_answer = choices[idx - 1]
+
+        try:
+            # Create the item and add it to the selected quiz
+            item = Quiz_item(question, choices, correct_answer)
+            if catalog is not None:
+                # Publish the quiz with the new question first: it is only added
+                # here once its shards have it
+                bank = quizzes[quiz_name].bank
+                rows = [[bank.question(row), bank.choices(row), bank.correct_index(row), bank.tags(row)]
+                        for row in range(len(bank))]
+                rows.append([question, choices, idx - 1, []])
+                catalog.put_rows(quiz_name, rows)
+            # The journal logs the new question as it reaches the quiz
+            quizzes[quiz_name].add_question(item)
+        except CatalogError as e:
+            messagebox.showerror("Error", f"Could not publish the question: {e.message}")
+            return
+        except Exception as e:
+            # raise any error that could be caused 
+            messagebox.showerror("Error", str(e))
+            return
+
+        messagebox.showinfo("Success", "Question added!")
+        win.destroy()
+
+    Button(win, text="Add Question", command=save).pack(pady=16)
+
+class VirtualList(Frame):
+    """
+    A scrollable list of text rows that only draws the rows that fit in the window.
+    The rows can be any sequence of strings (e.g. PreviewLines); they are read on
+    demand as the list is scrolled, and the canvas text items are reused.
+    """
+    def __init__(self, master):
+        Frame.__init__(self, master)
+        self.canvas = Canvas(self, highlightthickness=0)
+        self.scrollbar = Scrollbar(self, orient="vertical", command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.row_height = tkfont.nametofont("TkDefaultFont").metrics("linespace") + 2
+        self.rows = []
+        self.first = 0          # index of the top visible row
+        self.items = []         # canvas text items, one per visible row
+        self.drawn = None       # what is currently on screen, to skip identical redraws
+
+        self.canvas.bind("<Configure>", lambda e: self.redraw())
+        self.canvas.bind("<MouseWheel>", lambda e: self.yview("scroll", -1 if e.delta > 0 else 1, "units"))
+        self.canvas.bind("<Button-4>", lambda e: self.yview("scroll", -1, "units"))
+        self.canvas.bind("<Button-5>", lambda e: self.yview("scroll", 1, "units"))
+
+    def set_rows(self, rows):
+        if rows is not self.rows:
+            self.rows = rows
+            self.first = 0
+        self.redraw()
+
+    def visible_count(self):
+        return max(1, self.canvas.winfo_height() // self.row_height + 1)
+
+    def redraw(self):
+        """
+        Draw the visible rows. Does nothing if the same rows of the same data are on screen.
+        """
+        with metrics.span("gui_preview_redraw"):
+            self._redraw()
+
+    def _redraw(self):
+        total = len(self.rows)
+        count = self.visible_count()
+        self.first = max(0, min(self.first, total - count + 1))
+        key = (id(self.rows), getattr(self.rows, "version", None), total, self.first, count)
+        if key == self.drawn:
+            return
+        self.drawn = key
+
+        # Grow the pool of text items only when the window got taller
+        while len(self.items) < count:
+            y = 2 + len(self.items) * self.row_height
+            self.items.append(self.canvas.create_text(4, y, anchor="nw", text=""))
+        for k in range(len(self.items)):
+            line = self.first + k
+            if k < count and line < total:
+                self.canvas.itemconfigure(self.items[k], text=self.rows[line], state="normal")
+            else:
+                self.canvas.itemconfigure(self.items[k], state="hidden")
+
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + count) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def yview(self, *args):
+        """
+        Scrollbar and mouse-wheel command: ("moveto", fraction) or ("scroll", n, "units"|"pages").
+        """
+        if args[0] == "moveto":
+            self.first = int(float(args[1]) * len(self.rows))
+        elif args[0] == "scroll":
+            step = self.visible_count() - 1 if args[2] == "pages" else 1
+            self.first = self.first + int(args[1]) * max(1, step)
+        self.redraw()
+
+def preview_quiz():
+    """
+    Purpose:
+        Allow the user to select a quiz and preview all questions and the correct answers.
+    Inputs:
+        - Quiz name
+    Outputs:
+        - Shows the quiz contents in a scrollable list that only renders the visible lines.
+        - Shows an error dialog if there are no quizzes.
+        - Creates/destroys a Toplevel window.
+    """
+    if not quizzes:
+        messagebox.showerror("Error", "No quizzes available")
+        return
+    
+    win = Toplevel()
+    win.title("Preview Quiz")
+    win.geometry("500x400")
+
+    Label(win, text="Select Quiz: ").pack(pady=(10,4))
+    quiz_var = StringVar()
+    quiz_var.set(next(iter(quizzes)))   #default pick 
+
+    for name in quizzes.keys():
+        Radiobutton(win, text=name, variable=quiz_var, value=name).pack(fill="x", padx=12)
+
+    view = VirtualList(win)
+    view.pack(fill="both", expand=True, padx=12, pady=10)
+    view.set_rows(["Quiz will be shown here"])
+
+    previews = {}   # quiz name -> PreviewLines, so each quiz keeps its rendered lines
+
+    def show():
+        """
+        Show the currently selected quiz's questions and correct answers. Lines are
+        rendered as they scroll into view; showing an unchanged quiz again does nothing.
+        """
+        name = quiz_var.get()
+        qz = quizzes[name]
+        with metrics.span("gui_preview_show"):
+            if not qz.questions:
+                view.set_rows(["No questions in this quiz yet"])
+                return
+            if name not in previews:
+                previews[name] = PreviewLines(qz)
+            view.set_rows(previews[name])
+        
+    Button(win, text="Show Quiz", command=show).pack(pady=5)
+
+def search_questions():
+    """
+    Purpose:
+        Find questions by their words and tags across every quiz.
+    Inputs:
+        - Search words and/or #tags; the last word may be the start of a word.
+    Outputs:
+        - Lists the best matching questions (quiz, question number and text), best first.
+        - Creates/destroys a Toplevel window.
+    """
+    if not quizzes:
+        messagebox.showerror("Error", "No quizzes available")
+        return
+
+    win = Toplevel()
+    win.title("Search Questions")
+    win.geometry("500x360")
+
+    Label(win, text="Words or #tags: ").pack(pady=(10,4))
+    ent = Entry(win, width=50)
+    ent.pack(padx=12)
+    status = Label(win, text="")
+    status.pack(pady=(6,0))
+    results_list = Listbox(win)
+    results_list.pack(fill="both", expand=True, padx=12, pady=8)
+
+    def search(event=None):
+        """
+        Index the quizzes not indexed yet (only their new or edited rows if the
+        saved index has them), then search. Attached quizzes keep the index up to
+        date as questions are added and edited.
+        """
+        for name, qz in quizzes.items():
+            if not index.attached(name):
+                index.attach(name, qz)
+        results = index.search(ent.get(), limit=50)
+        results_list.delete(0, END)
+        for name, row, score in results:
+            results_list.insert(END, format_result(quizzes, name, row, score))
+        if results.truncated:
+            status.config(text=f"Only the first {MAX_PREFIX_TERMS} words starting with the last word were "
+                               f"searched; type more of it")
+        else:
+            status.config(text=f"{len(results)} matching questions" if results else "No matching questions")
+
+    ent.bind("<Return>", search)
+    Button(win, text="Search", command=search).pack(pady=(0,10))
+    ent.focus_set()
+
+def choose_quiz():
+    """
+    Purpose:
+        Let the user pick which quiz to take, then launch the quiz.
+    Inputs:
+        - Quiz name 
+    Outputs:
+        - Opens the quiz window on success.
+        - Shows an error if the chosen quiz has no questions.
+        - Creates/destroys a Toplevel window.
+    """
+    if not quizzes:
+        messagebox.showerror("Error", "No quizzes available")
+        return
+    
+    choose = Toplevel()
+    choose.title("Select Quiz")
+    choose.geometry("300x260")
+
+    Label(choose, text="Choose Quiz: ").pack(pady=(10,6))
+    quiz_var = StringVar()
+    quiz_var.set(next(iter(quizzes)))   # Default pick
+
+    for name in quizzes.keys():
+        Radiobutton(choose, text=name, variable=quiz_var, value=name).pack(padx=12)
+
+    shuffle_var = BooleanVar(value=False)
+    adaptive_var = BooleanVar(value=False)
+    if catalog is None:
+        # Catalog quizzes are taken on their shard, as they are
+        Checkbutton(choose, text="Shuffle questions and choices", variable=shuffle_var).pack(pady=(6,0))
+        Checkbutton(choose, text="Adaptive (fewer questions, picked for you)", variable=adaptive_var).pack()
+    
+    def start():
+        """
+        Start the selected quiz, otherwise show an error
+        """
+        name = quiz_var.get()
+        if catalog is not None:
+            # The session runs on a shard holding the quiz (its owner or a replica)
+            try:
+                remote = catalog.start_session(name)
+            except (CatalogError, OSError) as e:
+                messagebox.showerror("Error", getattr(e, "message", None) or str(e))
+                return
+            choose.destroy()
+            run_remote_quiz(remote, name)
+            return
+        qz = quizzes[name]
+        if not qz.questions:
+            messagebox.showerror("Error", "That quiz has no questions")
+            return
+        choose.destroy()
+        if adaptive_var.get():
+            # Questions calibrated from past attempts; the test stops once the score is precise enough
+            try:
+                pool = ItemPool.from_analytics(qz, analytics, name)
+            except ImportError as e:
+                messagebox.showerror("Error", str(e))
+                return
+            run_quiz(qz, name, session=AdaptiveSession(pool, qz, name))
+            return
+        if shuffle_var.get():
+            # Same questions in a random order, each with its choices shuffled
+            qz = ExamSampler(qz).assemble()
+        run_quiz(qz, name)
+
+    Button(choose, text="Start Quiz", command=start).pack(pady=12)
+
+def run_quiz(qz, name, session=None, sid=None):
+    """
+    Runs the quiz for the selected quiz name.
+
+    Purpose:
+        - Shows each question one by one with multiple-choice answers.
+        - Starts a countdown timer (30 seconds per question in total).
+        - Keeps track of correct and wrong answers.
+        - At the end, shows your score and a summary of mistakes.
+
+    Inputs:
+        - qz: the Quiz object (contains the list of questions), or an Exam drawn from one.
+        - name: the quiz name (used as the window title).
+        - session, sid: a recovered session and its journal id, to resume it instead of starting over,
+          or a session started elsewhere (e.g. an AdaptiveSession), which is not journaled.
+    Outputs:
+        - Creates a new Toplevel window for the quiz run.
+        - Displays timer, question, multiple-choice options, and a Next/Finish button.
+        - At the end, shows a results with score and missed questions.
+        - Destroys the quiz window when time is up.
+    """
+    # All quiz state (question index, score, missed answers, countdown) lives in the session
+    if session is None:
+        # A snapshot (an Exam reads from its own), so the quiz can be edited in the main window while it is taken
+        session = QuizSession(qz if isinstance(qz, Exam) else qz.snapshot(), name)
+        if journal is not None:
+            sid = journal.start_session(session, name, qz if isinstance(qz, Exam) else None)
+    else:
+        session.resume()
+    rid = recorder.start(session, name) if recorder is not None else None
+
+    win = Toplevel()
+    win.title("Choosing: " + name)
+    win.geometry("500x300")
+    
+    # Question text label
+    q_label = Label(win, text="")
+    q_label.pack(padx=12, pady=(12,8))
+
+    # Timer and progress 
+    timer_frame = Frame(win)
+    timer_frame.pack(fill="x", padx=12, pady=5)
+    
+    timer_label = Label(timer_frame, text="")
+    timer_label.pack()
+    
+    progress_label = Label(timer_frame, text="")
+    progress_label.pack()
+
+    # Navigation button(next/finish)
+    next_btn = Button(win, text="Next")
+    next_btn.pack(pady=12)
+
+    # Answer options 
+    answer_var = IntVar(value=-1)     # index of the chosen choice, -1 for none
+    opts_frame = Frame(win)
+    opts_frame.pack(fill="x", padx=12)
+
+    shown = {"time": None, "progress": None}    # label texts currently displayed
+    option_pool = []            # Radiobuttons reused from question to question
+    prefetched = {"index": None, "options": None}   # (label, value) pairs of the next question
+    last_tick = {"due": None}   # monotonic time the next timer callback is due, to measure its lateness
+
+    def option_list(i):
+        """
+        The (label, value) pairs of the Radiobuttons for question i, rendered once
+        per question for every taker until the question is edited.
+        """
+        return option_labels(session.questions[i])
+
+    def prefetch():
+        """
+        Prepare the option list of the next question while the taker reads this one.
+        """
+        i = session.index + 1
+        if i < session.total and prefetched["index"] != i:
+            prefetched["options"] = option_list(i)
+            prefetched["index"] = i
+
+    def show_options(options):
+        """
+        Put the options on the pooled Radiobuttons; new buttons are only created
+        when a question has more choices than any question before it.
+        """
+        while len(option_pool) < len(options):
+            option_pool.append(Radiobutton(opts_frame, variable=answer_var))
+        for k in range(len(option_pool)):
+            button = option_pool[k]
+            if k < len(options):
+                text, value = options[k]
+                button.config(text=text, value=value)
+                if not button.winfo_manager():
+                    button.pack(fill="x", pady=2)
+            elif button.winfo_manager():
+                button.pack_forget()
+
+    def refresh_labels(event=None):
+        """
+        Show the remaining time and progress. The labels are only touched when the
+        window can be seen and the text has changed.
+        """
+        if event is not None and event.widget is not win:
+            return
+        if not win.winfo_viewable():
+            return
+        time_text = session.time_text()
+        if time_text != shown["time"]:
+            shown["time"] = time_text
+            timer_label.config(text=time_text)
+        progress_text = session.progress_text()
+        if progress_text != shown["progress"]:
+            shown["progress"] = progress_text
+            progress_label.config(text=progress_text)
+
+    def update_timer():
+        """
+        Check the deadlines, update the readout and trigger finish() if time runs out.
+        The next check is scheduled for when the displayed time changes, and the time
+        left always comes from the deadline, so late callbacks do not add time.
+        """
+        if session.finished and not session.timed_out:
+            return
+        if metrics.enabled and last_tick["due"] is not None:
+            metrics.observe("gui_timer_lateness", max(0.0, time.monotonic() - last_tick["due"]))
+
+        index = session.index
+        session.tick()
+        if rid is not None:
+            recorder.tick(rid, session)
+        if session.timed_out:
+            # Time is up, exit the quiz
+            refresh_labels()
+            messagebox.showwarning("Time Up!", "You ran out of time.")
+            finish()
+            return
+        if session.index != index:
+            # The question's own time ran out
+            update_quiz()
+            if session.finished:
+                return
+        refresh_labels()
+
+        delay = session.until_change()
+        last_tick["due"] = time.monotonic() + delay
+        win.after(max(1, math.ceil(delay * 1000)), update_timer)
+
+    def update_quiz():
+        """
+        Update the current question and its choices. If we are past the last question,
+        end the quiz by calling finish().
+        """
+        start = time.perf_counter()
+        q = session.current_question()
+        if q is None:
+            finish()
+            return
+        
+        i = session.index
+        if rid is not None:
+            recorder.shown(rid, session)
+        q_label.config(text="Q" + str(i+1) + ": " + q.get_question())
+        answer_var.set(-1)  # clear previous selection
+
+        # Show the options on the pooled Radiobuttons, using the prefetched list if it is ready
+        if prefetched["index"] == i:
+            options = prefetched["options"]
+        else:
+            options = option_list(i)
+        show_options(options)
+        
+        if session.is_last_question():
+            next_btn.config(text="Finish")
+        else:
+            next_btn.config(text="Next")
+
+        if metrics.enabled:
+            # Draw now, so the measurement includes the redraw
+            win.update_idletasks()
+            metrics.observe("gui_update_quiz", time.perf_counter() - start)
+        win.after_idle(prefetch)
+    
+    def submit():
+        """
+        Record the chosen answer (if any), update score/missed, advance to next question,
+        and re update. If user hasn't picked an option, warn and stay on the current question.
+        """
+        if session.finished:
+            finish()
+            return
+
+        chosen = answer_var.get()
+        if chosen < 0:
+            messagebox.showwarning("Choose one", "Please select an answer.")
+            return
+
+        if rid is not None:
+            recorder.answer(rid, session, chosen)
+        if sid is not None:
+            journal.answer(sid, chosen)     # logged, so a crash does not lose the answer
+        else:
+            session.answer_index(chosen)
+        update_quiz()
+
+    def finish():
+        """
+        Stop the timer, show the final results (score and percent) and
+        the incorrect answers with your choice vs. the correct one.
+        Then close the quiz window.
+        """
+        session.finish()
+        if rid is not None:
+            recorder.finish(rid, session)
+        if sid is not None:
+            journal.end_session(sid)
+        if repo is not None:
+            repo.record_session(session)
+        analytics.add_session(session)
+        with metrics.span("gui_result_text"):
+            result = session.result_text()
+        messagebox.showinfo("Quiz Results", result)
+        win.destroy()
+
+    # Call the functions
+    next_btn.config(command=submit)
+    win.bind("<Map>", refresh_labels)   # catch up as soon as the window is shown again
+    update_quiz()
+    update_timer()
+
+def run_remote_quiz(remote, name):
+    """
+    Runs a quiz session that lives on a catalog shard (a RemoteSession).
+
+    Purpose:
+        - Shows the shard's current question and choices; every answer is sent to the shard,
+          which grades it and keeps the score, the missed questions and the deadline.
+        - Counts the time down locally and asks the shard again once it runs out.
+        - At the end, shows the results the shard sends.
+    Inputs:
+        - remote: the RemoteSession, as started by catalog.start_session(name).
+        - name: the quiz name (used as the window title).
+    Outputs:
+        - Creates a new Toplevel window for the quiz run and destroys it at the end.
+    """
+    win = Toplevel()
+    win.title("Choosing: " + name)
+    win.geometry("500x300")
+
+    q_label = Label(win, text="")
+    q_label.pack(padx=12, pady=(12,8))
+    timer_label = Label(win, text="")
+    timer_label.pack()
+    progress_label = Label(win, text="")
+    progress_label.pack()
+    next_btn = Button(win, text="Next")
+    next_btn.pack(pady=12)
+
+    answer_var = IntVar(value=-1)     # index of the chosen choice, -1 for none
+    opts_frame = Frame(win)
+    opts_frame.pack(fill="x", padx=12)
+    option_pool = []            # Radiobuttons reused from question to question
+
+    def show_error(e):
+        messagebox.showerror("Error", getattr(e, "message", None) or str(e))
+        win.destroy()
+
+    def update_quiz():
+        if remote.finished:
+            finish()
+            return
+        q_label.config(text="Q" + str(remote.index + 1) + ": " + remote.question)
+        answer_var.set(-1)
+        options = option_labels(remote)
+        while len(option_pool) < len(options):
+            option_pool.append(Radiobutton(opts_frame, variable=answer_var))
+        for k, button in enumerate(option_pool):
+            if k < len(options):
+                text, value = options[k]
+                button.config(text=text, value=value)
+                if not button.winfo_manager():
+                    button.pack(fill="x", pady=2)
+            elif button.winfo_manager():
+                button.pack_forget()
+        next_btn.config(text="Finish" if remote.index == remote.total - 1 else "Next")
+        progress_label.config(text=f"Question {remote.index + 1}/{remote.total}")
+
+    def update_timer():
+        if not win.winfo_exists() or remote.finished:
+            return
+        remaining = remote.remaining()
+        if remaining <= 0:
+            # The shard ends the session at its deadline
+            try:
+                remote.refresh()
+            except (CatalogError, OSError) as e:
+                show_error(e)
+                return
+            if remote.timed_out:
+                messagebox.showwarning("Time Up!", "You ran out of time.")
+                finish()
+                return
+            remaining = remote.remaining()
+        mins, secs = divmod(math.ceil(remaining), 60)
+        timer_label.config(text=f"Time Remaining: {mins}:{secs}")
+        # Next check when the displayed second changes
+        delay = remaining - math.floor(remaining) or 1.0
+        win.after(max(1, math.ceil(delay * 1000)), update_timer)
+
+    def submit():
+        chosen = answer_var.get()
+        if chosen < 0:
+            messagebox.showwarning("Choose one", "Please select an answer.")
+            return
+        try:
+            remote.answer_index(chosen)
+        except (CatalogError, OSError) as e:
+            show_error(e)
+            return
+        update_quiz()
+
+    def finish():
+        try:
+            result = remote.results()["text"]
+        except (CatalogError, OSError) as e:
+            show_error(e)
+            return
+        messagebox.showinfo("Quiz Results", result)
+        win.destroy()
+
+    next_btn.config(command=submit)
+    update_quiz()
+    update_timer()
+
+def main():
+    """
+    Build the main window and enter the Tkinter loop.
+    """
+    global journal, repo, analytics, recorder, catalog, index
+    if os.environ.get("QUIZ_CATALOG"):
+        # Quizzes live on the shards of a catalog; each is fetched from its shard
+        # (or a replica) when first used, new quizzes and questions are published
+        # to it and quizzes are taken on a shard
+        catalog = ShardedCatalog(os.environ["QUIZ_CATALOG"].split(","))
+        quizzes.update({name: Quiz(loader=catalog.loader(name)) for name in catalog.names()})
+    elif os.environ.get("QUIZ_DB"):
+        # Quizzes and attempts live in an SQLite database; questions are read page by page
+        from quiz_sqlite import SQLiteRepository
+        repo = SQLiteRepository(os.environ["QUIZ_DB"])
+        quizzes.update(repo.quizzes())
+    else:
+        # Open the saved quizzes and replay the log of the last run; questions are
+        # only read when a quiz is used
+        journal = Journal(STORE_PATH)
+        quizzes.update(journal.quizzes)
+    if os.path.exists(STATS_PATH):
+        analytics = ItemAnalytics.load(STATS_PATH)
+    # The saved search index; quizzes are attached to it on the first search
+    index = open_index(INDEX_PATH)
+    if os.environ.get("QUIZ_REPLAY_LOG"):
+        # Every quiz run is recorded, to be replayed with quiz_replay.py
+        recorder = SessionRecorder(os.environ["QUIZ_REPLAY_LOG"])
+
+    # Main window screen
+    root = Tk()
+    root.title("Quiz Management System")
+    root.geometry("400x340")
+
+    Label(root, text="Quiz Management System").pack(pady=20)
+    Button(root, text="Create New Quiz", command=create_quiz, width=20).pack(pady=5)
+    Button(root, text="Add Question to Quiz", command=add_question, width=20).pack(pady=5)
+    Button(root, text="Preview Quiz", command=preview_quiz, width=20).pack(pady=5)
+    Button(root, text="Search Questions", command=search_questions, width=20).pack(pady=5)
+    Button(root, text="Take Quiz", command=choose_quiz, width=20).pack(pady=5)
+    Button(root, text="Exit", command=root.quit, width=20).pack(pady=20)
+
+    # Offer to resume the quizzes that were being taken when the program stopped
+    for sid, session in list(journal.sessions.items() if journal is not None else ()):
+        if messagebox.askyesno("Resume quiz", f"Resume the unfinished quiz '{session.name}' "
+                                              f"at question {session.index + 1}?"):
+            run_quiz(quizzes.get(session.name), session.name, session, sid)
+        else:
+            journal.end_session(sid)
+
+    # Enter the Tkinter loop, profiled and with metrics exported if asked for
+    metrics.start_export(os.environ.get("QUIZ_METRICS"))
+    profile = Profile(os.environ["QUIZ_PROFILE"]) if os.environ.get("QUIZ_PROFILE") else None
+    root.mainloop()
+    if profile is not None:
+        profile.stop()
+    metrics.close()     # writes the metrics and their summary if exported to a file
+    if recorder is not None:
+        recorder.close()
+    if journal is not None:
+        journal.close()
+    if repo is not None:
+        repo.close()
+    if catalog is not None:
+        catalog.close()
+    analytics.save(STATS_PATH)
+    if any(index.attached(name) for name in quizzes):
+        index.save(INDEX_PATH)     # only changed if a search was made
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,482 @@
+"""
+Full-text and tag search over the questions of many quizzes.
+
+SearchIndex is an inverted index: every word of a question and of its choices,
+and every tag (as "#tag"), maps to a sorted array of document ids, one document
+per question. It listens to the QuestionBank of each attached quiz, so
+Quiz.add_question, Quiz_item.set_question, set_choices and set_tags keep it up
+to date without a rebuild.
+
+Queries match questions containing every word (AND), found by walking the
+rarest word's documents; the last word also matches as a prefix of up to
+MAX_PREFIX_TERMS words (results say when a prefix had more). Every match is
+ranked by the summed inverse document frequency of the query words (doubled for
+words found in the question itself rather than only in its choices or tags),
+normalized by question length, keeping the best in a heap. The index can be
+saved to disk and loaded at startup instead of being rebuilt; rows edited while
+their quiz was not attached are found by a per-row checksum and reindexed.
+
+The quiz window searches through "Search Questions"; from the command line:
+    python quiz_index.py "capital fra" [--store quizzes.qzs] [--index quizzes.idx] [--limit 10]
+"""
+
+import argparse
+import heapq
+import math
+import os
+import pickle
+import re
+import zlib
+from array import array
+from bisect import bisect_left, insort
+
+TOKEN = re.compile(r"#?\w+")
+MAX_PREFIX_TERMS = 64       # prefix queries look at most this many matching words (see SearchResults.truncated)
+UNION_FACTOR = 100          # a many-word prefix is matched through the set of its documents up to
+                            # this many times the documents of the rarest query word
+FORMAT = 2
+
+
+def tokenize(text):
+    return TOKEN.findall(text.lower())
+
+
+def tag_term(tag):
+    return "#" + "_".join(re.findall(r"\w+", tag.lower()))
+
+
+class SearchResults(list):
+    """
+    The results of a search: (quiz name, row, score) tuples, best first.
+    """
+    truncated = False       # the prefix had too many completions to match them all
+
+
+class SearchIndex:
+    def __init__(self):
+        """
+        Initialize an empty index.
+        Inputs:  None
+        Outputs: None
+        """
+        self._postings = {}             # term -> array("I") of document ids, ascending
+        self._terms = []                # sorted vocabulary, for prefix queries
+        self._doc_quiz = array("I")     # document id -> quiz id
+        self._doc_row = array("I")      # document id -> row in that quiz's bank
+        self._doc_len = array("I")      # document id -> number of words
+        self._doc_sum = array("I")      # document id -> checksum of the text it was indexed from
+        self._total_len = 0
+        self._quiz_names = []           # quiz id -> name
+        self._quiz_ids = {}             # name -> quiz id
+        self._quiz_docs = []            # quiz id -> array("I"): row -> document id
+        self._attached = {}             # quiz id -> (bank, listener)
+        self._pending = {}              # (quiz id, row) -> terms before an edit
+
+    def __len__(self):
+        return len(self._doc_row)
+
+    # Building
+
+    @staticmethod
+    def _doc_terms(bank, row):
+        """
+        Returns: tuple(set, int, int): the terms of a row, its number of words and
+                 the checksum of its text
+        """
+        question = bank.question(row)
+        choices = bank.choices(row)
+        tags = bank.tags(row)
+        words = tokenize(question)
+        for choice in choices:
+            words.extend(tokenize(choice))
+        terms = set(words)
+        terms.update(tag_term(t) for t in tags)
+        return terms, len(words), _checksum(question, choices, tags)
+
+    @staticmethod
+    def _checksum(bank, row):
+        return _checksum(bank.question(row), bank.choices(row), bank.tags(row))
+
+    def _add_term(self, term, doc):
+        postings = self._postings.get(term)
+        if postings is None:
+            self._postings[term] = array("I", [doc])
+            insort(self._terms, term)
+        elif postings[-1] < doc:
+            postings.append(doc)
+        else:
+            postings.insert(bisect_left(postings, doc), doc)
+
+    def _remove_term(self, term, doc):
+        postings = self._postings[term]
+        del postings[bisect_left(postings, doc)]
+        if not postings:
+            del self._postings[term]
+            del self._terms[bisect_left(self._terms, term)]
+
+    def _add_doc(self, quiz_id, bank, row):
+        terms, length, checksum = self._doc_terms(bank, row)
+        doc = len(self._doc_row)
+        self._doc_quiz.append(quiz_id)
+        self._doc_row.append(row)
+        self._doc_len.append(length)
+        self._doc_sum.append(checksum)
+        self._total_len = self._total_len + length
+        self._quiz_docs[quiz_id].append(doc)
+        for term in terms:
+            self._add_term(term, doc)
+
+    def _on_change(self, quiz_id, bank, row, event):
+        if event == "add":
+            self._add_doc(quiz_id, bank, row)
+        elif event == "before":
+            self._pending[(quiz_id, row)] = self._doc_terms(bank, row)[0]
+        elif event == "change":
+            old = self._pending.pop((quiz_id, row))
+            new, length, checksum = self._doc_terms(bank, row)
+            doc = self._quiz_docs[quiz_id][row]
+            for term in old - new:
+                self._remove_term(term, doc)
+            for term in new - old:
+                self._add_term(term, doc)
+            self._total_len = self._total_len - self._doc_len[doc] + length
+            self._doc_len[doc] = length
+            self._doc_sum[doc] = checksum
+
+    def _remove_docs(self, dead):
+        """
+        Take a set of documents out of every posting array, in one pass over the index.
+        """
+        for term in list(self._postings):
+            kept = array("I", [d for d in self._postings[term] if d not in dead])
+            if kept:
+                self._postings[term] = kept
+            else:
+                del self._postings[term]
+        self._terms = sorted(self._postings)
+        for doc in dead:
+            self._total_len = self._total_len - self._doc_len[doc]
+            self._doc_len[doc] = 0
+
+    def _drop_quiz(self, quiz_id):
+        """
+        Forget every document of a quiz (used when a saved index no longer matches it).
+        """
+        self._remove_docs(set(self._quiz_docs[quiz_id]))
+        self._quiz_docs[quiz_id] = array("I")
+
+    def _reindex(self, quiz_id, bank, rows):
+        """
+        Index again rows whose text changed while the quiz was not attached.
+        """
+        docs = self._quiz_docs[quiz_id]
+        self._remove_docs({docs[row] for row in rows})
+        for row in rows:
+            doc = docs[row]
+            terms, length, checksum = self._doc_terms(bank, row)
+            for term in terms:
+                self._add_term(term, doc)
+            self._total_len = self._total_len + length
+            self._doc_len[doc] = length
+            self._doc_sum[doc] = checksum
+
+    def attach(self, name, quiz):
+        """
+        Index a quiz and follow its changes from now on. A quiz already in the
+        index (e.g. loaded from disk) is checked row by row against the checksum
+        of the text it was indexed from: only the rows edited and the questions
+        added since then are indexed.
+        Inputs: name(str): The quiz name
+                quiz(Quiz): The quiz
+        Outputs: None
+        """
+        quiz_id = self._quiz_ids.get(name)
+        if quiz_id is None:
+            quiz_id = len(self._quiz_names)
+            self._quiz_names.append(name)
+            self._quiz_ids[name] = quiz_id
+            self._quiz_docs.append(array("I"))
+        elif quiz_id in self._attached:
+            self.detach(name)
+
+        bank = quiz.bank
+        docs = self._quiz_docs[quiz_id]
+        if len(docs) > len(bank):
+            self._drop_quiz(quiz_id)
+        elif docs:
+            doc_sum = self._doc_sum
+            checksum = self._checksum
+            edited = [row for row, doc in enumerate(docs) if doc_sum[doc] != checksum(bank, row)]
+            if edited:
+                self._reindex(quiz_id, bank, edited)
+        for row in range(len(self._quiz_docs[quiz_id]), len(bank)):
+            self._add_doc(quiz_id, bank, row)
+
+        def listener(bank, row, event):
+            self._on_change(quiz_id, bank, row, event)
+
+        bank.listeners.append(listener)
+        self._attached[quiz_id] = (bank, listener)
+
+    def attach_all(self, quizzes):
+        """
+        Attach every quiz of a {name: Quiz} dict.
+        """
+        for name, quiz in quizzes.items():
+            self.attach(name, quiz)
+
+    def attached(self, name):
+        """
+        Whether a quiz is attached (indexed and followed).
+        """
+        quiz_id = self._quiz_ids.get(name)
+        return quiz_id is not None and quiz_id in self._attached
+
+    def detach(self, name):
+        bank, listener = self._attached.pop(self._quiz_ids[name])
+        bank.listeners.remove(listener)
+
+    # Searching
+
+    def _terms_of(self, doc):
+        """
+        The current words of a document, read from its quiz (empty if not attached).
+        """
+        attached = self._attached.get(self._doc_quiz[doc])
+        if attached is None:
+            return set()
+        return self._doc_terms(attached[0], self._doc_row[doc])[0]
+
+    def _expand(self, term):
+        """
+        The vocabulary words starting with `term`, at most MAX_PREFIX_TERMS of
+        them (the first in alphabetical order).
+        Returns: tuple(list[str], bool): the words, and whether more words have the prefix
+        """
+        start = bisect_left(self._terms, term)
+        end = min(start + MAX_PREFIX_TERMS, len(self._terms))
+        found = []
+        for k in range(start, end):
+            if not self._terms[k].startswith(term):
+                return found, False
+            found.append(self._terms[k])
+        return found, end < len(self._terms) and self._terms[end].startswith(term)
+
+    def search(self, query, limit=10, prefix=True):
+        """
+        Find the questions matching every word of a query.
+        Inputs: query(str): Words and/or #tags
+                limit(int): Maximum number of results
+                prefix(bool): Let the last word match as a prefix
+        Returns: SearchResults: list of (quiz name, row, score), best first. Its
+                 `truncated` is True when the last word has more than
+                 MAX_PREFIX_TERMS completions: only the first of them were matched,
+                 so questions with the others are missing
+        """
+        results = SearchResults()
+        words = tokenize(query)
+        if not words or limit < 1:
+            return results
+        # Each query word becomes the list of posting arrays that satisfy it
+        groups = []
+        for k, word in enumerate(words):
+            if prefix and k == len(words) - 1:
+                terms, results.truncated = self._expand(word)
+            else:
+                terms = [word] if word in self._postings else []
+            if not terms:
+                return results
+            groups.append([self._postings[t] for t in terms])
+
+        n_docs = max(1, len(self._doc_row))
+        sizes = [sum(len(p) for p in group) for group in groups]
+        weights = [math.log(1 + n_docs / size) for size in sizes]
+        order = sorted(range(len(groups)), key=sizes.__getitem__)
+
+        # Walk the documents of the rarest word and keep those that contain the others
+        first = groups[order[0]]
+        rest = []
+        for k in order[1:]:
+            members = None
+            if len(groups[k]) > 4 and sizes[k] <= UNION_FACTOR * sizes[order[0]]:
+                # A prefix with many expansions: one set of all their documents
+                members = set()
+                for postings in groups[k]:
+                    members.update(postings)
+            rest.append((words[k], groups[k], members))
+        candidates = array("I")
+        for doc in first[0] if len(first) == 1 else _merge(first):
+            terms = None
+            for word, group, members in rest:
+                if members is not None:
+                    found = doc in members
+                elif len(group) <= 4:
+                    found = any(_contains(p, doc) for p in group)
+                else:
+                    # Too many documents to gather: cheaper to look at the question's own words
+                    if terms is None:
+                        terms = self._terms_of(doc)
+                    found = any(t.startswith(word) for t in terms)
+                if not found:
+                    break
+            else:
+                candidates.append(doc)
+
+        # Rank every candidate, counting a word twice when it is in the question
+        # itself (tags are not). A question scores at most `best` over its length
+        # factor, so going from the shortest questions to the longest, ranking
+        # stops once that bound cannot beat the current top `limit`; only the
+        # questions ranked are read from their quiz.
+        avg_len = self._total_len / n_docs or 1
+        doc_len = self._doc_len
+        in_text = [k for k, word in enumerate(words) if not word.startswith("#")]
+        base = sum(weights)
+        best = base + sum(weights[k] for k in in_text)
+        top = []        # min-heap of (score, -doc)
+        for doc in sorted(candidates, key=doc_len.__getitem__):
+            norm = 0.5 + 0.5 * doc_len[doc] / avg_len
+            if len(top) == limit and best / norm <= top[0][0]:
+                break
+            score = base
+            attached = self._attached.get(self._doc_quiz[doc])
+            if in_text and attached is not None:
+                question = attached[0].question(self._doc_row[doc]).lower()
+                in_question = None
+                for k in in_text:
+                    word = words[k]
+                    if word not in question:
+                        continue        # not even a substring: no need to split the question into words
+                    if in_question is None:
+                        in_question = set(TOKEN.findall(question))
+                    if prefix and k == len(words) - 1:
+                        hit = any(w.startswith(word) for w in in_question)
+                    else:
+                        hit = word in in_question
+                    if hit:
+                        score = score + weights[k]
+            entry = (score / norm, -doc)
+            if len(top) < limit:
+                heapq.heappush(top, entry)
+            elif entry > top[0]:
+                heapq.heapreplace(top, entry)
+        top.sort(reverse=True)
+        results.extend((self._quiz_names[self._doc_quiz[-d]], self._doc_row[-d], score) for score, d in top)
+        return results
+
+    # Persistence
+
+    def save(self, path):
+        """
+        Write the index to a file (atomically replacing an older one).
+        """
+        state = {
+            "format": FORMAT,
+            "postings": self._postings,
+            "doc_quiz": self._doc_quiz,
+            "doc_row": self._doc_row,
+            "doc_len": self._doc_len,
+            "doc_sum": self._doc_sum,
+            "total_len": self._total_len,
+            "quiz_names": self._quiz_names,
+            "quiz_docs": self._quiz_docs,
+        }
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read an index written by save(). Quizzes still have to be attached.
+        """
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if state.get("format") != FORMAT:
+            raise ValueError("unsupported search index format")
+        index = cls()
+        index._postings = state["postings"]
+        index._terms = sorted(index._postings)
+        index._doc_quiz = state["doc_quiz"]
+        index._doc_row = state["doc_row"]
+        index._doc_len = state["doc_len"]
+        index._doc_sum = state["doc_sum"]
+        index._total_len = state["total_len"]
+        index._quiz_names = state["quiz_names"]
+        index._quiz_ids = {name: k for k, name in enumerate(index._quiz_names)}
+        index._quiz_docs = state["quiz_docs"]
+        return index
+
+
+def _checksum(question, choices, tags):
+    """
+    CRC of the indexed text of a row (question, choices and tags).
+    """
+    return zlib.crc32("\x1f".join([question] + choices + ["\x1e"] + tags).encode("utf-8"))
+
+
+def _merge(arrays):
+    """
+    Iterate the union of several ascending posting arrays in order, without duplicates.
+    """
+    last = None
+    for doc in heapq.merge(*arrays):
+        if doc != last:
+            yield doc
+            last = doc
+
+
+def _contains(postings, doc):
+    k = bisect_left(postings, doc)
+    return k < len(postings) and postings[k] == doc
+
+
+def open_index(path):
+    """
+    The index saved at a path, or a new one if there is none or it cannot be read
+    (e.g. written by an older version): it is then rebuilt as quizzes are attached.
+    """
+    if os.path.exists(path):
+        try:
+            return SearchIndex.load(path)
+        except (OSError, ValueError, pickle.UnpicklingError, EOFError, KeyError):
+            pass
+    return SearchIndex()
+
+
+def format_result(quizzes, name, row, score):
+    return f"{name} #{row + 1}: {quizzes[name].bank.question(row)} ({score:.2f})"
+
+
+def main(argv=None):
+    from quiz_model import Quiz
+    from quiz_store import QuizStore
+
+    parser = argparse.ArgumentParser(description="Search the questions of the stored quizzes")
+    parser.add_argument("query")
+    parser.add_argument("--store", default=os.environ.get("QUIZ_STORE", "quizzes.qzs"))
+    parser.add_argument("--index", default=os.environ.get("QUIZ_INDEX", "quizzes.idx"))
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    store = QuizStore(args.store)
+    try:
+        quizzes = {name: Quiz(loader=store.loader(name)) for name in store.names()}
+        index = open_index(args.index)
+        index.attach_all(quizzes)
+        results = index.search(args.query, args.limit)
+        for name, row, score in results:
+            print(format_result(quizzes, name, row, score))
+        if not results:
+            print("No matching questions")
+        if results.truncated:
+            print(f"(the last word has more than {MAX_PREFIX_TERMS} completions; type more of it)")
+        index.save(args.index)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""
+Streaming bulk import and export of question banks, without Tkinter.
+
+Supported formats:
+    CSV   - one question per row: question, correct_answer, choice 1, choice 2, ...
+            (a first row starting with "question" is treated as a header)
+    JSONL - one object per line: {"question": ..., "choices": [...], "correct_answer": ...}
+
+Rows are read through generators and validated a batch at a time, so a bank of
+any size is loaded in constant memory. Invalid rows do not stop the load; they
+are collected in the report with their line number and the error message
+Quiz_item would have raised.
+
+Usage:
+    python quiz_io.py import bank.csv "Quiz name" [--store quizzes.qzs] [--errors errors.txt]
+    python quiz_io.py export "Quiz name" out.jsonl [--store quizzes.qzs]
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+from itertools import islice
+
+from quiz_dedup import item_text
+from quiz_model import Quiz
+
+
+class TransferReport:
+    """
+    Outcome of an import or export: row counts, errors and throughput.
+    """
+    def __init__(self, max_errors=1000):
+        self.rows = 0           # rows read (import) or written (export)
+        self.loaded = 0         # rows that passed validation and were added
+        self.failed = 0         # rows rejected by validation
+        self.errors = []        # (line number, message) of the first max_errors rejected rows
+        self.seconds = 0.0
+        self.max_errors = max_errors
+
+    def add_error(self, line, message):
+        self.failed = self.failed + 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append((line, message))
+
+    @property
+    def rows_per_sec(self):
+        if self.seconds <= 0:
+            return 0.0
+        return self.rows / self.seconds
+
+    def __str__(self):
+        return (f"{self.rows} rows, {self.loaded} loaded, {self.failed} rejected "
+                f"in {self.seconds:.2f}s ({self.rows_per_sec:,.0f} rows/sec)")
+
+
+# Readers: yield (line number, question, choices, correct_answer)
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        for line, row in enumerate(csv.reader(f), start=1):
+            if line == 1 and row and row[0].strip().lower() == "question":
+                continue
+            if not row:
+                continue
+            # Rows may have a different number of choices; drop the empty padding cells
+            choices = row[2:]
+            while choices and choices[-1] == "":
+                choices.pop()
+            yield line, row[0], choices, row[1] if len(row) > 1 else ""
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        for line, text in enumerate(f, start=1):
+            if not text.strip():
+                continue
+            try:
+                row = json.loads(text)
+            except ValueError:
+                yield line, None, None, None
+                continue
+            if not isinstance(row, dict):
+                yield line, None, None, None
+                continue
+            yield line, row.get("question"), row.get("choices"), row.get("correct_answer")
+
+
+def read_rows(path):
+    """
+    Pick the reader from the file extension (.csv or .jsonl).
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return read_csv(path)
+    if ext in (".jsonl", ".ndjson"):
+        return read_jsonl(path)
+    raise ValueError("Unsupported file type: " + ext)
+
+
+def validate_batch(batch):
+    """
+    Run the Quiz_item checks over a batch of rows, one check at a time over the
+    whole batch rather than one row at a time.
+    Inputs: batch(list): (line, question, choices, correct_answer) rows
+    Returns: tuple(list, list): valid (question, choices, correct_index) rows and
+             (line, message) for every rejected row
+    """
+    lines = [row[0] for row in batch]
+    questions = [row[1] for row in batch]
+    choices = [row[2] for row in batch]
+    answers = [row[3] for row in batch]
+
+    # One message per row; None while the row is still valid. The checks and
+    # messages are the same, and in the same order, as in Quiz_item.__init__
+    errors = [None if row[1] is not None or row[2] is not None or row[3] is not None
+              else "malformed row" for row in batch]
+
+    def check(ok, message):
+        for k in range(len(errors)):
+            if errors[k] is None and not ok[k]:
+                errors[k] = message
+
+    check([isinstance(q, str) and bool(q.strip()) for q in questions],
+          "question must be a non-empty string")
+    check([isinstance(c, list) for c in choices],
+          "choice must be a list of strings")
+    check([e is not None or len(c) >= 2 for e, c in zip(errors, choices)],
+          "There must be at least two choices")
+    check([e is not None or all(isinstance(x, str) and x.strip() for x in c) for e, c in zip(errors, choices)],
+          "each choice must be a non-empty string")
+    check([isinstance(a, str) and bool(a.strip()) for a in answers],
+          "correct answer must be a non-empty string")
+    # Position of every choice of every row, for the duplicate check and the correct index
+    positions = [None if e is not None else {x: j for j, x in enumerate(c)} for e, c in zip(errors, choices)]
+    check([e is not None or len(p) == len(c) for e, p, c in zip(errors, positions, choices)],
+          "choices must be different from each other")
+    check([e is not None or a in p for e, a, p in zip(errors, answers, positions)],
+          "Correct answer must be one of the choices")
+
+    valid = []
+    rejected = []
+    for k in range(len(batch)):
+        if errors[k] is None:
+            valid.append((questions[k], choices[k], positions[k][answers[k]]))
+        else:
+            rejected.append((lines[k], errors[k]))
+    return valid, rejected
+
+
+def import_rows(quiz, rows, batch_size=1000, store=None, name=None, max_errors=1000, dedup=None):
+    """
+    Validate rows in batches and add the valid ones to a quiz, a store or both.
+    Inputs: quiz(Quiz): The quiz to add the questions to, or None to only write
+                them to the store (nothing is kept in memory)
+            rows(iterator): (line, question, choices, correct_answer) rows, e.g. from read_rows()
+            batch_size(int): Number of rows validated together
+            store(QuizStore): Optional store the questions are also appended to
+            name(str): The quiz name in the store
+            max_errors(int): Number of rejected rows kept in the report
+            dedup(DuplicateDetector): Optional detector each batch is checked against
+                (keys are (name, row)); duplicates go to its on_duplicate callback.
+                Needs the quiz, for the row numbers
+    Returns: TransferReport
+    Raises: ValueError: If there is neither a quiz nor a store, or a detector without a quiz
+    """
+    if quiz is None and (store is None or dedup is not None):
+        raise ValueError("rows need a quiz to go to" if store is None else "dedup needs the quiz")
+    report = TransferReport(max_errors)
+    start = time.perf_counter()
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        valid, rejected = validate_batch(batch)
+        if quiz is not None:
+            first = quiz.add_rows(valid)
+        if store is not None:
+            for question, choices, correct in valid:
+                store.append_item(name, question, choices, correct)
+        if dedup is not None:
+            dedup.add_many(((name, first + k), item_text(question, choices))
+                           for k, (question, choices, _) in enumerate(valid))
+        for line, message in rejected:
+            report.add_error(line, message)
+        report.rows = report.rows + len(batch)
+        report.loaded = report.loaded + len(valid)
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def import_file(quiz, path, **kwargs):
+    """
+    Import a CSV or JSONL file into a quiz. Keyword arguments go to import_rows().
+    Returns: TransferReport
+    """
+    return import_rows(quiz, read_rows(path), **kwargs)
+
+
+def iter_questions(quiz):
+    """
+    Yield (question, choices, correct_answer) for every question of a quiz.
+    """
+    bank = quiz.bank
+    for row in range(len(bank)):
+        yield bank.question(row), bank.choices(row), bank.correct_answer(row)
+
+
+def export_file(quiz, path):
+    """
+    Write the questions of a quiz to a CSV or JSONL file, one row at a time.
+    Returns: TransferReport
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in (".csv", ".jsonl", ".ndjson"):
+        raise ValueError("Unsupported file type: " + ext)
+    report = TransferReport()
+    start = time.perf_counter()
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        if ext == ".csv":
+            writer = csv.writer(f)
+            writer.writerow(["question", "correct_answer", "choices"])
+            for question, choices, correct in iter_questions(quiz):
+                writer.writerow([question, correct] + choices)
+                report.rows = report.rows + 1
+        else:
+            for question, choices, correct in iter_questions(quiz):
+                f.write(json.dumps({"question": question, "choices": choices, "correct_answer": correct}))
+                f.write("\n")
+                report.rows = report.rows + 1
+    report.loaded = report.rows
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def print_duplicates(found):
+    for (quiz, row), (other_quiz, other_row), similarity in found:
+        print(f"{quiz} #{row + 1} ~ {other_quiz} #{other_row + 1} ({similarity:.0%} similar)")
+    print(f"{len(found)} near-duplicate pairs")
+
+
+def main(argv=None):
+    from quiz_store import QuizStore
+
+    parser = argparse.ArgumentParser(description="Bulk import/export of quiz questions")
+    parser.add_argument("--store", default=os.environ.get("QUIZ_STORE", "quizzes.qzs"))
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="load a CSV/JSONL file into a quiz")
+    imp.add_argument("file")
+    imp.add_argument("quiz")
+    imp.add_argument("--errors", help="write rejected rows to this file")
+    imp.add_argument("--dedup", action="store_true", help="report near-duplicates of stored questions")
+    exp = sub.add_parser("export", help="write a quiz to a CSV/JSONL file")
+    exp.add_argument("quiz")
+    exp.add_argument("file")
+    sub.add_parser("dedup", help="list near-duplicate questions across all quizzes")
+    args = parser.parse_args(argv)
+
+    store = QuizStore(args.store)
+    try:
+        if args.command == "import":
+            if args.quiz not in store:
+                store.append_quiz(args.quiz)
+            # Only the new rows go to the store, so nothing needs to be loaded or kept
+            quiz = None
+            detector = None
+            if args.dedup:
+                # Check against every stored question; the new rows then follow the quiz's own rows
+                from quiz_dedup import DuplicateDetector
+                quizzes = {name: Quiz(loader=store.loader(name)) for name in store.names()}
+                detector = DuplicateDetector()
+                detector.scan(quizzes)
+                detector.found.clear()
+                quiz = quizzes[args.quiz]
+            report = import_file(quiz, args.file, store=store, name=args.quiz, dedup=detector)
+            if args.errors:
+                with open(args.errors, "w", encoding="utf-8") as f:
+                    for line, message in report.errors:
+                        f.write(f"{line}: {message}\n")
+            if detector is not None:
+                print_duplicates(detector.found)
+        elif args.command == "dedup":
+            from quiz_dedup import DuplicateDetector
+            print_duplicates(DuplicateDetector().scan({name: Quiz(loader=store.loader(name)) for name in store.names()}))
+            return
+        else:
+            if args.quiz not in store:
+                parser.error("no quiz named " + args.quiz)
+            report = export_file(Quiz(loader=store.loader(args.quiz)), args.file)
+        print(report)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""
+Built-in instrumentation: counters, timers and latency histograms for the hot
+paths of the quiz engine and GUI, with export as Prometheus text (to a file or
+over HTTP) and an opt-in profiler.
+
+Instrumentation is off unless the QUIZ_METRICS environment variable is set when
+the program starts:
+    QUIZ_METRICS=metrics.prom    write the metrics to this file on exit
+    QUIZ_METRICS=:9100           serve them at http://127.0.0.1:9100/metrics
+While it is off, functions decorated with timed() are left undecorated, span()
+returns a shared do-nothing context manager and callers guard count() and
+observe() with `if metrics.enabled`, so the cost is close to nothing.
+
+QUIZ_PROFILE=<path> profiles the GUI's main thread while it runs: with cProfile
+(readable with pstats) or, for a path ending in .folded, by sampling the stack
+every few milliseconds into collapsed stacks (for flame graph tools).
+
+Histogram buckets are powers of two from 1 microsecond to about 67 seconds.
+Updates are not locked; each registry is meant to be updated from one thread.
+"""
+
+import functools
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+BUCKETS = tuple(2.0 ** k / 1e6 for k in range(27))     # upper bounds in seconds; then +Inf
+
+
+class Histogram:
+    """
+    Latency histogram with fixed bucket bounds (BUCKETS).
+    """
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count = self.count + 1
+        self.sum = self.sum + seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """
+        Upper bound of the bucket holding the q-quantile (the maximum for the last bucket).
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for k, n in enumerate(self.counts):
+            seen = seen + n
+            if seen >= rank and n:
+                return min(BUCKETS[k], self.max) if k < len(BUCKETS) else self.max
+        return self.max
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+
+class _Span:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NO_SPAN = _NoSpan()
+
+
+class Registry:
+    def __init__(self, enabled=False, prefix="quiz_"):
+        """
+        Inputs: enabled(bool): Whether to record anything
+                prefix(str): Prefix of the exported metric names
+        """
+        self.enabled = enabled
+        self.prefix = prefix
+        self.counters = {}      # name -> int
+        self.histograms = {}    # name -> Histogram
+        self._path = None       # file written by close()
+        self._server = None
+
+    # Recording
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return histogram
+
+    def observe(self, name, seconds):
+        self.histogram(name).observe(seconds)
+
+    def span(self, name):
+        """
+        Context manager timing a block into the histogram `name`.
+        """
+        if not self.enabled:
+            return NO_SPAN
+        return _Span(self.histogram(name))
+
+    def timed(self, name):
+        """
+        Decorator timing every call into the histogram `name`. Does nothing
+        (returns the function itself) if the registry is disabled when the
+        function is decorated.
+        """
+        def decorate(fn):
+            if not self.enabled:
+                return fn
+            histogram = self.histogram(name)
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - start)
+            return wrapper
+        return decorate
+
+    def reset(self):
+        self.counters.clear()
+        self.histograms.clear()
+
+    # Export
+
+    def render(self):
+        """
+        The metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        for name in sorted(self.counters):
+            metric = self.prefix + name + "_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {self.counters[name]}")
+        for name in sorted(self.histograms):
+            histogram = self.histograms[name]
+            metric = self.prefix + name + "_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, n in zip(BUCKETS, histogram.counts):
+                cumulative = cumulative + n
+                lines.append(f'{metric}_bucket{{le="{bound:.6g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {histogram.count}')
+            lines.append(f"{metric}_sum {histogram.sum:.9g}")
+            lines.append(f"{metric}_count {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """
+        One line per histogram: count, mean, p50, p99 and max in milliseconds.
+        """
+        lines = []
+        for name in sorted(self.histograms):
+            h = self.histograms[name]
+            lines.append(f"{name}: {h.count} calls, mean {h.mean * 1000:.3f} ms, p50 <= {h.quantile(0.5) * 1000:.3f} ms, "
+                         f"p99 <= {h.quantile(0.99) * 1000:.3f} ms, max {h.max * 1000:.3f} ms")
+        return "\n".join(lines)
+
+    def write(self, path):
+        """
+        Write the metrics to a file (atomically replacing an older one), followed
+        by the summary() as comment lines, which Prometheus parsers skip.
+        """
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render())
+            for line in self.summary().splitlines():
+                f.write("# " + line + "\n")
+        os.replace(tmp, path)
+
+    def serve(self, port, host="127.0.0.1"):
+        """
+        Serve the metrics at http://host:port/metrics from a background thread.
+        Returns: The HTTPServer (port 0 picks a free port: server.server_port)
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                payload = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server
+
+    def start_export(self, target):
+        """
+        Export as QUIZ_METRICS says: ":port" serves over HTTP, anything else is
+        a file written by close(). Does nothing for an empty target.
+        """
+        if not target:
+            return
+        if target.startswith(":"):
+            self.serve(int(target[1:]))
+        else:
+            self._path = target
+
+    def close(self):
+        if self._path is not None:
+            self.write(self._path)
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+metrics = Registry(enabled=bool(os.environ.get("QUIZ_METRICS")))
+
+
+# Profiling
+
+class SamplingProfiler:
+    """
+    Samples the stack of one thread at a fixed interval from a background
+    thread and counts the stacks seen, as collapsed stacks ("f1;f2;f3 count").
+    """
+    def __init__(self, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, n in self.stacks.most_common():
+                f.write(f"{stack} {n}\n")
+
+
+class Profile:
+    """
+    Profile the calling thread until stop(), then write the result to a file:
+    collapsed stacks for a path ending in .folded, cProfile statistics otherwise.
+    """
+    def __init__(self, path, interval=0.005):
+        self.path = path
+        if path.endswith(".folded"):
+            self._sampler = SamplingProfiler(interval).start()
+            self._profile = None
+        else:
+            import cProfile
+            self._sampler = None
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def stop(self):
+        if self._sampler is not None:
+            self._sampler.stop()
+            self._sampler.write(self.path)
+        else:
+            self._profile.disable()
+            self._profile.dump_stats(self.path)
@@ -0,0 +1,404 @@
+"""
+In this problem, there is a class named Quiz_item that models multiple choice questions. The class should have attributes 
+for the question, choices, correct answer. Also, the class has methods for changing the question, 
+each choice, and the correct answer. 
+"""
+
+from collections.abc import Sequence
+
+from question_bank import QuestionBank
+from quiz_metrics import metrics
+from quiz_render import display_text, format_missed, format_prompt
+
+
+class _ItemBank(QuestionBank):
+    # The bank of its own of a Quiz_item that is in no quiz yet
+    __slots__ = ()
+
+
+class Quiz_item:
+    # A Quiz_item is only a view onto one row of a QuestionBank, so it carries no __dict__
+    __slots__ = ("_bank", "_row")
+
+    @metrics.timed("item_init")
+    def __init__(self, question, choice, correct_answer):
+        """
+        Purpose: Initialize a Quiz_item object 
+        Inputs: question(str): The quiz question 
+                choice(list[str]): List of choices
+                correct_answer(str): The correct answer
+                
+        Output: ValueError: If inputs are invalid 
+        """
+        # Validate that question is a non-empty string
+        if not isinstance (question, str) or not question.strip():
+            raise ValueError("question must be a non-empty string")
+        # Validate that choice is a list of non-empty strings
+        if not isinstance(choice, list):
+            raise ValueError("choice must be a list of strings")
+        if len(choice) < 2:
+            raise ValueError("There must be at least two choices")
+        if not all(isinstance(c, str) and c.strip() for c in choice):
+            raise ValueError("each choice must be a non-empty string")
+        # Validate correct_answer
+        if not isinstance(correct_answer, str) or not correct_answer.strip():
+            raise ValueError("correct answer must be a non-empty string")
+
+        # Until the item is added to a Quiz it lives in a bank of its own. Storing
+        # the choices interns them, so equal choices (which would make the correct
+        # answer ambiguous) show up as equal string ids
+        bank = _ItemBank()
+        row = bank.append(question, choice, 0)
+        if bank.distinct_choices(row) != len(choice):
+            raise ValueError("choices must be different from each other")
+        try:
+            # One pass over the list, no lookup table: the item is often added to a quiz next
+            bank.set_correct_index(row, choice.index(correct_answer))
+        except ValueError:
+            raise ValueError("Correct answer must be one of the choices") from None
+        self._bank = bank
+        self._row = row
+
+    @classmethod
+    def _view(cls, bank, row):
+        """
+        Build a Quiz_item over an existing row of a QuestionBank without copying it.
+        """
+        item = cls.__new__(cls)
+        item._bank = bank
+        item._row = row
+        return item
+
+    @property
+    def question(self):
+        return self._bank.question(self._row)
+
+    @property
+    def choices(self):
+        return self._bank.choices(self._row)
+
+    @property
+    def correct_answer(self):
+        return self._bank.correct_answer(self._row)
+
+    @property
+    def correct_index(self):
+        return self._bank.correct_index(self._row)
+    
+    def set_question(self, question):
+        """
+        Update the quiz question
+        Inputs: question(str): New question text
+        Output: ValueError: If question is invalid
+        """
+        if not isinstance(question, str) or not question.strip():
+            raise ValueError("Question must be a non-empty string")
+        self._bank.set_question(self._row, question)
+    
+    def set_choices(self, index, choice):
+        """
+        Update a specific choice at a given index. The correct answer stays the
+        choice at the same index.
+        Inputs: index(int): Index of the choice to update
+                choice(str): New choice text
+        Outputs: ValueError: If the choice is invalid or the same as another choice
+                 IndexError: If the index is out of range
+        """
+        if not isinstance(choice, str) or not choice.strip():
+            raise ValueError("choice must be a non-empty string")
+        self._bank.set_choice(self._row, index, choice, distinct=True)
+    
+    def set_correct_answer(self, correct_answer):
+        """
+        Update the correct answer
+        Inputs: correct_answer (str): The new correct answer.
+        Outputs: ValueError: If invalid 
+        """
+        if not isinstance(correct_answer, str) or not correct_answer.strip():
+            raise ValueError("correct answer must be a non-empty string")
+        index = self._bank.choice_index(self._row, correct_answer)
+        if index < 0:
+            raise ValueError("Correct answer must be one of the choices")
+        self._bank.set_correct_index(self._row, index)
+
+    def set_correct_index(self, index):
+        """
+        Update the correct answer by its position among the choices
+        Inputs: index(int): Index of the correct choice
+        Outputs: IndexError: If the index is out of range
+        """
+        if not 0 <= index < self._bank.choice_count(self._row):
+            raise IndexError("Choice index is out of range")
+        self._bank.set_correct_index(self._row, index)
+    
+    def get_question(self):
+        """
+        Get the quiz question
+        Returns: str: The question text 
+        """
+        return self._bank.question(self._row)
+    
+    def get_choice(self, index):
+        """
+        Get a specific choice by index.
+        Inputs: index(int): The index of the choice 
+        Returns: str: The choice 
+        Raises: IndexError: if index is out of range
+        """
+        if 0 <= index < self._bank.choice_count(self._row):
+            return self._bank.choice(self._row, index)
+        else:
+            raise IndexError("Choice index is out of range")
+    
+    def get_correct_answer(self):
+        """
+        Get the correct answer 
+        Returns: str: Correct answer 
+        """
+        return self._bank.correct_answer(self._row)
+
+    def get_correct_index(self):
+        """
+        Get the position of the correct answer among the choices
+        Returns: int: Index of the correct choice
+        """
+        return self._bank.correct_index(self._row)
+
+    def choice_index(self, choice):
+        """
+        Find a choice by its text, in O(1)
+        Inputs: choice(str): The choice text
+        Returns: int: Its index, -1 if it is not one of the choices
+        """
+        return self._bank.choice_index(self._row, choice)
+
+    def set_tags(self, tags):
+        """
+        Replace the tags of the question (e.g. topic or difficulty labels)
+        Inputs: tags(list[str]): The new tags, may be empty
+        Outputs: ValueError: If a tag is not a non-empty string
+        """
+        if not isinstance(tags, list) or not all(isinstance(t, str) and t.strip() for t in tags):
+            raise ValueError("tags must be a list of non-empty strings")
+        self._bank.set_tags(self._row, tags)
+
+    def get_tags(self):
+        """
+        Get the tags of the question
+        Returns: list[str]: The tags
+        """
+        return self._bank.tags(self._row)
+
+"""
+In this program there is a class named Quiz, that will use Quiz_item
+to model a quiz. Then develop a terminal-based system that allows a user 
+to add a new quiz item to the quiz, view all the quiz items in the quiz, 
+modify individual quiz items, and take the quiz by seeing and answering 
+quiz questions one by one.
+"""
+
+class Questions(Sequence):
+    """
+    Read-only list of the questions of a Quiz. Items are built on demand as
+    Quiz_item views over the quiz's QuestionBank.
+    """
+    __slots__ = ("_bank",)
+
+    def __init__(self, bank):
+        self._bank = bank
+
+    def __len__(self):
+        return len(self._bank)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [Quiz_item._view(self._bank, row) for row in range(len(self._bank))[i]]
+        n = len(self._bank)
+        if i < 0:
+            i = i + n
+        if not 0 <= i < n:
+            raise IndexError("question index out of range")
+        return Quiz_item._view(self._bank, i)
+
+    def __iter__(self):
+        bank = self._bank
+        for row in range(len(bank)):
+            yield Quiz_item._view(bank, row)
+
+class Quiz:
+    def __init__(self, loader=None):
+        """
+        Initialize an empty quiz.
+        Inputs:  loader(function(QuestionBank)): Optional function that fills the
+                 question bank the first time the questions are used (e.g. QuizStore.loader)
+        Outputs: None
+        """
+        self._bank = QuestionBank()
+        self._loader = loader
+        self._versions = None       # QuizVersions, once a snapshot has been taken
+
+    @property
+    def bank(self):
+        """
+        The QuestionBank holding the questions, loaded on first use.
+        """
+        if self._loader is not None:
+            loader = self._loader
+            self._loader = None
+            loader(self._bank)
+        return self._bank
+
+    @property
+    def loaded(self):
+        """
+        Whether the questions have been loaded (always True without a loader).
+        """
+        return self._loader is None
+
+    @property
+    def questions(self):
+        return Questions(self.bank)
+
+    def snapshot(self):
+        """
+        A read-only copy of the quiz as it is now, for a session to be taken
+        from while the quiz keeps being edited. O(1): rows are only copied when
+        they are edited (see quiz_versions).
+        Returns: QuizSnapshot
+        """
+        if self._versions is None:
+            from quiz_versions import QuizVersions
+            self._versions = QuizVersions(self.bank)
+        return self._versions.snapshot()
+
+    def add_question(self, my_quiz):
+        """
+        Add a `Quiz_item` to the quiz.
+        Purpose:
+            Ensures only valid Quiz_item objects are added to the internal list.
+            The item becomes a view of the quiz's copy of the question, so later
+            edits through the item reach the quiz. An item can join one quiz only:
+            one taken from a quiz (e.g. quiz.questions[0]) is refused rather than
+            moved, so it keeps editing the quiz it came from. To put the same
+            question in another quiz, build a new Quiz_item from its text.
+        Inputs:
+            my_quiz (Quiz_item): The question to add.
+        Outputs:
+            None
+        Raises:
+            TypeError: If `my_quiz` is not a Quiz_item instance.
+            ValueError: If `my_quiz` is already in a quiz.
+        """
+        self._check_new(my_quiz)
+        row = self.bank.append_row(my_quiz._bank, my_quiz._row)
+        my_quiz._bank = self.bank
+        my_quiz._row = row
+
+    @staticmethod
+    def _check_new(my_quiz):
+        """
+        Check that an item can be added to a quiz: a Quiz_item that is in no quiz yet.
+        Raises: TypeError, ValueError
+        """
+        if not isinstance (my_quiz, Quiz_item):
+            raise TypeError("my_quiz must be a Quiz_item object")
+        if not isinstance(my_quiz._bank, _ItemBank):
+            raise ValueError("This question is already in a quiz")
+    
+    def add_rows(self, rows):
+        """
+        Add already validated questions in bulk (used by imports), without
+        building a Quiz_item for each.
+        Inputs:
+            rows (iterable): (question, choices, correct_index) or
+                (question, choices, correct_index, tags) tuples.
+        Outputs:
+            int: The row number of the first added question.
+        """
+        bank = self.bank
+        first = len(bank)
+        for values in rows:
+            bank.append(*values)
+        return first
+
+    def display_questions(self):
+        """
+        Print all questions with choices and correct answer
+        Purpose:
+            Provides a quick, non-interactive preview of the quiz content.
+        Inputs:
+            None
+        Outputs:
+            None 
+        """
+        if not self.questions:
+            print("No quiz available")
+            return 
+        questions = self.questions
+        for i in range(len(questions)):
+            # Rendered once per question until it is edited
+            print(display_text(questions[i], i + 1))
+    
+    def execute_quiz(self):
+        """
+        Purpose:
+            Prompts the user to answer each question by entering the index 
+        Inputs:
+            None 
+        Outputs:
+            int: The number of correct answers for this run.
+        """
+        if not self.questions:
+            print("No quiz available")
+            return 
+        score = 0
+        wrong_answers = []
+
+        for i in range(len(self.questions)):
+            q = self.questions[i]
+            choices = q.choices
+            print(format_prompt(i + 1, q.get_question(), choices))
+            # Keep asking until a valid index is provided
+            while True:
+                try:
+                    user_answer = int(input("Your answer: "))
+                    # Validate 1-based choice index
+                    if 1 <= user_answer <= len(choices):
+                        # Graded by position: no string comparison
+                        correct_index = q.correct_index
+                        if user_answer - 1 == correct_index:
+                            score = score + 1
+                            print("Correct!")
+                        else:
+                            wrong_answers.append((i+1, q.get_question(), choices[user_answer - 1],
+                                                  choices[correct_index]))
+                            print("Incorrect!")
+                        break
+                    else: 
+                        print(f"Please enter a number between 1 and {len(choices)}")
+                except ValueError:
+                    # Handles non-integer input 
+                    print("Please enter a valid number")
+        
+        percentage = (score/ len(self.questions)) * 100
+        print(f"Final Percentage: {percentage} %")
+
+        if wrong_answers:
+            print("Incorrect answers: ")
+            print("\n".join(format_missed(wrong_answers)))
+        
+        return score
+
+    def grade_batch(self, chosen):
+        """
+        Purpose:
+            Grade many answer sheets at once (needs NumPy), instead of one
+            execute_quiz run per taker.
+        Inputs:
+            chosen (array-like): (takers, questions) matrix of chosen choice
+                indices, 0-based, -1 for an unanswered question.
+        Outputs:
+            BatchGrades: scores, percentages and missed questions per taker.
+        """
+        from quiz_grading import grade
+        return grade(self, chosen)
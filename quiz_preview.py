@@ -0,0 +1,73 @@
+"""
+Lazy line model for the quiz preview.
+
+The preview lists every question as:
+    <n>. <question>
+    1) <choice>
+    ...
+    Correct: <correct answer>
+
+PreviewLines gives random access to those lines without building them all:
+question i always starts at line 2*i + (number of choices before it), which
+comes straight from the QuestionBank's choice offsets, so any line is found
+with a binary search and rendered on demand. Rendered questions are kept in the
+bank's RenderCache (quiz_render), which only drops the questions that are edited.
+"""
+
+from bisect import bisect_right
+
+from quiz_render import preview_lines
+
+
+class PreviewLines:
+    def __init__(self, quiz):
+        """
+        Inputs: quiz(Quiz): The quiz to preview
+        Outputs: None
+        """
+        self.quiz = quiz
+
+    def __len__(self):
+        bank = self.quiz.bank
+        return 2 * len(bank) + bank.choice_offsets()[len(bank)]
+
+    def _first_line(self, row):
+        return 2 * row + self.quiz.bank.choice_offsets()[row]
+
+    def locate(self, line):
+        """
+        Find which question a line belongs to.
+        Returns: tuple(int, int): row of the question and position of the line within it
+                 (0 for the question, 1..n for the choices, n+1 for the correct answer)
+        """
+        bank = self.quiz.bank
+        row = bisect_right(range(len(bank)), line, key=self._first_line) - 1
+        return row, line - self._first_line(row)
+
+    def __getitem__(self, line):
+        if not 0 <= line < len(self):
+            raise IndexError("preview line out of range")
+        row, part = self.locate(line)
+        return preview_lines(self.quiz.bank, row)[part]
+
+    def window(self, first, count):
+        """
+        Get the lines first .. first + count - 1 (fewer at the end of the quiz).
+        """
+        last = min(first + count, len(self))
+        first = max(first, 0)
+        count = last - first
+        if count <= 0:
+            return []
+        # One search for the first line, then the questions follow each other
+        bank = self.quiz.bank
+        row, part = self.locate(first)
+        lines = list(preview_lines(bank, row)[part:part + count])
+        while len(lines) < count:
+            row = row + 1
+            lines.extend(preview_lines(bank, row)[:count - len(lines)])
+        return lines
+
+    @property
+    def version(self):
+        return self.quiz.bank.version
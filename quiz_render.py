@@ -0,0 +1,191 @@
+"""
+Cached rendering of question text.
+
+The same questions are rendered over and over: the option labels of the quiz
+window for every taker, the preview lines on every scroll, display_questions
+on every call. A question's text only changes when it is
+edited, so the text rendered from a QuestionBank row is kept in the bank's
+RenderCache, keyed by row and kind of rendering:
+
+    - the cache is one of the bank's listeners, and a row's entries are
+      dropped as soon as the row is edited (its "change" event), so stale
+      text is never served and the rest of the quiz stays cached
+    - it holds at most `size` rows, least recently used evicted first
+    - it lives as long as its bank
+
+Items are found in the bank they read from (Quiz_item, and SnapshotItem while
+its row has not changed since the snapshot); other items (e.g. ExamItem, whose
+choices are shuffled per exam) are rendered every time.
+
+The result summary of a finished quiz (format_results, format_missed) is
+formatted here too, for every front end that shows one.
+"""
+
+from collections import OrderedDict
+
+from question_bank import QuestionBank
+from quiz_versions import SnapshotItem
+
+CACHE_SIZE = 4096
+
+
+class RenderCache:
+    """
+    Rendered text of the rows of one QuestionBank. Register with render_cache(bank).
+    """
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self._rows = OrderedDict()      # row -> {kind: text}, least recently used first
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __call__(self, bank, row, event):
+        if event == "change":
+            self._rows.pop(row, None)
+
+    def get(self, bank, row, kind, render):
+        """
+        The text of one kind for a row, rendered on first use.
+        Inputs: bank(QuestionBank): The bank this cache belongs to
+                row(int): The row
+                kind(str): Name of the rendering
+                render(function(bank, row)): Renders it
+        """
+        rows = self._rows
+        entry = rows.get(row)
+        if entry is None:
+            entry = rows[row] = {}
+            if len(rows) > self.size:
+                rows.popitem(last=False)
+        else:
+            rows.move_to_end(row)
+        text = entry.get(kind)
+        if text is None:
+            self.misses = self.misses + 1
+            text = entry[kind] = render(bank, row)
+        else:
+            self.hits = self.hits + 1
+        return text
+
+
+def render_cache(bank):
+    """
+    The RenderCache of a bank, created and registered on first use.
+    """
+    for listener in bank.listeners:
+        if isinstance(listener, RenderCache):
+            return listener
+    cache = RenderCache()
+    bank.listeners.append(cache)
+    return cache
+
+
+def source(item):
+    """
+    The bank and row an item reads its current text from.
+    Returns: tuple(QuestionBank, int), or None if the item cannot be cached
+    """
+    if isinstance(item, SnapshotItem):
+        snapshot = item._snapshot
+        if snapshot.versions.row(snapshot.version, item.row) is not None:
+            return None     # edited since the snapshot: the bank no longer has its text
+        return snapshot.versions.bank, item.row
+    bank = getattr(item, "_bank", None)
+    if bank is None:
+        return None
+    if not isinstance(bank, QuestionBank):
+        # Stands in for the bank holding the row now (e.g. quiz_sqlite's DbRows)
+        return bank.locate(item._row)
+    return bank, item._row
+
+
+def _cached(item, kind, render, fallback):
+    found = source(item)
+    if found is None:
+        return fallback(item)
+    bank, row = found
+    return render_cache(bank).get(bank, row, kind, render)
+
+
+# Renderings, from a bank row or from any item
+
+def _options(choices):
+    return tuple((str(j + 1) + ". " + choices[j], j) for j in range(len(choices)))
+
+
+def option_labels(item):
+    """
+    The (label, value) pairs of the quiz window's choice buttons: ("1. <choice>", 0), ...
+    The value is the choice's index.
+    """
+    return _cached(item, "options", lambda bank, row: _options(bank.choices(row)),
+                   lambda item: _options(item.choices))
+
+
+def format_prompt(number, question, choices):
+    """
+    A question and its numbered choices, as execute_quiz asks it (not cached:
+    a run asks each question once).
+    """
+    lines = [f"{number}: {question}"]
+    lines.extend(f"{j + 1}. {choices[j]}" for j in range(len(choices)))
+    return "\n".join(lines)
+
+
+def display_text(item, number):
+    """
+    A question, its numbered choices and its correct answer, as display_questions prints it.
+    """
+    return _cached(item, ("display", number),
+                   lambda bank, row: (format_prompt(number, bank.question(row), bank.choices(row)) +
+                                      "\nCorrect Answer: " + bank.correct_answer(row)),
+                   lambda item: (format_prompt(number, item.get_question(), item.choices) +
+                                 "\nCorrect Answer: " + item.get_correct_answer()))
+
+
+def _preview(bank, row):
+    lines = [f"{row + 1}. {bank.question(row)}"]
+    lines.extend(f"{j + 1}) {choice}" for j, choice in enumerate(bank.choices(row)))
+    lines.append(f"Correct: {bank.correct_answer(row)}")
+    return tuple(lines)
+
+
+def preview_lines(bank, row):
+    """
+    The preview lines of a bank row: "<n>. <question>", "1) <choice>", ..., "Correct: <answer>".
+    """
+    return render_cache(bank).get(bank, row, "preview", _preview)
+
+
+def format_results(score, total, missed):
+    """
+    Format a result summary the way the quiz window shows it.
+    Inputs: score(int): Number of correct answers
+            total(int): Number of questions
+            missed(list): (q_number, question_text, your_answer, correct_answer) tuples
+    Returns: str
+    """
+    pct = (score / total) * 100
+    result_lines = [f"Quiz Completed!\nScore: {score}/{total} ({pct}%)"]
+    if missed:
+        result_lines.append("Incorrect answers:")
+        result_lines.extend(format_missed(missed))
+    return "\n".join(result_lines)
+
+
+def format_missed(missed):
+    """
+    The lines of the missed-answer report (results window, execute_quiz).
+    Inputs: missed(list): (q_number, question_text, your_answer, correct_answer) tuples,
+                your_answer None for a question skipped or out of time
+    Returns: list[str]
+    """
+    lines = []
+    for n, ques, your, corr in missed:
+        lines.append(f"Q{n}: {ques}")
+        lines.append(f"Your answer: {your if your is not None else '(no answer)'}")
+        lines.append(f"Correct answer: {corr}")
+    return lines
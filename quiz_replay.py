@@ -0,0 +1,511 @@
+"""
+Session replay log and load generator for the quiz flow.
+
+The GUI can record every quiz it runs (QUIZ_REPLAY_LOG=<path>): question
+shown, answer chosen, timer tick, finish and timeout, one fixed-size binary
+record each:
+    record : kind (1 byte) + session (4 bytes) + time (8 bytes, seconds)
+             + question index (4 bytes) + value (4 bytes)
+    start  : the record (index = number of questions, value = length of the
+             name) followed by the time budget, the time left, the limit per
+             question, the exam seed and length, and the quiz name
+The value is the chosen choice's index for an answer, the time left for a
+tick and the score for a finish or a timeout. Every time the log is opened a
+run record is written, so session ids only need to be unique within a run.
+Records are flushed to the OS as they are written, so a crash of the program
+loses none of them (a torn last record is skipped when the log is read).
+
+replay() drives the same flow headlessly from a log, at N times the recorded
+speed or as fast as possible. Sessions run on a virtual clock that follows the
+recorded times, so timeouts happen at the same moments whatever the speed, and
+each session's outcome is checked against the log. synthetic_sessions() makes
+logs of realistic sessions (staggered starts, varying pace and skill) for any
+quiz, so the same replayer doubles as a load generator:
+    python quiz_replay.py replay sessions.qzr --speed 10
+    python quiz_replay.py load --questions 100000 --sessions 5000
+The report gives throughput, latency percentiles per kind of event and the
+memory high-water marks.
+
+Sessions are rebuilt from the quizzes as they are at replay time, and exams
+from their seed. Sessions that cannot be rebuilt that way (adaptive tests)
+are not recorded.
+"""
+
+import argparse
+import heapq
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+
+from quiz_exam import ExamItem, ExamSampler
+from quiz_model import Quiz
+from quiz_render import option_labels
+from quiz_session import SECONDS_PER_QUESTION, QuizSession
+
+MAGIC = b"QZRP\x01"
+EVENT = struct.Struct("<BIdii")         # kind, session, time, question index, value
+START_INFO = struct.Struct("<dddqI")    # time budget, time left, seconds per question (0: none), exam seed, exam length
+
+RUN, START, SHOWN, ANSWER, TICK, FINISH, TIMEOUT = range(7)
+KINDS = ("run", "start", "shown", "answer", "tick", "finish", "timeout")
+
+
+def _pack(kind, sid, t, index, value, info=None):
+    if kind != START:
+        return EVENT.pack(kind, sid, t, index, value)
+    total_time, remaining, question_seconds, seed, length, name = info
+    name = name.encode("utf-8")
+    return (EVENT.pack(kind, sid, t, index, len(name)) +
+            START_INFO.pack(total_time, remaining, question_seconds or 0.0, seed, length) + name)
+
+
+def read_events(path):
+    """
+    Read the records of a log, in the order they were written.
+    Yields: tuple: (kind, session, time, index, value, info), info being
+            (time budget, time left, seconds per question or None, exam seed,
+            exam length or 0, quiz name) for a start and None otherwise.
+            Sessions are numbered (run, session id).
+    Raises: ValueError: If the file is not a replay log
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(path + " is not a session replay log")
+    unpack, size = EVENT.unpack_from, EVENT.size
+    run = 0
+    pos = len(MAGIC)
+    while pos + size <= len(data):      # a torn record at the end is left out
+        kind, sid, t, index, value = unpack(data, pos)
+        pos = pos + size
+        info = None
+        if kind == RUN:
+            run = run + 1
+            continue
+        if kind == START:
+            end = pos + START_INFO.size + value
+            if end > len(data):
+                break
+            total_time, remaining, question_seconds, seed, length = START_INFO.unpack_from(data, pos)
+            info = (total_time, remaining, question_seconds or None, seed, length,
+                    data[pos + START_INFO.size:end].decode("utf-8"))
+            pos = end
+        yield kind, (run, sid), t, index, value, info
+
+
+def write_events(path, events):
+    """
+    Write a log from (kind, session, time, index, value, info) events, e.g.
+    from synthetic_sessions().
+    Returns: int: Number of events written
+    """
+    count = 0
+    with open(path, "wb") as f:
+        f.write(MAGIC + _pack(RUN, 0, 0.0, 0, 0))
+        for event in events:
+            f.write(_pack(*event))
+            count = count + 1
+    return count
+
+
+class SessionRecorder:
+    def __init__(self, path):
+        """
+        Open a replay log for appending; a new log is created if needed.
+        Inputs: path(str): The log file
+        Outputs: None
+        """
+        self.path = path
+        self._file = open(path, "ab")
+        # Wall-clock times, so the runs appended to one log stay in order
+        self._base = time.time() - time.monotonic()
+        self._next_id = 1
+        self._write((MAGIC if self._file.tell() == 0 else b"") + _pack(RUN, 0, self._now(), 0, 0))
+
+    def _write(self, data):
+        """
+        Append records and hand them to the OS, so they survive a crash of the program.
+        """
+        self._file.write(data)
+        self._file.flush()
+
+    def _now(self):
+        return self._base + time.monotonic()
+
+    def start(self, session, name):
+        """
+        Record the start (or the resumption) of a session. A resumed session's
+        earlier answers are recorded again, so the replay starts from the same point.
+        Inputs: session(QuizSession): The session
+                name(str): The quiz it takes
+        Returns: int: The id to record the session's events with, or None if it
+                 cannot be replayed (it is then not recorded)
+        """
+        if type(session) is not QuizSession:
+            return None
+        first = session.questions[0]
+        exam = first._exam if isinstance(first, ExamItem) else None
+        if exam is not None and (exam.seed is None or not -2 ** 63 <= exam.seed < 2 ** 63):
+            return None
+        sid = self._next_id
+        self._next_id = sid + 1
+        t = self._now()
+        info = (session.total_time, session.clock.remaining(), session.question_seconds,
+                exam.seed if exam is not None else 0, len(exam) if exam is not None else 0, name)
+        records = [_pack(START, sid, t, session.total, 0, info)]
+        records.extend(_pack(ANSWER, sid, t, index, position) for index, position, _ in session.responses)
+        self._write(b"".join(records))
+        return sid
+
+    def shown(self, sid, session):
+        self._write(_pack(SHOWN, sid, self._now(), session.index, 0))
+
+    def answer(self, sid, session, position):
+        """
+        Record an answer; called before the session takes it.
+        """
+        self._write(_pack(ANSWER, sid, self._now(), session.index, position))
+
+    def tick(self, sid, session):
+        """
+        Record a timer tick; called after session.tick().
+        """
+        self._write(_pack(TICK, sid, self._now(), session.index, session.remaining_time))
+
+    def finish(self, sid, session):
+        kind = TIMEOUT if session.timed_out else FINISH
+        self._write(_pack(kind, sid, self._now(), session.index, session.score))
+
+    def close(self):
+        self._file.close()
+
+
+# Replay
+
+class ReplayReport:
+    """
+    What a replay did and what it cost.
+    Attributes: sessions(int): Sessions replayed
+                events(int): Events replayed
+                elapsed(float): Wall-clock seconds
+                latencies(dict): kind name -> array of seconds spent on each event
+                mismatches(list): (session, message) for sessions that did not end as logged
+                skipped(int): Sessions whose quiz is missing
+                peak_sessions(int): Most sessions running at once
+                lag(float): Most seconds an event was handled behind its paced time
+                peak_memory(int): Python heap high-water mark in bytes (with trace_memory), or None
+                max_rss(int): Process resident set high-water mark in bytes, or None
+    """
+    def __init__(self):
+        self.sessions = 0
+        self.events = 0
+        self.elapsed = 0.0
+        self.latencies = {name: array("d") for name in KINDS[START:]}
+        self.mismatches = []
+        self.skipped = 0
+        self.peak_sessions = 0
+        self.lag = 0.0
+        self.peak_memory = None
+        self.max_rss = None
+
+    def percentile(self, kind, q):
+        """
+        The q-quantile (0 to 1) of the time spent on one kind of event, in seconds.
+        """
+        values = sorted(self.latencies[kind])
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+    def __str__(self):
+        rate = self.events / self.elapsed if self.elapsed else 0.0
+        lines = [f"{self.sessions:,} sessions, {self.events:,} events in {self.elapsed:.2f} s: "
+                 f"{rate:,.0f} events/s, {self.sessions / self.elapsed if self.elapsed else 0.0:,.1f} sessions/s, "
+                 f"at most {self.peak_sessions:,} at once"]
+        lines.append(f"{'event':8s} {'count':>10s} {'p50':>9s} {'p90':>9s} {'p99':>9s} {'p99.9':>9s} {'max':>9s}")
+        for kind, values in self.latencies.items():
+            if values:
+                cells = " ".join(f"{self.percentile(kind, q) * 1e6:7.1f}us" for q in (0.5, 0.9, 0.99, 0.999))
+                lines.append(f"{kind:8s} {len(values):10,} {cells} {max(values) * 1e6:7.1f}us")
+        if self.lag:
+            lines.append(f"fell behind the paced time by up to {self.lag * 1000:.1f} ms")
+        memory = []
+        if self.peak_memory is not None:
+            memory.append(f"Python heap peak {self.peak_memory / 1e6:.1f} MB")
+        if self.max_rss is not None:
+            memory.append(f"process RSS peak {self.max_rss / 1e6:.1f} MB")
+        if memory:
+            lines.append("memory: " + ", ".join(memory))
+        if self.skipped:
+            lines.append(f"{self.skipped:,} sessions skipped (quiz not found)")
+        lines.append(f"{len(self.mismatches):,} sessions did not end as logged")
+        for session, message in self.mismatches[:10]:
+            lines.append(f"  session {session}: {message}")
+        return "\n".join(lines)
+
+
+def max_rss():
+    """
+    The process's resident set high-water mark in bytes, None where it is not available.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def replay(events, quizzes, speed=None, trace_memory=False):
+    """
+    Drive the recorded sessions headlessly, doing for each event what the quiz
+    window does: render the question and its options, check and redraw the
+    timer, take the answer, show the results.
+    Inputs: events(iterable): (kind, session, time, index, value, info) in time
+                order, from read_events() or synthetic_sessions()
+            quizzes(dict): name -> Quiz
+            speed(float): Play at this many times the recorded speed; None (or 0)
+                for as fast as possible
+            trace_memory(bool): Trace Python allocations for the heap high-water
+                mark (slows the replay down)
+    Returns: ReplayReport
+    """
+    report = ReplayReport()
+    latencies = [report.latencies.get(name) for name in KINDS]
+    sessions = {}           # session -> QuizSession, while it runs
+    samplers = {}           # quiz name -> ExamSampler
+    virtual = [0.0]         # recorded time of the event being replayed
+
+    def clock():
+        return virtual[0]
+
+    def start(key, index, info):
+        total_time, remaining, question_seconds, seed, length, name = info
+        quiz = quizzes.get(name)
+        if quiz is None:
+            report.skipped = report.skipped + 1
+            return
+        if length:
+            sampler = samplers.get(name)
+            if sampler is None:
+                sampler = samplers[name] = ExamSampler(quiz)
+            quiz = sampler.assemble(length, seed=seed)
+        else:
+            quiz = quiz.snapshot()
+        session = QuizSession(quiz, name, question_seconds=question_seconds, clock=clock)
+        if session.total != index:
+            report.mismatches.append((key, f"{session.total} questions, {index} logged"))
+        session.total_time = total_time
+        session.remaining_time = remaining
+        sessions[key] = session
+        report.sessions = report.sessions + 1
+        report.peak_sessions = max(report.peak_sessions, len(sessions))
+
+    def shown(session):
+        q = session.current_question()
+        if q is not None:
+            return "Q" + str(session.index + 1) + ": " + q.get_question(), option_labels(q), session.is_last_question()
+
+    def tick(session):
+        session.tick()
+        session.time_text()
+        session.progress_text()
+        session.until_change()
+
+    def end(key, session, kind, value):
+        if kind == TIMEOUT:
+            session.tick()
+            if not session.timed_out:
+                report.mismatches.append((key, "did not time out"))
+                session.timeout()
+        else:
+            if session.timed_out:
+                report.mismatches.append((key, "timed out"))
+            session.finish()
+        session.result_text()
+        if session.score != value:
+            report.mismatches.append((key, f"score {session.score}, {value} logged"))
+        del sessions[key]
+
+    if trace_memory:
+        tracemalloc.start()
+    paced = bool(speed)
+    first = None
+    began = time.perf_counter()
+    perf = time.perf_counter
+    for kind, key, t, index, value, info in events:
+        if paced:
+            if first is None:
+                first = t
+            due = began + (t - first) / speed
+            now = perf()
+            if now < due:
+                time.sleep(due - now)
+            else:
+                report.lag = max(report.lag, now - due)
+        virtual[0] = t
+        report.events = report.events + 1
+        before = perf()
+        if kind == START:
+            start(key, index, info)
+        else:
+            session = sessions.get(key)
+            if session is None:
+                continue
+            if session.index != index and kind != TICK:
+                report.mismatches.append((key, f"at question {session.index + 1}, {index + 1} logged"))
+                del sessions[key]
+                continue
+            if kind == SHOWN:
+                shown(session)
+            elif kind == ANSWER and value < 0:
+                session.skip()      # a question skipped before the session was resumed
+            elif kind == ANSWER:
+                try:
+                    session.answer_index(value)
+                except ValueError as e:
+                    report.mismatches.append((key, str(e)))
+                    del sessions[key]
+            elif kind == TICK:
+                tick(session)
+            elif kind in (FINISH, TIMEOUT):
+                end(key, session, kind, value)
+        latencies[kind].append(perf() - before)
+    report.elapsed = time.perf_counter() - began
+    if trace_memory:
+        report.peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    report.max_rss = max_rss()
+    return report
+
+
+# Load generation
+
+def synthetic_sessions(quiz, name, sessions, length=20, window=60.0, think=12.0, seed=0,
+                       seconds_per_question=SECONDS_PER_QUESTION):
+    """
+    Realistic sessions of a quiz, as a replay log's events in time order. Takers
+    start at random moments of a time window and each has a pace and a chance of
+    answering right of their own; the time spent on a question varies around
+    `think` seconds. Slow takers run out of time. The timer ticks once a second,
+    as the quiz window's does. The same seed gives the same sessions.
+    Inputs: quiz(Quiz): The quiz
+            name(str): Its name
+            sessions(int): Number of sessions
+            length(int): Questions per session, drawn as a shuffled exam; 0 for the
+                whole quiz in order
+            window(float): Seconds over which the sessions start
+            think(float): Median seconds per question
+            seed(int): Seed of the sessions
+            seconds_per_question(int): Time budget per question
+    Yields: tuple: (kind, session, time, index, value, info)
+    """
+    sampler = ExamSampler(quiz) if length else None
+    whole = None if length else quiz.questions
+
+    def one(sid):
+        rng = random.Random(seed * 1_000_003 + sid)
+        start = rng.uniform(0.0, window)
+        if sampler is not None:
+            exam_seed = rng.randrange(1 << 63)
+            questions = sampler.assemble(length, seed=exam_seed).questions
+        else:
+            exam_seed, questions = 0, whole
+        n = len(questions)
+        total = n * seconds_per_question
+        deadline = start + total
+        skill = rng.uniform(0.35, 0.95)
+        pace = think * rng.lognormvariate(0.0, 0.35)
+        yield START, sid, start, n, 0, (total, total, None, exam_seed, n if length else 0, name)
+
+        t = start
+        ticks = 1                   # next tick at start + ticks seconds
+        score = 0
+        for index, q in enumerate(questions):
+            yield SHOWN, sid, t, index, 0, None
+            answered = t + pace * rng.lognormvariate(0.0, 0.5)
+            while ticks <= total and start + ticks <= min(answered, deadline):
+                yield TICK, sid, start + ticks, index, total - ticks, None
+                ticks = ticks + 1
+            if answered >= deadline:
+                yield TIMEOUT, sid, deadline, index, score, None
+                return
+            correct = q.correct_index
+            if rng.random() < skill:
+                position = correct
+                score = score + 1
+            else:
+                position = rng.randrange(len(q.choices) - 1)
+                position = position + (position >= correct)
+            yield ANSWER, sid, answered, index, position, None
+            t = answered
+        yield FINISH, sid, t, n, score, None
+
+    return heapq.merge(*(one(sid) for sid in range(1, sessions + 1)), key=lambda event: event[2])
+
+
+def synthetic_quiz(questions, choices=4):
+    """
+    A quiz of numbered questions, for load tests.
+    """
+    quiz = Quiz()
+    quiz.add_rows((f"Question {i}?", [f"Answer {i}.{k}" for k in range(choices)], i % choices)
+                  for i in range(questions))
+    return quiz
+
+
+def main(argv=None):
+    from quiz_store import QuizStore
+
+    parser = argparse.ArgumentParser(description="Replay recorded quiz sessions, or generate load")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="times the recorded speed; 0 for as fast as possible")
+    parser.add_argument("--memory", action="store_true", help="trace the Python heap high-water mark (slower)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rep = sub.add_parser("replay", help="replay a log against the stored quizzes")
+    rep.add_argument("log")
+    rep.add_argument("--store", default=os.environ.get("QUIZ_STORE", "quizzes.qzs"))
+    load = sub.add_parser("load", help="generate and replay synthetic sessions")
+    load.add_argument("--questions", type=int, default=10_000, help="questions in the quiz")
+    load.add_argument("--sessions", type=int, default=2_000)
+    load.add_argument("--length", type=int, default=20, help="questions per session; 0 for the whole quiz")
+    load.add_argument("--window", type=float, default=60.0, help="seconds over which the sessions start")
+    load.add_argument("--seed", type=int, default=0)
+    load.add_argument("--log", help="keep the generated log in this file")
+    args = parser.parse_args(argv)
+
+    if args.command == "replay":
+        store = QuizStore(args.store)
+        try:
+            quizzes = {name: Quiz(loader=store.loader(name)) for name in store.names()}
+            print(replay(read_events(args.log), quizzes, args.speed, args.memory))
+        finally:
+            store.close()
+        return
+
+    # The sessions are written to a log first and streamed from it, so generating
+    # them is not part of the measurement
+    quiz = synthetic_quiz(args.questions)
+    path = args.log
+    if not path:
+        fd, path = tempfile.mkstemp(suffix=".qzr")
+        os.close(fd)
+    try:
+        start = time.perf_counter()
+        count = write_events(path, synthetic_sessions(quiz, "Load", args.sessions, args.length, args.window,
+                                                      seed=args.seed))
+        print(f"{args.sessions:,} sessions on a quiz of {args.questions:,} questions: {count:,} events "
+              f"generated in {time.perf_counter() - start:.1f} s, {os.path.getsize(path) / count:.1f} bytes each")
+        print(replay(read_events(path), {"Load": quiz}, args.speed, args.memory))
+    finally:
+        if not args.log:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Result reports for many takers of many quizzes, built on a pool of processes.
+
+Each quiz's QuestionBank and answer matrix are copied once into shared memory;
+the takers are split into shards and every worker process attaches to the
+shared blocks by name, grades its shard and writes the result summary of each
+taker (in the format the quiz window shows) to a file of its own. Tasks carry
+only names and row ranges, so no quiz data is pickled per task, and question
+texts are only decoded for the questions a taker missed.
+
+Answer matrices are the ones Quiz.grade_batch takes: one row per taker, one
+column per question, 0-based chosen choice indices and -1 if unanswered.
+Needs NumPy:
+    pip install numpy
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from quiz_render import format_results
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("report generation needs NumPy: pip install numpy") from None
+    return numpy
+
+
+class SharedBank:
+    """
+    A read-only copy of a QuestionBank in one shared memory block:
+        header: rows, choices, strings, text bytes (uint64)
+        string offsets (uint64), then question ids, choice offsets, choice ids,
+        correct indices (uint32), then the UTF-8 text of every string
+    """
+    def __init__(self, shm):
+        np = _numpy()
+        self.shm = shm
+        rows, choices, strings, text = np.ndarray(4, dtype=np.uint64, buffer=shm.buf).tolist()
+        pos = 32
+        self.string_offsets = np.ndarray(strings + 1, dtype=np.uint64, buffer=shm.buf, offset=pos)
+        pos = pos + 8 * (strings + 1)
+        self.question_ids = np.ndarray(rows, dtype=np.uint32, buffer=shm.buf, offset=pos)
+        pos = pos + 4 * rows
+        self.offsets = np.ndarray(rows + 1, dtype=np.uint32, buffer=shm.buf, offset=pos)
+        pos = pos + 4 * (rows + 1)
+        self.choice_ids = np.ndarray(choices, dtype=np.uint32, buffer=shm.buf, offset=pos)
+        pos = pos + 4 * choices
+        self.correct = np.ndarray(rows, dtype=np.uint32, buffer=shm.buf, offset=pos)
+        pos = pos + 4 * rows
+        self.text = shm.buf[pos:pos + text]
+        self._decoded = {}      # string id -> str, filled as strings are used
+
+    @classmethod
+    def create(cls, bank):
+        """
+        Copy a bank into a new shared memory block (to be unlinked by the caller).
+        """
+        np = _numpy()
+        strings, questions, offsets, choices, correct = bank.columns()
+        encoded = [s.encode("utf-8") for s in strings]
+        string_offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+        np.cumsum([len(e) for e in encoded], out=string_offsets[1:])
+        text = b"".join(encoded)
+        parts = [np.array([len(questions), len(choices), len(encoded), len(text)], dtype=np.uint64).tobytes(),
+                 string_offsets.tobytes(), questions.tobytes(), offsets.tobytes(), choices.tobytes(),
+                 correct.tobytes(), text]
+        size = sum(len(p) for p in parts)
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        pos = 0
+        for p in parts:
+            shm.buf[pos:pos + len(p)] = p
+            pos = pos + len(p)
+        return cls(shm)
+
+    @classmethod
+    def attach(cls, name):
+        return cls(shared_memory.SharedMemory(name=name))
+
+    def __len__(self):
+        return len(self.question_ids)
+
+    def string(self, sid):
+        text = self._decoded.get(sid)
+        if text is None:
+            start, end = int(self.string_offsets[sid]), int(self.string_offsets[sid + 1])
+            text = self._decoded[sid] = bytes(self.text[start:end]).decode("utf-8")
+        return text
+
+    def question(self, row):
+        return self.string(int(self.question_ids[row]))
+
+    def choice(self, row, index):
+        return self.string(int(self.choice_ids[int(self.offsets[row]) + index]))
+
+    def correct_answer(self, row):
+        return self.choice(row, int(self.correct[row]))
+
+    def close(self):
+        # Views must go before the block can be closed
+        self.string_offsets = self.question_ids = self.offsets = self.choice_ids = self.correct = None
+        self.text.release()
+        self.shm.close()
+
+
+class ReportSummary:
+    """
+    Outcome of a report run.
+    Attributes: files(list[str]): The written report files, in order
+                reports(int): Number of takers reported
+                seconds(float): Wall time
+    """
+    def __init__(self, files, reports, seconds):
+        self.files = files
+        self.reports = reports
+        self.seconds = seconds
+
+    @property
+    def reports_per_sec(self):
+        return self.reports / self.seconds if self.seconds > 0 else 0.0
+
+    def __str__(self):
+        return (f"{self.reports} reports in {len(self.files)} files in {self.seconds:.2f}s "
+                f"({self.reports_per_sec:,.0f} reports/sec)")
+
+
+# Worker side: shared blocks stay attached for the life of the worker process
+_banks = {}
+_answers = {}
+
+
+def _attached(bank_name, answers_name, shape):
+    np = _numpy()
+    bank = _banks.get(bank_name)
+    if bank is None:
+        bank = _banks[bank_name] = SharedBank.attach(bank_name)
+    answers = _answers.get(answers_name)
+    if answers is None:
+        shm = shared_memory.SharedMemory(name=answers_name)
+        answers = _answers[answers_name] = (shm, np.ndarray(shape, dtype=np.int32, buffer=shm.buf))
+    return bank, answers[1]
+
+
+def render_shard(task):
+    """
+    Grade one shard of takers and write their result summaries to a file.
+    Inputs: task(tuple): (quiz name, bank block, answers block, answers shape,
+            first taker, end taker, taker labels, output path)
+    Returns: int: Number of reports written
+    """
+    np = _numpy()
+    name, bank_name, answers_name, shape, start, stop, takers, path = task
+    bank, answers = _attached(bank_name, answers_name, shape)
+    chosen = answers[start:stop]
+    right = chosen == bank.correct
+    scores = right.sum(axis=1).tolist()
+    # Every missed answer of the shard at once, taker after taker: string ids of
+    # the question, the given (-1 if unanswered) and the correct answer
+    taker, q = np.nonzero(~right)
+    first = bank.offsets[q]
+    given = chosen[taker, q]
+    question_ids = bank.question_ids[q].tolist()
+    your_ids = np.where(given >= 0, bank.choice_ids[first + np.maximum(given, 0)].astype(np.int64), -1).tolist()
+    correct_ids = bank.choice_ids[first + bank.correct[q]].tolist()
+    numbers = (q + 1).tolist()
+    bounds = np.searchsorted(taker, np.arange(len(chosen) + 1)).tolist()
+
+    string = bank.string
+    total = shape[1]
+    parts = []
+    for k in range(len(chosen)):
+        missed = [(numbers[m], string(question_ids[m]), string(your_ids[m]) if your_ids[m] >= 0 else None,
+                   string(correct_ids[m]))
+                  for m in range(bounds[k], bounds[k + 1])]
+        parts.append(f"Taker: {takers[k]}\nQuiz: {name}\n{format_results(scores[k], total, missed)}\n\n")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("".join(parts))
+    return len(parts)
+
+
+def generate_reports(quizzes, answers, out_dir, processes=None, shard_size=2000):
+    """
+    Write the result summary of every taker of every quiz.
+    Inputs: quizzes(dict): name -> Quiz
+            answers(dict): name -> (takers, chosen): taker labels (or None for
+                1, 2, ...) and the (takers, questions) answer matrix of that quiz
+            out_dir(str): Directory for the report files (reports-00000.txt, ...)
+            processes(int): Worker processes (default: one per core); 0 renders
+                in this process
+            shard_size(int): Takers per task and per file
+    Returns: ReportSummary
+    Raises: ValueError: If a matrix does not match its quiz or holds an invalid index
+    """
+    np = _numpy()
+    start_time = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    blocks = []
+    tasks = []
+    try:
+        for name, (takers, chosen) in answers.items():
+            bank = quizzes[name].bank
+            chosen = np.asarray(chosen)
+            n = len(bank)
+            if n == 0:
+                raise ValueError("No quiz available")
+            if chosen.ndim != 2 or chosen.shape[1] != n:
+                raise ValueError(f"answers of {name} must be a (takers, {n}) matrix")
+            counts = np.diff(np.frombuffer(bank.choice_offsets(), dtype=np.uintc)).astype(np.int64)
+            if ((chosen < -1) | (chosen >= counts)).any():
+                raise ValueError(f"answers of {name} hold a choice index that is out of range")
+            if takers is None:
+                takers = range(1, len(chosen) + 1)
+
+            shared = SharedBank.create(bank)
+            blocks.append(shared)
+            # 32-bit: a question may have more than 32k choices
+            matrix = shared_memory.SharedMemory(create=True, size=max(chosen.size * 4, 1))
+            blocks.append(matrix)
+            np.ndarray(chosen.shape, dtype=np.int32, buffer=matrix.buf)[:] = chosen
+            for first in range(0, len(chosen), shard_size):
+                stop = min(first + shard_size, len(chosen))
+                path = os.path.join(out_dir, f"reports-{len(tasks):05d}.txt")
+                tasks.append((name, shared.shm.name, matrix.name, chosen.shape, first, stop,
+                              list(takers[first:stop]), path))
+
+        if processes == 0:
+            reports = sum(render_shard(task) for task in tasks)
+        else:
+            with ProcessPoolExecutor(processes) as pool:
+                reports = sum(pool.map(render_shard, tasks))
+    finally:
+        for block in blocks:
+            block.close()
+            shm = block.shm if isinstance(block, SharedBank) else block
+            shm.unlink()
+        # Blocks attached while rendering in this process
+        while _banks:
+            _banks.popitem()[1].close()
+        while _answers:
+            shm, view = _answers.popitem()[1]
+            del view
+            shm.close()
+    return ReportSummary([task[-1] for task in tasks], reports, time.perf_counter() - start_time)
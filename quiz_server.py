@@ -0,0 +1,402 @@
+"""
+Multi-user quiz server.
+
+Runs many QuizSessions at once on a single asyncio event loop, behind a small
+HTTP/1.1 + JSON interface (keep-alive, no external dependencies). Every session
+of the same quiz reads the same Quiz object; nothing is copied per taker. Each
+session has its own deadline (30 seconds per question in total, as in the GUI).
+Deadlines are kept in one TimerWheel, and the event loop only wakes up when one
+of them is actually due.
+
+Routes:
+    GET  /quizzes                   names of the quizzes that can be taken
+    POST /sessions                  {"quiz": name} -> start a session
+    GET  /sessions/<id>             current question, progress and remaining time
+    POST /sessions/<id>/answer      {"choice": index (1-based)} -> record an answer
+    GET  /sessions/<id>/results     score, percentage and missed questions
+
+Catalog routes, used by quiz_catalog to read quizzes from a shard:
+    GET  /quizzes/<name>            {"name", "questions": count}
+    GET  /quizzes/<name>/rows?first=0&count=100
+                                    [question, choices, correct index, tags] rows (at most ROWS_PAGE)
+and, on servers started with writable=True (shards), to place them:
+    PUT    /quizzes/<name>          {"rows": [...]} -> create or replace a quiz
+    DELETE /quizzes/<name>          drop a quiz
+
+Usage:
+    python quiz_server.py [--host 127.0.0.1] [--port 8080] [--store quizzes.qzs]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import traceback
+from urllib.parse import parse_qs, unquote
+
+from quiz_session import SECONDS_PER_QUESTION, QuizSession
+from timer_wheel import TimerWheel
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+MAX_BODY = 64 * 1024
+ROWS_PAGE = 1000
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class _LiveSession:
+    """
+    A QuizSession with the event-loop deadline that ends it.
+    """
+    __slots__ = ("session", "deadline", "timer")
+
+    def __init__(self, session, deadline):
+        self.session = session
+        self.deadline = deadline
+        self.timer = None       # TimerWheel timer: the deadline, then the end of retention
+
+
+class QuizServer:
+    def __init__(self, quizzes, seconds_per_question=SECONDS_PER_QUESTION, retention=300,
+                 timer_resolution=0.05, writable=False, max_body=MAX_BODY):
+        """
+        Inputs: quizzes(dict[str, Quiz]): The quizzes that can be taken. Each session
+                    takes a snapshot, so a quiz can be edited while served: new sessions
+                    see the edits, running ones keep the questions they started with.
+                seconds_per_question(int): Time budget per question
+                retention(int): Seconds a finished session's results are kept
+                timer_resolution(float): Granularity of session deadlines, in seconds
+                writable(bool): Accept quizzes put and deleted over HTTP (catalog shards)
+                max_body(int): Largest request body, in bytes
+        Outputs: None
+        """
+        self.quizzes = quizzes
+        self.writable = writable
+        self.max_body = max_body
+        self.seconds_per_question = seconds_per_question
+        self.retention = retention
+        self.timer_resolution = timer_resolution
+        self.sessions = {}      # session id -> _LiveSession
+        self._ids = itertools.count(1)
+        self._server = None
+        self._wheel = None      # created on first use, with the event loop's clock
+        self._wakeup = None     # the single event-loop callback that advances the wheel
+
+    # Session management
+
+    def _loop(self):
+        return asyncio.get_running_loop()
+
+    def _schedule(self, when, callback, *args):
+        """
+        Add a deadline to the timer wheel and make sure the loop wakes up for it.
+        """
+        loop = self._loop()
+        if self._wheel is None:
+            self._wheel = TimerWheel(self.timer_resolution, start=loop.time())
+        elif not self._wheel:
+            # The wheel sat idle; move it to the current time (nothing can fire)
+            self._wheel.advance(loop.time())
+        timer = self._wheel.schedule(when, callback, *args)
+        self._arm()
+        return timer
+
+    def _arm(self):
+        """
+        (Re)schedule the event-loop wakeup for the earliest pending deadline.
+        """
+        when = self._wheel.next_wakeup()
+        if when is None:
+            return
+        if self._wakeup is not None:
+            if self._wakeup.when() <= when:
+                return
+            self._wakeup.cancel()
+        self._wakeup = self._loop().call_at(when, self._run_timers)
+
+    def _run_timers(self):
+        self._wakeup = None
+        self._wheel.advance(self._loop().time())
+        self._arm()
+
+    def _expire(self, session_id):
+        live = self.sessions.get(session_id)
+        if live is None:
+            return
+        live.timer = None
+        live.session.timeout()
+        self._retire(session_id)
+
+    def _retire(self, session_id):
+        """
+        Keep a finished session for `retention` seconds so its results can be read.
+        """
+        live = self.sessions[session_id]
+        if live.timer is not None:
+            self._wheel.cancel(live.timer)
+        live.timer = self._schedule(self._loop().time() + self.retention, self.sessions.pop, session_id, None)
+
+    def start_session(self, quiz_name):
+        if not isinstance(quiz_name, str):
+            raise HTTPError(400, "quiz must be the name of a quiz")
+        qz = self.quizzes.get(quiz_name)
+        if qz is None:
+            raise HTTPError(404, "No quiz named " + str(quiz_name))
+        try:
+            session = QuizSession(qz.snapshot(), quiz_name, self.seconds_per_question, clock=self._loop().time)
+        except ValueError as e:
+            raise HTTPError(409, str(e))
+        session_id = str(next(self._ids))
+        live = _LiveSession(session, session.clock.deadline)
+        live.timer = self._schedule(live.deadline, self._expire, session_id)
+        self.sessions[session_id] = live
+        return session_id, live
+
+    def _get(self, session_id):
+        live = self.sessions.get(session_id)
+        if live is None:
+            raise HTTPError(404, "No such session")
+        live.session.tick()     # ends it if its deadline passed before the wheel got to it
+        return live
+
+    def answer(self, session_id, choice):
+        live = self._get(session_id)
+        session = live.session
+        if session.finished:
+            raise HTTPError(409, "The quiz is over")
+        q = session.current_question()
+        if not isinstance(choice, int) or isinstance(choice, bool) or not 1 <= choice <= len(q.choices):
+            raise HTTPError(400, "choice must be a number between 1 and " + str(len(q.choices)))
+        correct = session.answer_index(choice - 1)
+        if session.finished:
+            self._retire(session_id)
+        return live, correct
+
+    # JSON views
+
+    def state(self, session_id, live):
+        session = live.session
+        data = {
+            "session": session_id,
+            "quiz": session.name,
+            "finished": session.finished,
+            "timed_out": session.timed_out,
+            "remaining_time": session.remaining_time,
+            "index": session.index,
+            "total": session.total,
+        }
+        q = session.current_question()
+        if q is not None and not session.finished:
+            data["question"] = q.get_question()
+            data["choices"] = q.choices
+        return data
+
+    def results(self, live):
+        session = live.session
+        return {
+            "score": session.score,
+            "total": session.total,
+            "percentage": session.percentage(),
+            "timed_out": session.timed_out,
+            "missed": [list(m) for m in session.missed],
+            "text": session.result_text(),
+        }
+
+    # Catalog
+
+    def _quiz(self, name):
+        qz = self.quizzes.get(name)
+        if qz is None:
+            raise HTTPError(404, "No quiz named " + name)
+        return qz
+
+    def rows(self, name, query):
+        bank = self._quiz(name).bank
+        try:
+            first = int(query.get("first", ["0"])[0])
+            count = int(query.get("count", [str(ROWS_PAGE)])[0])
+        except ValueError:
+            raise HTTPError(400, "first and count must be numbers")
+        first = max(first, 0)
+        end = min(first + max(0, min(count, ROWS_PAGE)), len(bank))
+        return {"total": len(bank),
+                "rows": [[bank.question(row), bank.choices(row), bank.correct_index(row), bank.tags(row)]
+                         for row in range(first, end)]}
+
+    def put_quiz(self, name, rows):
+        """
+        Create or replace a quiz from [question, choices, correct index, tags] rows,
+        checked as an import would check them. Running sessions keep their snapshot.
+        """
+        from quiz_io import validate_batch
+        from quiz_model import Quiz
+
+        if not isinstance(rows, list):
+            raise HTTPError(400, "rows must be a list")
+        batch, tags = [], []
+        for line, row in enumerate(rows, 1):
+            if (not isinstance(row, list) or len(row) != 4 or not isinstance(row[1], list) or
+                    not isinstance(row[2], int) or not 0 <= row[2] < len(row[1]) or not isinstance(row[3], list) or
+                    not all(isinstance(tag, str) for tag in row[3])):
+                raise HTTPError(400, f"row {line}: expected [question, choices, correct index, tags]")
+            batch.append((line, row[0], row[1], row[1][row[2]]))
+            tags.append(row[3])
+        valid, errors = validate_batch(batch)
+        if errors:
+            line, message = errors[0]
+            raise HTTPError(400, f"row {line}: {message}")
+        qz = Quiz()
+        qz.add_rows((question, choices, correct, tags[k]) for k, (question, choices, correct) in enumerate(valid))
+        self.quizzes[name] = qz
+        return {"name": name, "questions": len(valid)}
+
+    def route(self, method, path, body):
+        """
+        Dispatch one request.
+        Returns: tuple(int, object): status code and JSON-serializable body
+        """
+        path, _, query = path.partition("?")
+        parts = [unquote(p) for p in path.split("/") if p]
+        if parts == ["quizzes"] and method == "GET":
+            return 200, sorted(self.quizzes)
+        if len(parts) >= 2 and parts[0] == "quizzes":
+            name = parts[1]
+            if len(parts) == 2 and method == "GET":
+                return 200, {"name": name, "questions": len(self._quiz(name).questions)}
+            if parts[2:] == ["rows"] and method == "GET":
+                return 200, self.rows(name, parse_qs(query))
+            if len(parts) == 2 and method in ("PUT", "DELETE") and self.writable:
+                if method == "DELETE":
+                    self._quiz(name)
+                    del self.quizzes[name]
+                    return 200, {"name": name}
+                return 201, self.put_quiz(name, body.get("rows"))
+            raise HTTPError(405, "Method not allowed")
+        if parts == ["sessions"] and method == "POST":
+            session_id, live = self.start_session(body.get("quiz"))
+            return 201, self.state(session_id, live)
+        if len(parts) >= 2 and parts[0] == "sessions":
+            session_id = parts[1]
+            if len(parts) == 2 and method == "GET":
+                return 200, self.state(session_id, self._get(session_id))
+            if parts[2:] == ["answer"] and method == "POST":
+                live, correct = self.answer(session_id, body.get("choice"))
+                data = self.state(session_id, live)
+                data["correct"] = correct
+                return 200, data
+            if parts[2:] == ["results"] and method == "GET":
+                live = self._get(session_id)
+                if not live.session.finished:
+                    raise HTTPError(409, "The quiz is not finished")
+                return 200, self.results(live)
+            raise HTTPError(405, "Method not allowed")
+        raise HTTPError(404, "Not found")
+
+    # HTTP
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, path, _ = lines[0].split(" ", 2)
+                except ValueError:
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        key, value = line.split(":", 1)
+                        headers[key.strip().lower()] = value.strip()
+                close = headers.get("connection", "").lower() == "close"
+                # Until the body is read the connection cannot be reused: on an error before that it is closed
+                unread = True
+                try:
+                    try:
+                        length = int(headers.get("content-length", "0") or 0)
+                    except ValueError:
+                        raise HTTPError(400, "Content-Length must be a number")
+                    if length < 0:
+                        raise HTTPError(400, "Content-Length must not be negative")
+                    if length > self.max_body:
+                        raise HTTPError(413, "Request body too large")
+                    raw = await reader.readexactly(length) if length else b""
+                    unread = False
+                    try:
+                        body = json.loads(raw) if raw else {}
+                    except ValueError:
+                        raise HTTPError(400, "Body must be JSON")
+                    if not isinstance(body, dict):
+                        raise HTTPError(400, "Body must be a JSON object")
+                    status, data = self.route(method, path, body)
+                except HTTPError as e:
+                    status, data = e.status, {"error": e.message}
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    raise
+                except Exception:
+                    # A bug in a handler answers this request, not the whole connection
+                    traceback.print_exc()
+                    status, data = 500, {"error": "Internal server error"}
+                close = close or unread
+                payload = json.dumps(data).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n".encode("latin-1") + payload)
+                await writer.drain()
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=8080):
+        """
+        Start listening. Returns the asyncio Server (port 0 picks a free port).
+        """
+        self._server = await asyncio.start_server(self.handle, host, port, backlog=4096)
+        return self._server
+
+    async def serve_forever(self, host="127.0.0.1", port=8080):
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    from quiz_model import Quiz
+    from quiz_store import QuizStore
+
+    parser = argparse.ArgumentParser(description="Serve quizzes to many takers at once")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--store", default=os.environ.get("QUIZ_STORE", "quizzes.qzs"))
+    args = parser.parse_args(argv)
+
+    store = QuizStore(args.store)
+    quizzes = {}
+    for name in store.names():
+        quizzes[name] = Quiz(loader=store.loader(name))
+    try:
+        asyncio.run(QuizServer(quizzes).serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
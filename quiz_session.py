@@ -0,0 +1,274 @@
+"""
+Headless quiz session engine.
+
+A QuizSession holds everything needed to take one quiz: the current question,
+the score, the countdown (30 seconds per question in total, optionally with a
+limit per question as well) and the list of missed questions. It has no
+dependency on Tkinter, so the same logic drives the GUI, scripts, tests and
+servers. Countdowns are deadlines on a monotonic clock (QuizClock), so the time
+left does not depend on how often or how late the caller checks it.
+"""
+
+import math
+import time
+
+from quiz_clock import QuizClock
+from quiz_metrics import metrics
+from quiz_render import format_results
+
+SECONDS_PER_QUESTION = 30
+
+
+class QuizSession:
+    def __init__(self, quiz, name="", seconds_per_question=SECONDS_PER_QUESTION, question_seconds=None,
+                 clock=time.monotonic):
+        """
+        Start a new session for a quiz.
+        Inputs: quiz(Quiz): The quiz to take
+                name(str): The quiz name
+                seconds_per_question(int): Time budget per question, for the quiz as a whole
+                question_seconds(float): Optional limit for each question; a question
+                    not answered in time is skipped (missed, with no answer)
+                clock(function): Monotonic clock the deadlines are kept on
+        Outputs: ValueError: If the quiz has no questions
+        """
+        self.questions = quiz.questions
+        if not self.questions:
+            raise ValueError("That quiz has no questions")
+        self.name = name
+        self.index = 0          # index of the current question
+        self.score = 0          # number of correct answers
+        self.missed = []        # (q_number, question_text, your_answer, correct_answer)
+        self.responses = []     # (question index, chosen choice position or -1, seconds spent)
+        self.now = clock
+        self.shown_at = clock()             # when the current question was shown
+        self.total_time = len(self.questions) * seconds_per_question
+        self.clock = QuizClock(self.total_time, clock)
+        self.question_seconds = question_seconds
+        self.question_clock = QuizClock(question_seconds, clock) if question_seconds else None
+        self.finished = False
+        self.timed_out = False
+        self._result = None     # (state, text) of the last result_text()
+
+    @property
+    def total(self):
+        return len(self.questions)
+
+    @property
+    def running(self):
+        return not self.finished
+
+    @property
+    def remaining_time(self):
+        """
+        Whole seconds left for the quiz (rounded up), computed from its deadline.
+        """
+        return math.ceil(self.clock.remaining())
+
+    @remaining_time.setter
+    def remaining_time(self, seconds):
+        self.clock.set_remaining(seconds)
+
+    def question_remaining(self):
+        """
+        Whole seconds left for the current question (the quiz's if it has no limit of its own).
+        """
+        if self.question_clock is None:
+            return self.remaining_time
+        return math.ceil(min(self.question_clock.remaining(), self.clock.remaining()))
+
+    def current_question(self):
+        """
+        Get the question being answered.
+        Returns: Quiz_item, or None once every question has been answered
+        """
+        if self.index >= len(self.questions):
+            return None
+        return self.questions[self.index]
+
+    def is_last_question(self):
+        return self.index == len(self.questions) - 1
+
+    def answer(self, chosen):
+        """
+        Record the answer to the current question and move to the next one.
+        Inputs: chosen(str): The text of the chosen choice
+        Returns: bool: True if the answer was correct
+        Raises: ValueError: If no answer was given or the session is over
+        """
+        if self.finished:
+            raise ValueError("The quiz is over")
+        if not chosen:
+            raise ValueError("Please select an answer.")
+        q = self.current_question()
+        if q is None:
+            raise ValueError("The quiz is over")
+        return self._answer(q, q.choice_index(chosen), chosen)
+
+    def answer_index(self, position):
+        """
+        Record the answer to the current question by the position of the chosen
+        choice, and move to the next one. Graded by comparing positions.
+        Inputs: position(int): Index of the chosen choice
+        Returns: bool: True if the answer was correct
+        Raises: ValueError: If the position is not a choice or the session is over
+        """
+        if self.finished:
+            raise ValueError("The quiz is over")
+        q = self.current_question()
+        if q is None:
+            raise ValueError("The quiz is over")
+        chosen = None       # the text is only needed for a wrong answer's report
+        if position != q.correct_index:
+            try:
+                chosen = q.get_choice(position)
+            except (IndexError, TypeError):
+                raise ValueError("Please select an answer.") from None
+        return self._answer(q, position, chosen)
+
+    def _answer(self, q, position, chosen):
+        """
+        Grade an answer: position is the index of the chosen choice (-1 if the
+        chosen text is not a choice), chosen its text.
+        """
+        now = self.now()
+        self.responses.append((self.index, position, now - self.shown_at))
+        self.shown_at = now
+        if self.question_clock is not None:
+            self.question_clock.set_remaining(self.question_seconds)
+
+        correct = position >= 0 and position == q.correct_index
+        if metrics.enabled:
+            metrics.count("answers")
+        if correct:
+            self.score = self.score + 1
+        else:
+            self.missed.append((self.index + 1, q.get_question(), chosen, q.get_correct_answer()))
+
+        self.index = self.index + 1
+        if self.index >= len(self.questions):
+            self.finish()
+        return correct
+
+    def time_up(self):
+        return self.remaining_time <= 0
+
+    def tick(self, seconds=0):
+        """
+        Check the deadlines: once the quiz's time is up the session is finished,
+        and a question whose own time is up is skipped.
+        Inputs: seconds(float): Extra time to take off both countdowns (e.g. a penalty)
+        Returns: bool: True if the time is up
+        """
+        if self.finished:
+            return self.timed_out
+        if seconds:
+            self.clock.deadline = self.clock.deadline - seconds
+            if self.question_clock is not None:
+                self.question_clock.deadline = self.question_clock.deadline - seconds
+        if self.clock.expired():
+            self.timeout()
+        elif self.question_clock is not None:
+            # Skip every question whose own time ran out since the last check,
+            # each at its deadline, so the next one's time starts from there
+            while not self.finished and self.question_clock.expired():
+                self.skip(self.question_clock.deadline)
+        return self.timed_out
+
+    def skip(self, at=None):
+        """
+        Move past the current question without answering it. It is missed,
+        with no answer (None), and its response has position -1.
+        Inputs: at(float): When the question was left (now by default), e.g. its deadline
+        """
+        if self.finished:
+            return
+        if at is None:
+            at = self.now()
+        q = self.current_question()
+        self.responses.append((self.index, -1, at - self.shown_at))
+        self.missed.append((self.index + 1, q.get_question(), None, q.get_correct_answer()))
+        self.shown_at = at
+        self.index = self.index + 1
+        if self.question_clock is not None:
+            if self.question_clock.paused:
+                self.question_clock.set_remaining(self.question_seconds)
+            else:
+                self.question_clock.deadline = at + self.question_seconds
+        if self.index >= len(self.questions):
+            self.finish()
+
+    def until_change(self):
+        """
+        Seconds until the displayed time changes or a deadline passes: when the
+        caller should check again. None once the session is finished or paused.
+        """
+        if self.finished or self.clock.paused:
+            return None
+        delay = self.clock.until_change()
+        if self.question_clock is not None:
+            delay = min(delay, self.question_clock.until_change())
+        return delay
+
+    def pause(self):
+        """
+        Stop the countdowns, e.g. while a recovered session waits to be resumed.
+        """
+        self.clock.pause()
+        if self.question_clock is not None:
+            self.question_clock.pause()
+
+    def resume(self):
+        if self.finished:
+            return
+        self.clock.resume()
+        if self.question_clock is not None:
+            self.question_clock.resume()
+        self.shown_at = self.now()
+
+    def timeout(self):
+        """
+        End the session because the time ran out.
+        """
+        if not self.finished:
+            self.clock.set_remaining(0)
+            self.timed_out = True
+            self.finish()
+
+    def finish(self):
+        # The time left is kept as it was when the quiz ended
+        self.pause()
+        self.finished = True
+
+    def percentage(self):
+        return (self.score / len(self.questions)) * 100
+
+    def time_text(self):
+        mins, secs = divmod(self.remaining_time, 60)
+        if self.question_clock is not None:
+            return f"Time Remaining: {mins}:{secs} | This question: {self.question_remaining()}s"
+        return f"Time Remaining: {mins}:{secs}"
+
+    def progress_text(self):
+        current_q = self.index + 1
+        total_q = len(self.questions)
+        remaining_q = total_q - self.index
+        # Integer division
+        if remaining_q > 0:
+            time_per_remaining = self.remaining_time // remaining_q
+        else:
+            time_per_remaining = 0
+        return (f"Question {current_q}/{total_q} | Questions Remaining: {remaining_q} | "
+                f"Time per remaining question: {time_per_remaining}s")
+
+    def result_text(self):
+        """
+        Build the result summary: score, percentage and every missed question
+        with the given and the correct answer. Formatted again only after the
+        session has moved on (e.g. a server answering repeated result requests).
+        """
+        state = (self.index, self.score, len(self.missed), len(self.questions))
+        if self._result is None or self._result[0] != state:
+            self._result = (state, format_results(self.score, len(self.questions), self.missed))
+        return self._result[1]
+
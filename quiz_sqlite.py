@@ -0,0 +1,526 @@
+"""
+Optional SQLite backend for quizzes, questions and attempts.
+
+Schema:
+    quiz    (id, name UNIQUE)
+    item    (quiz_id, row, question, choices as a JSON list, correct index)   primary key (quiz_id, row)
+    tag     (quiz_id, row, tag)                                               indexed by tag
+    attempt (id, quiz_id, taken_at, score, total)                             indexed by quiz
+    missed  (attempt_id, q_number, question, your_answer, correct_answer)
+
+A DbQuiz is a Quiz whose questions stay in the database: `questions` is a lazy
+sequence that reads pages of rows through a cursor as they are used, and
+add_question inserts a row without loading the others. Items handed out are
+Quiz_item views whose edits are written back to the database; they read and
+edit their row wherever it is held now (its page, read again if it was dropped
+from the cache, or the whole bank once loaded), so they never work on a copy
+that has been left behind. Components that
+need the whole quiz in memory (grading, preview, search, and sessions through
+snapshot()) still use `bank`, which loads it once and then keeps writing
+changes through.
+
+Readers take a connection from a small pool (the database runs in WAL mode, so
+they do not block the writer) and give it back before handing out any row;
+waiting for one gives up with TimeoutError after `pool_timeout` seconds. Writes
+go through one writer connection.
+Statements are fixed SQL strings with parameters, so sqlite3 prepares each once
+per connection and reuses it from its statement cache.
+"""
+
+import json
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from contextlib import contextmanager
+
+from question_bank import QuestionBank
+from quiz_model import Questions, Quiz, Quiz_item
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS quiz (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS item (
+    quiz_id INTEGER NOT NULL REFERENCES quiz(id),
+    row INTEGER NOT NULL,
+    question TEXT NOT NULL,
+    choices TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    PRIMARY KEY (quiz_id, row)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS tag (
+    quiz_id INTEGER NOT NULL,
+    row INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (quiz_id, row, tag)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS tag_by_name ON tag (tag);
+CREATE TABLE IF NOT EXISTS attempt (
+    id INTEGER PRIMARY KEY,
+    quiz_id INTEGER NOT NULL REFERENCES quiz(id),
+    taken_at REAL NOT NULL,
+    score INTEGER NOT NULL,
+    total INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS attempt_by_quiz ON attempt (quiz_id);
+CREATE TABLE IF NOT EXISTS missed (
+    attempt_id INTEGER NOT NULL REFERENCES attempt(id),
+    q_number INTEGER NOT NULL,
+    question TEXT NOT NULL,
+    your_answer TEXT NOT NULL,
+    correct_answer TEXT NOT NULL,
+    PRIMARY KEY (attempt_id, q_number)
+) WITHOUT ROWID;
+"""
+
+SELECT_ROWS = "SELECT row, question, choices, correct FROM item WHERE quiz_id = ? AND row >= ? AND row < ? ORDER BY row"
+SELECT_ALL = "SELECT row, question, choices, correct FROM item WHERE quiz_id = ? ORDER BY row"
+SELECT_TAGS = "SELECT row, tag FROM tag WHERE quiz_id = ? AND row >= ? AND row < ? ORDER BY row"
+INSERT_ITEM = "INSERT INTO item (quiz_id, row, question, choices, correct) VALUES (?, ?, ?, ?, ?)"
+INSERT_TAG = "INSERT INTO tag (quiz_id, row, tag) VALUES (?, ?, ?)"
+UPDATE_ITEM = "UPDATE item SET question = ?, choices = ?, correct = ? WHERE quiz_id = ? AND row = ?"
+DELETE_TAGS = "DELETE FROM tag WHERE quiz_id = ? AND row = ?"
+
+
+class ConnectionPool:
+    def __init__(self, path, size=4, timeout=30.0):
+        """
+        Inputs: path(str): The database file
+                size(int): Maximum number of reader connections
+                timeout(float): Seconds to wait for a reader connection when all are in use
+        Outputs: None
+        """
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._writer = self._connect()
+        self._writer.execute("PRAGMA journal_mode=WAL")
+
+    def _connect(self):
+        con = sqlite3.connect(self.path, check_same_thread=False, cached_statements=256)
+        con.execute("PRAGMA synchronous=NORMAL")
+        con.execute("PRAGMA foreign_keys=ON")
+        return con
+
+    @contextmanager
+    def reader(self):
+        """
+        Borrow a reader connection, waiting for one if all are in use.
+        Raises: TimeoutError: If none is given back within `timeout` seconds
+        """
+        try:
+            con = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created = self._created + 1
+            if create:
+                con = self._connect()
+            else:
+                try:
+                    con = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"no free reader connection after {self.timeout} s "
+                                       f"({self.size} in use)") from None
+        try:
+            yield con
+        finally:
+            self._idle.put(con)
+
+    @contextmanager
+    def writer(self):
+        """
+        Use the writer connection inside one transaction (committed on success).
+        """
+        with self._write_lock:
+            with self._writer:
+                yield self._writer
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        self._writer.close()
+
+
+class SQLiteRepository:
+    def __init__(self, path, pool_size=4, page_size=256, cached_pages=64, pool_timeout=30.0):
+        """
+        Open (or create) a quiz database.
+        Inputs: path(str): The database file
+                pool_size(int): Number of reader connections
+                pool_timeout(float): Seconds to wait for a reader connection before giving up
+                page_size(int): Rows read together by the lazy question sequences
+                cached_pages(int): Pages kept in memory per quiz
+        Outputs: None
+        """
+        self.pool = ConnectionPool(path, pool_size, pool_timeout)
+        self.page_size = page_size
+        self.cached_pages = cached_pages
+        with self.pool.writer() as con:
+            con.executescript(SCHEMA)
+        self._quizzes = {}
+
+    # Quizzes
+
+    def names(self):
+        with self.pool.reader() as con:
+            return [name for (name,) in con.execute("SELECT name FROM quiz ORDER BY id")]
+
+    def __contains__(self, name):
+        with self.pool.reader() as con:
+            return con.execute("SELECT 1 FROM quiz WHERE name = ?", (name,)).fetchone() is not None
+
+    def quiz(self, name):
+        """
+        Get a stored quiz (the same DbQuiz object on every call).
+        Raises: KeyError: If no quiz has that name
+        """
+        quiz = self._quizzes.get(name)
+        if quiz is None:
+            with self.pool.reader() as con:
+                found = con.execute("SELECT id FROM quiz WHERE name = ?", (name,)).fetchone()
+                if found is None:
+                    raise KeyError(name)
+                (count,) = con.execute("SELECT coalesce(max(row) + 1, 0) FROM item WHERE quiz_id = ?",
+                                       (found[0],)).fetchone()
+            quiz = self._quizzes[name] = DbQuiz(self, name, found[0], count)
+        return quiz
+
+    def quizzes(self):
+        """
+        Every stored quiz, as a {name: DbQuiz} dict like the app's `quizzes`.
+        """
+        return {name: self.quiz(name) for name in self.names()}
+
+    def create_quiz(self, name):
+        """
+        Store a new, empty quiz.
+        Returns: DbQuiz
+        Raises: ValueError: If a quiz with that name is already stored
+        """
+        try:
+            with self.pool.writer() as con:
+                con.execute("INSERT INTO quiz (name) VALUES (?)", (name,))
+        except sqlite3.IntegrityError:
+            raise ValueError("Quiz already exists") from None
+        return self.quiz(name)
+
+    def add_items(self, name, rows, batch_size=1000):
+        """
+        Bulk insert questions, one transaction per batch.
+        Inputs: name(str): The quiz name
+                rows(iterable): (question, choices, correct_index) or
+                    (question, choices, correct_index, tags) tuples, already validated
+                batch_size(int): Rows per transaction
+        Returns: int: Number of rows added
+        """
+        quiz = self.quiz(name)
+        added = 0
+        batch = []
+        for values in rows:
+            batch.append(values)
+            if len(batch) >= batch_size:
+                quiz.add_rows(batch)
+                added = added + len(batch)
+                batch = []
+        if batch:
+            quiz.add_rows(batch)
+            added = added + len(batch)
+        return added
+
+    def questions_tagged(self, tag):
+        """
+        Find the questions with a tag, across all quizzes.
+        Returns: list of (quiz name, row)
+        """
+        with self.pool.reader() as con:
+            return con.execute("SELECT quiz.name, tag.row FROM tag JOIN quiz ON quiz.id = tag.quiz_id "
+                               "WHERE tag.tag = ? ORDER BY tag.quiz_id, tag.row", (tag,)).fetchall()
+
+    # Attempts
+
+    def record_attempt(self, name, score, total, missed, taken_at=None):
+        """
+        Store the result of taking a quiz.
+        Inputs: name(str): The quiz name
+                score(int): Number of correct answers
+                total(int): Number of questions
+                missed(list): (q_number, question_text, your_answer, correct_answer) tuples
+                taken_at(float): Time of the attempt (now by default)
+        Returns: int: The attempt id
+        """
+        quiz = self.quiz(name)
+        with self.pool.writer() as con:
+            cur = con.execute("INSERT INTO attempt (quiz_id, taken_at, score, total) VALUES (?, ?, ?, ?)",
+                              (quiz.quiz_id, time.time() if taken_at is None else taken_at, score, total))
+            attempt_id = cur.lastrowid
+            # No answer (a skipped question) is stored as "", which no choice can be
+            con.executemany("INSERT INTO missed VALUES (?, ?, ?, ?, ?)",
+                            [(attempt_id, n, question, "" if your is None else your, correct)
+                             for n, question, your, correct in missed])
+        return attempt_id
+
+    def record_session(self, session):
+        """
+        Store the result of a finished QuizSession.
+        Returns: int: The attempt id
+        """
+        return self.record_attempt(session.name, session.score, session.total, session.missed)
+
+    def attempts(self, name):
+        """
+        The attempts at a quiz, oldest first.
+        Returns: list of (attempt id, taken_at, score, total)
+        """
+        quiz = self.quiz(name)
+        with self.pool.reader() as con:
+            return con.execute("SELECT id, taken_at, score, total FROM attempt WHERE quiz_id = ? ORDER BY id",
+                               (quiz.quiz_id,)).fetchall()
+
+    def missed(self, attempt_id):
+        """
+        The missed questions of an attempt, as finish() lists them.
+        Returns: list of (q_number, question_text, your_answer, correct_answer)
+        """
+        with self.pool.reader() as con:
+            rows = con.execute("SELECT q_number, question, your_answer, correct_answer FROM missed "
+                               "WHERE attempt_id = ? ORDER BY q_number", (attempt_id,)).fetchall()
+        return [(n, question, your or None, correct) for n, question, your, correct in rows]
+
+    def close(self):
+        self.pool.close()
+
+
+class DbQuiz(Quiz):
+    """
+    A Quiz stored in an SQLiteRepository.
+    """
+    def __init__(self, repo, name, quiz_id, count):
+        super().__init__(loader=self._load)
+        self.repo = repo
+        self.name = name
+        self.quiz_id = quiz_id
+        self._count = count
+        self._pages = OrderedDict()     # page number -> QuestionBank of its rows, least recently used first
+        self._rows = DbRows(self)       # what the items handed out read their row through
+        self._pages_lock = threading.Lock()
+        self._bulk = False              # rows being added by add_rows, which stores them itself
+
+    # Reading
+
+    def _fill(self, bank, first, cursor_rows, tags):
+        for row, question, choices, correct in cursor_rows:
+            bank.append(question, json.loads(choices), correct, tags.get(row, ()))
+        bank.listeners.append(self._write_through(first))
+
+    def _tags(self, con, start, end):
+        tags = {}
+        for row, tag in con.execute(SELECT_TAGS, (self.quiz_id, start, end)):
+            tags.setdefault(row, []).append(tag)
+        return tags
+
+    def _load(self, bank):
+        """
+        Loader of the full bank: every row, then keep writing changes through.
+        """
+        with self.repo.pool.reader() as con:
+            tags = self._tags(con, 0, self._count)
+            self._fill(bank, 0, con.execute(SELECT_ALL, (self.quiz_id,)), tags)
+        # Items read this bank from now on (see DbRows)
+        self._pages.clear()
+
+    def _page(self, number):
+        """
+        The QuestionBank holding one page of rows, read on first use.
+        """
+        pages = self._pages
+        with self._pages_lock:
+            bank = pages.get(number)
+            if bank is not None:
+                pages.move_to_end(number)
+                return bank
+        start = number * self.repo.page_size
+        end = start + self.repo.page_size
+        bank = QuestionBank()
+        with self.repo.pool.reader() as con:
+            self._fill(bank, start, con.execute(SELECT_ROWS, (self.quiz_id, start, end)),
+                       self._tags(con, start, end))
+        with self._pages_lock:
+            bank = pages.setdefault(number, bank)
+            if len(pages) > self.repo.cached_pages:
+                pages.popitem(last=False)
+        return bank
+
+    @property
+    def questions(self):
+        if self.loaded:
+            return Questions(self._bank)
+        return CursorQuestions(self)
+
+    def snapshot(self):
+        """
+        A read-only copy of the quiz as it is now. Rows kept in page caches come
+        and go, so there is no single bank to version: the whole quiz is loaded
+        first (once; the bank then stays and writes changes through).
+        Returns: QuizSnapshot
+        """
+        self.bank       # loads it
+        return super().snapshot()
+
+    # Writing
+
+    def _write_through(self, first):
+        """
+        Listener that stores the changes made to a bank holding rows first, first + 1, ...
+        """
+        def listener(bank, row, event):
+            if event == "add" and not self._bulk:
+                self._insert([(bank.question(row), bank.choices(row), bank.correct_index(row), bank.tags(row))])
+            elif event == "change":
+                self._update(first + row, bank, row)
+        return listener
+
+    def _insert(self, batch):
+        """
+        Insert rows at the end of the quiz, in one transaction.
+        """
+        first = self._count
+        items = []
+        tags = []
+        for k, values in enumerate(batch):
+            question, choices, correct = values[:3]
+            items.append((self.quiz_id, first + k, question, json.dumps(choices), correct))
+            if len(values) > 3:
+                tags.extend((self.quiz_id, first + k, t) for t in values[3])
+        with self.repo.pool.writer() as con:
+            con.executemany(INSERT_ITEM, items)
+            if tags:
+                con.executemany(INSERT_TAG, tags)
+        self._count = first + len(batch)
+        # The last page may now have more rows than when it was read
+        with self._pages_lock:
+            self._pages.pop(first // self.repo.page_size, None)
+        return len(batch)
+
+    def _update(self, db_row, bank, row):
+        with self.repo.pool.writer() as con:
+            con.execute(UPDATE_ITEM, (bank.question(row), json.dumps(bank.choices(row)), bank.correct_index(row),
+                                      self.quiz_id, db_row))
+            con.execute(DELETE_TAGS, (self.quiz_id, db_row))
+            con.executemany(INSERT_TAG, [(self.quiz_id, db_row, t) for t in bank.tags(row)])
+
+    def add_rows(self, rows):
+        """
+        Add already validated questions in bulk, stored in one transaction.
+        Inputs: rows(iterable): (question, choices, correct_index[, tags]) tuples
+        Returns: int: Row number of the first added question
+        """
+        rows = list(rows)
+        first = self._count
+        if self.loaded:
+            self._bulk = True
+            try:
+                super().add_rows(rows)
+            finally:
+                self._bulk = False
+        self._insert(rows)
+        return first
+
+    def add_question(self, my_quiz):
+        """
+        Add a `Quiz_item` to the quiz, storing it right away. As with Quiz, an
+        item that is already in a quiz is refused.
+        Raises: TypeError: If `my_quiz` is not a Quiz_item instance.
+                ValueError: If `my_quiz` is already in a quiz.
+        """
+        self._check_new(my_quiz)
+        if self.loaded:
+            # The bank's listener stores the new row
+            super().add_question(my_quiz)
+            return
+        source, row = my_quiz._bank, my_quiz._row
+        number = self._count
+        self._insert([(source.question(row), source.choices(row), source.correct_index(row), source.tags(row))])
+        # Point the item at its stored row, so later edits reach the database
+        my_quiz._bank = self._rows
+        my_quiz._row = number
+
+
+class DbRows:
+    """
+    Stands in for the QuestionBank of the items of a DbQuiz: every call takes a
+    row number of the quiz and goes to the bank holding that row now, the whole
+    bank once the quiz is loaded, else the row's page.
+    """
+    def __init__(self, quiz):
+        self._quiz = quiz
+
+    def locate(self, row):
+        """
+        Returns: tuple(QuestionBank, int): The bank holding a row of the quiz now, and its row there
+        """
+        quiz = self._quiz
+        if quiz.loaded:
+            return quiz._bank, row
+        size = quiz.repo.page_size
+        return quiz._page(row // size), row % size
+
+    def __getattr__(self, name):
+        # Only called for names not found yet: build the forwarding call once
+        method = getattr(QuestionBank, name)
+        locate = self.locate
+
+        def call(row, *args, **kwargs):
+            bank, row = locate(row)
+            return method(bank, row, *args, **kwargs)
+
+        setattr(self, name, call)
+        return call
+
+
+class CursorQuestions(Sequence):
+    """
+    Read-only list of the questions of a DbQuiz, read from the database a page
+    at a time as they are used. A page is read with a pooled connection that is
+    given back before any of its questions is handed out, so any number of
+    iterations can be open at once.
+    """
+    __slots__ = ("_quiz",)
+
+    def __init__(self, quiz):
+        self._quiz = quiz
+
+    def __len__(self):
+        return self._quiz._count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(len(self))[i]]
+        n = len(self)
+        if i < 0:
+            i = i + n
+        if not 0 <= i < n:
+            raise IndexError("question index out of range")
+        return Quiz_item._view(self._quiz._rows, i)
+
+    def __iter__(self):
+        quiz = self._quiz
+        size = quiz.repo.page_size
+        i = 0
+        while i < quiz._count:
+            if i % size == 0 and not quiz.loaded:
+                quiz._page(i // size)       # read the page before its questions are used
+            yield Quiz_item._view(quiz._rows, i)
+            i = i + 1
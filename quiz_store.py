@@ -0,0 +1,319 @@
+"""
+Persistent, append-only quiz store.
+
+File layout (all integers little-endian):
+    header   : magic "QZST", version, index offset, end of the index record
+    records  : kind (1 byte) + payload length (4 bytes) + payload, appended one after another
+               QUIZ   - the quiz name
+               ITEM   - quiz id, correct index, number of choices, then the question and choice strings
+               INDEX  - for every quiz: its name, item count and the file offsets of its ITEM records
+
+Opening a store memory-maps the file and reads only the quiz names from the
+latest INDEX record (plus any records appended after it), so startup does not
+depend on how many questions are stored. Questions are decoded the first time
+a quiz is touched. New quizzes and questions are appended to the end of the
+file, flushed right away and fsync'd in batches; close() writes a fresh INDEX.
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+MAGIC = b"QZST"
+VERSION = 1
+
+HEADER = struct.Struct("<4sHHQQ")    # magic, version, reserved, index offset, index end
+RECORD = struct.Struct("<BI")        # kind, payload length
+ITEM = struct.Struct("<III")         # quiz id, correct index, number of choices
+U32 = struct.Struct("<I")
+
+QUIZ_RECORD = 1
+ITEM_RECORD = 2
+INDEX_RECORD = 3
+
+
+def _offsets_from_bytes(data):
+    offsets = array("Q")
+    offsets.frombytes(data)
+    if sys.byteorder != "little":
+        offsets.byteswap()
+    return offsets
+
+
+def _offsets_to_bytes(offsets):
+    if sys.byteorder != "little":
+        offsets = array("Q", offsets)
+        offsets.byteswap()
+    return offsets.tobytes()
+
+
+class _Entry:
+    """
+    What the store knows about one quiz: its id, where its indexed offsets are
+    in the file, and the offsets of items appended after the last INDEX.
+    """
+    __slots__ = ("quiz_id", "index_pos", "indexed", "tail")
+
+    def __init__(self, quiz_id, index_pos=0, indexed=0):
+        self.quiz_id = quiz_id
+        self.index_pos = index_pos
+        self.indexed = indexed
+        self.tail = array("Q")
+
+    def __len__(self):
+        return self.indexed + len(self.tail)
+
+
+class QuizStore:
+    def __init__(self, path, batch_size=64):
+        """
+        Open (or create) a quiz store file.
+        Inputs: path(str): Location of the store file
+                batch_size(int): Number of appended records between two fsyncs
+        Outputs: None
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self._entries = {}      # quiz name -> _Entry
+        self._names = []        # quiz id -> quiz name
+        self._unsynced = 0
+
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, "wb") as f:
+                f.write(HEADER.pack(MAGIC, VERSION, 0, 0, HEADER.size))
+                f.flush()
+                os.fsync(f.fileno())
+
+        self._file = open(path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, index_offset, index_end = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError("not a quiz store file")
+        if version != VERSION:
+            raise ValueError("unsupported quiz store version")
+
+        if index_offset:
+            self._read_index(index_offset)
+        self._end = self._scan(index_end)
+        if self._end < len(self._map):
+            # A crash left a partially written record at the end; drop it
+            self._file.truncate(self._end)
+            self._remap()
+
+    # Reading
+
+    def _remap(self):
+        self._map.close()
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _read_index(self, offset):
+        """
+        Load quiz names from an INDEX record; item offsets are left in the file.
+        """
+        m = self._map
+        pos = offset + RECORD.size
+        (count,) = U32.unpack_from(m, pos)
+        pos += U32.size
+        for _ in range(count):
+            (name_len,) = U32.unpack_from(m, pos)
+            pos += U32.size
+            name = str(m[pos:pos + name_len], "utf-8")
+            pos += name_len
+            (indexed,) = U32.unpack_from(m, pos)
+            pos += U32.size
+            self._add_entry(name, _Entry(len(self._names), pos, indexed))
+            pos += 8 * indexed
+
+    def _scan(self, pos):
+        """
+        Replay the records appended after the last INDEX record.
+        Returns: int: Offset just past the last complete record
+        """
+        m = self._map
+        size = len(m)
+        while pos + RECORD.size <= size:
+            kind, length = RECORD.unpack_from(m, pos)
+            end = pos + RECORD.size + length
+            if end > size:
+                break
+            if kind == QUIZ_RECORD:
+                name = str(m[pos + RECORD.size:end], "utf-8")
+                self._add_entry(name, _Entry(len(self._names)))
+            elif kind == ITEM_RECORD:
+                (quiz_id,) = U32.unpack_from(m, pos + RECORD.size)
+                self._entries[self._names[quiz_id]].tail.append(pos)
+            pos = end
+        return pos
+
+    def _add_entry(self, name, entry):
+        self._names.append(name)
+        self._entries[name] = entry
+
+    def _item_offsets(self, entry, count):
+        """
+        Offsets of the first `count` ITEM records of a quiz.
+        """
+        offsets = _offsets_from_bytes(self._map[entry.index_pos:entry.index_pos + 8 * entry.indexed])
+        offsets.extend(entry.tail)
+        return offsets[:count]
+
+    def _read_item(self, pos):
+        """
+        Decode one ITEM record.
+        Returns: tuple(str, list[str], int): question, choices, correct index
+        """
+        m = self._map
+        pos += RECORD.size
+        _, correct, n_choices = ITEM.unpack_from(m, pos)
+        pos += ITEM.size
+        strings = []
+        for _ in range(n_choices + 1):
+            (length,) = U32.unpack_from(m, pos)
+            pos += U32.size
+            strings.append(str(m[pos:pos + length], "utf-8"))
+            pos += length
+        return strings[0], strings[1:], correct
+
+    def names(self):
+        """
+        Get the names of all stored quizzes in creation order.
+        """
+        return list(self._names)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def __len__(self):
+        return len(self._names)
+
+    def item_count(self, name):
+        return len(self._entries[name])
+
+    def iter_items(self, name, count=None):
+        """
+        Decode the questions of a quiz one at a time.
+        Inputs: name(str): The quiz name
+                count(int): Only decode the first `count` questions (all when None)
+        Returns: iterator of (question, choices, correct_index)
+        """
+        entry = self._entries[name]
+        if count is None:
+            count = len(entry)
+        if self._end > len(self._map):
+            # Records were appended since the file was mapped
+            self._file.flush()
+            self._remap()
+        offsets = self._item_offsets(entry, count)
+        for pos in offsets:
+            yield self._read_item(pos)
+
+    def loader(self, name):
+        """
+        Build a function that fills a QuestionBank with the questions stored for
+        a quiz. Only the questions stored at the time of this call are loaded, so
+        questions appended afterwards are not loaded twice.
+        Inputs: name(str): The quiz name
+        Returns: function(QuestionBank)
+        """
+        count = self.item_count(name)
+
+        def load(bank):
+            for question, choices, correct in self.iter_items(name, count):
+                bank.append(question, choices, correct)
+
+        return load
+
+    # Writing
+
+    def _append(self, kind, payload):
+        pos = self._end
+        self._file.seek(pos)
+        self._file.write(RECORD.pack(kind, len(payload)))
+        self._file.write(payload)
+        # Flush to the OS on every write, but only fsync once per batch
+        self._file.flush()
+        self._end = pos + RECORD.size + len(payload)
+        self._unsynced += 1
+        if self._unsynced >= self.batch_size:
+            self.sync()
+        return pos
+
+    def append_quiz(self, name):
+        """
+        Store a new, empty quiz.
+        Inputs: name(str): The quiz name
+        Outputs: ValueError: If a quiz with that name is already stored
+        """
+        if name in self._entries:
+            raise ValueError("Quiz already exists")
+        self._append(QUIZ_RECORD, name.encode("utf-8"))
+        self._add_entry(name, _Entry(len(self._names)))
+
+    def append_item(self, name, question, choices, correct_index):
+        """
+        Append a question to a stored quiz.
+        Inputs: name(str): The quiz name
+                question(str): The question text
+                choices(list[str]): The choices
+                correct_index(int): Index of the correct choice
+        Outputs: KeyError: If no quiz with that name is stored
+        """
+        entry = self._entries[name]
+        parts = [ITEM.pack(entry.quiz_id, correct_index, len(choices))]
+        for text in [question] + list(choices):
+            data = text.encode("utf-8")
+            parts.append(U32.pack(len(data)))
+            parts.append(data)
+        entry.tail.append(self._append(ITEM_RECORD, b"".join(parts)))
+
+    def sync(self):
+        """
+        Force every appended record to disk.
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def checkpoint(self):
+        """
+        Append a fresh INDEX record and point the header at it, so the next
+        open does not need to scan the records written since the last one.
+        """
+        parts = [U32.pack(len(self._names))]
+        for name in self._names:
+            entry = self._entries[name]
+            data = name.encode("utf-8")
+            parts.append(U32.pack(len(data)))
+            parts.append(data)
+            parts.append(U32.pack(len(entry)))
+            parts.append(_offsets_to_bytes(self._item_offsets(entry, len(entry))))
+        payload = b"".join(parts)
+        index_offset = self._append(INDEX_RECORD, payload)
+        self.sync()
+
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, VERSION, 0, index_offset, self._end))
+        self.sync()
+
+        # Item offsets now live in the new INDEX record
+        self._remap()
+        pos = index_offset + RECORD.size + U32.size
+        for name in self._names:
+            entry = self._entries[name]
+            pos += U32.size + len(name.encode("utf-8"))
+            entry.indexed = len(entry)
+            entry.index_pos = pos + U32.size
+            entry.tail = array("Q")
+            pos += U32.size + 8 * entry.indexed
+
+    def close(self):
+        """
+        Write an index, sync and release the file.
+        """
+        if self._file.closed:
+            return
+        self.checkpoint()
+        self._map.close()
+        self._file.close()
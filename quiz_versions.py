@@ -0,0 +1,278 @@
+"""
+Copy-on-write versions of a quiz, so a quiz can be edited while it is being taken.
+
+Quiz.snapshot() returns a QuizSnapshot: a read-only view of the quiz exactly as
+it was when the snapshot was taken. Taking one costs O(1) whatever the size of
+the quiz: it only records the bank's version number and row count. Rows are
+shared with the live quiz until they are edited; just before a row is edited
+(the bank's "before" event) its current content is saved, once per row for all
+the snapshots that may still see it. A snapshot reads a row from the first
+saved copy made after it was taken, or from the live bank if there is none.
+
+Saved copies are only kept while a snapshot that may read them is alive: a
+snapshot is released by release() or when it is garbage collected (e.g. with
+the session that used it), a copy is dropped as soon as every snapshot older
+than it is released, and with no snapshot left all copies are dropped.
+"""
+
+import weakref
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from collections.abc import Sequence
+
+
+class QuizVersions:
+    """
+    The saved row copies of one QuestionBank, and the snapshots pinning them.
+    """
+    def __init__(self, bank):
+        self.bank = bank
+        self._history = {}      # row -> [(bank version when it was edited, row content before the edit)]
+        self._saved = deque()   # (version, row) of every saved copy, oldest first
+        # Pinned version -> number of live snapshots, oldest first (snapshots are
+        # taken at ever newer versions); released versions stay until they are the oldest
+        self._pins = OrderedDict()
+        self._live = 0          # live snapshots
+        bank.listeners.append(self._before_edit)
+
+    def __len__(self):
+        """
+        Number of saved row copies.
+        """
+        return sum(len(entries) for entries in self._history.values())
+
+    def snapshot(self):
+        """
+        Take a snapshot of the bank as it is now, in O(1).
+        Returns: QuizSnapshot
+        """
+        version = self.bank.version
+        self._pins[version] = self._pins.get(version, 0) + 1
+        self._live = self._live + 1
+        return QuizSnapshot(self, version, len(self.bank))
+
+    def _before_edit(self, bank, row, event):
+        if event != "before" or not self._live:
+            return
+        entries = self._history.get(row)
+        if entries is None:
+            entries = self._history[row] = []
+        elif entries[-1][0] >= next(reversed(self._pins)):
+            return      # already saved since the newest snapshot: every snapshot reads that copy
+        entries.append((bank.version, (bank.question(row), bank.choices(row), bank.correct_index(row),
+                                       bank.tags(row))))
+        self._saved.append((bank.version, row))
+
+    def row(self, version, row):
+        """
+        The content of a row as of a version.
+        Returns: tuple: (question, choices, correct index, tags), or None if it is
+                 unchanged since then (read it from the bank)
+        """
+        entries = self._history.get(row)
+        if entries:
+            k = bisect_left(entries, version, key=lambda entry: entry[0])
+            if k < len(entries):
+                return entries[k][1]
+        return None
+
+    def _unpin(self, version):
+        self._pins[version] = self._pins[version] - 1
+        self._live = self._live - 1
+        if not self._live:
+            self._history.clear()
+            self._saved.clear()
+            self._pins.clear()
+            return
+        pins = self._pins
+        while not pins[next(iter(pins))]:
+            pins.popitem(last=False)
+        # No snapshot reads a copy saved before the oldest pinned version
+        oldest = next(iter(pins))
+        saved = self._saved
+        while saved and saved[0][0] < oldest:
+            _, row = saved.popleft()
+            entries = self._history[row]
+            del entries[0]
+            if not entries:
+                del self._history[row]
+
+
+class QuizSnapshot:
+    """
+    A read-only quiz as it was at one version. It can be taken like a Quiz
+    (QuizSession(snapshot)).
+    """
+    def __init__(self, versions, version, count):
+        self.versions = versions
+        self.version = version
+        self.count = count
+        self._release = weakref.finalize(self, versions._unpin, version)
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def questions(self):
+        return SnapshotQuestions(self)
+
+    def row(self, row):
+        """
+        Returns: tuple: (question, choices, correct index, tags) of a row
+        """
+        saved = self.versions.row(self.version, row)
+        if saved is not None:
+            return saved
+        bank = self.versions.bank
+        return bank.question(row), bank.choices(row), bank.correct_index(row), bank.tags(row)
+
+    # Read like a QuestionBank (e.g. by an Exam drawn from the quiz), a row not
+    # edited since the snapshot straight from the bank
+
+    def question(self, row):
+        saved = self.versions.row(self.version, row)
+        return saved[0] if saved is not None else self.versions.bank.question(row)
+
+    def choice_count(self, row):
+        saved = self.versions.row(self.version, row)
+        return len(saved[1]) if saved is not None else self.versions.bank.choice_count(row)
+
+    def choice(self, row, index):
+        saved = self.versions.row(self.version, row)
+        return saved[1][index] if saved is not None else self.versions.bank.choice(row, index)
+
+    def choices(self, row):
+        saved = self.versions.row(self.version, row)
+        return list(saved[1]) if saved is not None else self.versions.bank.choices(row)
+
+    def choice_index(self, row, choice):
+        """
+        Returns: int: Index of the first choice of a row with that text, -1 if there is none
+        """
+        saved = self.versions.row(self.version, row)
+        if saved is not None:
+            return saved[1].index(choice) if choice in saved[1] else -1
+        return self.versions.bank.choice_index(row, choice)
+
+    def correct_index(self, row):
+        saved = self.versions.row(self.version, row)
+        return saved[2] if saved is not None else self.versions.bank.correct_index(row)
+
+    def correct_answer(self, row):
+        saved = self.versions.row(self.version, row)
+        return saved[1][saved[2]] if saved is not None else self.versions.bank.correct_answer(row)
+
+    def tags(self, row):
+        saved = self.versions.row(self.version, row)
+        return list(saved[3]) if saved is not None else self.versions.bank.tags(row)
+
+    def release(self):
+        """
+        Let the saved copies this snapshot reads go (also done when it is garbage collected).
+        """
+        self._release()
+
+
+class SnapshotQuestions(Sequence):
+    __slots__ = ("_snapshot",)
+
+    def __init__(self, snapshot):
+        self._snapshot = snapshot
+
+    def __len__(self):
+        return self._snapshot.count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [SnapshotItem(self._snapshot, row) for row in range(self._snapshot.count)[i]]
+        n = self._snapshot.count
+        if i < 0:
+            i = i + n
+        if not 0 <= i < n:
+            raise IndexError("question index out of range")
+        return SnapshotItem(self._snapshot, i)
+
+
+class SnapshotItem:
+    """
+    One question of a QuizSnapshot. Read-only. A question not edited since the
+    snapshot reads only what it needs from the bank.
+    """
+    __slots__ = ("_snapshot", "_row")
+
+    def __init__(self, snapshot, row):
+        self._snapshot = snapshot
+        self._row = row
+
+    def _saved(self):
+        snapshot = self._snapshot
+        return snapshot.versions.row(snapshot.version, self._row)
+
+    @property
+    def _live(self):
+        return self._snapshot.versions.bank
+
+    @property
+    def row(self):
+        """
+        Row of the question in the quiz.
+        """
+        return self._row
+
+    @property
+    def question(self):
+        saved = self._saved()
+        return saved[0] if saved is not None else self._live.question(self._row)
+
+    @property
+    def choices(self):
+        saved = self._saved()
+        return list(saved[1]) if saved is not None else self._live.choices(self._row)
+
+    @property
+    def correct_index(self):
+        saved = self._saved()
+        return saved[2] if saved is not None else self._live.correct_index(self._row)
+
+    @property
+    def correct_answer(self):
+        saved = self._saved()
+        if saved is not None:
+            return saved[1][saved[2]]
+        return self._live.correct_answer(self._row)
+
+    def get_question(self):
+        return self.question
+
+    def get_choice(self, index):
+        """
+        Raises: IndexError: if index is out of range
+        """
+        saved = self._saved()
+        if saved is not None:
+            choices = saved[1]
+            if 0 <= index < len(choices):
+                return choices[index]
+        elif 0 <= index < self._live.choice_count(self._row):
+            return self._live.choice(self._row, index)
+        raise IndexError("Choice index is out of range")
+
+    def get_correct_answer(self):
+        return self.correct_answer
+
+    def get_correct_index(self):
+        return self.correct_index
+
+    def choice_index(self, choice):
+        """
+        Returns: int: Index of a choice, -1 if it is not one of the choices
+        """
+        saved = self._saved()
+        if saved is not None:
+            choices = saved[1]
+            return choices.index(choice) if choice in choices else -1
+        return self._live.choice_index(self._row, choice)
+
+    def get_tags(self):
+        saved = self._saved()
+        return list(saved[3]) if saved is not None else self._live.tags(self._row)
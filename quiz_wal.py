@@ -0,0 +1,518 @@
+"""
+Write-ahead log for quiz edits and quiz sessions.
+
+Every change is appended to a log file before it is acknowledged. Each record
+is a JSON event framed by its length, a CRC32 and a log sequence number (LSN):
+    header  : length (4 bytes) + crc32 of lsn and payload (4 bytes) + lsn (8 bytes)
+    payload : the event as compact JSON
+Appends are buffered and written by one background thread, which fsyncs once
+for everything that arrived while the previous fsync was running (group commit;
+an optional commit delay makes the groups larger on slow disks): a caller that
+must know its event is on disk waits for it, and everyone waiting at the same
+moment shares one fsync.
+
+Journal puts the log to work for the quiz application:
+    - quiz creation, added questions and edits (Quiz_item.set_*) are logged as
+      they reach a quiz's QuestionBank; session starts, answers and ends are
+      logged as they happen
+    - snapshot() folds the log into the QuizStore (appending new questions, or
+      rewriting the store when stored questions were edited), writes tags and
+      live sessions next to it, and truncates the log (compaction); it runs
+      every `snapshot_every` events and on close()
+    - on open, the quizzes are rebuilt from the store and the log, lazily: the
+      logged events of a quiz are replayed when its questions are first used,
+      and in-flight sessions are restored with their answers and remaining time
+Replay is idempotent (added rows carry their row number), so a crash at any
+point of a snapshot is safe.
+
+The QuizStore file should not be changed by other tools (e.g. quiz_io) while a
+log written by a crashed run is waiting to be replayed.
+"""
+
+import json
+import os
+import struct
+import threading
+import time
+import uuid
+import zlib
+
+from quiz_model import Quiz
+from quiz_session import QuizSession
+from quiz_store import QuizStore
+
+RECORD = struct.Struct("<IIQ")      # payload length, crc32 of lsn + payload, lsn
+LSN = struct.Struct("<Q")
+
+
+def _encode(lsn, event):
+    data = json.dumps(event, separators=(",", ":")).encode("utf-8")
+    return RECORD.pack(len(data), zlib.crc32(data, zlib.crc32(LSN.pack(lsn))), lsn) + data
+
+
+def read_log(path):
+    """
+    Read the complete records of a log file.
+    Returns: tuple(list, int): (lsn, event) pairs, and the offset just past the
+             last valid record (anything after it is a torn or corrupt write)
+    """
+    events = []
+    if not os.path.exists(path):
+        return events, 0
+    with open(path, "rb") as f:
+        data = f.read()
+    decode = json.JSONDecoder().decode
+    pos = 0
+    while pos + RECORD.size <= len(data):
+        length, crc, lsn = RECORD.unpack_from(data, pos)
+        end = pos + RECORD.size + length
+        if end > len(data):
+            break
+        payload = data[pos + RECORD.size:end]
+        if zlib.crc32(payload, zlib.crc32(LSN.pack(lsn))) != crc:
+            break
+        events.append((lsn, decode(payload.decode("utf-8"))))
+        pos = end
+    return events, pos
+
+
+class WriteAheadLog:
+    def __init__(self, path, commit_delay=0.0, max_batch=4096, next_lsn=1):
+        """
+        Open a log file for appending. A torn record at its end is cut off; the
+        events already in the file are kept in `recovered` for the caller to replay.
+        Inputs: path(str): The log file
+                commit_delay(float): Seconds the writer waits for more events before an fsync
+                max_batch(int): Number of waiting events that triggers an fsync right away
+                next_lsn(int): Sequence number of the next event (when the file is empty)
+        Outputs: None
+        """
+        self.path = path
+        self.commit_delay = commit_delay
+        self.max_batch = max_batch
+        events, end = read_log(path)
+        self.recovered = events
+        self._file = open(path, "ab")
+        if self._file.tell() > end:
+            self._file.truncate(end)
+        self.next_lsn = max(next_lsn, events[-1][0] + 1 if events else 1)
+        self.durable_lsn = self.next_lsn - 1
+        self.commits = 0                # number of fsyncs, for statistics
+
+        lock = threading.Lock()
+        self._pending = threading.Condition(lock)   # the writer waits for events
+        self._durable = threading.Condition(lock)   # callers wait for their event to be on disk
+        self._buffer = []
+        self._error = None
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="wal-writer", daemon=True)
+        self._writer.start()
+
+    def append(self, event, wait=False):
+        """
+        Add an event to the log.
+        Inputs: event(list): JSON-serializable event
+                wait(bool): Return only once the event is on disk
+        Returns: int: The event's LSN
+        """
+        with self._pending:
+            if self._closed:
+                raise ValueError("the log is closed")
+            lsn = self.next_lsn
+            self.next_lsn = lsn + 1
+            self._buffer.append(_encode(lsn, event))
+            if len(self._buffer) == 1 or len(self._buffer) >= self.max_batch:
+                self._pending.notify()
+        if wait:
+            self.wait(lsn)
+        return lsn
+
+    def wait(self, lsn):
+        """
+        Block until the event with this LSN (and every earlier one) is on disk.
+        Raises: OSError: If writing the log failed
+        """
+        with self._durable:
+            while self.durable_lsn < lsn and self._error is None:
+                self._durable.wait()
+            if self._error is not None:
+                raise self._error
+
+    def sync(self):
+        """
+        Block until every appended event is on disk.
+        """
+        with self._pending:
+            lsn = self.next_lsn - 1
+            self._pending.notify()
+        self.wait(lsn)
+
+    def _write_loop(self):
+        while True:
+            with self._pending:
+                while not self._buffer and not self._closed:
+                    self._pending.wait()
+                if not self._buffer:
+                    return
+                # Let more events join this commit, unless enough are already waiting
+                deadline = time.monotonic() + self.commit_delay
+                while self.commit_delay and len(self._buffer) < self.max_batch and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._pending.wait(remaining)
+                batch = self._buffer
+                self._buffer = []
+                last = self.next_lsn - 1
+            try:
+                self._file.write(b"".join(batch))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except OSError as e:
+                with self._durable:
+                    self._error = e
+                    self._durable.notify_all()
+                return
+            with self._durable:
+                self.durable_lsn = last
+                self.commits = self.commits + 1
+                self._durable.notify_all()
+
+    def truncate(self):
+        """
+        Empty the log after its events have been made durable elsewhere (a snapshot).
+        LSNs keep counting up.
+        """
+        self.sync()
+        with self._pending:
+            self._file.truncate(0)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._closed:
+            return
+        self.sync()
+        with self._pending:
+            self._closed = True
+            self._pending.notify()
+        self._writer.join()
+        self._file.close()
+
+
+class _Tracked:
+    """
+    A live session and what is needed to rebuild it.
+    """
+    __slots__ = ("session", "quiz", "exam_seed", "exam_len", "answers")
+
+    def __init__(self, session, quiz, exam_seed=None, exam_len=None, answers=None):
+        self.session = session
+        self.quiz = quiz
+        self.exam_seed = exam_seed
+        self.exam_len = exam_len
+        self.answers = answers if answers is not None else []
+
+
+class Journal:
+    def __init__(self, store_path, log_path=None, snapshot_every=10000, commit_delay=0.0):
+        """
+        Open the quiz store and its log, and recover the quizzes and sessions they hold.
+        Inputs: store_path(str): The QuizStore file (the snapshot of the questions)
+                log_path(str): The log file (store_path + ".wal" by default)
+                snapshot_every(int): Number of logged events between two snapshots
+                commit_delay(float): Group commit delay of the log
+        Outputs: None
+        Attributes: quizzes(dict): name -> Quiz
+                    sessions(dict): session id -> QuizSession, for sessions that were not finished
+        """
+        self.store_path = store_path
+        self.log_path = log_path or store_path + ".wal"
+        self.state_path = store_path + ".state"
+        self.snapshot_every = snapshot_every
+        self.store = QuizStore(store_path)
+        self.quizzes = {}
+        self.sessions = {}
+        self._tracked = {}          # session id -> _Tracked
+        self._pending = {}          # quiz name -> logged events not yet replayed into its bank
+        self._stored = {}           # quiz name -> rows already in the store
+        self._edited = set()        # quizzes with edits to stored rows since the last snapshot
+        self._tags = {}             # quiz name -> {row: tags}, for quizzes not loaded yet
+        self._since_snapshot = 0
+
+        state = {"lsn": 0, "tags": {}, "sessions": []}
+        if os.path.exists(self.state_path):
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        for name in self.store.names():
+            self._open_quiz(name, self.store.item_count(name))
+        self._tags = {name: {int(row): tags for row, tags in rows.items()} for name, rows in state["tags"].items()}
+
+        self.log = WriteAheadLog(self.log_path, commit_delay, next_lsn=state["lsn"] + 1)
+        events = [event for lsn, event in self.log.recovered if lsn > state["lsn"]]
+        self.log.recovered = []
+        self.recovered_events = len(events)
+
+        # Questions first, so that restored sessions see their quizzes complete
+        for event in events:
+            if event[0] in ("quiz", "add", "row"):
+                self._replay(event)
+        for saved in state["sessions"]:
+            self._restore_session(saved)
+        for event in events:
+            if event[0] not in ("quiz", "add", "row"):
+                self._replay(event)
+        for sid, tracked in list(self._tracked.items()):
+            if tracked.session.finished:
+                del self._tracked[sid]
+        self.sessions = {sid: tracked.session for sid, tracked in self._tracked.items()}
+
+    # Quizzes
+
+    def _open_quiz(self, name, stored):
+        self._stored[name] = stored
+        self._pending[name] = []
+        self.quizzes[name] = Quiz(loader=lambda bank: self._load(name, bank))
+
+    def _load(self, name, bank):
+        """
+        Fill a quiz's bank from the store, then replay its logged events and start logging its changes.
+        """
+        if self._stored[name]:
+            for question, choices, correct in self.store.iter_items(name, self._stored[name]):
+                bank.append(question, choices, correct)
+        for row, tags in self._tags.pop(name, {}).items():
+            if row < len(bank):
+                bank.set_tags(row, tags)
+        for event in self._pending.pop(name):
+            kind, _, row, question, choices, correct, tags = event
+            if kind == "add":
+                if row == len(bank):
+                    bank.append(question, choices, correct, tags)
+            elif row < len(bank):
+                bank.set_question(row, question)
+                for k, choice in enumerate(choices):
+                    bank.set_choice(row, k, choice)
+                bank.set_correct_index(row, correct)
+                bank.set_tags(row, tags)
+
+        def listener(bank, row, event):
+            if event == "add":
+                self._log(_row_event("add", name, bank, row))
+            elif event == "change":
+                if row < self._stored[name]:
+                    self._edited.add(name)
+                self._log(_row_event("row", name, bank, row))
+
+        bank.listeners.append(listener)
+
+    def create_quiz(self, name):
+        """
+        Create and log a new, empty quiz.
+        Returns: Quiz
+        Raises: ValueError: If the quiz already exists
+        """
+        if name in self.quizzes:
+            raise ValueError("Quiz already exists")
+        self._open_quiz(name, 0)
+        self._log(["quiz", name])
+        return self.quizzes[name]
+
+    # Sessions
+
+    def start_session(self, session, quiz_name, exam=None):
+        """
+        Log the start of a session.
+        Inputs: session(QuizSession): The session
+                quiz_name(str): The quiz it takes
+                exam(Exam): The shuffled exam it takes, if any (rebuilt from its seed on recovery)
+        Returns: str: The session id
+        """
+        sid = uuid.uuid4().hex
+        seed = exam.seed if exam is not None else None
+        length = len(exam) if exam is not None else None
+        self._tracked[sid] = _Tracked(session, quiz_name, seed, length)
+        self.sessions[sid] = session
+        self._log(["start", sid, quiz_name, session.total_time, seed, length])
+        return sid
+
+    def answer(self, sid, chosen):
+        """
+        Answer the current question of a session and log the answer.
+        Inputs: chosen(int): Index of the chosen choice (or, as logged by older
+                    versions, its text)
+        Returns: bool: True if the answer was correct
+        """
+        tracked = self._tracked[sid]
+        correct = _answer(tracked.session, chosen)
+        tracked.answers.append(chosen)
+        self._log(["answer", sid, chosen, tracked.session.remaining_time])
+        return correct
+
+    def end_session(self, sid):
+        """
+        Log that a session is over (finished, timed out or abandoned).
+        """
+        if self._tracked.pop(sid, None) is not None:
+            self.sessions.pop(sid, None)
+            self._log(["end", sid])
+
+    def _restore_session(self, saved):
+        name = saved["quiz"]
+        if name not in self.quizzes:
+            return
+        quiz = self.quizzes[name]
+        if saved["exam_seed"] is not None:
+            from quiz_exam import ExamSampler
+            quiz = ExamSampler(quiz).assemble(saved["exam_len"], seed=saved["exam_seed"])
+        else:
+            quiz = quiz.snapshot()
+        try:
+            session = QuizSession(quiz, name)
+        except ValueError:
+            return
+        session.total_time = saved["total_time"]
+        session.remaining_time = saved["remaining"]
+        session.pause()         # until it is resumed; the time the program was down is not counted
+        tracked = _Tracked(session, name, saved["exam_seed"], saved["exam_len"])
+        for chosen in saved["answers"]:
+            if session.finished:
+                break
+            _answer(session, chosen)
+            tracked.answers.append(chosen)
+        self._tracked[saved["sid"]] = tracked
+
+    # Logging and recovery
+
+    def _log(self, event):
+        self.log.append(event)
+        self._since_snapshot = self._since_snapshot + 1
+        if self._since_snapshot >= self.snapshot_every:
+            self.snapshot()
+
+    def _replay(self, event):
+        kind = event[0]
+        if kind == "quiz":
+            if event[1] not in self.quizzes:
+                self._open_quiz(event[1], 0)
+        elif kind in ("add", "row"):
+            name = event[1]
+            if name in self._pending:
+                self._pending[name].append(event)
+                if kind == "row" and event[2] < self._stored[name]:
+                    self._edited.add(name)
+        elif kind == "start":
+            _, sid, name, total_time, seed, length = event
+            self._restore_session({"sid": sid, "quiz": name, "total_time": total_time, "remaining": total_time,
+                                   "exam_seed": seed, "exam_len": length, "answers": []})
+        elif kind == "answer":
+            tracked = self._tracked.get(event[1])
+            if tracked is not None and not tracked.session.finished:
+                _answer(tracked.session, event[2])
+                tracked.session.remaining_time = event[3]
+                tracked.answers.append(event[2])
+        elif kind == "end":
+            self._tracked.pop(event[1], None)
+
+    def sync(self):
+        """
+        Block until every logged event is on disk.
+        """
+        self.log.sync()
+
+    # Snapshots
+
+    def snapshot(self):
+        """
+        Fold the log into the store and the state file, then empty the log.
+        """
+        self._since_snapshot = 0
+        # Quizzes with recovered events not replayed yet must be loaded before the log goes
+        for name, events in list(self._pending.items()):
+            if events:
+                self.quizzes[name].bank
+        self.log.sync()
+        lsn = self.log.next_lsn - 1
+
+        if self._edited:
+            self._rewrite_store()
+        else:
+            for name, quiz in self.quizzes.items():
+                if name not in self.store:
+                    self.store.append_quiz(name)
+                if quiz.loaded:
+                    bank = quiz.bank
+                    for row in range(self._stored[name], len(bank)):
+                        self.store.append_item(name, bank.question(row), bank.choices(row),
+                                               bank.correct_index(row))
+                    self._stored[name] = len(bank)
+            self.store.checkpoint()
+
+        tags = {}
+        for name, quiz in self.quizzes.items():
+            if quiz.loaded:
+                bank = quiz.bank
+                rows = {row: bank.tags(row) for row in bank.tagged_rows()}
+            else:
+                rows = self._tags.get(name, {})
+            if rows:
+                tags[name] = rows
+        sessions = [{"sid": sid, "quiz": t.quiz, "total_time": t.session.total_time,
+                     "remaining": t.session.remaining_time, "exam_seed": t.exam_seed,
+                     "exam_len": t.exam_len, "answers": t.answers}
+                    for sid, t in self._tracked.items()]
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"lsn": lsn, "tags": tags, "sessions": sessions}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.state_path)
+        self.log.truncate()
+
+    def _rewrite_store(self):
+        """
+        Write every quiz, with its edits, to a new store file and swap it in.
+        """
+        tmp = self.store_path + ".tmp"
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        fresh = QuizStore(tmp, batch_size=1 << 30)
+        for name, quiz in self.quizzes.items():
+            fresh.append_quiz(name)
+            if quiz.loaded:
+                bank = quiz.bank
+                rows = ((bank.question(r), bank.choices(r), bank.correct_index(r)) for r in range(len(bank)))
+            else:
+                rows = self.store.iter_items(name, self._stored[name])
+            count = 0
+            for question, choices, correct in rows:
+                fresh.append_item(name, question, choices, correct)
+                count = count + 1
+            self._stored[name] = count
+        fresh.close()
+        self.store.close()
+        os.replace(tmp, self.store_path)
+        self.store = QuizStore(self.store_path)
+        self._edited.clear()
+
+    def close(self):
+        """
+        Take a final snapshot and close the store and the log.
+        """
+        self.snapshot()
+        self.log.close()
+        self.store.close()
+
+
+def _row_event(kind, name, bank, row):
+    return [kind, name, row, bank.question(row), bank.choices(row), bank.correct_index(row), bank.tags(row)]
+
+
+def _answer(session, chosen):
+    """
+    Replay or record an answer: a choice index, or a choice text in logs
+    written before answers were logged by index.
+    """
+    if isinstance(chosen, str):
+        return session.answer(chosen)
+    return session.answer_index(chosen)
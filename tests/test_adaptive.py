@@ -0,0 +1,100 @@
+"""
+Adaptive testing: the EAP update against the posterior computed directly, the
+stopping rule, and question selection once the best questions are used up.
+"""
+
+import math
+import random
+from statistics import NormalDist
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from quiz_adaptive import GRID, Ability, AdaptiveSession, ItemPool, grid_index
+from quiz_replay import synthetic_quiz
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 100.0
+
+    def __call__(self):
+        return self.t
+
+
+def posterior(pool, answers):
+    """
+    EAP estimate and standard error computed from scratch over the grid.
+    """
+    weights = []
+    for theta in GRID:
+        w = NormalDist().pdf(theta)
+        for row, correct in answers:
+            p = pool.probability(row, theta)
+            w = w * (p if correct else 1 - p)
+        weights.append(w)
+    total = sum(weights)
+    mean = sum(w * t for w, t in zip(weights, GRID)) / total
+    return mean, math.sqrt(sum(w * (t - mean) ** 2 for w, t in zip(weights, GRID)) / total)
+
+
+def test_eap_update_matches_the_posterior():
+    pool = ItemPool([1.2, 0.8, 2.0, 1.5], [-1.0, 0.0, 0.5, 2.0], [0.2, 0.0, 0.25, 0.1])
+    ability = Ability()
+    assert ability.theta == pytest.approx(0.0, abs=1e-9) and ability.se == pytest.approx(1.0, abs=0.01)
+    answers = []
+    for row, correct in [(0, True), (2, True), (1, False), (3, True)]:
+        before = ability.theta
+        ability.update(pool, row, correct)
+        answers.append((row, correct))
+        assert (ability.theta, ability.se) == pytest.approx(posterior(pool, answers))
+        assert (ability.theta > before) == correct
+
+
+def test_information_tables_hold_the_best_questions():
+    pool = ItemPool([0.5, 2.0, 1.0, 1.5, 2.5], [0.0, -2.0, 1.0, 0.2, 3.0], top=2)
+    for theta in (-3.0, 0.0, 2.5):
+        info = sorted(range(5), key=lambda row: -pool.information(row, theta))
+        assert pool.tables[grid_index(theta)] == info[:2]
+        assert pool.select(theta, set()) == info[0]
+
+
+def test_select_falls_back_to_the_nearest_peaks():
+    b = [-3.0, -1.0, 0.0, 0.4, 1.0, 3.0]
+    pool = ItemPool([1.0] * 6, b, top=2)            # without guessing, peaks are at b
+    used = set(pool.tables[grid_index(0.3)])
+    assert used == {2, 3}
+    assert pool.select(0.3, used) == 4                  # |1.0 - 0.3| < |-1.0 - 0.3|
+    assert pool.select(0.3, used | {4}) == 1
+    assert pool.select(0.3, set(range(5))) == 5
+    assert pool.select(0.3, set(range(6))) is None
+    picks = {pool.select(0.3, used, random.Random(seed), randomesque=3) for seed in range(30)}
+    assert picks == {1, 4, 5}
+
+
+def test_session_stops_once_the_estimate_is_precise():
+    n = 60
+    quiz = synthetic_quiz(n)
+    pool = ItemPool([2.5] * n, [GRID[(k * 7) % len(GRID)] for k in range(n)])
+    session = AdaptiveSession(pool, quiz, min_items=5, max_items=40, target_se=0.4, clock=FakeClock())
+    while not session.finished:
+        # A taker of ability about 1 answers the easier questions right
+        q = session.current_question()
+        right = pool.params[session.rows[session.index]][1] < 1.0
+        session.answer_index(q.correct_index if right else (q.correct_index + 1) % 4)
+    asked = len(session.rows)
+    assert 5 <= asked < 40 and session.ability.se <= 0.4
+    assert len(set(session.rows)) == asked
+
+    capped = AdaptiveSession(pool, quiz, min_items=5, max_items=8, target_se=0.0, clock=FakeClock())
+    while not capped.finished:
+        capped.answer_index(capped.current_question().correct_index)
+    assert len(capped.rows) == 8 and capped.score == 8
+
+
+def test_pool_must_match_the_quiz():
+    with pytest.raises(ValueError):
+        AdaptiveSession(ItemPool([1.0], [0.0]), synthetic_quiz(2))
+    with pytest.raises(ValueError):
+        ItemPool([1.0, -1.0], [0.0, 0.0])
@@ -0,0 +1,103 @@
+"""
+Item analytics: the running (Welford) statistics agree with the vectorized
+recompute and with a direct computation, across a save/load, and choice counts
+stay per question when one question has very many choices.
+"""
+
+import math
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from quiz_analytics import ItemAnalytics
+from quiz_replay import synthetic_quiz
+from quiz_session import QuizSession
+
+
+def random_attempts(analytics, attempts=300, rows=8, seed=5):
+    rng = random.Random(seed)
+    history = []
+    for _ in range(attempts):
+        ability = rng.random()
+        responses = []
+        for row in range(rows):
+            right = rng.random() < ability
+            chosen = row % 4 if right else (row % 4 + rng.randint(1, 3)) % 4
+            responses.append((row, chosen, right, rng.uniform(1, 30) if rng.random() < 0.9 else -1.0))
+        score = sum(r[2] for r in responses) / rows
+        analytics.add_attempt("Maths", responses, score)
+        history.append((responses, score))
+    return history
+
+
+def test_running_statistics_agree_with_recompute_and_a_direct_computation():
+    analytics = ItemAnalytics()
+    history = random_attempts(analytics)
+    table = analytics.recompute("Maths")
+    for row in range(8):
+        item = analytics.stats("Maths", row)
+        right = [r[row][2] for r, _ in history]
+        scores = [s for _, s in history]
+        times = [r[row][3] for r, _ in history if r[row][3] >= 0]
+        p = sum(right) / len(right)
+        mean = sum(scores) / len(scores)
+        sd = math.sqrt(sum((s - mean) ** 2 for s in scores) / len(scores))
+        m1 = sum(s for s, ok in zip(scores, right) if ok) / sum(right)
+        assert item.p_value == pytest.approx(p) == pytest.approx(table.p_value[row])
+        assert item.discrimination == pytest.approx((m1 - mean) / sd * math.sqrt(p / (1 - p)), rel=1e-6)
+        assert item.discrimination == pytest.approx(table.discrimination[row], rel=1e-5)
+        assert item.mean_time == pytest.approx(sum(times) / len(times), rel=1e-5)
+        assert item.time_sd == pytest.approx(table.time_sd[row], rel=1e-4)
+        assert item.choice_rates == pytest.approx(table.choice_rates[row].tolist())
+        assert sum(item.choice_rates) == pytest.approx(1.0)
+
+
+def test_save_and_load_rebuild_the_same_statistics(tmp_path):
+    analytics = ItemAnalytics()
+    random_attempts(analytics)
+    path = str(tmp_path / "quizzes.stats")
+    analytics.save(path)
+    loaded = ItemAnalytics.load(path)
+    assert len(loaded) == len(analytics)
+    for row in range(8):
+        a, b = analytics.stats("Maths", row), loaded.stats("Maths", row)
+        assert (a.count, a.correct, a.choice_counts) == (b.count, b.correct, b.choice_counts)
+        assert a.discrimination == pytest.approx(b.discrimination, rel=1e-5)
+        assert a.mean_time == pytest.approx(b.mean_time, rel=1e-5)
+
+
+def test_undefined_statistics_are_none_or_nan():
+    analytics = ItemAnalytics()
+    analytics.add_attempt("Maths", [(0, 0, True, -1.0), (1, 1, False, 2.0)], 0.5)
+    item = analytics.stats("Maths", 0)
+    assert item.discrimination is None and item.mean_time is None
+    table = analytics.recompute("Maths")
+    assert math.isnan(table.discrimination[0]) and math.isnan(table.mean_time[0])
+    assert analytics.stats("Maths", 5) is None
+
+
+def test_one_question_with_many_choices_keeps_counts_per_question():
+    analytics = ItemAnalytics()
+    for k in range(50):
+        analytics.add_attempt("Wide", [(row, 1_000_000 if row == 0 and k == 0 else k % 3, k % 2 == 0, 1.0)
+                                       for row in range(200)], 0.5)
+    table = analytics.recompute("Wide")
+    assert len(table.choice_rates[0]) == 1_000_001 and table.choice_rates[0][1_000_000] == pytest.approx(0.02)
+    assert len(table.choice_rates[1]) == 3
+    analytics.rebuild()
+    assert analytics.stats("Wide", 1).choice_counts == [17, 17, 16]
+
+
+def test_sessions_feed_the_statistics_of_their_rows():
+    quiz = synthetic_quiz(4)
+    session = QuizSession(quiz.snapshot(), "Load")
+    session.answer_index(0)         # right
+    session.skip()
+    session.answer_index(0)         # wrong
+    session.answer_index(3)         # right
+    analytics = ItemAnalytics()
+    analytics.add_session(session)
+    assert [analytics.stats("Load", row).p_value for row in range(4)] == [1.0, 0.0, 0.0, 1.0]
+    assert analytics.stats("Load", 1).choice_counts == []
@@ -0,0 +1,163 @@
+"""
+Catalog routing: the hash ring places every quiz on a stable shard and moves
+only about 1/N of them when a shard joins or leaves; ShardedCatalog reads and
+writes a quiz on the shards the ring gives it, replicas included.
+"""
+
+import http.client
+import socket
+import threading
+
+import pytest
+
+from quiz_catalog import HashRing, LocalShards, ShardClient, ShardedCatalog
+from quiz_replay import synthetic_quiz
+
+NODES = [f"10.0.0.{k}:9000" for k in range(1, 6)]
+NAMES = [f"quiz-{k}" for k in range(4000)]
+
+
+def test_placement_is_stable_and_independent_of_join_order():
+    ring = HashRing(NODES)
+    again = HashRing(reversed(NODES))
+    assert [ring.node_for(name) for name in NAMES] == [again.node_for(name) for name in NAMES]
+    # Every shard gets a share of the quizzes
+    assert {ring.node_for(name) for name in NAMES} == set(NODES)
+
+
+def test_nodes_for_gives_distinct_shards_owner_first():
+    ring = HashRing(NODES)
+    for name in NAMES[:200]:
+        nodes = ring.nodes_for(name, 3)
+        assert len(set(nodes)) == 3 and nodes[0] == ring.node_for(name)
+    assert len(ring.nodes_for("quiz-0", 10)) == len(NODES)
+    assert HashRing().nodes_for("quiz-0") == []
+
+
+def test_adding_a_shard_moves_only_its_share():
+    ring = HashRing(NODES)
+    before = {name: ring.node_for(name) for name in NAMES}
+    ring.add("10.0.0.9:9000")
+    moved = [name for name in NAMES if ring.node_for(name) != before[name]]
+    # Quizzes only move to the new shard, about 1/(N+1) of them
+    assert all(ring.node_for(name) == "10.0.0.9:9000" for name in moved)
+    assert 0 < len(moved) < 1.5 * len(NAMES) / (len(NODES) + 1)
+
+
+def test_removing_a_shard_moves_only_its_quizzes():
+    ring = HashRing(NODES)
+    before = {name: ring.node_for(name) for name in NAMES}
+    ring.remove(NODES[0])
+    assert NODES[0] not in ring
+    for name in NAMES:
+        if before[name] != NODES[0]:
+            assert ring.node_for(name) == before[name]
+
+
+def test_catalog_routes_reads_and_replicas_to_ring_shards():
+    with LocalShards(2) as shards:
+        catalog = ShardedCatalog(shards.nodes)
+        try:
+            catalog.put("geography", synthetic_quiz(30))
+            assert catalog.placement["geography"] == [catalog.ring.node_for("geography")]
+            assert catalog.info("geography")["questions"] == 30
+            total, rows = catalog.rows("geography", 5, 10)
+            assert total == 30 and len(rows) == 10
+
+            catalog.replicate("geography", 1)
+            assert catalog.placement["geography"] == catalog.ring.nodes_for("geography", 2)
+            # Reads are spread over both copies and every copy has the same rows
+            assert all(catalog.rows("geography", 5, 10)[1] == rows for _ in range(4))
+
+            # A second client learns the placement from the shards
+            other = ShardedCatalog(shards.nodes)
+            assert sorted(other.placement["geography"]) == sorted(catalog.placement["geography"])
+            other.close()
+
+            catalog.replicate("geography", 0)
+            assert catalog.placement["geography"] == [catalog.ring.node_for("geography")]
+
+            # A new shard takes over the quizzes the ring now gives it
+            for k in range(8):
+                catalog.put(f"quiz-{k}", synthetic_quiz(5))
+            catalog.add_node(shards.start())
+            for name in catalog.names():
+                assert catalog.placement[name] == [catalog.ring.node_for(name)]
+                assert catalog.info(name)["questions"] == (30 if name == "geography" else 5)
+
+            catalog.delete("geography")
+            assert "geography" not in catalog.names()
+        finally:
+            catalog.close()
+
+
+class DroppingShard:
+    """
+    A shard that reads each request, drops the connection without answering the
+    first one and answers the next ones with {}.
+    """
+    def __init__(self):
+        self.listener = socket.create_server(("127.0.0.1", 0))
+        self.node = f"127.0.0.1:{self.listener.getsockname()[1]}"
+        self.requests = []
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    def serve(self):
+        while True:
+            try:
+                conn, _ = self.listener.accept()
+            except OSError:
+                return
+            with conn:
+                while True:
+                    data = conn.recv(65536)
+                    if not data:
+                        break
+                    self.requests.append(data.split(b" ", 1)[0].decode())
+                    if len(self.requests) == 1:
+                        break
+                    conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n{}")
+
+    def close(self):
+        self.listener.close()
+
+
+def test_lost_response_is_retried_only_for_idempotent_requests():
+    shard = DroppingShard()
+    try:
+        client = ShardClient(shard.node, timeout=5)
+        assert client.request("GET", "/quizzes") == {}
+        assert shard.requests == ["GET", "GET"]
+        client.close()
+
+        shard.requests.clear()
+        client = ShardClient(shard.node, timeout=5)
+        # The shard may have started the session: sending it again could start two
+        with pytest.raises((ConnectionError, http.client.HTTPException)):
+            client.request("POST", "/sessions", {"quiz": "geography"})
+        assert shard.requests == ["POST"]
+        client.close()
+    finally:
+        shard.close()
+
+
+def test_remote_session_runs_on_the_shard():
+    with LocalShards(2) as shards:
+        catalog = ShardedCatalog(shards.nodes)
+        try:
+            catalog.put_rows("capitals", [])
+            catalog.put_rows("capitals", [["Capital of France?", ["Paris", "Rome"], 0, []],
+                                          ["Capital of Italy?", ["Paris", "Rome"], 1, ["europe"]]])
+            assert catalog.info("capitals")["questions"] == 2
+
+            remote = catalog.start_session("capitals")
+            assert remote.node == catalog.ring.node_for("capitals")
+            assert (remote.index, remote.total, remote.question) == (0, 2, "Capital of France?")
+            assert remote.choices == ["Paris", "Rome"] and 0 < remote.remaining() <= 60
+            assert remote.answer_index(0) is True
+            assert remote.answer_index(0) is False
+            assert remote.finished and remote.question is None and remote.remaining() == 0
+            results = remote.results()
+            assert results["score"] == 1 and results["missed"] == [[2, "Capital of Italy?", "Paris", "Rome"]]
+        finally:
+            catalog.close()
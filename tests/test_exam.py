@@ -0,0 +1,110 @@
+"""
+Exam assembly: the alias table gives every group its weight, the sparse
+Fisher-Yates draw is uniform over ordered draws, and exams keep their quotas,
+seeds and snapshot.
+"""
+
+import random
+from collections import Counter
+from itertools import permutations
+
+import pytest
+
+from quiz_exam import ExamSampler, alias_table, sample_indices
+from quiz_model import Quiz
+
+
+def tagged_quiz(easy=6, hard=4):
+    quiz = Quiz()
+    quiz.add_rows((f"Question {i}?", [f"Answer {i}.{k}" for k in range(4)], i % 4,
+                   ["easy" if i < easy else "hard"]) for i in range(easy + hard))
+    return quiz
+
+
+@pytest.mark.parametrize("weights", [[1, 1, 1], [5, 1, 0, 2], [0.1, 3.7], [7]])
+def test_alias_table_encodes_the_weights_exactly(weights):
+    prob, alias = alias_table(weights)
+    n = len(weights)
+    mass = [p / n for p in prob]
+    for i, p in enumerate(prob):
+        mass[alias[i]] = mass[alias[i]] + (1.0 - p) / n
+    total = sum(weights)
+    assert mass == pytest.approx([w / total for w in weights])
+
+
+def test_alias_table_draws_follow_the_weights():
+    weights = [5, 1, 0, 2]
+    prob, alias = alias_table(weights)
+    rng = random.Random(3)
+    counts = Counter()
+    draws = 80000
+    for _ in range(draws):
+        i = int(rng.random() * len(weights))
+        counts[i if rng.random() < prob[i] else alias[i]] += 1
+    assert counts[2] == 0
+    for i, w in enumerate(weights):
+        assert counts[i] / draws == pytest.approx(w / 8, abs=0.01)
+
+
+def test_alias_table_needs_a_positive_weight():
+    for weights in ([], [0, 0]):
+        with pytest.raises(ValueError):
+            alias_table(weights)
+
+
+def test_sparse_fisher_yates_is_uniform_over_ordered_draws():
+    rng = random.Random(11)
+    draws = 60000
+    counts = Counter(tuple(sample_indices(rng, 5, 2)) for _ in range(draws))
+    assert set(counts) == set(permutations(range(5), 2))
+    for count in counts.values():
+        assert count / draws == pytest.approx(1 / 20, abs=0.006)
+
+
+def test_sparse_fisher_yates_draws_distinct_indices_from_a_huge_range():
+    drawn = sample_indices(random.Random(1), 10 ** 15, 1000)
+    assert len(set(drawn)) == 1000 and all(0 <= i < 10 ** 15 for i in drawn)
+    assert sorted(sample_indices(random.Random(2), 7, 7)) == list(range(7))
+
+
+def test_exam_keeps_quotas_and_is_reproducible():
+    quiz = tagged_quiz()
+    sampler = ExamSampler(quiz, stratify="tag")
+    exam = sampler.assemble(seed=42, quotas={"easy": 3, "hard": 2})
+    tags = Counter(item.get_tags()[0] for item in exam.questions)
+    assert tags == {"easy": 3, "hard": 2} and len(set(exam.rows)) == 5
+    again = sampler.assemble(seed=42, quotas={"easy": 3, "hard": 2})
+    assert (list(again.rows), list(again.order)) == (list(exam.rows), list(exam.order))
+    for item in exam.questions:
+        assert item.get_choice(item.get_correct_index()) == item.get_correct_answer()
+    with pytest.raises(ValueError):
+        sampler.assemble(quotas={"hard": 5})
+
+
+def test_weighted_mix_stays_within_the_pool():
+    sampler = ExamSampler(tagged_quiz(easy=8, hard=2), stratify="tag")
+    for seed in range(20):
+        exam = sampler.assemble(8, seed=seed, weights={"easy": 1, "hard": 9})
+        tags = Counter(item.get_tags()[0] for item in exam.questions)
+        assert tags["hard"] <= 2 and sum(tags.values()) == 8
+
+
+def test_exam_reads_the_quiz_as_it_was_drawn():
+    quiz = tagged_quiz()
+    exam = ExamSampler(quiz).assemble(seed=5)
+    item = exam.questions[0]
+    text, answer = item.get_question(), item.get_correct_answer()
+    quiz.questions[item.row].set_question("Edited?")
+    assert (item.get_question(), item.get_correct_answer()) == (text, answer)
+
+
+def test_batch_keys_match_their_exams():
+    pytest.importorskip("numpy")
+    batch = ExamSampler(tagged_quiz(), stratify="tag").assemble_batch(
+        50, seed=9, quotas={"easy": 2, "hard": 2})
+    assert batch.rows.shape == (50, 4) and batch.distinct() > 1
+    for k in (0, 17, 49):
+        exam = batch[k]
+        for item in exam.questions:
+            assert item.get_choice(item.get_correct_index()) == item.get_correct_answer()
+    assert list(batch.scores(batch.correct)) == [4] * 50
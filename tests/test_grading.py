@@ -0,0 +1,49 @@
+"""
+Batch grading: scores and missed lists match what a QuizSession gives for the
+same answers, unanswered questions (-1) included.
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from quiz_grading import answer_matrix, grade
+from quiz_replay import synthetic_quiz
+from quiz_session import QuizSession
+
+
+def session_result(quiz, row):
+    """
+    The result text of a session answering as a row of an answer matrix does (-1: skipped).
+    """
+    session = QuizSession(quiz.snapshot(), "Batch")
+    for position in row:
+        if position < 0:
+            session.skip()
+        else:
+            session.answer_index(position)
+    return session.score, session.result_text()
+
+
+def test_batch_grades_agree_with_sessions():
+    quiz = synthetic_quiz(6)        # question i's correct choice is i % 4
+    chosen = np.array([[0, 1, 2, 3, 0, 1],
+                       [0, -1, 0, -1, 1, 1],
+                       [-1, -1, -1, -1, -1, -1]])
+    grades = grade(quiz, chosen)
+    assert grades.scores.tolist() == [6, 2, 0]
+    assert grades.missed(1) == [(2, "Question 1?", None, "Answer 1.1"), (3, "Question 2?", "Answer 2.0", "Answer 2.2"),
+                                (4, "Question 3?", None, "Answer 3.3"), (5, "Question 4?", "Answer 4.1", "Answer 4.0")]
+    for taker in range(3):
+        assert (int(grades.scores[taker]), grades.result_text(taker)) == session_result(quiz, chosen[taker].tolist())
+
+
+def test_answer_matrix_and_invalid_sheets():
+    quiz = synthetic_quiz(3)
+    matrix = answer_matrix([0, 0, 1], [0, 2, 1], [0, 2, 1], 2, 3)
+    assert matrix.tolist() == [[0, -1, 2], [-1, 1, -1]]
+    assert grade(quiz, matrix).scores.tolist() == [2, 1]
+    with pytest.raises(ValueError):
+        grade(quiz, np.zeros((2, 4), dtype=int))
+    with pytest.raises(ValueError):
+        grade(quiz, np.array([[0, 4, 0]]))
@@ -0,0 +1,94 @@
+"""
+Search index: tokenizing, incremental updates from the quizzes' banks, prefix
+truncation, and save/load round trips with rows edited while detached.
+"""
+
+from quiz_index import MAX_PREFIX_TERMS, SearchIndex, open_index, tag_term, tokenize
+from quiz_model import Quiz, Quiz_item
+
+
+def make_quiz(*questions):
+    quiz = Quiz()
+    for question, choices in questions:
+        quiz.add_question(Quiz_item(question, choices, choices[0]))
+    return quiz
+
+
+def found(results):
+    return [(name, row) for name, row, _ in results]
+
+
+def test_tokenize_lowercases_words_and_keeps_tags():
+    assert tokenize("What's the Capital of France?") == ["what", "s", "the", "capital", "of", "france"]
+    assert tokenize("#geo and #World_War") == ["#geo", "and", "#world_war"]
+    assert tag_term("World War") == "#world_war"
+
+
+def test_every_word_must_match_and_the_last_is_a_prefix():
+    index = SearchIndex()
+    index.attach("geo", make_quiz(("Capital of France?", ["Paris", "Rome"]),
+                                  ("Capital of Spain?", ["Madrid", "Paris"]),
+                                  ("Largest ocean?", ["Pacific", "Atlantic"])))
+    assert sorted(found(index.search("capital"))) == [("geo", 0), ("geo", 1)]
+    assert found(index.search("capital fra")) == [("geo", 0)]
+    assert found(index.search("capital fra", prefix=False)) == []
+    assert found(index.search("paris madrid")) == [("geo", 1)]
+    assert index.search("") == [] and index.search("nothing") == []
+
+
+def test_edits_and_new_questions_update_the_index():
+    quiz = make_quiz(("Capital of France?", ["Paris", "Rome"]))
+    index = SearchIndex()
+    index.attach("geo", quiz)
+
+    quiz.add_question(Quiz_item("Capital of Italy?", ["Rome", "Paris"], "Rome"))
+    assert sorted(found(index.search("capital"))) == [("geo", 0), ("geo", 1)]
+    item = quiz.questions[0]
+    item.set_question("Largest city of France?")
+    assert found(index.search("capital")) == [("geo", 1)]
+    assert found(index.search("largest")) == [("geo", 0)]
+    item.set_choices(1, "Lyon")
+    assert found(index.search("lyon")) == [("geo", 0)] and found(index.search("rome")) == [("geo", 1)]
+    item.set_tags(["europe"])
+    assert found(index.search("#europe")) == [("geo", 0)]
+
+    index.detach("geo")
+    quiz.questions[1].set_question("Detached edit?")
+    assert found(index.search("detached")) == []
+
+
+def test_save_and_load_reindex_only_what_changed(tmp_path):
+    path = str(tmp_path / "quizzes.idx")
+    quiz = make_quiz(("Capital of France?", ["Paris", "Rome"]), ("Capital of Spain?", ["Madrid", "Paris"]))
+    index = SearchIndex()
+    index.attach("geo", quiz)
+    index.save(path)
+    index.detach("geo")
+
+    # Edited and added while no index followed the quiz
+    quiz.questions[1].set_question("Largest city of Spain?")
+    quiz.add_question(Quiz_item("Capital of Peru?", ["Lima", "Quito"], "Lima"))
+
+    loaded = SearchIndex.load(path)
+    assert sorted(found(loaded.search("capital"))) == [("geo", 0), ("geo", 1)]     # as saved
+    loaded.attach("geo", quiz)
+    assert sorted(found(loaded.search("capital"))) == [("geo", 0), ("geo", 2)]
+    assert found(loaded.search("largest")) == [("geo", 1)]
+    assert len(loaded) == 3
+
+
+def test_unreadable_index_file_starts_a_new_index(tmp_path):
+    path = tmp_path / "quizzes.idx"
+    path.write_bytes(b"not an index")
+    index = open_index(str(path))
+    assert len(index) == 0
+    assert len(open_index(str(tmp_path / "missing.idx"))) == 0
+
+
+def test_prefix_with_too_many_completions_is_reported():
+    quiz = make_quiz(*[(f"Question about word{k:03d}?", ["yes", "no"]) for k in range(MAX_PREFIX_TERMS + 5)])
+    index = SearchIndex()
+    index.attach("many", quiz)
+    results = index.search("word", limit=200)
+    assert results.truncated and len(results) == MAX_PREFIX_TERMS
+    assert not index.search("word000").truncated
@@ -0,0 +1,51 @@
+"""
+Bulk import and export: batch validation with per-line errors, imports written
+straight to a store, and export round trips.
+"""
+
+import pytest
+
+from quiz_io import export_file, import_rows, read_rows, validate_batch
+from quiz_model import Quiz
+from quiz_store import QuizStore
+
+
+def rows(n):
+    return [(k + 1, f"Question {k}?", [f"right {k}", f"wrong {k}"], f"right {k}") for k in range(n)]
+
+
+def test_invalid_rows_are_reported_with_their_line():
+    batch = rows(2) + [(3, "", ["a", "b"], "a"), (4, "Q?", ["a", "a"], "a"), (5, "Q?", ["a", "b"], "c")]
+    valid, rejected = validate_batch(batch)
+    assert valid == [("Question 0?", ["right 0", "wrong 0"], 0), ("Question 1?", ["right 1", "wrong 1"], 0)]
+    assert [line for line, _ in rejected] == [3, 4, 5]
+    assert rejected[1][1] == "choices must be different from each other"
+
+
+def test_import_to_a_store_keeps_nothing_in_memory(tmp_path):
+    store = QuizStore(str(tmp_path / "quizzes.qzs"))
+    try:
+        store.append_quiz("bulk")
+        report = import_rows(None, iter(rows(2500) + [(2501, "Q?", ["a"], "a")]), batch_size=1000,
+                             store=store, name="bulk")
+        assert (report.rows, report.loaded, report.failed) == (2501, 2500, 1)
+        assert store.item_count("bulk") == 2500
+        assert next(store.iter_items("bulk")) == ("Question 0?", ["right 0", "wrong 0"], 0)
+        with pytest.raises(ValueError):
+            import_rows(None, iter(rows(1)))
+    finally:
+        store.close()
+
+
+@pytest.mark.parametrize("ext", [".csv", ".jsonl"])
+def test_export_then_import_round_trips(tmp_path, ext):
+    quiz = Quiz()
+    import_rows(quiz, iter(rows(20)))
+    path = str(tmp_path / ("bank" + ext))
+    assert export_file(quiz, path).rows == 20
+
+    again = Quiz()
+    report = import_rows(again, read_rows(path))
+    assert report.loaded == 20 and report.failed == 0
+    assert [again.bank.choices(row) for row in range(20)] == [quiz.bank.choices(row) for row in range(20)]
+    assert [again.bank.correct_answer(row) for row in range(20)] == [f"right {k}" for k in range(20)]
@@ -0,0 +1,90 @@
+"""
+Quiz_item and QuestionBank: validation, refusal of duplicate choices (rows
+with few and with many choices), lookups by choice text, and items joining
+one quiz only.
+"""
+
+import pytest
+
+from question_bank import LOOKUP_MIN, QuestionBank
+from quiz_model import Quiz, Quiz_item
+
+
+def test_item_is_validated():
+    item = Quiz_item("2 + 2?", ["3", "4"], "4")
+    assert item.get_correct_index() == 1 and item.get_correct_answer() == "4"
+    for question, choices, correct in [("", ["a", "b"], "a"), ("Q?", ["a"], "a"),
+                                       ("Q?", ["a", " "], "a"), ("Q?", ["a", "b"], "c")]:
+        with pytest.raises(ValueError):
+            Quiz_item(question, choices, correct)
+
+
+def test_item_refuses_duplicate_choices():
+    with pytest.raises(ValueError, match="different"):
+        Quiz_item("Q?", ["a", "b", "a"], "a")
+
+
+@pytest.mark.parametrize("count", [3, LOOKUP_MIN + 8])
+def test_set_choices_refuses_a_choice_the_row_already_has(count):
+    choices = [f"choice {k}" for k in range(count)]
+    item = Quiz_item("Q?", choices, "choice 0")
+    item.choice_index("choice 1")               # builds the lookup table of a long row
+    with pytest.raises(ValueError, match="different"):
+        item.set_choices(2, "choice 1")
+    assert item.choices == choices              # nothing changed
+
+    item.set_choices(2, "choice 2")             # the same text again is not a duplicate
+    item.set_choices(2, "brand new")
+    assert item.get_choice(2) == "brand new"
+    assert item.choice_index("brand new") == 2 and item.choice_index("choice 2") == -1
+    with pytest.raises(ValueError, match="different"):
+        item.set_choices(1, "brand new")
+    with pytest.raises(IndexError):
+        item.set_choices(count, "past the end")
+
+
+def test_text_interned_elsewhere_is_still_checked_against_the_row():
+    quiz = Quiz()
+    quiz.add_question(Quiz_item("First?", ["shared", "other"], "shared"))
+    quiz.add_question(Quiz_item("Second?", ["x", "y", "z"], "x"))
+    second = quiz.questions[1]
+    second.set_choices(1, "shared")             # in the bank already, not in this row
+    assert second.choices == ["x", "shared", "z"]
+    with pytest.raises(ValueError):
+        second.set_choices(2, "shared")
+
+
+def test_an_item_joins_one_quiz_only():
+    first, second = Quiz(), Quiz()
+    item = Quiz_item("Q?", ["a", "b"], "a")
+    first.add_question(item)
+    with pytest.raises(ValueError, match="already in a quiz"):
+        second.add_question(item)
+    with pytest.raises(ValueError, match="already in a quiz"):
+        first.add_question(first.questions[0])
+    with pytest.raises(TypeError):
+        first.add_question("Q?")
+    assert (len(first.questions), len(second.questions)) == (1, 0)
+    item.set_question("Edited?")                # still a view of the first quiz
+    assert first.questions[0].get_question() == "Edited?"
+
+
+def test_correct_answer_follows_the_choice_index():
+    item = Quiz_item("Q?", ["a", "b", "c"], "b")
+    item.set_choices(1, "B")
+    assert item.get_correct_answer() == "B"
+    item.set_correct_answer("c")
+    assert item.get_correct_index() == 2
+    with pytest.raises(ValueError):
+        item.set_correct_answer("missing")
+
+
+def test_bank_choice_index_and_distinct_set_choice():
+    bank = QuestionBank()
+    row = bank.append("Q?", [f"c{k}" for k in range(LOOKUP_MIN * 2)], 0)
+    assert bank.choice_index(row, f"c{LOOKUP_MIN + 3}") == LOOKUP_MIN + 3
+    assert bank.choice_index(row, "nope") == -1
+    bank.set_choice(row, 5, "c6")               # allowed without distinct
+    assert bank.choice_index(row, "c6") == 5    # the first occurrence
+    with pytest.raises(ValueError):
+        bank.set_choice(row, 7, "c6", distinct=True)
@@ -0,0 +1,77 @@
+"""
+Render cache: a row's text is dropped on its "change" event and only that
+row's, snapshots never serve text edited after them, and the cache stays
+within its size.
+"""
+
+from quiz_exam import ExamSampler
+from quiz_model import Quiz, Quiz_item
+from quiz_render import RenderCache, display_text, option_labels, preview_lines, render_cache
+from quiz_replay import synthetic_quiz
+
+
+def test_edits_drop_only_the_edited_row():
+    quiz = synthetic_quiz(3)
+    first, second = quiz.questions[0], quiz.questions[1]
+    cache = render_cache(quiz.bank)
+    assert option_labels(first)[0] == ("1. Answer 0.0", 0)
+    option_labels(second)
+    display_text(second, 2)
+    misses = cache.misses
+
+    first.set_choices(0, "Edited 0.0")
+    assert option_labels(first)[0] == ("1. Edited 0.0", 0)
+    assert cache.misses == misses + 1
+    option_labels(second)
+    display_text(second, 2)
+    assert cache.misses == misses + 1             # still cached
+
+    second.set_question("Edited 1?")
+    second.set_correct_answer("Answer 1.3")
+    assert display_text(second, 2).splitlines()[0] == "2: Edited 1?"
+    assert display_text(second, 2).endswith("Correct Answer: Answer 1.3")
+    assert preview_lines(quiz.bank, 1)[0] == "2. Edited 1?"
+
+
+def test_every_bank_has_one_cache():
+    quiz = synthetic_quiz(1)
+    cache = render_cache(quiz.bank)
+    assert render_cache(quiz.bank) is cache
+    assert sum(isinstance(listener, RenderCache) for listener in quiz.bank.listeners) == 1
+
+
+def test_snapshot_items_are_not_served_edited_text():
+    quiz = synthetic_quiz(2)
+    snapshot = quiz.snapshot()
+    item = snapshot.questions[0]
+    assert option_labels(item)[1] == ("2. Answer 0.1", 1)
+    quiz.questions[0].set_choices(1, "Edited")
+    assert option_labels(item)[1] == ("2. Answer 0.1", 1)
+    assert option_labels(quiz.questions[0])[1] == ("2. Edited", 1)
+
+
+def test_cache_evicts_the_least_recently_used_rows():
+    quiz = synthetic_quiz(5)
+    cache = render_cache(quiz.bank)
+    cache.size = 3
+    for row in (0, 1, 2):
+        preview_lines(quiz.bank, row)
+    preview_lines(quiz.bank, 0)                   # now the most recently used
+    preview_lines(quiz.bank, 3)
+    assert len(cache) == 3
+    misses = cache.misses
+    preview_lines(quiz.bank, 0)
+    assert cache.misses == misses
+    preview_lines(quiz.bank, 1)
+    assert cache.misses == misses + 1
+
+
+def test_items_of_their_own_and_exam_items_are_rendered_directly():
+    item = Quiz_item("Q?", ["a", "b"], "b")
+    quiz = Quiz()
+    quiz.add_question(Quiz_item("Q?", ["a", "b", "c"], "c"))
+    exam = ExamSampler(quiz).assemble(seed=1)
+    exam_item = exam.questions[0]
+    assert option_labels(item) == (("1. a", 0), ("2. b", 1))
+    assert [label for label, _ in option_labels(exam_item)] == \
+        [f"{j + 1}. {choice}" for j, choice in enumerate(exam_item.choices)]
@@ -0,0 +1,63 @@
+"""
+Replay logs: sessions recorded by SessionRecorder replay to the same outcome,
+records reach the file before the recorder is closed, and a torn last record
+is left out.
+"""
+
+from quiz_replay import (ANSWER, FINISH, START, TIMEOUT, SessionRecorder, read_events, replay,
+                         synthetic_quiz, synthetic_sessions, write_events)
+from quiz_session import QuizSession
+
+
+def record_run(recorder, quiz, name, positions):
+    session = QuizSession(quiz.snapshot(), name)
+    sid = recorder.start(session, name)
+    for position in positions:
+        recorder.shown(sid, session)
+        recorder.answer(sid, session, position)
+        session.answer_index(position)
+        recorder.tick(sid, session)
+    recorder.finish(sid, session)
+    return session
+
+
+def test_recorded_sessions_replay_to_the_same_outcome(tmp_path):
+    path = str(tmp_path / "sessions.qzr")
+    quiz = synthetic_quiz(5)        # question i's correct choice is i % 4
+    recorder = SessionRecorder(path)
+    first = record_run(recorder, quiz, "Load", [0, 1, 2, 0, 0])
+    second = record_run(recorder, quiz, "Load", [3, 3, 3, 3, 3])
+    recorder.close()
+    assert (first.score, second.score) == (4, 1)
+
+    report = replay(read_events(path), {"Load": quiz})
+    assert report.sessions == 2 and report.mismatches == [] and report.skipped == 0
+
+    # A changed quiz no longer gives the logged scores
+    quiz.questions[0].set_correct_index(1)
+    assert replay(read_events(path), {"Load": quiz}).mismatches
+
+
+def test_events_are_on_disk_before_the_recorder_is_closed(tmp_path):
+    path = str(tmp_path / "sessions.qzr")
+    quiz = synthetic_quiz(3)
+    recorder = SessionRecorder(path)
+    session = QuizSession(quiz.snapshot(), "Load")
+    sid = recorder.start(session, "Load")
+    recorder.answer(sid, session, 0)
+    # As after a crash: nothing closed or finished
+    kinds = [event[0] for event in read_events(path)]
+    assert kinds == [START, ANSWER]
+    recorder.close()
+
+
+def test_torn_last_record_is_left_out(tmp_path):
+    path = str(tmp_path / "load.qzr")
+    quiz = synthetic_quiz(50)
+    count = write_events(path, synthetic_sessions(quiz, "Load", 10, length=5, seed=1))
+    events = list(read_events(path))
+    assert len(events) == count and events[-1][0] in (FINISH, TIMEOUT)
+    with open(path, "r+b") as f:
+        f.truncate(f.seek(0, 2) - 3)
+    assert len(list(read_events(path))) == count - 1
+    assert replay(iter(events), {"Load": quiz}).mismatches == []
@@ -0,0 +1,48 @@
+"""
+Report generation: every taker's report is the result text a QuizSession shows
+for the same answers, unanswered questions (-1) included, whether rendered in
+this process or on a pool.
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from quiz_replay import synthetic_quiz
+from quiz_reports import generate_reports
+from quiz_session import QuizSession
+
+
+def session_result(quiz, row):
+    """
+    The result text of a session answering as a row of an answer matrix does (-1: skipped).
+    """
+    session = QuizSession(quiz.snapshot(), "Load")
+    for position in row:
+        if position < 0:
+            session.skip()
+        else:
+            session.answer_index(position)
+    return session.result_text()
+
+
+@pytest.mark.parametrize("processes", [0, 2])
+def test_reports_match_session_results(tmp_path, processes):
+    quiz = synthetic_quiz(5)
+    chosen = np.array([[0, 1, 2, 3, 0], [1, -1, 2, -1, 0], [-1] * 5, [3, 3, 3, 3, 3]])
+    summary = generate_reports({"Load": quiz}, {"Load": (["ann", "bo", "cy", "di"], chosen)}, str(tmp_path),
+                               processes=processes, shard_size=3)
+    assert summary.reports == 4 and len(summary.files) == 2
+    text = "".join(open(path, encoding="utf-8").read() for path in summary.files)
+    expected = "".join(f"Taker: {taker}\nQuiz: Load\n{session_result(quiz, row)}\n\n"
+                       for taker, row in zip(["ann", "bo", "cy", "di"], chosen.tolist()))
+    assert text == expected
+    assert "Your answer: (no answer)" in text
+
+
+def test_matrix_must_match_the_quiz(tmp_path):
+    quiz = synthetic_quiz(3)
+    with pytest.raises(ValueError):
+        generate_reports({"Load": quiz}, {"Load": (None, np.zeros((1, 2), dtype=int))}, str(tmp_path), processes=0)
+    with pytest.raises(ValueError):
+        generate_reports({"Load": quiz}, {"Load": (None, np.array([[0, 0, -2]]))}, str(tmp_path), processes=0)
@@ -0,0 +1,144 @@
+"""
+Quiz server over real sockets: the session lifecycle (answers, results,
+deadline, retention) and the error paths (400, 404, 405, 409, 413 and 500),
+including when the connection is kept open after an error.
+"""
+
+import asyncio
+import json
+
+from quiz_model import Quiz_item
+from quiz_replay import synthetic_quiz
+from quiz_server import QuizServer
+
+
+async def send(reader, writer, method, path, body=None, raw=None, headers=""):
+    """
+    Send one request and read the answer.
+    Returns: tuple(int, object, bool): status, JSON body, and whether the server keeps the connection
+    """
+    payload = raw if raw is not None else (json.dumps(body).encode("utf-8") if body is not None else b"")
+    if raw is None:
+        headers = headers + f"Content-Length: {len(payload)}\r\n"
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: test\r\n{headers}\r\n".encode("latin-1") + payload)
+    await writer.drain()
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    fields = dict(line.split(": ", 1) for line in head[1:] if ": " in line)
+    data = json.loads(await reader.readexactly(int(fields["Content-Length"])))
+    return int(head[0].split(" ")[1]), data, fields["Connection"] == "keep-alive"
+
+
+def serve(test, **kwargs):
+    """
+    Run test(server, connect) against a server of one 3-question quiz, "Load".
+    """
+    async def main():
+        server = QuizServer({"Load": synthetic_quiz(3)}, **kwargs)
+        listener = await server.start("127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        try:
+            await test(server, lambda: asyncio.open_connection("127.0.0.1", port))
+        finally:
+            listener.close()
+            await listener.wait_closed()
+    asyncio.run(main())
+
+
+def test_session_lifecycle():
+    async def test(server, connect):
+        reader, writer = await connect()
+        assert await send(reader, writer, "GET", "/quizzes") == (200, ["Load"], True)
+        status, state, _ = await send(reader, writer, "POST", "/sessions", {"quiz": "Load"})
+        assert status == 201 and state["question"] == "Question 0?" and state["total"] == 3
+        sid = state["session"]
+        assert (await send(reader, writer, "GET", f"/sessions/{sid}/results"))[0] == 409
+
+        # Editing the quiz does not reach the running session (it took a snapshot)
+        server.quizzes["Load"].questions[1].set_question("Edited?")
+        status, state, _ = await send(reader, writer, "POST", f"/sessions/{sid}/answer", {"choice": 1})
+        assert status == 200 and state["correct"] is True and state["question"] == "Question 1?"
+        assert (await send(reader, writer, "POST", f"/sessions/{sid}/answer", {"choice": 9}))[0] == 400
+        await send(reader, writer, "POST", f"/sessions/{sid}/answer", {"choice": 1})
+        status, state, _ = await send(reader, writer, "POST", f"/sessions/{sid}/answer", {"choice": 3})
+        assert state["finished"] and not state["timed_out"] and "question" not in state
+        assert (await send(reader, writer, "POST", f"/sessions/{sid}/answer", {"choice": 1}))[0] == 409
+
+        status, results, _ = await send(reader, writer, "GET", f"/sessions/{sid}/results")
+        assert status == 200 and results["score"] == 2
+        assert results["missed"] == [[2, "Question 1?", "Answer 1.0", "Answer 1.1"]]
+        assert (await send(reader, writer, "GET", "/sessions/999"))[0] == 404
+        assert (await send(reader, writer, "POST", "/sessions", {"quiz": "Nope"}))[0] == 404
+        assert (await send(reader, writer, "POST", "/sessions", {"quiz": 5}))[0] == 400
+        writer.close()
+    serve(test)
+
+
+def test_session_times_out_and_is_retired():
+    async def test(server, connect):
+        reader, writer = await connect()
+        sid = (await send(reader, writer, "POST", "/sessions", {"quiz": "Load"}))[1]["session"]
+        await asyncio.sleep(0.25)       # 3 questions x 0.05 s
+        status, state, _ = await send(reader, writer, "GET", f"/sessions/{sid}")
+        assert status == 200 and state["finished"] and state["timed_out"]
+        assert (await send(reader, writer, "GET", f"/sessions/{sid}/results"))[1]["timed_out"]
+        await asyncio.sleep(0.3)        # past the retention of its results
+        assert (await send(reader, writer, "GET", f"/sessions/{sid}"))[0] == 404
+        assert not server.sessions
+        writer.close()
+    serve(test, seconds_per_question=0.05, retention=0.2, timer_resolution=0.01)
+
+
+def test_malformed_requests_get_400_and_oversized_bodies_413():
+    async def test(server, connect):
+        reader, writer = await connect()
+        # A bad body that was read: the connection stays usable
+        assert await send(reader, writer, "POST", "/sessions", raw=b"{nope", headers="Content-Length: 5\r\n") \
+            == (400, {"error": "Body must be JSON"}, True)
+        assert (await send(reader, writer, "POST", "/sessions", ["Load"]))[0:3:2] == (400, True)
+        assert (await send(reader, writer, "DELETE", "/quizzes/Load"))[0] == 405
+        assert (await send(reader, writer, "GET", "/nowhere"))[0] == 404
+        writer.close()
+
+        # A body that was not read: answered, then the connection is closed
+        for length, error in (("ten", "Content-Length must be a number"),
+                              ("-1", "Content-Length must not be negative")):
+            reader, writer = await connect()
+            assert await send(reader, writer, "POST", "/sessions", raw=b"",
+                              headers=f"Content-Length: {length}\r\n") == (400, {"error": error}, False)
+            assert await reader.read() == b""
+            writer.close()
+        reader, writer = await connect()
+        status, data, keep = await send(reader, writer, "POST", "/sessions", raw=b"",
+                                        headers=f"Content-Length: {server.max_body + 1}\r\n")
+        assert (status, keep) == (413, False)
+        writer.close()
+    serve(test)
+
+
+def test_handler_error_answers_500_and_keeps_the_connection(capsys):
+    async def test(server, connect):
+        def broken(quiz_name):
+            raise RuntimeError("bug")
+        server.start_session = broken
+        reader, writer = await connect()
+        assert await send(reader, writer, "POST", "/sessions", {"quiz": "Load"}) \
+            == (500, {"error": "Internal server error"}, True)
+        assert (await send(reader, writer, "GET", "/quizzes"))[0] == 200
+        writer.close()
+    serve(test)
+    assert "RuntimeError: bug" in capsys.readouterr().err
+
+
+def test_writable_server_puts_and_deletes_quizzes():
+    async def test(server, connect):
+        reader, writer = await connect()
+        rows = [["Capital of France?", ["Paris", "Rome"], 0, ["geo"]]]
+        assert (await send(reader, writer, "PUT", "/quizzes/Geo", {"rows": rows}))[0:2] \
+            == (201, {"name": "Geo", "questions": 1})
+        assert (await send(reader, writer, "GET", "/quizzes/Geo/rows?first=0&count=5"))[1] \
+            == {"total": 1, "rows": rows}
+        assert (await send(reader, writer, "PUT", "/quizzes/Bad", {"rows": [["Q?", ["a", "a"], 0, []]]}))[0] == 400
+        assert (await send(reader, writer, "DELETE", "/quizzes/Geo"))[0] == 200
+        assert (await send(reader, writer, "GET", "/quizzes"))[1] == ["Load"]
+        writer.close()
+    serve(test, writable=True)
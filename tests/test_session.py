@@ -0,0 +1,105 @@
+"""
+QuizSession: answers, per-question time limits and the quiz deadline, on a
+clock the tests move by hand.
+"""
+
+import pytest
+
+from quiz_model import Quiz, Quiz_item
+from quiz_render import format_missed
+from quiz_session import QuizSession
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 100.0
+
+    def __call__(self):
+        return self.t
+
+
+def make_quiz(n):
+    quiz = Quiz()
+    for k in range(n):
+        quiz.add_question(Quiz_item(f"Question {k}?", [f"right {k}", f"wrong {k}"], f"right {k}"))
+    return quiz
+
+
+def test_answers_are_graded_and_wrong_ones_missed():
+    session = QuizSession(make_quiz(2), "Q", clock=FakeClock())
+    assert session.answer("right 0") is True
+    assert session.answer_index(1) is False
+    assert session.finished and session.score == 1
+    assert session.missed == [(2, "Question 1?", "wrong 1", "right 1")]
+    assert [r[:2] for r in session.responses] == [(0, 0), (1, 1)]
+
+
+def test_empty_quiz_is_refused():
+    with pytest.raises(ValueError):
+        QuizSession(Quiz(), "Q")
+
+
+def test_skip_records_a_missed_question_with_no_answer():
+    clock = FakeClock()
+    session = QuizSession(make_quiz(3), "Q", clock=clock)
+    clock.t += 4
+    session.skip()
+    assert session.index == 1
+    assert session.missed == [(1, "Question 0?", None, "right 0")]
+    assert session.responses == [(0, -1, 4.0)]
+    assert "Your answer: (no answer)" in format_missed(session.missed)
+
+
+def test_question_timeout_is_recorded():
+    clock = FakeClock()
+    session = QuizSession(make_quiz(3), "Q", question_seconds=10, clock=clock)
+    clock.t += 10.5
+    assert session.tick() is False
+    assert session.index == 1 and not session.finished
+    assert session.missed == [(1, "Question 0?", None, "right 0")]
+    assert session.responses == [(0, -1, 10.0)]
+
+
+def test_tick_skips_every_question_whose_time_ran_out():
+    clock = FakeClock()
+    session = QuizSession(make_quiz(5), "Q", question_seconds=10, clock=clock)
+    clock.t += 25
+    session.tick()
+    # Two questions ran out (at 10 s and 20 s); the third started at 20 s
+    assert session.index == 2
+    assert [r[0] for r in session.responses] == [0, 1]
+    assert all(r[1] == -1 and r[2] == 10.0 for r in session.responses)
+    assert session.question_remaining() == 5
+
+
+def test_tick_past_every_question_finishes_without_timing_out():
+    clock = FakeClock()
+    session = QuizSession(make_quiz(3), "Q", question_seconds=10, clock=clock)
+    clock.t += 35
+    session.tick()
+    assert session.finished and not session.timed_out
+    assert session.score == 0 and len(session.missed) == 3
+
+
+def test_quiz_deadline_times_out():
+    clock = FakeClock()
+    session = QuizSession(make_quiz(2), "Q", seconds_per_question=30, clock=clock)
+    session.answer("right 0")
+    clock.t += 60
+    assert session.tick() is True
+    assert session.finished and session.timed_out
+    assert session.remaining_time == 0
+    assert session.score == 1
+
+
+def test_paused_session_does_not_run_out():
+    clock = FakeClock()
+    session = QuizSession(make_quiz(2), "Q", question_seconds=10, clock=clock)
+    session.pause()
+    clock.t += 1000
+    assert session.tick() is False
+    assert session.index == 0
+    session.resume()
+    clock.t += 5
+    session.tick()
+    assert session.index == 0 and session.question_remaining() == 5
@@ -0,0 +1,90 @@
+"""
+SQLite backend: lazy iteration with many open iterators, pool timeout and
+snapshot isolation of a quiz that was not loaded, and items that are already
+in a quiz being refused.
+"""
+
+import pytest
+
+from quiz_model import Quiz_item
+from quiz_session import QuizSession
+from quiz_sqlite import SQLiteRepository
+
+
+@pytest.fixture
+def repo(tmp_path):
+    path = str(tmp_path / "quizzes.db")
+    writer = SQLiteRepository(path)
+    writer.create_quiz("Maths")
+    writer.add_items("Maths", [(f"Question {k}?", [f"right {k}", f"wrong {k}"], 0, ["odd"] if k % 2 else [])
+                               for k in range(10)])
+    writer.close()
+    # A new repository, so the quiz starts unloaded
+    repo = SQLiteRepository(path, pool_size=2, page_size=3, pool_timeout=0.5)
+    yield repo
+    repo.close()
+
+
+def test_more_open_iterators_than_connections(repo):
+    quiz = repo.quiz("Maths")
+    iterators = [iter(quiz.questions) for _ in range(5)]
+    heads = [[next(it).get_question() for _ in range(4)] for it in iterators]
+    assert heads == [[f"Question {k}?" for k in range(4)]] * 5
+    rest = [q.get_question() for q in iterators[0]]
+    assert rest == [f"Question {k}?" for k in range(4, 10)]
+    assert [q.get_tags() for q in quiz.questions][:3] == [[], ["odd"], []]
+    assert not quiz.loaded
+
+
+def test_pool_times_out_when_every_reader_is_borrowed(repo):
+    with repo.pool.reader(), repo.pool.reader():
+        with pytest.raises(TimeoutError):
+            with repo.pool.reader():
+                pass
+    with repo.pool.reader() as con:
+        assert con.execute("SELECT count(*) FROM item").fetchone() == (10,)
+
+
+def test_session_of_unloaded_quiz_is_isolated_from_edits(repo):
+    quiz = repo.quiz("Maths")
+    session = QuizSession(quiz.snapshot(), "Maths")
+    quiz.questions[0].set_question("Edited?")
+    assert session.current_question().get_question() == "Question 0?"
+    assert quiz.questions[0].get_question() == "Edited?"
+
+
+def test_page_item_edits_reach_the_loaded_bank(repo):
+    quiz = repo.quiz("Maths")
+    item = quiz.questions[4]
+    item.set_question("Edited?")
+    assert quiz.bank.question(4) == "Edited?"
+    # Edits made after the load go to the loaded bank too
+    item.set_correct_index(1)
+    assert quiz.bank.correct_answer(4) == "wrong 4"
+    assert item.get_question() == "Edited?" and quiz.snapshot().correct_answer(4) == "wrong 4"
+
+
+def test_items_of_a_dropped_page_see_edits_made_after_it_is_read_again(repo):
+    quiz = repo.quiz("Maths")
+    repo.cached_pages = 1
+    first = quiz.questions[0]
+    other = quiz.questions[9]          # drops the first page from the cache
+    again = quiz.questions[0]          # reads it again
+    again.set_question("Edited?")
+    assert first.get_question() == "Edited?"
+    first.set_choices(1, "changed")
+    assert again.choices == ["right 0", "changed"]
+    assert other.get_question() == "Question 9?" and not quiz.loaded
+
+
+def test_items_already_in_a_quiz_are_refused(repo):
+    quiz = repo.quiz("Maths")
+    with pytest.raises(ValueError, match="already in a quiz"):
+        quiz.add_question(quiz.questions[2])
+    item = Quiz_item("New?", ["yes", "no"], "no")
+    quiz.add_question(item)
+    with pytest.raises(ValueError, match="already in a quiz"):
+        quiz.add_question(item)
+    item.set_question("Edited?")
+    assert not quiz.loaded and len(quiz.questions) == 11
+    assert quiz.questions[10].get_question() == "Edited?"
@@ -0,0 +1,98 @@
+"""
+Quiz store: appended quizzes and questions survive a reopen with or without a
+checkpoint, a torn record at the end is cut off, and appends are fsync'd in
+batches.
+"""
+
+import os
+
+import pytest
+
+import quiz_store
+from quiz_model import Quiz
+from quiz_store import QuizStore
+
+
+def crash(store):
+    """
+    Stop a store the way a crash would: no INDEX written on close.
+    """
+    store._map.close()
+    store._file.close()
+
+
+def fill(store, name, n, first=0):
+    for k in range(first, first + n):
+        store.append_item(name, f"Question {k}?", [f"right {k}", f"wrong {k}"], k % 2)
+
+
+def test_questions_survive_a_reopen_with_and_without_an_index(tmp_path):
+    path = str(tmp_path / "quizzes.qzs")
+    store = QuizStore(path)
+    store.append_quiz("Maths")
+    store.append_quiz("Ünïcode")
+    fill(store, "Maths", 3)
+    store.close()                   # INDEX written
+
+    store = QuizStore(path)
+    assert store.names() == ["Maths", "Ünïcode"] and store.item_count("Maths") == 3
+    fill(store, "Maths", 2, first=3)
+    fill(store, "Ünïcode", 1)
+    crash(store)                    # appended after the INDEX, found by scanning
+
+    store = QuizStore(path)
+    assert store.item_count("Maths") == 5 and store.item_count("Ünïcode") == 1
+    assert list(store.iter_items("Maths"))[3:] == [("Question 3?", ["right 3", "wrong 3"], 1),
+                                                   ("Question 4?", ["right 4", "wrong 4"], 0)]
+    quiz = Quiz(loader=store.loader("Maths"))
+    fill(store, "Maths", 1, first=5)        # after the loader was made: not loaded twice
+    assert len(quiz.questions) == 5 and quiz.bank.correct_answer(1) == "wrong 1"
+    assert store.item_count("Maths") == 6
+    store.close()
+
+
+def test_torn_record_at_the_end_is_cut_off(tmp_path):
+    path = str(tmp_path / "quizzes.qzs")
+    store = QuizStore(path)
+    store.append_quiz("Maths")
+    fill(store, "Maths", 2)
+    crash(store)
+    size = os.path.getsize(path)
+    with open(path, "ab") as f:
+        f.write(b"\x02\xff\x00\x00\x00partial")     # an ITEM record cut short
+
+    store = QuizStore(path)
+    assert os.path.getsize(path) == size and store.item_count("Maths") == 2
+    fill(store, "Maths", 1, first=2)
+    store.close()
+    store = QuizStore(path)
+    assert [q for q, _, _ in store.iter_items("Maths")] == ["Question 0?", "Question 1?", "Question 2?"]
+    store.close()
+
+
+def test_appends_are_fsynced_in_batches(tmp_path, monkeypatch):
+    synced = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(quiz_store.os, "fsync", lambda fd: (synced.append(fd), real_fsync(fd)))
+    store = QuizStore(str(tmp_path / "quizzes.qzs"), batch_size=4)
+    synced.clear()
+    store.append_quiz("Maths")
+    fill(store, "Maths", 10)        # 11 records
+    assert len(synced) == 2
+    store.sync()
+    assert len(synced) == 3
+    store.close()
+
+
+def test_duplicate_quiz_and_foreign_file_are_rejected(tmp_path):
+    store = QuizStore(str(tmp_path / "quizzes.qzs"))
+    store.append_quiz("Maths")
+    with pytest.raises(ValueError):
+        store.append_quiz("Maths")
+    with pytest.raises(KeyError):
+        store.append_item("Physics", "Q?", ["a", "b"], 0)
+    store.close()
+    other = tmp_path / "other.bin"
+    other.write_bytes(b"NOPE" + bytes(20))
+    with pytest.raises(ValueError):
+        QuizStore(str(other))
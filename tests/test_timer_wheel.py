@@ -0,0 +1,76 @@
+"""
+TimerWheel: timers fire at their deadline whichever wheel they start in,
+including after cascading down from coarser wheels and the overflow list.
+Small wheels (4 slots, 2 levels) make every path run with few timers.
+"""
+
+import math
+import random
+
+from timer_wheel import TimerWheel
+
+
+def small_wheel():
+    return TimerWheel(resolution=1.0, slot_bits=2, levels=2)
+
+
+def test_timers_fire_at_their_deadline_across_cascades():
+    wheel = small_wheel()
+    rng = random.Random(3)
+    deadlines = [rng.uniform(0.5, 100.0) for _ in range(300)]
+    fired = {}
+    for k, deadline in enumerate(deadlines):
+        wheel.schedule(deadline, lambda k: fired.setdefault(k, now), k)
+    assert len(wheel) == len(deadlines)
+
+    for now in range(1, 102):
+        wheel.advance(now)
+        assert all(deadlines[k] <= fired[k] for k in fired)
+    assert len(fired) == len(deadlines) and len(wheel) == 0
+    # Deadlines are kept to whole ticks: each timer fires in the tick its deadline rounds up to
+    assert all(fired[k] == math.ceil(deadlines[k]) for k in fired)
+
+
+def test_far_deadline_goes_through_the_overflow_list():
+    wheel = small_wheel()
+    fired = []
+    wheel.schedule(40.0, fired.append, "far")      # past both wheels (16 ticks)
+    assert wheel.advance(39.0) == 0 and fired == []
+    assert wheel.advance(40.0) == 1 and fired == ["far"]
+
+
+def test_cancelled_timers_do_not_fire():
+    wheel = small_wheel()
+    fired = []
+    keep = wheel.schedule(3.0, fired.append, "keep")
+    drop = wheel.schedule(20.0, fired.append, "drop")
+    wheel.cancel(drop)
+    wheel.cancel(drop)
+    assert len(wheel) == 1
+    wheel.advance(50.0)
+    assert fired == ["keep"] and len(wheel) == 0
+    assert keep.cancelled
+
+
+def test_next_wakeup_is_never_after_the_next_deadline():
+    wheel = small_wheel()
+    rng = random.Random(8)
+    pending = sorted(rng.uniform(1.0, 60.0) for _ in range(20))
+    for deadline in pending:
+        wheel.schedule(deadline, lambda: None)
+    now = 0.0
+    while pending:
+        wakeup = wheel.next_wakeup()
+        assert wakeup is not None and wakeup <= math.ceil(pending[0])
+        now = wakeup
+        wheel.advance(now)
+        pending = [d for d in pending if math.ceil(d) > now]
+    assert wheel.next_wakeup() is None
+
+
+def test_deadline_in_the_past_fires_on_the_next_tick():
+    wheel = TimerWheel(resolution=1.0, start=10.0)
+    fired = []
+    wheel.schedule(2.0, fired.append, "late")
+    wheel.advance(11.0)
+    assert fired == ["late"]
@@ -0,0 +1,80 @@
+"""
+Copy-on-write snapshots: a snapshot keeps reading the quiz as it was, saved
+row copies are shared by snapshots and dropped once no snapshot can read them.
+"""
+
+import gc
+
+from quiz_exam import ExamSampler
+from quiz_model import Quiz, Quiz_item
+
+
+def make_quiz(n):
+    quiz = Quiz()
+    for k in range(n):
+        quiz.add_question(Quiz_item(f"Question {k}?", [f"right {k}", f"wrong {k}"], f"right {k}"))
+    return quiz
+
+
+def test_snapshot_reads_the_quiz_as_it_was():
+    quiz = make_quiz(3)
+    snapshot = quiz.snapshot()
+    quiz.questions[0].set_question("Edited?")
+    quiz.questions[1].set_choices(1, "changed 1")
+    quiz.questions[1].set_correct_answer("changed 1")
+    quiz.add_question(Quiz_item("New?", ["a", "b"], "a"))
+
+    questions = snapshot.questions
+    assert len(questions) == 3
+    assert questions[0].get_question() == "Question 0?"
+    assert questions[1].choices == ["right 1", "wrong 1"]
+    assert questions[1].get_correct_answer() == "right 1"
+    assert questions[1].choice_index("wrong 1") == 1
+    assert quiz.questions[0].get_question() == "Edited?"
+    assert quiz.questions[1].get_correct_answer() == "changed 1"
+
+
+def test_row_is_copied_once_for_every_snapshot_that_sees_it():
+    quiz = make_quiz(3)
+    first = quiz.snapshot()
+    second = quiz.snapshot()
+    versions = quiz._versions
+    quiz.questions[0].set_question("Edit 1")
+    quiz.questions[0].set_question("Edit 2")
+    assert len(versions) == 1             # one copy, made before the first edit
+    third = quiz.snapshot()
+    quiz.questions[0].set_question("Edit 3")
+    assert len(versions) == 2
+    assert first.questions[0].get_question() == "Question 0?"
+    assert second.questions[0].get_question() == "Question 0?"
+    assert third.questions[0].get_question() == "Edit 2"
+
+
+def test_copies_are_dropped_when_their_snapshots_are_released():
+    quiz = make_quiz(2)
+    old = quiz.snapshot()
+    quiz.questions[0].set_question("Edit 1")
+    newer = quiz.snapshot()
+    quiz.questions[0].set_question("Edit 2")
+    versions = quiz._versions
+    assert len(versions) == 2
+
+    old.release()
+    assert len(versions) == 1                  # only the copy `newer` reads is left
+    assert newer.questions[0].get_question() == "Edit 1"
+    del newer
+    gc.collect()                               # released when garbage collected, too
+    assert len(versions) == 0
+    quiz.questions[0].set_question("Edit 3")
+    assert len(versions) == 0                  # no snapshot left: edits copy nothing
+
+
+def test_exam_is_pinned_to_its_snapshot():
+    quiz = make_quiz(4)
+    exam = ExamSampler(quiz).assemble(seed=1)
+    item = exam.questions[0]
+    shown = (item.get_question(), item.choices, item.correct_index)
+    quiz.questions[item.row].set_question("Edited?")
+    quiz.questions[item.row].set_choices(0, "changed")
+    assert (item.get_question(), item.choices, item.correct_index) == shown
+    assert item.choices[item.correct_index] == item.get_correct_answer()
@@ -0,0 +1,133 @@
+"""
+Write-ahead log and Journal recovery: torn and corrupt records, replay of
+logged edits and sessions after a crash, and compaction by snapshot().
+"""
+
+import pytest
+
+from quiz_exam import ExamSampler
+from quiz_model import Quiz_item
+from quiz_session import QuizSession
+from quiz_wal import Journal, WriteAheadLog, read_log
+
+
+def crash(journal):
+    """
+    Stop a journal the way a crash would once its events are on disk: no snapshot.
+    """
+    journal.log.close()
+
+
+def add_questions(quiz, n):
+    for k in range(n):
+        quiz.add_question(Quiz_item(f"Question {k}?", [f"right {k}", f"wrong {k}"], f"right {k}"))
+
+
+def test_log_keeps_complete_records_and_cuts_a_torn_one(tmp_path):
+    path = str(tmp_path / "events.wal")
+    log = WriteAheadLog(path)
+    for k in range(3):
+        log.append(["event", k])
+    log.close()
+    with open(path, "ab") as f:
+        f.write(b"\x40\x00\x00\x00torn")     # a header promising more bytes than were written
+
+    events, end = read_log(path)
+    assert [event for _, event in events] == [["event", 0], ["event", 1], ["event", 2]]
+    assert [lsn for lsn, _ in events] == [1, 2, 3]
+
+    log = WriteAheadLog(path)
+    assert len(log.recovered) == 3
+    assert log.append(["event", 3], wait=True) == 4
+    log.close()
+    assert [lsn for lsn, _ in read_log(path)[0]] == [1, 2, 3, 4]
+
+
+def test_log_stops_at_a_corrupt_record(tmp_path):
+    path = str(tmp_path / "events.wal")
+    log = WriteAheadLog(path)
+    log.append(["first"])
+    log.append(["second"])
+    log.close()
+    with open(path, "r+b") as f:
+        data = f.read()
+        f.seek(len(data) - 2)
+        f.write(b"X")                       # flip a byte of the last payload
+    events, _ = read_log(path)
+    assert [event for _, event in events] == [["first"]]
+
+
+def test_journal_recovers_quizzes_and_sessions_after_a_crash(tmp_path):
+    store = str(tmp_path / "quizzes.qzs")
+    journal = Journal(store)
+    quiz = journal.create_quiz("Maths")
+    add_questions(quiz, 3)
+    quiz.questions[1].set_question("Edited?")
+    quiz.questions[2].set_tags(["hard"])
+    session = QuizSession(quiz.snapshot(), "Maths")
+    sid = journal.start_session(session, "Maths")
+    journal.answer(sid, 0)
+    journal.answer(sid, 1)
+    journal.log.sync()
+    crash(journal)
+
+    recovered = Journal(store)
+    assert recovered.recovered_events > 0
+    questions = recovered.quizzes["Maths"].questions
+    assert [q.get_question() for q in questions] == ["Question 0?", "Edited?", "Question 2?"]
+    assert questions[2].get_tags() == ["hard"]
+    restored = recovered.sessions[sid]
+    assert (restored.index, restored.score) == (2, 1)
+    assert restored.missed == [(2, "Edited?", "wrong 1", "right 1")]
+    recovered.close()
+
+
+def test_snapshot_compacts_the_log_and_recovery_starts_from_it(tmp_path):
+    store = str(tmp_path / "quizzes.qzs")
+    journal = Journal(store)
+    quiz = journal.create_quiz("Maths")
+    add_questions(quiz, 4)
+    journal.snapshot()
+    assert read_log(journal.log_path)[0] == []
+    quiz.questions[0].set_choices(1, "changed 0")
+    journal.log.sync()
+    crash(journal)
+
+    recovered = Journal(store)
+    questions = recovered.quizzes["Maths"].questions
+    assert len(questions) == 4
+    assert questions[0].choices == ["right 0", "changed 0"]
+    recovered.close()
+
+    reopened = Journal(store)
+    assert reopened.recovered_events == 0
+    assert reopened.quizzes["Maths"].questions[0].choices == ["right 0", "changed 0"]
+    reopened.close()
+
+
+def test_exam_session_is_rebuilt_from_its_seed(tmp_path):
+    store = str(tmp_path / "quizzes.qzs")
+    journal = Journal(store)
+    quiz = journal.create_quiz("Maths")
+    add_questions(quiz, 6)
+    exam = ExamSampler(quiz).assemble(4, seed=7)
+    session = QuizSession(exam, "Maths")
+    sid = journal.start_session(session, "Maths", exam)
+    journal.answer(sid, session.current_question().correct_index)
+    journal.log.sync()
+    crash(journal)
+
+    recovered = Journal(store)
+    restored = recovered.sessions[sid]
+    assert [q.row for q in restored.questions] == [q.row for q in exam.questions]
+    assert [q.choices for q in restored.questions] == [q.choices for q in exam.questions]
+    assert (restored.index, restored.score) == (1, 1)
+    recovered.close()
+
+
+def test_creating_an_existing_quiz_is_refused(tmp_path):
+    journal = Journal(str(tmp_path / "quizzes.qzs"))
+    journal.create_quiz("Maths")
+    with pytest.raises(ValueError):
+        journal.create_quiz("Maths")
+    journal.close()
@@ -0,0 +1,145 @@
+"""
+Hierarchical timer wheel for session deadlines.
+
+Deadlines are rounded up to ticks of `resolution` seconds and dropped into a
+slot of the first wheel that can hold them: wheel 0 has one slot per tick,
+wheel 1 one slot per full turn of wheel 0, and so on. Scheduling and
+cancelling are O(1). advance() walks the ticks that passed, moving timers down
+from the coarser wheels when their turn comes and firing those that are due,
+so work is only done for real deadlines - not once per second per session.
+"""
+
+import math
+
+
+class Timer:
+    __slots__ = ("deadline", "callback", "args", "tick", "cancelled")
+
+    def __init__(self, deadline, tick, callback, args):
+        self.deadline = deadline
+        self.tick = tick
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+
+class TimerWheel:
+    def __init__(self, resolution=0.1, start=0.0, slot_bits=8, levels=4):
+        """
+        Inputs: resolution(float): Length of one tick, in seconds
+                start(float): The current time, on the same clock the deadlines use
+                slot_bits(int): Each wheel has 2**slot_bits slots
+                levels(int): Number of wheels; later deadlines wait in an overflow list
+        Outputs: None
+        """
+        self.resolution = resolution
+        self._bits = slot_bits
+        self._mask = (1 << slot_bits) - 1
+        self._wheels = [[[] for _ in range(1 << slot_bits)] for _ in range(levels)]
+        self._overflow = []
+        self._tick = int(start / resolution)   # last tick that was processed
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def _place(self, timer):
+        delta = timer.tick - self._tick
+        bits = self._bits
+        for level, wheel in enumerate(self._wheels):
+            if delta < (1 << (bits * (level + 1))):
+                wheel[(timer.tick >> (bits * level)) & self._mask].append(timer)
+                return
+        self._overflow.append(timer)
+
+    def schedule(self, deadline, callback, *args):
+        """
+        Call callback(*args) once `deadline` has passed.
+        Inputs: deadline(float): Time on the clock given to advance()
+                callback(function): Function to call
+        Returns: Timer: Handle that can be passed to cancel()
+        """
+        tick = max(math.ceil(deadline / self.resolution), self._tick + 1)
+        timer = Timer(deadline, tick, callback, args)
+        self._place(timer)
+        self._count = self._count + 1
+        return timer
+
+    def cancel(self, timer):
+        """
+        Stop a timer from firing. The timer is dropped lazily when its slot is reached.
+        """
+        if not timer.cancelled:
+            timer.cancelled = True
+            self._count = self._count - 1
+
+    def _cascade(self, level):
+        """
+        Move the timers of the current slot of a coarser wheel down to finer wheels.
+        """
+        if level >= len(self._wheels):
+            timers = self._overflow
+            self._overflow = []
+        else:
+            wheel = self._wheels[level]
+            slot = (self._tick >> (self._bits * level)) & self._mask
+            timers = wheel[slot]
+            wheel[slot] = []
+        for timer in timers:
+            if not timer.cancelled:
+                self._place(timer)
+
+    def advance(self, now):
+        """
+        Process every tick up to `now` and fire the timers that are due.
+        Inputs: now(float): The current time
+        Returns: int: Number of callbacks fired
+        """
+        target = int(now / self.resolution)
+        fired = 0
+        while self._tick < target:
+            if self._count == 0:
+                # Nothing is scheduled: jump straight to the target tick
+                self._tick = target
+                break
+            self._tick = self._tick + 1
+            tick = self._tick
+            # When a wheel completes a turn, pull the next slot of the wheel above it
+            # down. Coarser wheels go first so their timers can continue downwards.
+            level = 0
+            while level < len(self._wheels) and (tick & ((1 << (self._bits * (level + 1))) - 1)) == 0:
+                level = level + 1
+            while level > 0:
+                self._cascade(level)
+                level = level - 1
+            wheel = self._wheels[0]
+            slot = tick & self._mask
+            timers = wheel[slot]
+            if not timers:
+                continue
+            wheel[slot] = []
+            for timer in timers:
+                if timer.cancelled:
+                    continue
+                timer.cancelled = True
+                self._count = self._count - 1
+                timer.callback(*timer.args)
+                fired = fired + 1
+        return fired
+
+    def next_wakeup(self):
+        """
+        The earliest time advance() has work to do: the next non-empty slot of
+        the finest wheel, or the next time a coarser wheel moves timers down.
+        Returns: float, or None if no timer is scheduled
+        """
+        if self._count == 0:
+            return None
+        # The finest wheel only holds timers less than one turn away, so the
+        # first non-empty slot after the current one is the earliest deadline
+        wheel = self._wheels[0]
+        for step in range(1, self._mask + 1):
+            if wheel[(self._tick + step) & self._mask]:
+                return (self._tick + step) * self.resolution
+        # Otherwise wake up when the finest wheel wraps and pulls timers down
+        return ((self._tick | self._mask) + 1) * self.resolution